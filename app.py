@@ -48,6 +48,10 @@ except Exception as e:
     print(f"Data integrity check failed: {e}")
     # Continue running even if integrity check fails
 
+# Export operational metrics when METRICS_PORT or METRICS_TEXTFILE is set
+from utils.metrics import start_metrics_exporter
+start_metrics_exporter()
+
 # Configure page
 st.set_page_config(
     page_title="Hotel Management System",
@@ -0,0 +1,3 @@
+"""
+Benchmarks - synthetic data generation and timing of the data layer
+"""
@@ -0,0 +1,84 @@
+"""
+Codec benchmark - compare save/load throughput of the JSON codecs on realistic sales files
+
+Usage: python benchmarks/codec_benchmark.py [--records 20000] [--repeat 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.data_manager import available_codecs
+from benchmarks.generator import generate_sales
+
+def time_it(func, repeat):
+    """Best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark_codec(codec, data, pretty, repeat, directory):
+    """Time save (encode + write) and load (read + decode) for one codec"""
+    path = os.path.join(directory, f"sales_{codec.name}_{'pretty' if pretty else 'compact'}.json")
+
+    def save():
+        with open(path, 'wb') as f:
+            f.write(codec.dumps(data, pretty))
+
+    def load():
+        with open(path, 'rb') as f:
+            return codec.loads(f.read())
+
+    save_seconds = time_it(save, repeat)
+    load_seconds = time_it(load, repeat)
+    if load() != data:
+        raise AssertionError(f"{codec.name} round trip changed the data")
+
+    size = os.path.getsize(path)
+    return {
+        'codec': codec.name,
+        'format': 'pretty' if pretty else 'compact',
+        'records': len(data),
+        'file_bytes': size,
+        'save_seconds': save_seconds,
+        'load_seconds': load_seconds,
+        'save_mb_per_s': size / save_seconds / 1e6,
+        'load_mb_per_s': size / load_seconds / 1e6,
+        'save_records_per_s': len(data) / save_seconds,
+        'load_records_per_s': len(data) / load_seconds
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data file codecs")
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    data = generate_sales(args.records)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in available_codecs().values():
+            for pretty in (False, True):
+                results.append(benchmark_codec(codec, data, pretty, args.repeat, directory))
+
+    print(f"{'codec':<10}{'format':<10}{'size KB':>10}{'save MB/s':>12}{'load MB/s':>12}{'save rec/s':>14}{'load rec/s':>14}")
+    for r in results:
+        print(f"{r['codec']:<10}{r['format']:<10}{r['file_bytes'] / 1024:>10.0f}{r['save_mb_per_s']:>12.1f}"
+              f"{r['load_mb_per_s']:>12.1f}{r['save_records_per_s']:>14.0f}{r['load_records_per_s']:>14.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'timestamp': datetime.now().isoformat(), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
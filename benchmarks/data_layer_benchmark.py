@@ -0,0 +1,227 @@
+"""
+Data layer benchmark - time load/save/add_record, the calculate_* totals and page computations
+on the JSON backend and PostgreSQL with generated data
+
+Usage: python benchmarks/data_layer_benchmark.py [--backend json|postgres|both] [--hotels 2] [--years 1]
+       [--seed 42] [--repeat 5] [--output results.json] [--compare previous.json]
+
+The PostgreSQL backend needs DATABASE_URL. It writes to hotels named bench_hotelN
+and removes their rows afterwards, so real hotel data is never touched.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.generator import generate_dataset, HotelDataGenerator
+from benchmarks.workloads import DASHBOARD_FILES, FINANCIAL_SUMMARY_FILES, dashboard_summary, financial_summary
+
+BACKEND_MODULES = {
+    'json': 'utils.data_manager',
+    'postgres': 'utils.database_data_manager'
+}
+ADD_RECORD_COUNT = 50
+# Slowdown ratio versus a previous run that counts as a regression
+REGRESSION_THRESHOLD = 1.25
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times, returning per-run wall times in seconds"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def summarize(backend, operation, timings, records=None, table=None):
+    return {
+        'backend': backend,
+        'operation': operation,
+        'table': table,
+        'records': records,
+        'runs': len(timings),
+        'min_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'mean_seconds': statistics.mean(timings),
+        'max_seconds': max(timings)
+    }
+
+def benchmark_backend(backend, dataset, repeat, today):
+    """Time every data layer operation for one backend"""
+    manager = importlib.import_module(BACKEND_MODULES[backend])
+    results = []
+
+    def invalidate_cache():
+        # Measure cold loads: the JSON backend would otherwise serve every repeat from its parse cache
+        if backend == 'json':
+            from utils.parse_cache import parse_cache
+            parse_cache.invalidate()
+
+    for hotel, files in dataset.items():
+        for filename, records in files.items():
+            timings = measure(lambda: manager.save_data(filename, records, hotel), repeat)
+            results.append(summarize(backend, 'save_data', timings, len(records), filename))
+
+            timings = measure(lambda: manager.load_data(filename, hotel), repeat, setup=invalidate_cache)
+            results.append(summarize(backend, 'load_data', timings, len(records), filename))
+            if backend == 'json':
+                timings = measure(lambda: manager.load_data(filename, hotel), repeat)
+                results.append(summarize(backend, 'load_data_cached', timings, len(records), filename))
+
+        # Single-record appends, as done by the entry forms
+        generator = HotelDataGenerator(hotel, seed=repeat)
+        day = next(generator.days())
+        new_sales = [generator.sale(day) for _ in range(ADD_RECORD_COUNT)]
+        timings = []
+        for sale in new_sales:
+            start = time.perf_counter()
+            manager.add_record('sales.json', sale, hotel)
+            timings.append(time.perf_counter() - start)
+        results.append(summarize(backend, 'add_record', timings, len(files['sales.json']), 'sales.json'))
+
+        for name in ('calculate_total_sales', 'calculate_total_expenditures', 'calculate_pending_dues'):
+            calculate = getattr(manager, name)
+            timings = measure(lambda: calculate(hotel), repeat, setup=invalidate_cache)
+            results.append(summarize(backend, name, timings))
+
+        for page, filenames, compute in (('dashboard', DASHBOARD_FILES, dashboard_summary),
+                                         ('financial_summary', FINANCIAL_SUMMARY_FILES, financial_summary)):
+            def render():
+                page_data = {filename: manager.load_data(filename, hotel) for filename in filenames}
+                return compute(page_data, "This Month", today)
+
+            timings = measure(render, repeat, setup=invalidate_cache)
+            results.append(summarize(backend, f"{page}_page", timings))
+
+            page_data = {filename: manager.load_data(filename, hotel) for filename in filenames}
+            for period in ("This Month", "All Time"):
+                timings = measure(lambda: compute(page_data, period, today), repeat)
+                results.append(summarize(backend, f"{page}_compute", timings, table=period))
+
+    return results
+
+def cleanup_postgres(dataset):
+    """Remove benchmark hotels' rows (and their history versions) from the database"""
+    from sqlalchemy import text
+    from utils.database_data_manager import save_data, get_db_manager
+    from utils.history_tables import HISTORY_TABLES
+
+    for hotel, files in dataset.items():
+        for filename in files:
+            save_data(filename, [], hotel)
+
+    db = get_db_manager()
+    if db:
+        try:
+            with db.engine.connect() as conn:
+                for table_name in HISTORY_TABLES:
+                    conn.execute(text(f"DELETE FROM {table_name}_history WHERE hotel LIKE 'bench_%'"))
+                conn.commit()
+        except Exception as e:
+            print(f"Could not clear benchmark history rows: {e}")
+
+def compare_results(results, previous_path, threshold=REGRESSION_THRESHOLD):
+    """Print operations that got slower than a previous results file, returning the regressions"""
+    with open(previous_path, 'r') as f:
+        previous = json.load(f)
+
+    def key(result):
+        return (result['backend'], result['operation'], result['table'])
+
+    baseline = {key(result): result for result in previous['results']}
+    regressions = []
+    for result in results:
+        before = baseline.get(key(result))
+        if not before or not before['median_seconds']:
+            continue
+        ratio = result['median_seconds'] / before['median_seconds']
+        if ratio > threshold:
+            regressions.append(dict(result, previous_median_seconds=before['median_seconds'], ratio=ratio))
+
+    if regressions:
+        print(f"\n{len(regressions)} regressions versus {previous_path}:")
+        for r in regressions:
+            print(f"  {r['backend']:<9}{r['operation']:<30}{str(r['table'] or ''):<28}"
+                  f"{r['previous_median_seconds'] * 1000:>9.2f} -> {r['median_seconds'] * 1000:.2f} ms ({r['ratio']:.2f}x)")
+    else:
+        print(f"\nNo regressions versus {previous_path}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the data layer with generated data")
+    parser.add_argument('--backend', choices=['json', 'postgres', 'both'], default='json')
+    parser.add_argument('--hotels', type=int, default=2)
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--volume', type=float, default=1.0, help="Scale daily record counts")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    parser.add_argument('--compare', help="Previous results JSON to check for regressions")
+    args = parser.parse_args()
+
+    backends = ['json', 'postgres'] if args.backend == 'both' else [args.backend]
+    output = os.path.abspath(args.output) if args.output else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+
+    started = time.perf_counter()
+    results = []
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # Both data managers use paths relative to the working directory (data/, journals)
+        os.chdir(directory)
+        os.makedirs('data', exist_ok=True)
+        try:
+            for backend in backends:
+                prefix = 'bench_hotel' if backend == 'postgres' else 'hotel'
+                end_date = datetime.now().replace(hour=23, minute=59, second=0, microsecond=0)
+                dataset = generate_dataset(args.hotels, args.years, args.seed, prefix, end_date, args.volume)
+                sizes = {filename: len(records) for filename, records in next(iter(dataset.values())).items()}
+                print(f"{backend}: {args.hotels} hotels x {sizes}")
+                try:
+                    results.extend(benchmark_backend(backend, dataset, args.repeat, end_date))
+                finally:
+                    if backend == 'postgres':
+                        cleanup_postgres(dataset)
+            if backends and 'json' in backends:
+                from utils.backup_worker import backup_worker
+                backup_worker.flush()
+        finally:
+            os.chdir(original_directory)
+
+    print(f"\n{'backend':<9}{'operation':<30}{'table':<28}{'records':>9}{'median ms':>11}{'min ms':>10}")
+    for r in results:
+        print(f"{r['backend']:<9}{r['operation']:<30}{str(r['table'] or ''):<28}{str(r['records'] or ''):>9}"
+              f"{r['median_seconds'] * 1000:>11.2f}{r['min_seconds'] * 1000:>10.2f}")
+    print(f"\nTotal benchmark time: {time.perf_counter() - started:.1f}s")
+
+    regressions = compare_results(results, compare) if compare else []
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'config': vars(args),
+                'environment': {
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'data_codec': os.environ.get('DATA_CODEC'),
+                    'storage_format': os.environ.get('DATA_STORAGE_FORMAT', 'json')
+                },
+                'results': results
+            }, f, indent=2)
+
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
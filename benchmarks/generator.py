@@ -0,0 +1,267 @@
+"""
+Synthetic data generator - seeded, realistic hotel data at any scale
+
+Record shapes follow the PostgreSQL tables in utils/database.py, so generated
+data can be saved through either data manager.
+"""
+import math
+import random
+from datetime import datetime, timedelta
+
+SALE_TYPES = ["Room Booking", "Food & Beverage", "Restaurant", "Laundry", "Other Services"]
+SALE_TYPE_WEIGHTS = [35, 15, 35, 5, 10]
+PAYMENT_TYPES = ["Cash", "Account", "Online"]
+PAYMENT_TYPE_WEIGHTS = [55, 25, 20]
+CUSTOMERS = ["Any", "Rahul Sharma", "Aisha Khan", "Vikram Singh", "Meera Gupta", "Walk-in Guest",
+             "Imran Lone", "Priya Nair", "Sanjay Raina", "Zoya Mir", "Arjun Kapoor", "Fatima Shah"]
+MENU = ["Rajma", "Rice", "Rogan Josh", "Tawa Roti", "Momo", "Chowmin", "Water", "Kahwa",
+        "Yakhni", "Dal Makhani", "Paneer Tikka", "Lassi"]
+STAFF = ["SazB", "SazK", "admin"]
+EXPENSE_CATEGORIES = ["Food & Supplies", "Maintenance", "Utilities", "Staff", "Marketing", "Other"]
+EXPENSE_CATEGORY_WEIGHTS = [40, 15, 15, 20, 3, 7]
+EXPENSE_METHODS = ["Cash", "Bank Transfer", "Online Transfer", "Cheque"]
+SERVICE_ITEMS = {
+    "Food": ["Breakfast", "Lunch", "Dinner", "Snacks"],
+    "Beverage": ["Tea", "Coffee", "Kahwa", "Soft Drink"],
+    "Laundry": ["Wash & Iron", "Dry Clean"],
+    "Housekeeping": ["Extra Towels", "Extra Bed", "Room Cleaning"]
+}
+
+# Tourist season in the valley: busy summers, quiet winters
+MONTH_SEASONALITY = {1: 0.45, 2: 0.5, 3: 0.7, 4: 1.0, 5: 1.35, 6: 1.6, 7: 1.5,
+                     8: 1.3, 9: 1.15, 10: 1.0, 11: 0.65, 12: 0.55}
+WEEKEND_FACTOR = 1.3
+# Prefix of generated record ids; the app's generate_id() ids are bare hex, so generated rows
+# saved to a live database can never upsert over (and then get cleaned up with) a real record
+ID_PREFIX = 'bench-'
+
+# Average records per day for an ordinary (seasonality 1.0) weekday
+DAILY_VOLUME = {
+    'sales': 30,
+    'expenditures': 6,
+    'advance_payments': 2,
+    'outstanding_dues': 1.5,
+    'room_services': 8,
+    'cash_handovers': 0.5,
+    'account_handovers': 0.2
+}
+
+def poisson(rng, lam):
+    """Draw a Poisson count (Knuth for small rates, normal approximation for large)"""
+    if lam <= 0:
+        return 0
+    if lam > 50:
+        return max(0, int(round(rng.gauss(lam, math.sqrt(lam)))))
+    limit = math.exp(-lam)
+    count, product = 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+def amount(rng, median, sigma=0.6, low=10, high=200000):
+    """Log-normally distributed amount around a median, rounded to rupees"""
+    return float(min(high, max(low, round(rng.lognormvariate(math.log(median), sigma)))))
+
+def day_factor(day):
+    return MONTH_SEASONALITY[day.month] * (WEEKEND_FACTOR if day.weekday() >= 5 else 1.0)
+
+class HotelDataGenerator:
+    """Generates one hotel's data from a seed.
+
+    The same (seed, hotel, end_date, years, volume) always produces the same records.
+    """
+
+    def __init__(self, hotel, years=1, seed=42, end_date=None, volume=1.0, room_count=12):
+        self.hotel = hotel
+        self.years = years
+        self.volume = volume
+        self.room_count = room_count
+        self.rng = random.Random(f"{seed}:{hotel}")
+        self.end_date = end_date or datetime(2025, 12, 31)
+        self.start_date = self.end_date - timedelta(days=int(365 * years))
+        self.rooms = [str(floor * 100 + number) for floor in range(1, 6) for number in range(1, 6)][:room_count]
+
+    def _id(self):
+        return f"{ID_PREFIX}{self.rng.getrandbits(32):08x}"
+
+    def _time_on(self, day):
+        # Most activity between 8am and 11pm
+        minutes = int(min(23 * 60 + 59, max(0, self.rng.gauss(15 * 60, 3.5 * 60))))
+        return day + timedelta(minutes=minutes, seconds=self.rng.randint(0, 59))
+
+    def _phone(self):
+        return f"9{self.rng.randint(100000000, 999999999)}"
+
+    def days(self):
+        day = self.start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day <= self.end_date:
+            yield day
+            day += timedelta(days=1)
+
+    def daily_count(self, table, day):
+        return poisson(self.rng, DAILY_VOLUME[table] * self.volume * day_factor(day))
+
+    def sale(self, day):
+        rng = self.rng
+        sale_type = rng.choices(SALE_TYPES, SALE_TYPE_WEIGHTS)[0]
+        payment_type = rng.choices(PAYMENT_TYPES, PAYMENT_TYPE_WEIGHTS)[0]
+        moment = self._time_on(day)
+        record = {
+            'id': self._id(),
+            'date': moment.strftime('%Y-%m-%d %H:%M:%S'),
+            'type': sale_type,
+            'amount': amount(rng, 3500 if sale_type == "Room Booking" else 600),
+            'payment_type': payment_type,
+            'customer_name': rng.choice(CUSTOMERS),
+            'customer_phone': self._phone(),
+            'description': f"Saz Valley - {sale_type}",
+            'room_number': rng.choice(self.rooms) if sale_type == "Room Booking" else None,
+            'status': 'Pending' if payment_type == 'Account' and rng.random() < 0.4 else 'Completed',
+            'created_by': rng.choice(STAFF)
+        }
+        if sale_type == "Restaurant":
+            items = rng.sample(MENU, rng.randint(1, 4))
+            record['order_details'] = "\n".join(f"{item}-----{rng.randint(30, 600)}" for item in items)
+            record['order_type'] = rng.choices(["Dine In", "Room Service"], [70, 30])[0]
+        return record
+
+    def expenditure(self, day):
+        rng = self.rng
+        category = rng.choices(EXPENSE_CATEGORIES, EXPENSE_CATEGORY_WEIGHTS)[0]
+        return {
+            'id': self._id(),
+            'date': self._time_on(day).strftime('%Y-%m-%d %H:%M:%S'),
+            'category': category,
+            'amount': amount(rng, 12000 if category == "Staff" else 1500, sigma=0.8),
+            'vendor_name': f"{category} Supplier {rng.randint(1, 8)}",
+            'description': f"{category} purchase",
+            'payment_method': rng.choices(EXPENSE_METHODS, [60, 25, 10, 5])[0],
+            'status': 'Paid',
+            'created_by': rng.choice(STAFF)
+        }
+
+    def advance_payment(self, day):
+        rng = self.rng
+        total = amount(rng, 8000, sigma=0.5)
+        advance = round(total * rng.uniform(0.2, 0.6))
+        completed = day < self.end_date - timedelta(days=14) and rng.random() < 0.85
+        record = {
+            'id': self._id(),
+            'date': self._time_on(day).strftime('%Y-%m-%d %H:%M:%S'),
+            'customer_name': rng.choice(CUSTOMERS[1:]),
+            'customer_contact': self._phone(),
+            'room_number': rng.choice(self.rooms),
+            'booking_date': (day + timedelta(days=rng.randint(1, 45))).strftime('%Y-%m-%d'),
+            'advance_amount': float(advance),
+            'remaining_amount': float(total - advance),
+            'total_amount': total,
+            'payment_method': rng.choice(["Cash", "Online", "Cheque"]),
+            'purpose': "Room Booking",
+            'status': 'Completed' if completed else 'Pending',
+            'received_amount': total if completed else 0.0,
+            'created_by': rng.choice(STAFF)
+        }
+        if completed:
+            record['completion_date'] = (day + timedelta(days=rng.randint(1, 14))).strftime('%Y-%m-%d %H:%M:%S')
+        return record
+
+    def outstanding_due(self, day):
+        rng = self.rng
+        settled = day < self.end_date - timedelta(days=30) and rng.random() < 0.75
+        return {
+            'id': self._id(),
+            'date': self._time_on(day).strftime('%Y-%m-%d %H:%M:%S'),
+            'customer_name': rng.choice(CUSTOMERS[1:]),
+            'amount': amount(rng, 2500),
+            'due_type': rng.choice(["Room Charges", "Restaurant", "Room Service"]),
+            'due_date': (day + timedelta(days=rng.randint(7, 30))).strftime('%Y-%m-%d'),
+            'phone': self._phone(),
+            'room_number': rng.choice(self.rooms),
+            'status': 'Paid' if settled else 'Pending',
+            'created_by': rng.choice(STAFF)
+        }
+
+    def room_service(self, day):
+        rng = self.rng
+        category = rng.choice(list(SERVICE_ITEMS))
+        quantity = rng.randint(1, 3)
+        unit_price = amount(rng, 250, sigma=0.4)
+        return {
+            'id': self._id(),
+            'date': self._time_on(day).strftime('%Y-%m-%d %H:%M:%S'),
+            'room_number': rng.choice(self.rooms),
+            'customer_name': rng.choice(CUSTOMERS[1:]),
+            'service_category': category,
+            'service_item': rng.choice(SERVICE_ITEMS[category]),
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'amount': unit_price * quantity,
+            'status': rng.choices(["Completed", "Pending"], [90, 10])[0],
+            'payment_method': rng.choice(["Cash", "Room Bill"]),
+            'created_by': rng.choice(STAFF)
+        }
+
+    def handover(self, day):
+        rng = self.rng
+        moment = self._time_on(day)
+        return {
+            'id': self._id(),
+            'date': moment.strftime('%Y-%m-%d %H:%M:%S'),
+            'handover_date': moment.strftime('%Y-%m-%d'),
+            'amount': amount(rng, 20000, sigma=0.5),
+            'handed_by': rng.choice(STAFF),
+            'received_by': "Owner",
+            'handover_type': "Daily",
+            'created_by': rng.choice(STAFF)
+        }
+
+    def room_records(self):
+        rooms = []
+        for number in self.rooms:
+            occupied = self.rng.random() < 0.55
+            rooms.append({
+                'id': f"{self.hotel}_{number}",
+                'room_number': number,
+                'status': 'Occupied' if occupied else 'Available',
+                'type': 'Deluxe' if number.endswith('1') else 'Standard',
+                'price': 3500.0 if number.endswith('1') else 2000.0,
+                'current_guest': self.rng.choice(CUSTOMERS[1:]) if occupied else None
+            })
+        return rooms
+
+    def generate(self):
+        """Generate all tables for the hotel, keyed by data filename"""
+        factories = {
+            'sales': self.sale,
+            'expenditures': self.expenditure,
+            'advance_payments': self.advance_payment,
+            'outstanding_dues': self.outstanding_due,
+            'room_services': self.room_service,
+            'cash_handovers': self.handover,
+            'account_handovers': self.handover
+        }
+        tables = {table: [] for table in factories}
+        for day in self.days():
+            for table, factory in factories.items():
+                for _ in range(self.daily_count(table, day)):
+                    tables[table].append(factory(day))
+
+        data = {f"{table}.json": records for table, records in tables.items()}
+        data['rooms.json'] = self.room_records()
+        return data
+
+def generate_dataset(hotels=2, years=1, seed=42, hotel_prefix='hotel', end_date=None, volume=1.0):
+    """Generate data for several hotels: {hotel: {filename: records}}"""
+    return {
+        f"{hotel_prefix}{number}": HotelDataGenerator(
+            f"{hotel_prefix}{number}", years=years, seed=seed, end_date=end_date, volume=volume
+        ).generate()
+        for number in range(1, hotels + 1)
+    }
+
+def generate_sales(count, seed=42):
+    """Generate a fixed number of sales records spread over two years"""
+    generator = HotelDataGenerator('hotel1', years=2, seed=seed)
+    days = list(generator.days())
+    return [generator.sale(generator.rng.choice(days)) for _ in range(count)]
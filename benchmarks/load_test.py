@@ -0,0 +1,307 @@
+"""
+Load test - simulate concurrent front-desk sessions against the data manager
+
+Usage: python benchmarks/load_test.py [--sessions 8] [--workers threads|processes] [--duration 30]
+       [--think-ms 200] [--backend postgres|json] [--seed 42] [--output results.json]
+
+Every session loops over page-like workloads (check-in, add sale, settle due,
+open dashboard) through the data manager functions the pages use. The report
+gives throughput, p50/p95/p99 latency per workload, connection pool waits and
+error rates. The PostgreSQL backend needs DATABASE_URL; sessions work on a
+generated bench_hotel1 that is removed afterwards.
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.generator import HotelDataGenerator
+from benchmarks.workloads import DASHBOARD_FILES, dashboard_summary
+
+BACKEND_MODULES = {
+    'json': 'utils.data_manager',
+    'postgres': 'utils.database_data_manager'
+}
+
+# Relative frequency of each workload in a session
+WORKLOAD_WEIGHTS = {
+    'open_dashboard': 40,
+    'add_sale': 30,
+    'settle_due': 15,
+    'check_in': 15
+}
+
+# Connection checkouts slower than this count as pool waits
+POOL_WAIT_THRESHOLD = 0.005
+
+class PoolMonitor:
+    """Times connection checkouts on the data manager's engine.
+
+    The engine's connect() is wrapped on the current DatabaseManager; the wrap is
+    re-applied if get_db_manager() has replaced the manager or its engine.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = []
+        self.peak_checked_out = 0
+        self.wrapped_engine = None
+
+    def ensure_wrapped(self, manager):
+        db = manager.db_manager
+        if db is None or db.engine is self.wrapped_engine:
+            return
+        engine = db.engine
+        original_connect = engine.connect
+        monitor = self
+
+        def timed_connect(*args, **kwargs):
+            start = time.perf_counter()
+            connection = original_connect(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            with monitor.lock:
+                monitor.checkouts.append(elapsed)
+                try:
+                    monitor.peak_checked_out = max(monitor.peak_checked_out, engine.pool.checkedout())
+                except Exception:
+                    pass
+            return connection
+
+        engine.connect = timed_connect
+        self.wrapped_engine = engine
+
+    def stats(self):
+        with self.lock:
+            return {'checkouts': list(self.checkouts), 'peak_checked_out': self.peak_checked_out}
+
+# Workloads - each mirrors what a page does on one interaction
+
+def open_dashboard(manager, hotel, rng):
+    data = {filename: manager.load_data(filename, hotel) for filename in DASHBOARD_FILES}
+    dashboard_summary(data, "This Month")
+
+def add_sale(manager, hotel, rng):
+    generator = HotelDataGenerator(hotel, seed=rng.random())
+    sale = generator.sale(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+    if manager.add_record('sales.json', sale, hotel) is False:
+        raise RuntimeError("add_record returned False")
+
+def settle_due(manager, hotel, rng):
+    dues = manager.load_data('outstanding_dues.json', hotel)
+    pending = [due for due in dues if due.get('status') == 'Pending']
+    if not pending:
+        return
+    due = rng.choice(pending)
+    due['status'] = 'Paid'
+    due['payment_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    due['payment_method'] = 'Cash'
+    if manager.save_data('outstanding_dues.json', dues, hotel) is False:
+        raise RuntimeError("save_data returned False")
+
+def check_in(manager, hotel, rng):
+    rooms = manager.load_data('rooms.json', hotel)
+    room_list = list(rooms.values()) if isinstance(rooms, dict) else rooms
+    available = [room for room in room_list if room.get('status') == 'Available']
+    if not available:
+        # Keep the workload going by checking everyone out
+        for room in room_list:
+            room['status'] = 'Available'
+            room['current_guest'] = None
+        available = room_list
+    room = rng.choice(available)
+    room['status'] = 'Occupied'
+    room['current_guest'] = f"Load Test Guest {rng.randint(1, 9999)}"
+    if manager.save_data('rooms.json', rooms, hotel) is False:
+        raise RuntimeError("save_data returned False")
+
+WORKLOADS = {
+    'open_dashboard': open_dashboard,
+    'add_sale': add_sale,
+    'settle_due': settle_due,
+    'check_in': check_in
+}
+
+def run_session(backend, hotel, session_id, seed, duration, think_seconds, monitor=None):
+    """Run one session until the duration elapses, returning its samples"""
+    manager = importlib.import_module(BACKEND_MODULES[backend])
+    rng = random.Random(f"{seed}:{session_id}")
+    names = list(WORKLOAD_WEIGHTS)
+    weights = [WORKLOAD_WEIGHTS[name] for name in names]
+    samples = []
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        if monitor and backend == 'postgres':
+            monitor.ensure_wrapped(manager)
+        start = time.perf_counter()
+        error = None
+        try:
+            WORKLOADS[name](manager, hotel, rng)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        samples.append({'workload': name, 'seconds': time.perf_counter() - start, 'error': error})
+        if think_seconds:
+            time.sleep(rng.expovariate(1 / think_seconds))
+    return samples
+
+def run_process_session(backend, hotel, session_id, seed, duration, think_seconds, directory):
+    """Process worker entry point: one session plus this process's pool statistics"""
+    os.chdir(directory)
+    monitor = PoolMonitor()
+    try:
+        samples = run_session(backend, hotel, session_id, seed, duration, think_seconds, monitor)
+    except Exception:
+        samples = [{'workload': 'session', 'seconds': 0.0, 'error': traceback.format_exc(limit=1)}]
+    return samples, monitor.stats()
+
+def percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None}
+    if len(values) == 1:
+        return {'p50': values[0], 'p95': values[0], 'p99': values[0]}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+def build_report(samples, pool_stats, elapsed, config):
+    """Aggregate samples into throughput, latency percentiles, pool waits and error rates"""
+    workloads = {}
+    for name in sorted({sample['workload'] for sample in samples}):
+        selected = [sample for sample in samples if sample['workload'] == name]
+        errors = [sample['error'] for sample in selected if sample['error']]
+        latencies = [sample['seconds'] for sample in selected if not sample['error']]
+        workloads[name] = dict(
+            percentiles(latencies),
+            operations=len(selected),
+            throughput_per_second=len(selected) / elapsed if elapsed else 0.0,
+            error_rate=len(errors) / len(selected),
+            sample_errors=sorted(set(errors))[:5]
+        )
+
+    checkouts = [value for stats in pool_stats for value in stats['checkouts']]
+    waits = [value for value in checkouts if value > POOL_WAIT_THRESHOLD]
+    all_latencies = [sample['seconds'] for sample in samples if not sample['error']]
+    error_count = len([sample for sample in samples if sample['error']])
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'config': config,
+        'elapsed_seconds': elapsed,
+        'operations': len(samples),
+        'throughput_per_second': len(samples) / elapsed if elapsed else 0.0,
+        'error_rate': error_count / len(samples) if samples else 0.0,
+        'latency': percentiles(all_latencies),
+        'workloads': workloads,
+        'pool': {
+            'checkouts': len(checkouts),
+            'waits': len(waits),
+            'wait_rate': len(waits) / len(checkouts) if checkouts else 0.0,
+            'checkout': percentiles(checkouts),
+            'peak_checked_out': max((stats['peak_checked_out'] for stats in pool_stats), default=0)
+        }
+    }
+
+def print_report(report):
+    def ms(value):
+        return f"{value * 1000:.1f}" if value is not None else "-"
+
+    print(f"\n{report['operations']} operations in {report['elapsed_seconds']:.1f}s "
+          f"({report['throughput_per_second']:.1f} ops/s), error rate {report['error_rate']:.1%}")
+    print(f"{'workload':<16}{'ops':>7}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, stats in report['workloads'].items():
+        print(f"{name:<16}{stats['operations']:>7}{stats['throughput_per_second']:>9.1f}{ms(stats['p50']):>10}"
+              f"{ms(stats['p95']):>10}{ms(stats['p99']):>10}{stats['error_rate']:>9.1%}")
+        for error in stats['sample_errors']:
+            print(f"    {error}")
+
+    pool = report['pool']
+    if pool['checkouts']:
+        print(f"\nPool: {pool['checkouts']} checkouts, {pool['waits']} waits over "
+              f"{POOL_WAIT_THRESHOLD * 1000:.0f} ms ({pool['wait_rate']:.1%}), checkout p95 "
+              f"{ms(pool['checkout']['p95'])} ms, p99 {ms(pool['checkout']['p99'])} ms, "
+              f"peak {pool['peak_checked_out']} connections")
+
+def seed_hotel(manager, hotel, seed):
+    """Give the load-test hotel a realistic quarter of data"""
+    data = HotelDataGenerator(hotel, years=0.25, seed=seed, end_date=datetime.now()).generate()
+    for filename, records in data.items():
+        manager.save_data(filename, records, hotel)
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions against the data manager")
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--workers', choices=['threads', 'processes'], default='threads')
+    parser.add_argument('--duration', type=float, default=30, help="Seconds each session runs")
+    parser.add_argument('--think-ms', type=float, default=200, help="Mean pause between actions")
+    parser.add_argument('--backend', choices=list(BACKEND_MODULES), default='postgres')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.backend == 'postgres' and not os.environ.get('DATABASE_URL'):
+        parser.error("the postgres backend needs DATABASE_URL")
+
+    hotel = 'bench_hotel1' if args.backend == 'postgres' else 'hotel1'
+    think_seconds = args.think_ms / 1000
+    output = os.path.abspath(args.output) if args.output else None
+    manager = importlib.import_module(BACKEND_MODULES[args.backend])
+
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.makedirs('data', exist_ok=True)
+        data = {}
+        try:
+            data = seed_hotel(manager, hotel, args.seed)
+            started = time.perf_counter()
+
+            if args.workers == 'threads':
+                monitor = PoolMonitor()
+                with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+                    futures = [pool.submit(run_session, args.backend, hotel, session_id, args.seed,
+                                           args.duration, think_seconds, monitor)
+                               for session_id in range(args.sessions)]
+                    samples = [sample for future in futures for sample in future.result()]
+                pool_stats = [monitor.stats()]
+            else:
+                # Spawned processes each build their own engine, like separate app workers
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=args.sessions, mp_context=context) as pool:
+                    futures = [pool.submit(run_process_session, args.backend, hotel, session_id, args.seed,
+                                           args.duration, think_seconds, directory)
+                               for session_id in range(args.sessions)]
+                    results = [future.result() for future in futures]
+                samples = [sample for session_samples, _ in results for sample in session_samples]
+                pool_stats = [stats for _, stats in results]
+
+            elapsed = time.perf_counter() - started
+        finally:
+            if args.backend == 'postgres':
+                from benchmarks.data_layer_benchmark import cleanup_postgres
+                cleanup_postgres({hotel: data})
+            else:
+                from utils.backup_worker import backup_worker
+                backup_worker.flush()
+            os.chdir(original_directory)
+
+    report = build_report(samples, pool_stats, elapsed, vars(args))
+    print_report(report)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Page workloads - the Dashboard and Financial Summary computations as plain functions
+
+These mirror the calculations in pages/8_Dashboard.py and
+pages/16_Financial_Summary.py so they can be timed without Streamlit.
+"""
+from utils import date_filter
+
+DASHBOARD_FILES = ['sales.json', 'expenditures.json', 'room_services.json', 'complementary_rooms.json',
+                   'advance_payments.json', 'outstanding_dues.json', 'uploaded_bills.json',
+                   'cash_handovers.json', 'rooms.json']
+FINANCIAL_SUMMARY_FILES = ['sales.json', 'expenditures.json', 'cash_handovers.json', 'account_handovers.json',
+                           'outstanding_dues.json', 'advance_payments.json', 'bad_debts.json', 'discounts.json',
+                           'rooms.json', 'room_services.json', 'complementary_rooms.json', 'uploaded_bills.json']
+
+def _amount(record, *fields):
+    for field in fields or ('amount',):
+        value = record.get(field)
+        if value is not None:
+            return float(value)
+    return 0.0
+
+def filter_by_period(records, period, today=None, start_date=None, end_date=None):
+    """Filter records by their date the way the Dashboard does"""
+    return date_filter.filter_by_period(records, period, start_date, end_date, today)
+
+def dashboard_summary(data, period="This Month", today=None):
+    """KPIs, sales breakdowns and restaurant analytics shown on the Dashboard"""
+    sales = filter_by_period(data.get('sales.json', []), period, today)
+    expenditures = filter_by_period(data.get('expenditures.json', []), period, today)
+    advance_payments = filter_by_period(data.get('advance_payments.json', []), period, today)
+    outstanding_dues = filter_by_period(data.get('outstanding_dues.json', []), period, today)
+    rooms = data.get('rooms.json', [])
+    rooms = list(rooms.values()) if isinstance(rooms, dict) else rooms
+
+    total_sales = sum(_amount(sale) for sale in sales)
+    total_expenditures = sum(_amount(exp) for exp in expenditures)
+
+    payment_data, type_data = {}, {}
+    for sale in sales:
+        payment_data[sale.get('payment_type')] = payment_data.get(sale.get('payment_type'), 0) + _amount(sale)
+        type_data[sale.get('type')] = type_data.get(sale.get('type'), 0) + _amount(sale)
+
+    restaurant_sales = [sale for sale in sales if sale.get('type') == 'Restaurant']
+    occupied = len([room for room in rooms if isinstance(room, dict) and room.get('status') == 'Occupied'])
+
+    return {
+        'total_sales': total_sales,
+        'total_expenditures': total_expenditures,
+        'net_profit': total_sales - total_expenditures,
+        'outstanding_dues': sum(_amount(due) for due in outstanding_dues if due.get('status') == 'Pending'),
+        'advance_payments': sum(_amount(ap, 'amount', 'advance_amount') for ap in advance_payments
+                                if ap.get('status') == 'Pending'),
+        'occupancy_rate': occupied / len(rooms) * 100 if rooms else 0,
+        'sales_by_payment_type': payment_data,
+        'sales_by_type': type_data,
+        'restaurant_total': sum(_amount(sale) for sale in restaurant_sales),
+        'restaurant_dine_in': sum(_amount(sale) for sale in restaurant_sales
+                                  if 'Dine In' in (sale.get('order_type') or '')),
+        'cash_sales': sum(_amount(sale) for sale in sales if sale.get('payment_type') == 'Cash'),
+        'account_sales': sum(_amount(sale) for sale in sales if sale.get('payment_type') == 'Account')
+    }
+
+def filter_sales_by_period(sales, period, today=None):
+    """Filter sales by completion/transaction date the way the Financial Summary does"""
+    return date_filter.filter_by_period(sales, period, today=today, key=date_filter.sale_display_day)
+
+def financial_summary(data, period="This Month", today=None):
+    """Totals and balances shown in the Financial Summary overview"""
+    sales = filter_sales_by_period(data.get('sales.json', []), period, today)
+    expenditures = filter_by_period(data.get('expenditures.json', []), period, today)
+    handovers = filter_by_period(data.get('cash_handovers.json', []), period, today)
+    account_handovers = filter_by_period(data.get('account_handovers.json', []), period, today)
+
+    cash_sales = sum(_amount(sale) for sale in sales if sale.get('payment_type') == 'Cash')
+    account_sales = sum(_amount(sale) for sale in sales if sale.get('payment_type') == 'Account')
+    cash_expenditures = sum(_amount(exp) for exp in expenditures
+                            if (exp.get('payment_method') or '').lower() in ['cash', 'cash payment'])
+    account_expenditures = sum(_amount(exp) for exp in expenditures
+                               if (exp.get('payment_method') or '').lower() in
+                               ['bank transfer', 'account', 'bank', 'online transfer'])
+    total_handovers = sum(_amount(handover) for handover in handovers)
+    total_account_handovers = sum(_amount(handover) for handover in account_handovers)
+
+    room_services = data.get('room_services.json', [])
+    service_counts = {}
+    for service in room_services:
+        service_counts[service.get('service_item')] = service_counts.get(service.get('service_item'), 0) + 1
+
+    total_sales = sum(_amount(sale) for sale in sales)
+    total_expenditures = sum(_amount(exp) for exp in expenditures)
+    return {
+        'total_sales': total_sales,
+        'total_expenditures': total_expenditures,
+        'net_profit': total_sales - total_expenditures,
+        'cash_balance': cash_sales - cash_expenditures - total_handovers,
+        'account_balance': account_sales - account_expenditures - total_account_handovers,
+        'outstanding_dues': sum(_amount(due) for due in data.get('outstanding_dues.json', [])
+                                if due.get('status') == 'Pending'),
+        'advance_payments': sum(_amount(ap, 'amount', 'advance_amount') for ap in data.get('advance_payments.json', [])
+                                if ap.get('status') == 'Pending'),
+        'bad_debts': sum(_amount(debt) for debt in data.get('bad_debts.json', [])),
+        'discounts': sum(_amount(discount) for discount in data.get('discounts.json', [])),
+        'room_service_revenue': sum(_amount(service) for service in room_services),
+        'top_services': sorted(service_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+    }
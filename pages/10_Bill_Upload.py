@@ -6,7 +6,10 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
+from utils.page_profiler import start_page_profile
+from utils.database_data_manager import generate_id, get_current_datetime
+from utils.hotel_snapshot import HotelSnapshot
+from utils.record_list import record_list
 import pandas as pd
 
 # Check authentication
@@ -14,13 +17,17 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("📄 Bill Upload")
 
 # Load data
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-uploaded_bills = load_data('uploaded_bills.json', selected_hotel)
+snapshot = HotelSnapshot(selected_hotel)
+uploaded_bills = snapshot.load('uploaded_bills.json')
 
 # Overview
 st.markdown("### Uploaded Bills Overview")
@@ -60,16 +67,7 @@ with st.form("upload_bill_form"):
 
     # Room number (optional) - dynamic based on selected hotel
     selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-    rooms_list = load_data('rooms.json', selected_hotel)
-
-    # Convert list to dictionary if needed
-    if isinstance(rooms_list, list):
-        rooms = {}
-        for room in rooms_list:
-            if isinstance(room, dict) and 'room_number' in room:
-                rooms[room['room_number']] = room
-    else:
-        rooms = rooms_list if rooms_list else {}
+    rooms = snapshot.rooms_by_number()
 
     all_rooms = [f"Room {k}" for k in sorted(rooms.keys(), key=lambda x: int(x))] if rooms else []
     room_options = ["None"] + all_rooms
@@ -99,7 +97,7 @@ with st.form("upload_bill_form"):
                 'uploaded_by': st.session_state.get('username', 'Unknown')
             }
             uploaded_bills.append(new_bill)
-            save_data('uploaded_bills.json', uploaded_bills, selected_hotel)
+            snapshot.save('uploaded_bills.json', uploaded_bills)
             st.success("Bill uploaded successfully!")
             st.rerun()
         else:
@@ -112,7 +110,7 @@ st.markdown("### Uploaded Bills")
 
 # Load data
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-uploaded_bills = load_data('uploaded_bills.json', selected_hotel)
+uploaded_bills = snapshot.load('uploaded_bills.json')
 
 if uploaded_bills:
     # Filter
@@ -125,8 +123,18 @@ if uploaded_bills:
     if filter_type != "All":
         filtered_bills = [b for b in filtered_bills if b['bill_type'] == filter_type]
 
-    for bill in filtered_bills:
-        with st.expander(f"#{bill['id']} - {bill['vendor_name']} - ₹{bill['amount']:,.2f}"):
+    # One grid, with the selected bill's details and actions below it
+    bill = record_list(filtered_bills, {
+        'ID': 'id',
+        'Uploaded': lambda b: b['date'][:10] if b.get('date') else 'N/A',
+        'Vendor': 'vendor_name',
+        'Type': 'bill_type',
+        'Amount': 'amount',
+        'Status': 'status'
+    }, key='uploaded_bills_list', amount_columns=['Amount'])
+    if bill:
+        with st.container(border=True):
+            st.markdown(f"#### #{bill['id']} - {bill['vendor_name']} - ₹{bill['amount']:,.2f}")
             col1, col2 = st.columns(2)
 
             with col1:
@@ -157,7 +165,7 @@ if uploaded_bills:
                                 b['status'] = 'Reviewed'
                                 b['reviewed_date'] = get_current_datetime()
                                 break
-                        save_data('uploaded_bills.json', uploaded_bills, selected_hotel)
+                        snapshot.save('uploaded_bills.json', uploaded_bills)
                         st.success("Bill marked as reviewed!")
                         st.rerun()
 
@@ -173,14 +181,14 @@ if uploaded_bills:
                                         b['amount'] = new_amount
                                         b['status'] = new_status
                                         break
-                                save_data('uploaded_bills.json', uploaded_bills, selected_hotel)
+                                snapshot.save('uploaded_bills.json', uploaded_bills)
                                 st.success("Bill updated!")
                                 st.rerun()
 
                 with col3:
                     if st.button(f"Delete", key=f"delete_{bill['id']}", type="secondary"):
                         uploaded_bills = [b for b in uploaded_bills if b['id'] != bill['id']]
-                        save_data('uploaded_bills.json', uploaded_bills, selected_hotel)
+                        snapshot.save('uploaded_bills.json', uploaded_bills)
                         st.success("Bill deleted!")
                         st.rerun()
 else:
@@ -193,7 +201,7 @@ if user_role == 'Admin':
 
     # Load data
     selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-    uploaded_bills = load_data('uploaded_bills.json', selected_hotel)
+    uploaded_bills = snapshot.load('uploaded_bills.json')
 
     if uploaded_bills:
         # Bills by type
@@ -210,4 +218,6 @@ if user_role == 'Admin':
         st.markdown("**Recent Uploads:**")
         recent_bills = sorted(uploaded_bills, key=lambda x: x['date'], reverse=True)[:5]
         for bill in recent_bills:
-            st.write(f"• {bill['vendor_name']} - ₹{bill['amount']:,.2f} ({bill['status']})")
\ No newline at end of file
+            st.write(f"• {bill['vendor_name']} - ₹{bill['amount']:,.2f} ({bill['status']})")
+
+profile.finish()
@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
 import pandas as pd
 
@@ -14,6 +15,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("📊 Account Sales")
@@ -162,4 +166,6 @@ if account_sales:
                     st.success("Sale deleted!")
                     st.rerun()
 else:
-    st.info("No account sales found")
\ No newline at end of file
+    st.info("No account sales found")
+
+profile.finish()
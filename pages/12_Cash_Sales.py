@@ -6,7 +6,9 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
+from utils.page_profiler import start_page_profile
+from utils.database_data_manager import generate_id, get_current_datetime
+from utils.hotel_snapshot import HotelSnapshot
 import pandas as pd
 
 # Check authentication
@@ -14,17 +16,20 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("💵 Cash Sales")
 
 # Load data
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-sales = load_data('sales.json', selected_hotel)
-rooms = load_data('rooms.json', selected_hotel)
+snapshot = HotelSnapshot(selected_hotel)
+sales = snapshot.load('sales.json')
 
 # Filter cash sales
-cash_sales = [s for s in sales if s['payment_type'] == 'Cash']
+cash_sales = snapshot.cash_sales()
 
 # Overview
 st.markdown("### Cash Sales Overview")
@@ -57,13 +62,7 @@ with st.form("add_cash_sale_form"):
         description = st.text_area("Description", placeholder="Sale description")
         # Room number (optional) - dynamic based on selected hotel
         selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-        rooms = load_data('rooms.json', selected_hotel)
-        if isinstance(rooms, dict):
-            all_rooms = [f"Room {k}" for k in sorted(rooms.keys(), key=lambda x: int(x))]
-        elif isinstance(rooms, list):
-            all_rooms = [f"Room {room.get('room_number', room.get('id', i+101))}" for i, room in enumerate(rooms)]
-        else:
-            all_rooms = [f"Room {i}" for i in range(101, 109)]
+        all_rooms = snapshot.room_labels()
         room_options = ["None"] + all_rooms
         room_number = st.selectbox("Room Number (if applicable)", room_options)
         cash_received = st.number_input("Cash Received", min_value=0.0, step=100.0)
@@ -84,7 +83,7 @@ with st.form("add_cash_sale_form"):
                 'created_by': st.session_state.get('username', 'Unknown')
             }
             sales.append(new_sale)
-            save_data('sales.json', sales, selected_hotel)
+            snapshot.save('sales.json', sales)
             st.success("Cash sale added successfully!")
             st.rerun()
         else:
@@ -144,14 +143,14 @@ if cash_sales:
                                         s['amount'] = new_amount
                                         s['cash_received'] = new_cash_received
                                         break
-                                save_data('sales.json', sales, selected_hotel)
+                                snapshot.save('sales.json', sales)
                                 st.success("Sale updated!")
                                 st.rerun()
 
                 with col2:
                     if st.button(f"Delete", key=f"delete_{sale['id']}", type="secondary"):
                         sales = [s for s in sales if s['id'] != sale['id']]
-                        save_data('sales.json', sales, selected_hotel)
+                        snapshot.save('sales.json', sales)
                         st.success("Sale deleted!")
                         st.rerun()
 
@@ -182,3 +181,5 @@ if cash_sales:
                 st.error("Please specify who received the cash")
 else:
     st.info("No cash sales to handover")
+
+profile.finish()
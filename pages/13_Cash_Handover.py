@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
 import pandas as pd
 
@@ -14,6 +15,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("💰 Cash Handover")
@@ -144,4 +148,6 @@ with col1:
 with col2:
     st.metric("Today's Handovers", f"₹{today_handovers:,.2f}")
 with col3:
-    st.metric("Today's Cash in Hand", f"₹{today_cash_sales - today_handovers:,.2f}")
\ No newline at end of file
+    st.metric("Today's Cash in Hand", f"₹{today_cash_sales - today_handovers:,.2f}")
+
+profile.finish()
@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
 import pandas as pd
 
@@ -14,6 +15,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("💸 Bad Debt Management")
@@ -175,4 +179,6 @@ else:
 
 all_rooms = [f"Room {k}" for k in sorted(rooms.keys(), key=lambda x: int(x))] if rooms else []
 room_options = ["None"] + all_rooms
-room_number = st.selectbox("Room Number (if applicable)", room_options)
\ No newline at end of file
+room_number = st.selectbox("Room Number (if applicable)", room_options)
+
+profile.finish()
@@ -2,21 +2,23 @@ import streamlit as st
 import sys
 import os
 import json
-import zipfile
 import io
 
 # Add utils directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, get_current_date
+from utils.database_data_manager import get_current_date, table_totals
+from utils.hotel_snapshot import HotelSnapshot
+from utils.page_profiler import start_page_profile
+from utils.date_filter import filter_by_period, sale_display_day, period_bounds
+from utils.daily_rollup import period_totals, CASH_PAYMENT_METHODS, ACCOUNT_PAYMENT_METHODS
+from utils.financial_cube import financial_cube, SALES_STREAMS
+from utils.data_export import export_zip
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json
-import zipfile
-import io
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Check authentication
 if not check_authentication():
@@ -29,92 +31,28 @@ hotel_name = st.session_state.get('hotel_name', 'Hotel 1')
 
 st.title(f"💰 {hotel_name} - Financial Summary")
 
-# Load all financial data with error handling
-try:
-    sales = load_data('sales.json', selected_hotel)
-    if not isinstance(sales, list):
-        sales = []
-except:
-    sales = []
-
-try:
-    expenditures = load_data('expenditures.json', selected_hotel)
-    if not isinstance(expenditures, list):
-        expenditures = []
-except:
-    expenditures = []
-
-try:
-    cash_handovers = load_data('cash_handovers.json', selected_hotel)
-    if not isinstance(cash_handovers, list):
-        cash_handovers = []
-except:
-    cash_handovers = []
-
-try:
-    account_handovers = load_data('account_handovers.json', selected_hotel)
-    if not isinstance(account_handovers, list):
-        account_handovers = []
-except:
-    account_handovers = []
-
-try:
-    outstanding_dues = load_data('outstanding_dues.json', selected_hotel)
-    if not isinstance(outstanding_dues, list):
-        outstanding_dues = []
-except:
-    outstanding_dues = []
-
-try:
-    advance_payments = load_data('advance_payments.json', selected_hotel)
-    if not isinstance(advance_payments, list):
-        advance_payments = []
-except:
-    advance_payments = []
-
-try:
-    bad_debts = load_data('bad_debts.json', selected_hotel)
-    if not isinstance(bad_debts, list):
-        bad_debts = []
-except:
-    bad_debts = []
-
-try:
-    discounts = load_data('discounts.json', selected_hotel)
-    if not isinstance(discounts, list):
-        discounts = []
-except:
-    discounts = []
-
-try:
-    rooms = load_data('rooms.json', selected_hotel)
-    if not isinstance(rooms, dict):
-        rooms = {}
-except:
-    rooms = {}
-
-try:
-    room_services = load_data('room_services.json', selected_hotel)
-    if not isinstance(room_services, list):
-        room_services = []
-except:
-    room_services = []
-
-try:
-    complementary_rooms = load_data('complementary_rooms.json', selected_hotel)
-    if not isinstance(complementary_rooms, list):
-        complementary_rooms = []
-except:
-    complementary_rooms = []
-
-try:
-    uploaded_bills = load_data('uploaded_bills.json', selected_hotel)
-    if not isinstance(uploaded_bills, list):
-        uploaded_bills = []
-except:
-    uploaded_bills = []
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__, selected_hotel)
+
+# Tables are loaded only by the section (or button) that needs them
+snapshot = HotelSnapshot(selected_hotel)
+
+# Columns each section reads
+SALES_COLUMNS = ['id', 'date', 'transaction_date', 'type', 'customer_name', 'amount', 'payment_type', 'status',
+                 'original_advance_date', 'order_type']
+EXPENDITURE_COLUMNS = ['id', 'date', 'category', 'vendor_name', 'amount', 'payment_method', 'status']
+HANDOVER_COLUMNS = ['id', 'date', 'received_by', 'amount', 'handover_type', 'reference_number', 'notes']
+
+def load_list(filename, columns=None):
+    """A table as a list (empty when it can't be loaded)"""
+    try:
+        data = snapshot.load(filename, columns)
+    except Exception:
+        return []
+    return data if isinstance(data, list) else []
 
 # Date filter section
+profile.section("Widgets")
 st.markdown("### 📅 Date Filter")
 col1, col2, col3 = st.columns(3)
 
@@ -146,109 +84,78 @@ def filter_by_date(data, date_filter, start_date=None, end_date=None):
     if not isinstance(data, list):
         return data
 
-    today = datetime.now()
-
-    if date_filter == "Today":
-        target_date = today.strftime('%Y-%m-%d')
-        return [item for item in data if isinstance(item, dict) and 'date' in item and item['date'].startswith(target_date)]
-    elif date_filter == "This Week":
-        week_start = (today - timedelta(days=today.weekday())).strftime('%Y-%m-%d')
-        return [item for item in data if isinstance(item, dict) and 'date' in item and item['date'] >= week_start]
-    elif date_filter == "This Month":
-        month_start = today.strftime('%Y-%m')
-        return [item for item in data if isinstance(item, dict) and 'date' in item and item['date'].startswith(month_start)]
-    elif date_filter == "This Year":
-        year_start = today.strftime('%Y')
-        return [item for item in data if isinstance(item, dict) and 'date' in item and item['date'].startswith(year_start)]
-    elif date_filter == "Custom Range" and start_date and end_date:
-        start_str = start_date.strftime('%Y-%m-%d')
-        end_str = end_date.strftime('%Y-%m-%d')
-        return [item for item in data if isinstance(item, dict) and 'date' in item and start_str <= item['date'][:10] <= end_str]
-
-    return data
-
-# Enhanced filter function for advance payments
+    # Custom range without both dates shows everything
+    if date_filter == "Custom Range" and not (start_date and end_date):
+        return data
+
+    return filter_by_period(data, date_filter, start_date, end_date)
+
+# Sales count on their completion date (completed advance payments) or transaction date
 def filter_sales_by_date(sales_data, date_filter, start_date=None, end_date=None):
-    """Filter sales using completion date for completed advance payments, otherwise regular date"""
-    if date_filter == "All Time":
-        return sales_data
-
-    today = datetime.now()
-    filtered_data = []
-
-    for sale in sales_data:
-        # For advance payments, use completion date if available, otherwise use transaction date
-        if 'Advance Payment' in sale.get('type', '') and sale.get('completion_date'):
-            # Use completion date for completed advance payments
-            display_date = sale['completion_date']
-        elif sale.get('transaction_date'):
-            # Use transaction date if available
-            display_date = sale['transaction_date'][:10]
-        else:
-            # Fall back to regular date
-            display_date = sale['date'][:10]
+    return filter_by_period(sales_data, date_filter, start_date, end_date, key=sale_display_day)
 
-        try:
-            sale_datetime = datetime.strptime(display_date, '%Y-%m-%d')
-        except ValueError:
-            # If date parsing fails, skip this record
-            continue
-
-        if date_filter == "Today":
-            if sale_datetime.date() == today.date():
-                filtered_data.append(sale)
-        elif date_filter == "This Week":
-            week_start = today - timedelta(days=today.weekday())
-            if sale_datetime.date() >= week_start.date():
-                filtered_data.append(sale)
-        elif date_filter == "This Month":
-            if sale_datetime.month == today.month and sale_datetime.year == today.year:
-                filtered_data.append(sale)
-        elif date_filter == "This Year":
-            if sale_datetime.year == today.year:
-                filtered_data.append(sale)
-        elif date_filter == "Custom Range" and start_date and end_date:
-            if start_date <= sale_datetime.date() <= end_date:
-                filtered_data.append(sale)
-
-    return filtered_data
-
-# Filter all data
-filtered_sales = filter_sales_by_date(sales, date_filter, start_date, end_date)
-filtered_expenditures = filter_by_date(expenditures, date_filter, start_date, end_date)
-filtered_handovers = filter_by_date(cash_handovers, date_filter, start_date, end_date)
-filtered_account_handovers = filter_by_date(account_handovers, date_filter, start_date, end_date)
-filtered_rooms = filter_by_date(rooms, date_filter, start_date, end_date)
-filtered_room_services = filter_by_date(room_services, date_filter, start_date, end_date)
-filtered_complementary_rooms = filter_by_date(complementary_rooms, date_filter, start_date, end_date)
-filtered_uploaded_bills = filter_by_date(uploaded_bills, date_filter, start_date, end_date)
+def period_records(filename, columns=None):
+    """A table's records in the selected period"""
+    if filename == 'sales.json':
+        return filter_sales_by_date(load_list(filename, columns), date_filter, start_date, end_date)
+    return filter_by_date(load_list(filename, columns), date_filter, start_date, end_date)
+
+bounds = period_bounds(date_filter, start_date, end_date)
+
+def period_cube():
+    """The financial cube sliced to the selected period (tables that changed are reloaded)"""
+    financial_cube.refresh(selected_hotel)
+    return financial_cube.view(selected_hotel).where(*(bounds or (None, None)))
+
+def is_cash_method(method):
+    return method.lower() in CASH_PAYMENT_METHODS
+
+def is_account_method(method):
+    return method.lower() in ACCOUNT_PAYMENT_METHODS
 
 st.markdown("---")
 
 # Financial Overview Section
+profile.section("Metrics")
 st.markdown("### 💰 Financial Overview")
 
-# Calculate totals
-total_sales = sum(sale['amount'] for sale in filtered_sales)
-cash_sales = sum(sale['amount'] for sale in filtered_sales if sale['payment_type'] == 'Cash')
-account_sales = sum(sale['amount'] for sale in filtered_sales if sale['payment_type'] == 'Account')
-
-total_expenditures = sum(exp['amount'] for exp in filtered_expenditures)
-# Fix cash expenditures calculation - check for various cash payment methods
-cash_expenditures = sum(exp['amount'] for exp in filtered_expenditures 
-                       if exp.get('payment_method', '').lower() in ['cash', 'cash payment'])
-# Fix account expenditures calculation
-account_expenditures = sum(exp['amount'] for exp in filtered_expenditures 
-                          if exp.get('payment_method', '').lower() in ['bank transfer', 'account', 'bank', 'online transfer'])
+# Period totals come from the daily rollup (sales by transaction date); the cube is the fallback
+totals = period_totals(selected_hotel, *bounds, sales_stream='sales_by_transaction') if bounds is not None else None
 
-total_handovers = sum(handover['amount'] for handover in filtered_handovers)
-total_account_handovers = sum(handover['amount'] for handover in filtered_account_handovers)
+# Calculate totals
+if totals:
+    total_sales = totals['total_sales']
+    cash_sales = totals['cash_sales']
+    account_sales = totals['account_sales']
+    total_expenditures = totals['total_expenditures']
+    cash_expenditures = totals['cash_expenditures']
+    account_expenditures = totals['account_expenditures']
+    total_handovers = totals['total_handovers']
+    total_account_handovers = totals['total_account_handovers']
+else:
+    cube = period_cube()
+    sales_cube = cube.where(stream=SALES_STREAMS)
+    total_sales = sales_cube.total()
+    cash_sales = sales_cube.where(payment='Cash').total()
+    account_sales = sales_cube.where(payment='Account').total()
+
+    expenditures_cube = cube.where(stream='expenditures')
+    total_expenditures = expenditures_cube.total()
+    # Cash and account expenditures cover the various spellings of each payment method
+    cash_expenditures = expenditures_cube.where(payment=is_cash_method).total()
+    account_expenditures = expenditures_cube.where(payment=is_account_method).total()
+
+    total_handovers = cube.where(stream='cash_handovers').total()
+    total_account_handovers = cube.where(stream='account_handovers').total()
 
 # Outstanding and advance amounts (always show all, not filtered)
-outstanding_amount = sum(due['amount'] for due in outstanding_dues if due['status'] == 'Pending')
-advance_amount = sum(ap['amount'] for ap in advance_payments if ap['status'] == 'Pending')
-bad_debt_amount = sum(bd['amount'] for bd in bad_debts)
-discount_amount = sum(disc['amount'] for disc in discounts)
+other_totals = table_totals(['outstanding_dues.json', 'advance_payments.json', 'bad_debts.json', 'discounts.json'],
+                            selected_hotel, {'outstanding_dues.json': "status = 'Pending'",
+                                             'advance_payments.json': "status = 'Pending'"})
+outstanding_amount = other_totals['outstanding_dues.json']['amount']
+advance_amount = other_totals['advance_payments.json']['amount']
+bad_debt_amount = other_totals['bad_debts.json']['amount']
+discount_amount = other_totals['discounts.json']['amount']
 
 # Calculate balances correctly
 cash_balance = cash_sales - cash_expenditures - total_handovers
@@ -295,49 +202,8 @@ with col5:
 
 st.markdown("---")
 
-# Add detailed breakdown for debugging
-with st.expander("🔍 Detailed Calculation Breakdown", expanded=False):
-    st.markdown("#### Cash Flow Breakdown")
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("**Cash Transactions:**")
-        st.write(f"Cash Sales: ₹{cash_sales:,.2f}")
-        st.write(f"Cash Expenditures: ₹{cash_expenditures:,.2f}")
-        st.write(f"Cash Handovers: ₹{total_handovers:,.2f}")
-        st.write(f"**Cash in Hand: ₹{cash_balance:,.2f}**")
-
-        # Show cash expenditure details
-        if filtered_expenditures:
-            st.markdown("**Cash Expenditure Methods:**")
-            cash_methods = {}
-            for exp in filtered_expenditures:
-                method = exp.get('payment_method', 'Unknown')
-                if method.lower() in ['cash', 'cash payment']:
-                    cash_methods[method] = cash_methods.get(method, 0) + exp['amount']
-            for method, amount in cash_methods.items():
-                st.write(f"• {method}: ₹{amount:,.2f}")
-
-    with col2:
-        st.markdown("**Account Transactions:**")
-        st.write(f"Account Sales: ₹{account_sales:,.2f}")
-        st.write(f"Account Expenditures: ₹{account_expenditures:,.2f}")
-        st.write(f"Account Handovers: ₹{total_account_handovers:,.2f}")
-        st.write(f"**Account Balance: ₹{account_balance:,.2f}**")
-
-        # Show account expenditure details
-        if filtered_expenditures:
-            st.markdown("**Account Expenditure Methods:**")
-            account_methods = {}
-            for exp in filtered_expenditures:
-                method = exp.get('payment_method', 'Unknown')
-                if method.lower() in ['bank transfer', 'account', 'bank', 'online transfer']:
-                    account_methods[method] = account_methods.get(method, 0) + exp['amount']
-            for method, amount in account_methods.items():
-                st.write(f"• {method}: ₹{amount:,.2f}")
-
 # Cash Flow Analysis
+profile.section("Charts")
 st.markdown("### 💵 Cash Flow Analysis")
 
 col1, col2 = st.columns(2)
@@ -436,102 +302,20 @@ with col2:
 
 st.markdown("---")
 
-# Detailed Records Section
-st.markdown("### 📋 Detailed Records")
-
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["Sales Records", "Expenditure Records", "Cash Handovers", "Account Handovers", "Summary Report"])
-
-with tab1:
-    st.markdown("#### Sales Records")
-    if filtered_sales:
-        # Create enhanced sales display
-        sales_display = []
-        for sale in filtered_sales:
-            display_record = {
-                'Display Date': sale.get('original_advance_date', sale['date'][:10]),
-                'Type': sale['type'],
-                'Customer': sale['customer_name'],
-                'Amount': f"₹{sale['amount']:,.2f}",
-                'Payment Type': sale['payment_type'],
-                'Status': sale.get('status', 'Completed')
-            }
-
-            # Add advance payment info if applicable
-            if sale.get('original_advance_date'):
-                display_record['Note'] = f"Advance Payment (Payment Date: {sale.get('transaction_date', sale['date'])[:10]})"
-                display_record['Advance Date'] = sale['original_advance_date']
-            else:
-                display_record['Note'] = 'Regular Sale'
-                display_record['Advance Date'] = 'N/A'
-
-            sales_display.append(display_record)
+# Sections render (and load their tables) only when picked
+profile.section("Widgets")
+st.markdown("### 📂 Details")
 
-        sales_df = pd.DataFrame(sales_display)
-        st.dataframe(sales_df, use_container_width=True)
+SECTIONS = ["📊 Summary Report", "📋 Detailed Records", "🔍 Calculation Breakdown", "🛎️ Room Service Analytics"]
+# Restaurant analytics - only show for Saz Valley Bhaderwah
+if selected_hotel == 'hotel2':
+    SECTIONS.append("🍽️ Restaurant Analytics")
+SECTIONS.append("📥 Download & Export")
 
-        # Show advance payment info
-        advance_sales = [s for s in filtered_sales if s.get('original_advance_date')]
-        if advance_sales:
-            st.info(f"ℹ️ {len(advance_sales)} advance payment(s) shown on their original advance dates")
+section = st.radio("Section", SECTIONS, horizontal=True, label_visibility="collapsed", key="financial_summary_section")
 
-        # Sales summary
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.write(f"**Total Records:** {len(filtered_sales)}")
-        with col2:
-            st.write(f"**Cash Sales:** ₹{cash_sales:,.2f}")
-        with col3:
-            st.write(f"**Account Sales:** ₹{account_sales:,.2f}")
-    else:
-        st.info("No sales records found for the selected period")
-
-with tab2:
-    st.markdown("#### Expenditure Records")
-    if filtered_expenditures:
-        exp_df = pd.DataFrame(filtered_expenditures)
-        exp_df['Amount'] = exp_df['amount'].apply(lambda x: f"₹{x:,.2f}")
-        display_columns = ['date', 'category', 'vendor_name', 'Amount', 'payment_method', 'status']
-        available_columns = [col for col in display_columns if col in exp_df.columns]
-        st.dataframe(exp_df[available_columns], use_container_width=True)
-
-        # Expenditure summary
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.write(f"**Total Records:** {len(filtered_expenditures)}")
-        with col2:
-            st.write(f"**Cash Expenditures:** ₹{cash_expenditures:,.2f}")
-        with col3:
-            st.write(f"**Account Expenditures:** ₹{account_expenditures:,.2f}")
-    else:
-        st.info("No expenditure records found for the selected period")
-
-with tab3:
-    st.markdown("#### Cash Handover Records")
-    if filtered_handovers:
-        handover_df = pd.DataFrame(filtered_handovers)
-        handover_df['Amount'] = handover_df['amount'].apply(lambda x: f"₹{x:,.2f}")
-        display_columns = ['date', 'received_by', 'Amount', 'notes']
-        available_columns = [col for col in display_columns if col in handover_df.columns]
-        st.dataframe(handover_df[available_columns], use_container_width=True)
-
-        st.write(f"**Total Cash Handovers:** ₹{total_handovers:,.2f}")
-    else:
-        st.info("No cash handover records found for the selected period")
-
-with tab4:
-    st.markdown("#### Account Handover Records")
-    if filtered_account_handovers:
-        acc_handover_df = pd.DataFrame(filtered_account_handovers)
-        acc_handover_df['Amount'] = acc_handover_df['amount'].apply(lambda x: f"₹{x:,.2f}")
-        display_columns = ['date', 'received_by', 'Amount', 'handover_type', 'reference_number', 'notes']
-        available_columns = [col for col in display_columns if col in acc_handover_df.columns]
-        st.dataframe(acc_handover_df[available_columns], use_container_width=True)
-
-        st.write(f"**Total Account Handovers:** ₹{total_account_handovers:,.2f}")
-    else:
-        st.info("No account handover records found for the selected period")
-
-with tab5:
+@st.fragment
+def summary_report_section():
     st.markdown("#### Summary Report")
 
     # Create summary data
@@ -570,46 +354,185 @@ with tab5:
         st.write(f"**Bad Debts:** ₹{bad_debt_amount:,.2f}")
         st.write(f"**Discounts Given:** ₹{discount_amount:,.2f}")
 
-# Room service analytics
-st.markdown("---")
-st.markdown("### Room Service Analytics")
+@st.fragment
+def detailed_records_section():
+    record_type = st.radio("Records", ["Sales Records", "Expenditure Records", "Cash Handovers", "Account Handovers"],
+                           horizontal=True, key="financial_summary_records")
+
+    if record_type == "Sales Records":
+        filtered_sales = period_records('sales.json', SALES_COLUMNS)
+        st.markdown("#### Sales Records")
+        if filtered_sales:
+            # Create enhanced sales display
+            sales_display = []
+            for sale in filtered_sales:
+                display_record = {
+                    'Display Date': sale.get('original_advance_date', sale['date'][:10]),
+                    'Type': sale['type'],
+                    'Customer': sale['customer_name'],
+                    'Amount': f"₹{sale['amount']:,.2f}",
+                    'Payment Type': sale['payment_type'],
+                    'Status': sale.get('status', 'Completed')
+                }
+
+                # Add advance payment info if applicable
+                if sale.get('original_advance_date'):
+                    display_record['Note'] = f"Advance Payment (Payment Date: {sale.get('transaction_date', sale['date'])[:10]})"
+                    display_record['Advance Date'] = sale['original_advance_date']
+                else:
+                    display_record['Note'] = 'Regular Sale'
+                    display_record['Advance Date'] = 'N/A'
+
+                sales_display.append(display_record)
+
+            sales_df = pd.DataFrame(sales_display)
+            st.dataframe(sales_df, use_container_width=True)
+
+            # Show advance payment info
+            advance_sales = [s for s in filtered_sales if s.get('original_advance_date')]
+            if advance_sales:
+                st.info(f"ℹ️ {len(advance_sales)} advance payment(s) shown on their original advance dates")
+
+            # Sales summary
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.write(f"**Total Records:** {len(filtered_sales)}")
+            with col2:
+                st.write(f"**Cash Sales:** ₹{cash_sales:,.2f}")
+            with col3:
+                st.write(f"**Account Sales:** ₹{account_sales:,.2f}")
+        else:
+            st.info("No sales records found for the selected period")
+
+    elif record_type == "Expenditure Records":
+        filtered_expenditures = period_records('expenditures.json', EXPENDITURE_COLUMNS)
+        st.markdown("#### Expenditure Records")
+        if filtered_expenditures:
+            exp_df = pd.DataFrame(filtered_expenditures)
+            exp_df['Amount'] = exp_df['amount'].apply(lambda x: f"₹{x:,.2f}")
+            display_columns = ['date', 'category', 'vendor_name', 'Amount', 'payment_method', 'status']
+            available_columns = [col for col in display_columns if col in exp_df.columns]
+            st.dataframe(exp_df[available_columns], use_container_width=True)
+
+            # Expenditure summary
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.write(f"**Total Records:** {len(filtered_expenditures)}")
+            with col2:
+                st.write(f"**Cash Expenditures:** ₹{cash_expenditures:,.2f}")
+            with col3:
+                st.write(f"**Account Expenditures:** ₹{account_expenditures:,.2f}")
+        else:
+            st.info("No expenditure records found for the selected period")
+
+    elif record_type == "Cash Handovers":
+        filtered_handovers = period_records('cash_handovers.json', HANDOVER_COLUMNS)
+        st.markdown("#### Cash Handover Records")
+        if filtered_handovers:
+            handover_df = pd.DataFrame(filtered_handovers)
+            handover_df['Amount'] = handover_df['amount'].apply(lambda x: f"₹{x:,.2f}")
+            display_columns = ['date', 'received_by', 'Amount', 'notes']
+            available_columns = [col for col in display_columns if col in handover_df.columns]
+            st.dataframe(handover_df[available_columns], use_container_width=True)
+
+            st.write(f"**Total Cash Handovers:** ₹{total_handovers:,.2f}")
+        else:
+            st.info("No cash handover records found for the selected period")
+
+    else:
+        filtered_account_handovers = period_records('account_handovers.json', HANDOVER_COLUMNS)
+        st.markdown("#### Account Handover Records")
+        if filtered_account_handovers:
+            acc_handover_df = pd.DataFrame(filtered_account_handovers)
+            acc_handover_df['Amount'] = acc_handover_df['amount'].apply(lambda x: f"₹{x:,.2f}")
+            display_columns = ['date', 'received_by', 'Amount', 'handover_type', 'reference_number', 'notes']
+            available_columns = [col for col in display_columns if col in acc_handover_df.columns]
+            st.dataframe(acc_handover_df[available_columns], use_container_width=True)
+
+            st.write(f"**Total Account Handovers:** ₹{total_account_handovers:,.2f}")
+        else:
+            st.info("No account handover records found for the selected period")
+
+@st.fragment
+def calculation_breakdown_section():
+    expenditures_cube = period_cube().where(stream='expenditures')
+
+    st.markdown("#### Cash Flow Breakdown")
 
-if room_services:
     col1, col2 = st.columns(2)
 
     with col1:
-        # Room service revenue
-        rs_revenue = sum(rs['amount'] for rs in room_services)
-        rs_completed = len([rs for rs in room_services if rs['status'] == 'Completed'])
-        rs_pending = len([rs for rs in room_services if rs['status'] == 'Pending'])
+        st.markdown("**Cash Transactions:**")
+        st.write(f"Cash Sales: ₹{cash_sales:,.2f}")
+        st.write(f"Cash Expenditures: ₹{cash_expenditures:,.2f}")
+        st.write(f"Cash Handovers: ₹{total_handovers:,.2f}")
+        st.write(f"**Cash in Hand: ₹{cash_balance:,.2f}**")
 
-        st.metric("Room Service Revenue", f"₹{rs_revenue:,.2f}")
-        st.metric("Completed Services", rs_completed)
-        st.metric("Pending Services", rs_pending)
+        # Show cash expenditure details
+        if expenditures_cube.count():
+            st.markdown("**Cash Expenditure Methods:**")
+            cash_methods = expenditures_cube.where(payment=is_cash_method).by('payment')
+            for method, amount in cash_methods.items():
+                st.write(f"• {method}: ₹{amount:,.2f}")
 
     with col2:
-        # Popular services
-        service_counts = {}
-        for rs in room_services:
-            service = rs['service_item']
-            service_counts[service] = service_counts.get(service, 0) + 1
-
-        if service_counts:
-            top_services = sorted(service_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-            st.markdown("**Top 5 Services:**")
-            for service, count in top_services:
-                st.write(f"• {service}: {count} orders")
+        st.markdown("**Account Transactions:**")
+        st.write(f"Account Sales: ₹{account_sales:,.2f}")
+        st.write(f"Account Expenditures: ₹{account_expenditures:,.2f}")
+        st.write(f"Account Handovers: ₹{total_account_handovers:,.2f}")
+        st.write(f"**Account Balance: ₹{account_balance:,.2f}**")
 
-# Restaurant analytics - only show for Saz Valley Bhaderwah
-if selected_hotel == 'hotel2':
-    restaurant_sales = [s for s in filtered_sales if s.get('type') == 'Restaurant']
-    if restaurant_sales:
-        st.markdown("---")
-        st.markdown("### 🍽️ Restaurant Analytics - Saz Valley Bhaderwah")
+        # Show account expenditure details
+        if expenditures_cube.count():
+            st.markdown("**Account Expenditure Methods:**")
+            account_methods = expenditures_cube.where(payment=is_account_method).by('payment')
+            for method, amount in account_methods.items():
+                st.write(f"• {method}: ₹{amount:,.2f}")
 
-        restaurant_total = sum(sale['amount'] for sale in restaurant_sales)
-        restaurant_cash = sum(sale['amount'] for sale in restaurant_sales if sale.get('payment_type') == 'Cash')
-        restaurant_account = sum(sale['amount'] for sale in restaurant_sales if sale.get('payment_type') == 'Account')
+@st.fragment
+def room_service_section():
+    st.markdown("#### Room Service Analytics")
+
+    # Room services are shown for all time
+    financial_cube.refresh(selected_hotel)
+    room_services_cube = financial_cube.view(selected_hotel, stream='room_services')
+    if room_services_cube.count():
+        col1, col2 = st.columns(2)
+
+        with col1:
+            # Room service revenue
+            rs_revenue = room_services_cube.total()
+            rs_completed = room_services_cube.where(status='Completed').count()
+            rs_pending = room_services_cube.where(status='Pending').count()
+
+            st.metric("Room Service Revenue", f"₹{rs_revenue:,.2f}")
+            st.metric("Completed Services", rs_completed)
+            st.metric("Pending Services", rs_pending)
+
+        with col2:
+            # Popular services
+            service_counts = room_services_cube.by('kind', measure='count')
+
+            if service_counts:
+                top_services = sorted(service_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+                st.markdown("**Top 5 Services:**")
+                for service, count in top_services:
+                    st.write(f"• {service}: {count} orders")
+    else:
+        st.info("No room services recorded")
+
+@st.fragment
+def restaurant_section():
+    restaurant_cube = period_cube().where(stream='restaurant')
+    restaurant_orders = restaurant_cube.count()
+    if not restaurant_orders:
+        st.info("No restaurant orders found for the selected period")
+    else:
+        st.markdown("#### 🍽️ Restaurant Analytics - Saz Valley Bhaderwah")
+
+        restaurant_total = restaurant_cube.total()
+        restaurant_cash = restaurant_cube.where(payment='Cash').total()
+        restaurant_account = restaurant_cube.where(payment='Account').total()
 
         col1, col2 = st.columns(2)
 
@@ -624,18 +547,19 @@ if selected_hotel == 'hotel2':
 
         with col2:
             # Order type breakdown - safely access order_type
-            dine_in_sales = sum(sale['amount'] for sale in restaurant_sales if 'Dine In' in str(sale.get('order_type', '')))
-            room_service_rest_sales = sum(sale['amount'] for sale in restaurant_sales if 'Room Service' in str(sale.get('order_type', '')))
+            dine_in_sales = restaurant_cube.where(channel=lambda order_type: 'Dine In' in order_type).total()
+            room_service_rest_sales = restaurant_cube.where(channel=lambda order_type: 'Room Service' in order_type).total()
 
             st.metric("Dine In Sales", f"₹{dine_in_sales:,.2f}")
             st.metric("Restaurant Room Service", f"₹{room_service_rest_sales:,.2f}")
-            st.metric("Total Restaurant Orders", len(restaurant_sales))
+            st.metric("Total Restaurant Orders", restaurant_orders)
 
             # Average order value
-            avg_order_value = restaurant_total / len(restaurant_sales) if restaurant_sales else 0
+            avg_order_value = restaurant_total / restaurant_orders
             st.metric("Average Order Value", f"₹{avg_order_value:,.0f}")
 
-        # Top restaurant customers
+        # Top restaurant customers (customers aren't a cube dimension, so these come from the records)
+        restaurant_sales = [s for s in period_records('sales.json', SALES_COLUMNS) if s.get('type') == 'Restaurant']
         if restaurant_sales:
             st.markdown("#### Top Restaurant Customers")
             customer_totals = {}
@@ -649,7 +573,7 @@ if selected_hotel == 'hotel2':
                     st.write(f"{i}. **{customer}**: ₹{total:,.2f}")
 
         # Restaurant payment type chart
-        if restaurant_sales and (restaurant_cash > 0 or restaurant_account > 0):
+        if restaurant_cash > 0 or restaurant_account > 0:
             col1, col2 = st.columns(2)
 
             with col1:
@@ -682,37 +606,25 @@ if selected_hotel == 'hotel2':
                     )
                     st.plotly_chart(fig_restaurant_type, use_container_width=True)
 
-st.markdown("---")
-
-# Download All Data Section
-st.markdown("### 📥 Download All Data")
-
-if st.button("📦 Download All Hotel Data as ZIP"):
-    try:
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
+@st.fragment
+def download_export_section():
+    st.markdown("#### 📥 Download All Data")
 
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add all data files to ZIP
+    if st.button("📦 Download All Hotel Data as ZIP"):
+        try:
+            # Stream every data file into the archive a batch at a time
             data_files = [
-                ('sales.json', sales),
-                ('expenditures.json', expenditures),
-                ('cash_handovers.json', cash_handovers),
-                ('account_handovers.json', account_handovers),
-                ('outstanding_dues.json', outstanding_dues),
-                ('advance_payments.json', advance_payments),
-                ('bad_debts.json', bad_debts),
-                ('discounts.json', discounts),
-                ('rooms.json', rooms),
-                ('room_services.json', room_services),
-                ('complementary_rooms.json', complementary_rooms),
-                ('uploaded_bills.json', uploaded_bills)
+                'sales.json', 'expenditures.json', 'cash_handovers.json', 'account_handovers.json',
+                'outstanding_dues.json', 'advance_payments.json', 'bad_debts.json', 'discounts.json',
+                'rooms.json', 'room_services.json', 'complementary_rooms.json', 'uploaded_bills.json'
             ]
+            progress_bar = st.progress(0.0, text="Preparing download...")
 
-            # Add each data file to ZIP
-            for filename, data in data_files:
-                json_str = json.dumps(data, indent=2, ensure_ascii=False)
-                zip_file.writestr(filename, json_str)
+            def show_progress(done, total, name, records):
+                progress_bar.progress(done / total, text=f"Exported {name} ({records} records)")
+
+            export, _ = export_zip([(filename, filename, 'json', None) for filename in data_files], selected_hotel,
+                                   progress=show_progress)
 
             # Add summary report
             summary_report = {
@@ -738,126 +650,136 @@ if st.button("📦 Download All Hotel Data as ZIP"):
                 }
             }
 
-            zip_file.writestr('summary_report.json', json.dumps(summary_report, indent=2, ensure_ascii=False))
+            export.add_text('summary_report.json', json.dumps(summary_report, indent=2, ensure_ascii=False))
 
-        zip_buffer.seek(0)
+            st.download_button(
+                label="📥 Download All Data",
+                data=export.finish(),
+                file_name=f"{hotel_name.lower().replace(' ', '_')}_complete_data_{get_current_date()}.zip",
+                mime="application/zip"
+            )
 
-        st.download_button(
-            label="📥 Download All Data",
-            data=zip_buffer.getvalue(),
-            file_name=f"{hotel_name.lower().replace(' ', '_')}_complete_data_{get_current_date()}.zip",
-            mime="application/zip"
-        )
+            st.success("✅ All data prepared for download!")
 
-        st.success("✅ All data prepared for download!")
+        except Exception as e:
+            st.error(f"Error creating download file: {str(e)}")
 
-    except Exception as e:
-        st.error(f"Error creating download file: {str(e)}")
+    st.markdown("---")
 
-st.markdown("---")
+    # Export Section
+    st.markdown("#### 📄 Export Options")
 
-# Export Section
-st.markdown("### 📄 Export Options")
+    col1, col2, col3 = st.columns(3)
 
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    if st.button("📊 Export Summary to CSV"):
-        # Create comprehensive summary for export
-        export_data = []
-
-        # Add summary metrics
-        export_data.extend([
-            ["FINANCIAL SUMMARY", "", "", ""],
-            ["Report Period", date_filter, "", ""],
-            ["Generated Date", get_current_date(), "", ""],
-            ["Generated By", st.session_state.get('username', 'Unknown'), "", ""],
-            ["", "", "", ""],
-            ["SALES SUMMARY", "", "", ""],
-            ["Total Sales", f"₹{total_sales:,.2f}", "", ""],
-            ["Cash Sales", f"₹{cash_sales:,.2f}", "", ""],
-            ["Account Sales", f"₹{account_sales:,.2f}", "", ""],
-            ["", "", "", ""],
-            ["EXPENDITURE SUMMARY", "", "", ""],
-            ["Total Expenditures", f"₹{total_expenditures:,.2f}", "", ""],
-            ["Cash Expenditures", f"₹{cash_expenditures:,.2f}", "", ""],
-            ["Account Expenditures", f"₹{account_expenditures:,.2f}", "", ""],
-            ["", "", "", ""],
-            ["BALANCE SUMMARY", "", "", ""],
-            ["Cash in Hand", f"₹{cash_balance:,.2f}", "", ""],
-            ["Account Balance", f"₹{account_balance:,.2f}", "", ""],
-            ["Net Profit", f"₹{net_profit:,.2f}", "", ""],
-            ["", "", "", ""],
-            ["OTHER METRICS", "", "", ""],
-            ["Outstanding Dues", f"₹{outstanding_amount:,.2f}", "", ""],
-            ["Advance Payments", f"₹{advance_amount:,.2f}", "", ""],
-            ["Bad Debts", f"₹{bad_debt_amount:,.2f}", "", ""],
-            ["Discounts Given", f"₹{discount_amount:,.2f}", "", ""]
-        ])
-
-        export_df = pd.DataFrame(export_data, columns=['Category', 'Value', 'Notes', 'Extra'])
-
-        csv_buffer = io.StringIO()
-        export_df.to_csv(csv_buffer, index=False)
-
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv_buffer.getvalue(),
-            file_name=f"{hotel_name.lower().replace(' ', '_')}_financial_summary_{get_current_date()}.csv",
-            mime="text/csv"
-        )
+    with col1:
+        if st.button("📊 Export Summary to CSV"):
+            # Create comprehensive summary for export
+            export_data = []
+
+            # Add summary metrics
+            export_data.extend([
+                ["FINANCIAL SUMMARY", "", "", ""],
+                ["Report Period", date_filter, "", ""],
+                ["Generated Date", get_current_date(), "", ""],
+                ["Generated By", st.session_state.get('username', 'Unknown'), "", ""],
+                ["", "", "", ""],
+                ["SALES SUMMARY", "", "", ""],
+                ["Total Sales", f"₹{total_sales:,.2f}", "", ""],
+                ["Cash Sales", f"₹{cash_sales:,.2f}", "", ""],
+                ["Account Sales", f"₹{account_sales:,.2f}", "", ""],
+                ["", "", "", ""],
+                ["EXPENDITURE SUMMARY", "", "", ""],
+                ["Total Expenditures", f"₹{total_expenditures:,.2f}", "", ""],
+                ["Cash Expenditures", f"₹{cash_expenditures:,.2f}", "", ""],
+                ["Account Expenditures", f"₹{account_expenditures:,.2f}", "", ""],
+                ["", "", "", ""],
+                ["BALANCE SUMMARY", "", "", ""],
+                ["Cash in Hand", f"₹{cash_balance:,.2f}", "", ""],
+                ["Account Balance", f"₹{account_balance:,.2f}", "", ""],
+                ["Net Profit", f"₹{net_profit:,.2f}", "", ""],
+                ["", "", "", ""],
+                ["OTHER METRICS", "", "", ""],
+                ["Outstanding Dues", f"₹{outstanding_amount:,.2f}", "", ""],
+                ["Advance Payments", f"₹{advance_amount:,.2f}", "", ""],
+                ["Bad Debts", f"₹{bad_debt_amount:,.2f}", "", ""],
+                ["Discounts Given", f"₹{discount_amount:,.2f}", "", ""]
+            ])
+
+            export_df = pd.DataFrame(export_data, columns=['Category', 'Value', 'Notes', 'Extra'])
+
+            csv_buffer = io.StringIO()
+            export_df.to_csv(csv_buffer, index=False)
+
+            st.download_button(
+                label="📥 Download CSV",
+                data=csv_buffer.getvalue(),
+                file_name=f"{hotel_name.lower().replace(' ', '_')}_financial_summary_{get_current_date()}.csv",
+                mime="text/csv"
+            )
 
-with col2:
-    if st.button("📈 Export Charts Data"):
-        # Export chart data
-        chart_data = {
-            "payment_type_data": {
-                "cash_sales": cash_sales,
-                "account_sales": account_sales
-            },
-            "balance_data": {
-                "cash_balance": cash_balance,
-                "account_balance": account_balance
-            },
-            "flow_data": {
-                "cash_inflow": cash_sales,
-                "cash_outflow": cash_expenditures + total_handovers,
-                "account_inflow": account_sales,
-                "account_outflow": account_expenditures + total_account_handovers
+    with col2:
+        if st.button("📈 Export Charts Data"):
+            # Export chart data
+            chart_data = {
+                "payment_type_data": {
+                    "cash_sales": cash_sales,
+                    "account_sales": account_sales
+                },
+                "balance_data": {
+                    "cash_balance": cash_balance,
+                    "account_balance": account_balance
+                },
+                "flow_data": {
+                    "cash_inflow": cash_sales,
+                    "cash_outflow": cash_expenditures + total_handovers,
+                    "account_inflow": account_sales,
+                    "account_outflow": account_expenditures + total_account_handovers
+                }
             }
-        }
-
-        json_str = json.dumps(chart_data, indent=2)
-
-        st.download_button(
-            label="📥 Download Chart Data",
-            data=json_str,
-            file_name=f"{hotel_name.lower().replace(' ', '_')}_charts_data_{get_current_date()}.json",
-            mime="application/json"
-        )
 
-with col3:
-    if st.button("🔍 Export Detailed Records"):
-        # Create detailed export with all transactions
-        detailed_data = {
-            "sales_records": filtered_sales,
-            "expenditure_records": filtered_expenditures,
-            "cash_handover_records": filtered_handovers,
-            "account_handover_records": filtered_account_handovers,
-            "metadata": {
-                "hotel_name": hotel_name,
-                "date_filter": date_filter,
-                "generated_date": get_current_date(),
-                "generated_by": st.session_state.get('username', 'Unknown')
+            json_str = json.dumps(chart_data, indent=2)
+
+            st.download_button(
+                label="📥 Download Chart Data",
+                data=json_str,
+                file_name=f"{hotel_name.lower().replace(' ', '_')}_charts_data_{get_current_date()}.json",
+                mime="application/json"
+            )
+
+    with col3:
+        if st.button("🔍 Export Detailed Records"):
+            # Create detailed export with all transactions
+            detailed_data = {
+                "sales_records": period_records('sales.json'),
+                "expenditure_records": period_records('expenditures.json'),
+                "cash_handover_records": period_records('cash_handovers.json'),
+                "account_handover_records": period_records('account_handovers.json'),
+                "metadata": {
+                    "hotel_name": hotel_name,
+                    "date_filter": date_filter,
+                    "generated_date": get_current_date(),
+                    "generated_by": st.session_state.get('username', 'Unknown')
+                }
             }
-        }
-
-        json_str = json.dumps(detailed_data, indent=2, ensure_ascii=False)
 
-        st.download_button(
-            label="📥 Download Detailed Records",
-            data=json_str,
-            file_name=f"{hotel_name.lower().replace(' ', '_')}_detailed_records_{get_current_date()}.json",
-            mime="application/json"
-        )
-# The financial summary now loads all relevant financial data from the database for comprehensive reporting.
\ No newline at end of file
+            json_str = json.dumps(detailed_data, indent=2, ensure_ascii=False)
+
+            st.download_button(
+                label="📥 Download Detailed Records",
+                data=json_str,
+                file_name=f"{hotel_name.lower().replace(' ', '_')}_detailed_records_{get_current_date()}.json",
+                mime="application/json"
+            )
+
+SECTION_RENDERERS = {
+    "📊 Summary Report": summary_report_section,
+    "📋 Detailed Records": detailed_records_section,
+    "🔍 Calculation Breakdown": calculation_breakdown_section,
+    "🛎️ Room Service Analytics": room_service_section,
+    "🍽️ Restaurant Analytics": restaurant_section,
+    "📥 Download & Export": download_export_section
+}
+profile.section(section.split(' ', 1)[1])
+SECTION_RENDERERS[section]()
+
+profile.finish()
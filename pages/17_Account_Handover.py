@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
 import pandas as pd
 
@@ -14,6 +15,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("🏦 Account Handover")
@@ -191,4 +195,6 @@ if account_handovers:
                 y=list(monthly_handovers.values()), 
                 title="Monthly Account Handovers"
             )
-            st.plotly_chart(fig_monthly, use_container_width=True)
\ No newline at end of file
+            st.plotly_chart(fig_monthly, use_container_width=True)
+
+profile.finish()
@@ -3,21 +3,25 @@ import streamlit as st
 import sys
 import os
 import pandas as pd
-import zipfile
-import io
 from datetime import datetime
 
 # Add utils directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, get_current_date
+from utils.page_profiler import start_page_profile
+from utils.database_data_manager import load_data, get_current_date, table_totals
+from utils.data_export import export_zip, export_xlsx
+from utils.arrow_export import arrow_available, export_parquet
 
 # Check authentication
 if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # Check admin privileges
 if st.session_state.get('user_role') != 'Admin':
     st.error("Access denied. Only admin can download data.")
@@ -31,273 +35,120 @@ hotel_name = st.session_state.get('hotel_name', 'Hotel 1')
 
 st.markdown(f"### Download Data for {hotel_name}")
 
-# Load all data
-rooms_list = load_data('rooms.json', selected_hotel)
-# Convert rooms list to dictionary for backward compatibility
-if isinstance(rooms_list, list):
-    rooms_dict = {}
-    for room in rooms_list:
-        if isinstance(room, dict) and 'room_number' in room:
-            rooms_dict[room['room_number']] = room
-else:
-    rooms_dict = rooms_list if rooms_list else {}
-
-all_data = {
-    'Sales Management': load_data('sales.json', selected_hotel),
-    'Expenditure Management': load_data('expenditures.json', selected_hotel),
-    'Room Management': rooms_dict,
-    'Room Service': load_data('room_services.json', selected_hotel),
-    'Complementary Rooms': load_data('complementary_rooms.json', selected_hotel),
-    'Advance Payments': load_data('advance_payments.json', selected_hotel),
-    'Outstanding Dues': load_data('outstanding_dues.json', selected_hotel),
-    'Bill Upload': load_data('uploaded_bills.json', selected_hotel),
-    'Cash Handover': load_data('cash_handovers.json', selected_hotel),
-    'Account Handover': load_data('account_handovers.json', selected_hotel),
-    'Bad Debt': load_data('bad_debts.json', selected_hotel),
-    'Discount': load_data('discounts.json', selected_hotel),
-    'Complementary Records': load_data('complementary_records.json', selected_hotel)
+# What each download reads: data type -> (data file, button, download label, file suffix, empty message).
+# Nothing is loaded until its button is clicked.
+DOWNLOADS = {
+    'Sales Management': ('sales.json', "📊 Sales Management Data", "Download Sales CSV", "sales",
+                         "No sales data available"),
+    'Expenditure Management': ('expenditures.json', "💸 Expenditure Data", "Download Expenditures CSV", "expenditures",
+                               "No expenditure data available"),
+    'Room Management': ('rooms.json', "🏠 Room Management Data", "Download Rooms CSV", "rooms",
+                        "No room data available"),
+    'Room Service': ('room_services.json', "🛎️ Room Service Data", "Download Room Service CSV", "room_service",
+                     "No room service data available"),
+    'Complementary Rooms': ('complementary_rooms.json', "🆓 Complementary Rooms Data", "Download Complementary CSV",
+                            "complementary", "No complementary room data available"),
+    'Advance Payments': ('advance_payments.json', "💰 Advance Payments Data", "Download Advance Payments CSV",
+                         "advance_payments", "No advance payment data available"),
+    'Outstanding Dues': ('outstanding_dues.json', "📋 Outstanding Dues Data", "Download Outstanding Dues CSV",
+                         "outstanding_dues", "No outstanding dues data available"),
+    'Bill Upload': ('uploaded_bills.json', "📄 Bill Upload Data", "Download Bills CSV", "bills",
+                    "No bill data available"),
+    'Cash Handover': ('cash_handovers.json', "💵 Cash Handover Data", "Download Cash Handover CSV", "cash_handover",
+                      "No cash handover data available"),
+    'Account Handover': ('account_handovers.json', "🏦 Account Handover Data", "Download Account Handover CSV",
+                         "account_handover", "No account handover data available"),
+    'Bad Debt': ('bad_debts.json', "💸 Bad Debt Data", "Download Bad Debt CSV", "bad_debt",
+                 "No bad debt data available"),
+    'Discount': ('discounts.json', "🏷️ Discount Data", "Download Discount CSV", "discount",
+                 "No discount data available"),
+    'Complementary Records': ('complementary_records.json', None, None, None, None)
 }
 
-# Individual page downloads
-st.markdown("### 📄 Download by Page")
-
-col1, col2, col3 = st.columns(3)
-
-# Sales Management
-with col1:
-    if st.button("📊 Sales Management Data"):
-        if all_data['Sales Management']:
-            df = pd.DataFrame(all_data['Sales Management'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Sales CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_sales_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No sales data available")
-
-# Expenditure Management
-with col2:
-    if st.button("💸 Expenditure Data"):
-        if all_data['Expenditure Management']:
-            df = pd.DataFrame(all_data['Expenditure Management'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Expenditures CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_expenditures_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No expenditure data available")
-
-# Room Management
-with col3:
-    if st.button("🏠 Room Management Data"):
-        if all_data['Room Management']:
-            # Convert rooms dict to list for DataFrame
-            rooms_list = [dict(room, room_id=room_id) for room_id, room in all_data['Room Management'].items()]
-            df = pd.DataFrame(rooms_list)
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Rooms CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_rooms_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No room data available")
-
-# Row 2
-col1, col2, col3 = st.columns(3)
-
-# Room Service
-with col1:
-    if st.button("🛎️ Room Service Data"):
-        if all_data['Room Service']:
-            df = pd.DataFrame(all_data['Room Service'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Room Service CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_room_service_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No room service data available")
-
-# Complementary Rooms
-with col2:
-    if st.button("🆓 Complementary Rooms Data"):
-        if all_data['Complementary Rooms']:
-            df = pd.DataFrame(all_data['Complementary Rooms'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Complementary CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_complementary_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No complementary room data available")
-
-# Advance Payments
-with col3:
-    if st.button("💰 Advance Payments Data"):
-        if all_data['Advance Payments']:
-            df = pd.DataFrame(all_data['Advance Payments'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Advance Payments CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_advance_payments_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No advance payment data available")
-
-# Row 3
-col1, col2, col3 = st.columns(3)
-
-# Outstanding Dues
-with col1:
-    if st.button("📋 Outstanding Dues Data"):
-        if all_data['Outstanding Dues']:
-            df = pd.DataFrame(all_data['Outstanding Dues'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Outstanding Dues CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_outstanding_dues_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No outstanding dues data available")
-
-# Bill Upload
-with col2:
-    if st.button("📄 Bill Upload Data"):
-        if all_data['Bill Upload']:
-            df = pd.DataFrame(all_data['Bill Upload'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Bills CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_bills_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No bill data available")
+def load_data_type(data_type):
+    """Load one data type's records (rooms keyed by room number)"""
+    data = load_data(DOWNLOADS[data_type][0], selected_hotel)
+    if data_type != 'Room Management':
+        return data
+    # Convert rooms list to dictionary for backward compatibility
+    if isinstance(data, list):
+        return {room['room_number']: room for room in data if isinstance(room, dict) and 'room_number' in room}
+    return data if data else {}
 
-# Cash Handover
-with col3:
-    if st.button("💵 Cash Handover Data"):
-        if all_data['Cash Handover']:
-            df = pd.DataFrame(all_data['Cash Handover'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Cash Handover CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_cash_handover_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No cash handover data available")
+def room_rows(rooms):
+    """Rooms as export rows, each with its room_id (rooms without a number are left out)"""
+    return [dict(room, room_id=room['room_number']) for room in rooms if isinstance(room, dict) and 'room_number' in room]
 
-# Row 4
-col1, col2, col3 = st.columns(3)
+def data_type_frame(data_type, data):
+    if data_type == 'Room Management':
+        # Convert rooms dict to list for DataFrame
+        return pd.DataFrame([dict(room, room_id=room_id) for room_id, room in data.items()])
+    return pd.DataFrame(data)
 
-# Account Handover
-with col1:
-    if st.button("🏦 Account Handover Data"):
-        if all_data['Account Handover']:
-            df = pd.DataFrame(all_data['Account Handover'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Account Handover CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_account_handover_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No account handover data available")
+# Record counts and amount totals for every data type, from one aggregate query
+totals_by_file = table_totals([filename for filename, *_ in DOWNLOADS.values()], selected_hotel)
+data_totals = {data_type: totals_by_file[filename] for data_type, (filename, *_) in DOWNLOADS.items()}
 
-# Bad Debt
-with col2:
-    if st.button("💸 Bad Debt Data"):
-        if all_data['Bad Debt']:
-            df = pd.DataFrame(all_data['Bad Debt'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Bad Debt CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_bad_debt_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No bad debt data available")
+# Individual page downloads
+st.markdown("### 📄 Download by Page")
 
-# Discount
-with col3:
-    if st.button("🏷️ Discount Data"):
-        if all_data['Discount']:
-            df = pd.DataFrame(all_data['Discount'])
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download Discount CSV",
-                data=csv,
-                file_name=f"{hotel_name.replace(' ', '_').lower()}_discount_{get_current_date()}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.warning("No discount data available")
+@st.fragment
+def page_downloads():
+    page_types = [data_type for data_type, (_, button, *_) in DOWNLOADS.items() if button]
+    for row_start in range(0, len(page_types), 3):
+        for column, data_type in zip(st.columns(3), page_types[row_start:row_start + 3]):
+            _, button, download_label, suffix, empty_message = DOWNLOADS[data_type]
+            with column:
+                if st.button(button):
+                    data = load_data_type(data_type)
+                    if data:
+                        csv = data_type_frame(data_type, data).to_csv(index=False)
+                        st.download_button(
+                            label=download_label,
+                            data=csv,
+                            file_name=f"{hotel_name.replace(' ', '_').lower()}_{suffix}_{get_current_date()}.csv",
+                            mime="text/csv"
+                        )
+                    else:
+                        st.warning(empty_message)
+
+page_downloads()
 
 st.markdown("---")
 
 # Bulk download options
 st.markdown("### 📦 Bulk Download Options")
 
-col1, col2 = st.columns(2)
+col1, col2, col3 = st.columns(3)
 
 with col1:
     if st.button("📥 Download All Data as ZIP", type="primary"):
         try:
-            # Create ZIP file in memory
-            zip_buffer = io.BytesIO()
-            
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                # Add each data type to ZIP
-                for data_type, data in all_data.items():
-                    if data:  # Only add if data exists
-                        if data_type == 'Room Management':
-                            # Handle rooms dict specially
-                            rooms_list = [dict(room, room_id=room_id) for room_id, room in data.items()]
-                            df = pd.DataFrame(rooms_list)
-                        else:
-                            df = pd.DataFrame(data)
-                        
-                        csv_content = df.to_csv(index=False)
-                        filename = f"{data_type.replace(' ', '_').lower()}.csv"
-                        zip_file.writestr(filename, csv_content)
-                
-                # Add a summary file
-                summary_data = {
-                    'Hotel': hotel_name,
-                    'Download Date': get_current_date(),
-                    'Admin User': st.session_state.get('username', 'Unknown'),
-                    'Data Types Included': len([d for d in all_data.values() if d]),
-                    'Total Records': sum(len(d) if isinstance(d, list) else len(d.keys()) for d in all_data.values() if d)
-                }
-                summary_df = pd.DataFrame([summary_data])
-                zip_file.writestr("download_summary.csv", summary_df.to_csv(index=False))
-            
-            zip_buffer.seek(0)
-            
+            # Stream each data type into the archive a batch at a time
+            progress_bar = st.progress(0.0, text="Preparing ZIP file...")
+
+            def show_progress(done, total, name, records):
+                progress_bar.progress(done / total, text=f"Exported {name} ({records} records)")
+
+            entries = [(f"{data_type.replace(' ', '_').lower()}.csv", filename, 'csv',
+                        room_rows if data_type == 'Room Management' else None)
+                       for data_type, (filename, *_) in DOWNLOADS.items()]
+            export, counts = export_zip(entries, selected_hotel, skip_empty=True, progress=show_progress)
+
+            # Add a summary file
+            summary_data = {
+                'Hotel': hotel_name,
+                'Download Date': get_current_date(),
+                'Admin User': st.session_state.get('username', 'Unknown'),
+                'Data Types Included': len(counts),
+                'Total Records': sum(counts.values())
+            }
+            summary_df = pd.DataFrame([summary_data])
+            export.add_text("download_summary.csv", summary_df.to_csv(index=False))
+
             st.download_button(
                 label="📥 Download ZIP File",
-                data=zip_buffer.getvalue(),
+                data=export.finish(),
                 file_name=f"{hotel_name.replace(' ', '_').lower()}_complete_data_{get_current_date()}.zip",
                 mime="application/zip"
             )
@@ -308,20 +159,42 @@ with col1:
             st.error(f"Error creating ZIP file: {str(e)}")
 
 with col2:
+    if st.button("📗 Download All Data as Excel"):
+        try:
+            # One sheet per data type, streamed row by row into a write-only workbook
+            progress_bar = st.progress(0.0, text="Preparing Excel workbook...")
+
+            def show_progress(done, total, name, records):
+                progress_bar.progress(done / total, text=f"Exported {name} ({records} records)")
+
+            entries = [(data_type, filename, room_rows if data_type == 'Room Management' else None)
+                       for data_type, (filename, *_) in DOWNLOADS.items()]
+            workbook = export_xlsx(entries, selected_hotel, progress=show_progress, summary={
+                'Hotel': hotel_name,
+                'Download Date': get_current_date(),
+                'Admin User': st.session_state.get('username', 'Unknown')
+            })
+
+            st.download_button(
+                label="📗 Download Excel File",
+                data=workbook,
+                file_name=f"{hotel_name.replace(' ', '_').lower()}_complete_data_{get_current_date()}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+            st.success("✅ Excel workbook prepared for download!")
+
+        except Exception as e:
+            st.error(f"Error creating Excel workbook: {str(e)}")
+
+with col3:
     if st.button("📊 Download Summary Report"):
         try:
             # Create summary report
             summary_data = []
-            for data_type, data in all_data.items():
-                if isinstance(data, list):
-                    record_count = len(data)
-                    total_amount = sum(item.get('amount', 0) for item in data if isinstance(item, dict) and 'amount' in item)
-                elif isinstance(data, dict):
-                    record_count = len(data)
-                    total_amount = 0
-                else:
-                    record_count = 0
-                    total_amount = 0
+            for data_type, totals in data_totals.items():
+                record_count = totals['records']
+                total_amount = totals['amount']
                 
                 summary_data.append({
                     'Data Type': data_type,
@@ -345,26 +218,55 @@ with col2:
 
 st.markdown("---")
 
+# Typed, compressed snapshots for offline analysis
+st.markdown("### 🗃️ Parquet Snapshot")
+
+if not arrow_available():
+    st.info("Parquet export needs pyarrow. Install it with `pip install pyarrow` to enable this option.")
+else:
+    parquet_scope = st.selectbox("Data to export", ["All Data Types"] + [data_type for data_type in DOWNLOADS
+                                                                        if DOWNLOADS[data_type][1]])
+    include_ipc = st.checkbox("Also include Arrow IPC files (memory-mappable)")
+    if st.button("🗃️ Export Parquet Snapshot"):
+        try:
+            progress_bar = st.progress(0.0, text="Preparing Parquet snapshot...")
+
+            def show_progress(done, total, name, records):
+                progress_bar.progress(done / total, text=f"Exported {name} ({records} records)")
+
+            if parquet_scope == "All Data Types":
+                filenames = [filename for filename, *_ in DOWNLOADS.values()]
+                suffix = "complete_data"
+            else:
+                filenames = [DOWNLOADS[parquet_scope][0]]
+                suffix = DOWNLOADS[parquet_scope][3]
+            archive, counts = export_parquet(filenames, selected_hotel, ipc=include_ipc, progress=show_progress)
+
+            st.download_button(
+                label="🗃️ Download Parquet ZIP",
+                data=archive,
+                file_name=f"{hotel_name.replace(' ', '_').lower()}_{suffix}_parquet_{get_current_date()}.zip",
+                mime="application/zip"
+            )
+
+            st.success(f"✅ Parquet snapshot prepared: {sum(counts.values())} records, partitioned by hotel and month")
+            st.caption("Read it with `pyarrow.dataset.dataset('<table>', partitioning='hive')`; "
+                       "open `.arrow` files with `pyarrow.memory_map`.")
+
+        except Exception as e:
+            st.error(f"Error creating Parquet snapshot: {str(e)}")
+
+st.markdown("---")
+
 # Data statistics
 st.markdown("### 📈 Data Statistics")
 
 total_records = 0
 total_amount = 0
 
-for data_type, data in all_data.items():
-    if data:
-        if isinstance(data, list):
-            record_count = len(data)
-            amount = sum(item.get('amount', 0) for item in data if isinstance(item, dict) and 'amount' in item)
-        elif isinstance(data, dict):
-            record_count = len(data)
-            amount = 0
-        else:
-            record_count = 0
-            amount = 0
-        
-        total_records += record_count
-        total_amount += amount
+for data_type, totals in data_totals.items():
+    total_records += totals['records']
+    total_amount += totals['amount']
 
 col1, col2, col3, col4 = st.columns(4)
 
@@ -375,7 +277,7 @@ with col2:
     st.metric("Total Amount", f"₹{total_amount:,.2f}")
 
 with col3:
-    data_types_with_data = len([d for d in all_data.values() if d])
+    data_types_with_data = len([totals for totals in data_totals.values() if totals['records']])
     st.metric("Active Data Types", data_types_with_data)
 
 with col4:
@@ -385,16 +287,9 @@ with col4:
 st.markdown("### 📋 Data Breakdown")
 
 breakdown_data = []
-for data_type, data in all_data.items():
-    if isinstance(data, list):
-        record_count = len(data)
-        total_amount = sum(item.get('amount', 0) for item in data if isinstance(item, dict) and 'amount' in item)
-    elif isinstance(data, dict):
-        record_count = len(data)
-        total_amount = 0
-    else:
-        record_count = 0
-        total_amount = 0
+for data_type, totals in data_totals.items():
+    record_count = totals['records']
+    total_amount = totals['amount']
     
     breakdown_data.append({
         'Page/Module': data_type,
@@ -408,3 +303,5 @@ st.dataframe(breakdown_df, use_container_width=True, hide_index=True)
 
 st.markdown("---")
 st.caption(f"Data Download Center | {hotel_name} | Generated on: {get_current_date()}")
+
+profile.finish()
@@ -7,6 +7,7 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
 import pandas as pd
 import plotly.express as px
@@ -16,6 +17,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # Check hotel access - only hotel2 (Saz Valley Bhaderwah) users can access restaurant
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
 hotel_access = st.session_state.get('hotel_access', 'both')
@@ -314,7 +318,6 @@ if restaurant_sales:
             payment_data[payment_type] = payment_data.get(payment_type, 0) + sale['amount']
 
         if payment_data:
-            import plotly.express as px
             fig_payment = px.pie(
                 values=list(payment_data.values()), 
                 names=list(payment_data.keys()), 
@@ -397,4 +400,6 @@ if user_role == 'Admin':
             )
 
 st.markdown("---")
-st.caption("Saz Valley Bhahrwah Restaurant • Integrated with hotel sales system")
\ No newline at end of file
+st.caption("Saz Valley Bhahrwah Restaurant • Integrated with hotel sales system")
+
+profile.finish()
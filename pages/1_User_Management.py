@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication, create_user, delete_user, load_users
+from utils.page_profiler import start_page_profile
 import pandas as pd
 
 # Check authentication
@@ -13,6 +14,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # Check admin privileges
 if st.session_state.get('user_role') != 'Admin':
     st.error("Access denied. Only admin can manage users.")
@@ -131,3 +135,5 @@ with col2:
 with col3:
     regular_users = len([u for u in users.values() if u['role'] == 'User'])
     st.metric("Regular Users", regular_users)
+
+profile.finish()
@@ -6,15 +6,22 @@ import os
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, save_data, get_current_date, get_current_datetime, generate_id
-from utils.backup_manager import list_backups, restore_from_backup, create_backup
+from utils.page_profiler import start_page_profile
+from utils.database_data_manager import load_data, save_data, get_current_date, get_current_datetime, generate_id, get_db_manager
+from utils.backup_manager import list_backups, restore_from_backup, create_backup, preview_point_in_time, restore_point_in_time
 import json
+from datetime import datetime, timedelta
+from utils.history_tables import HISTORY_TABLES, recent_changes, record_versions, undo_record_change
+from utils.db_backup import BACKUP_TABLES, dump_database, restore_database, list_database_backups
 
 # Check authentication
 if not check_authentication():
     st.warning("Please log in to access this page")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 st.title("🔄 Data Recovery System")
 
 # Get user details
@@ -31,7 +38,7 @@ if user_role != 'Admin':
 st.markdown(f"### Data Recovery for {hotel_name}")
 
 # Create tabs for different recovery options
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Current Data Status", "💾 Backup & Restore", "➕ Quick Data Entry", "🔧 Repair Tools"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📊 Current Data Status", "💾 Backup & Restore", "➕ Quick Data Entry", "🔧 Repair Tools", "⏪ Point-in-Time Restore", "↩️ Undo Record Changes"])
 
 with tab1:
     st.markdown("#### Current Data Status")
@@ -102,6 +109,77 @@ with tab2:
                             st.error(message)
         else:
             st.info("No backups available")
+    
+    st.markdown("---")
+    st.markdown("#### Database Backup")
+    st.caption("Streams the PostgreSQL tables into a compressed archive without locking them. "
+               "User accounts (with their password hashes) are not included.")
+    
+    db_tables = st.multiselect("Tables", BACKUP_TABLES, default=BACKUP_TABLES, key="db_backup_tables")
+    db_scope = st.radio("Hotels", ["This hotel only", "All hotels"], horizontal=True, key="db_backup_scope")
+    db_hotels = [selected_hotel] if db_scope == "This hotel only" else None
+    
+    if st.button("Create Database Backup", type="primary"):
+        db = get_db_manager()
+        if not db:
+            st.error("Database not available")
+        else:
+            progress_bar = st.progress(0.0)
+            steps = len(db_tables) * (1 if db_hotels else 2)
+            done = []
+            
+            def show_backup_progress(table_name, hotel, rows):
+                done.append(table_name)
+                progress_bar.progress(min(len(done) / steps, 1.0), text=f"{table_name} ({hotel}): {rows} rows")
+            
+            success, message, report = dump_database(db, db_tables, db_hotels, progress=show_backup_progress)
+            if success:
+                st.success(message)
+                st.info(f"{report['rows']} rows in {report['seconds']}s "
+                        f"({report['rows_per_second']} rows/s, {report['mb_per_second']} MB/s), "
+                        f"archive size {report['compressed_bytes'] / 1024:.1f} KB")
+            else:
+                st.error(message)
+    
+    db_backups = list_database_backups()
+    if db_backups:
+        for backup in db_backups[:5]:
+            col_a, col_b = st.columns([3, 1])
+            with col_a:
+                st.text(f"{backup['formatted_date']} - {backup['rows']} rows, {len(backup['tables'])} tables, "
+                        f"{backup['size'] / 1024:.1f} KB")
+            with col_b:
+                if selected_hotel in backup['hotels'] and st.button("Restore", key=f"restore_db_{backup['name']}"):
+                    st.session_state['db_restore_pending'] = (backup['name'], selected_hotel)
+        
+        # Restoring replaces data, so it only runs after the backup's contents are confirmed
+        pending = st.session_state.get('db_restore_pending')
+        pending_backup = next((b for b in db_backups if pending == (b['name'], selected_hotel)), None)
+        if pending_backup:
+            # Only the tables in this backup's manifest (older archives may still hold users)
+            restore_tables = [table for table in pending_backup['tables'] if table in BACKUP_TABLES]
+            st.warning(f"Restoring {pending_backup['formatted_date']} replaces this hotel location's rows in: "
+                       f"{', '.join(restore_tables)}")
+            col_a, col_b = st.columns(2)
+            with col_a:
+                if st.button("Confirm Database Restore", type="primary"):
+                    st.session_state.pop('db_restore_pending', None)
+                    db = get_db_manager()
+                    if not db:
+                        st.error("Database not available")
+                        st.stop()
+                    success, message, report = restore_database(db, pending_backup['path'], restore_tables,
+                                                                 [selected_hotel])
+                    if success:
+                        st.success(f"{message} ({report['rows']} rows in {report['seconds']}s)")
+                    else:
+                        st.error(message)
+            with col_b:
+                if st.button("Cancel", key="cancel_db_restore"):
+                    st.session_state.pop('db_restore_pending', None)
+                    st.rerun()
+    else:
+        st.info("No database backups available")
 
 with tab3:
     st.markdown("#### Quick Data Entry for Lost Records")
@@ -217,5 +295,116 @@ with tab4:
         else:
             st.success("No data integrity issues found")
 
+with tab5:
+    st.markdown("#### Point-in-Time Restore")
+    st.info("Restore a single table for this hotel location to how it was at a chosen time. Other tables and the other hotel are not touched.")
+    
+    restore_tables = [
+        ('sales', 'Sales Records'),
+        ('restaurant', 'Restaurant'),
+        ('expenditures', 'Expenditures'),
+        ('advance_payments', 'Advance Payments'),
+        ('outstanding_dues', 'Outstanding Dues'),
+        ('cash_handovers', 'Cash Handovers'),
+        ('account_handovers', 'Account Handovers'),
+        ('bad_debts', 'Bad Debts'),
+        ('discounts', 'Discounts'),
+        ('room_services', 'Room Services'),
+        ('complementary_rooms', 'Complementary Rooms'),
+        ('rooms', 'Rooms')
+    ]
+    table_labels = dict(restore_tables)
+    restore_table = st.selectbox("Table", [table for table, _ in restore_tables], format_func=lambda t: table_labels[t])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        default_time = datetime.now() - timedelta(minutes=10)
+        restore_date = st.date_input("Restore to date", value=default_time.date())
+    with col2:
+        restore_clock = st.time_input("Restore to time", value=default_time.time().replace(microsecond=0))
+    restore_timestamp = datetime.combine(restore_date, restore_clock)
+    
+    if st.button("Preview Changes (Dry Run)"):
+        success, message, diff = preview_point_in_time(restore_table, selected_hotel, restore_timestamp)
+        if success:
+            st.session_state['pitr_preview'] = (restore_table, selected_hotel, restore_timestamp)
+            st.info(message)
+            col_a, col_b, col_c = st.columns(3)
+            col_a.metric("Records restored", len(diff['added']))
+            col_b.metric("Records removed", len(diff['removed']))
+            col_c.metric("Records reverted", len(diff['changed']))
+            if diff['added']:
+                st.markdown("##### Records that will be restored")
+                st.dataframe(diff['added'], use_container_width=True)
+            if diff['removed']:
+                st.markdown("##### Records that will be removed")
+                st.dataframe(diff['removed'], use_container_width=True)
+            if diff['changed']:
+                st.markdown("##### Records that will be reverted")
+                st.dataframe([target for _, target in diff['changed']], use_container_width=True)
+        else:
+            st.session_state.pop('pitr_preview', None)
+            st.warning(message)
+    
+    # Restoring is only offered for the exact selection that was previewed
+    if st.session_state.get('pitr_preview') == (restore_table, selected_hotel, restore_timestamp):
+        if st.button("Restore Table to This Time", type="primary"):
+            success, message = restore_point_in_time(restore_table, selected_hotel, restore_timestamp)
+            st.session_state.pop('pitr_preview', None)
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
+
+with tab6:
+    st.markdown("#### Undo Record Changes")
+    st.info("Every insert, edit and delete is kept as a row version. Undo reverts one record without touching anything else.")
+    
+    history_table = st.selectbox("Table", HISTORY_TABLES, key="history_table",
+                                 format_func=lambda t: t.replace('_', ' ').title())
+    db = get_db_manager()
+    if not db:
+        st.error("Database not available")
+    else:
+        try:
+            changes = recent_changes(db, history_table, selected_hotel, limit=25)
+        except Exception as e:
+            changes = []
+            st.warning(f"Change history not available: {e}")
+        
+        operation_labels = {'I': 'Added', 'U': 'Edited', 'D': 'Deleted'}
+        if changes:
+            for change in changes:
+                data = change['data']
+                summary = data.get('customer_name') or data.get('description') or data.get('room_number') or ''
+                amount = data.get('amount') or data.get('total_amount')
+                col_a, col_b, col_c = st.columns([3, 1, 1])
+                with col_a:
+                    st.text(f"{change['changed_at']:%Y-%m-%d %H:%M:%S} - {operation_labels.get(change['operation'], change['operation'])} "
+                            f"{change['record_id']} {summary}" + (f" (₹{float(amount):,.2f})" if amount else ""))
+                with col_b:
+                    if st.button("Versions", key=f"versions_{history_table}_{change['record_id']}_{change['changed_at']}"):
+                        st.session_state['history_record'] = (history_table, change['record_id'])
+                with col_c:
+                    if st.button("Undo", key=f"undo_{history_table}_{change['record_id']}_{change['changed_at']}"):
+                        success, message = undo_record_change(db, history_table, change['record_id'])
+                        if success:
+                            st.success(message)
+                            st.rerun()
+                        else:
+                            st.error(message)
+        else:
+            st.info("No recorded changes for this table")
+        
+        selected_record = st.session_state.get('history_record')
+        if selected_record and selected_record[0] == history_table:
+            st.markdown(f"##### Versions of record {selected_record[1]}")
+            for version in record_versions(db, history_table, selected_record[1]):
+                valid_to = version['valid_to'].strftime('%Y-%m-%d %H:%M:%S') if version['valid_to'] else 'now'
+                with st.expander(f"{version['valid_from']:%Y-%m-%d %H:%M:%S} → {valid_to}"):
+                    st.json(version['data'])
+
 st.markdown("---")
-st.info("💡 **Tip**: All operations are logged and can be reviewed in the activity logs above.")
\ No newline at end of file
+st.info("💡 **Tip**: All operations are logged and can be reviewed in the activity logs above.")
+
+profile.finish()
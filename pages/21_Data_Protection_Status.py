@@ -9,14 +9,22 @@ from datetime import datetime, timedelta
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.data_integrity import check_all_data_integrity, repair_corrupted_files
-from utils.database_data_manager import load_data
+from utils.database_data_manager import load_data, get_db_manager
+from utils.daily_rollup import check_daily_rollup, rebuild_daily_rollup
+from utils.backup_worker import backup_worker
+from utils.query_monitor import query_monitor, SLOW_QUERY_MS
+import pandas as pd
 
 # Check authentication
 if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("🛡️ Data Protection Status")
@@ -25,9 +33,11 @@ st.markdown("Monitor and ensure your data is fully protected")
 # Data integrity check
 st.markdown("### 📊 Data Integrity Status")
 
+deep_verify = st.checkbox("Deep verify (parse every file instead of comparing checksums)")
+
 if st.button("🔍 Check Data Integrity", type="primary"):
     with st.spinner("Checking data integrity..."):
-        issues = check_all_data_integrity()
+        issues = check_all_data_integrity(deep=deep_verify)
         
         if not issues:
             st.success("✅ All data files are intact and healthy!")
@@ -69,6 +79,12 @@ for backup_name, backup_path in backup_dirs:
     else:
         st.error(f"❌ {backup_name}: Backup directory not found")
 
+worker_stats = backup_worker.stats()
+if worker_stats['failed']:
+    st.warning(f"⚠️ Background backups: {worker_stats['failed']} failed tasks, {worker_stats['pending']} pending")
+else:
+    st.info(f"🔄 Background backups: {worker_stats['completed']} completed, {worker_stats['pending']} pending")
+
 # Session persistence status
 st.markdown("### 🔐 Session Persistence Status")
 
@@ -126,6 +142,41 @@ if os.path.exists('data/access_log.json'):
 else:
     st.warning("⚠️ Data access log not found")
 
+# Query performance
+st.markdown("### 🐢 Query Performance")
+
+sort_options = {"Total time": "total_ms", "p95 latency": "p95_ms", "Calls": "calls", "Rows": "total_rows"}
+col1, col2 = st.columns(2)
+with col1:
+    sort_label = st.selectbox("Sort queries by", list(sort_options))
+with col2:
+    page_names = sorted({total['page'] for total in query_monitor.page_totals()})
+    page_filter = st.selectbox("Page", ["All pages"] + page_names)
+
+top_queries = query_monitor.top_queries(limit=15, sort_by=sort_options[sort_label],
+                                        page=None if page_filter == "All pages" else page_filter)
+if top_queries:
+    queries_df = pd.DataFrame(top_queries)[['page', 'operation', 'calls', 'total_ms', 'p95_ms',
+                                            'mean_ms', 'mean_rows', 'errors', 'statement']]
+    st.dataframe(queries_df, use_container_width=True, hide_index=True)
+
+    page_totals_df = pd.DataFrame(query_monitor.page_totals())
+    page_totals_df['total_ms'] = page_totals_df['total_ms'].round(1)
+    st.caption("Database time by page")
+    st.dataframe(page_totals_df, use_container_width=True, hide_index=True)
+else:
+    st.info("No database queries recorded since the app started")
+
+slow_queries = query_monitor.read_slow_log(limit=20)
+if slow_queries:
+    with st.expander(f"Slow queries (over {SLOW_QUERY_MS:.0f} ms) - latest {len(slow_queries)}"):
+        st.dataframe(pd.DataFrame(slow_queries)[['timestamp', 'page', 'operation', 'ms', 'rows', 'statement']],
+                     use_container_width=True, hide_index=True)
+
+if user_role == 'Admin' and st.button("Reset Query Statistics"):
+    query_monitor.clear()
+    st.rerun()
+
 # Data protection recommendations
 st.markdown("### 💡 Data Protection Recommendations")
 
@@ -157,3 +208,30 @@ if user_role == 'Admin':
                     st.write(f"• {repair}")
             else:
                 st.info("No recovery operations needed")
+
+    # Daily rollup (pre-aggregated period totals for the Dashboard and Financial Summary)
+    st.markdown("#### 📅 Daily Rollup")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔎 Check Daily Rollup"):
+            with st.spinner("Comparing the rollup with the records..."):
+                try:
+                    mismatches = check_daily_rollup(get_db_manager())
+                except Exception as e:
+                    mismatches = None
+                    st.error(f"Rollup check failed: {str(e)}")
+            if mismatches:
+                st.warning(f"{len(mismatches)} rollup rows differ from the records - rebuild the rollup")
+                st.dataframe(pd.DataFrame(mismatches), use_container_width=True, hide_index=True)
+            elif mismatches is not None:
+                st.success("Daily rollup matches the records")
+    with col2:
+        if st.button("♻️ Rebuild Daily Rollup"):
+            with st.spinner("Rebuilding the rollup..."):
+                success, message = rebuild_daily_rollup(get_db_manager())
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
+
+profile.finish()
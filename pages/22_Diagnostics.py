@@ -0,0 +1,108 @@
+import streamlit as st
+import sys
+import os
+
+# Add utils directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+from utils.auth import check_authentication
+from utils.page_profiler import page_profiler
+from utils.database_data_manager import get_current_date
+import pandas as pd
+import plotly.express as px
+
+# Check authentication
+if not check_authentication():
+    st.error("Please login first")
+    st.stop()
+
+# Check admin privileges
+if st.session_state.get('user_role') != 'Admin':
+    st.error("Access denied. Only admin can view diagnostics.")
+    st.stop()
+
+st.title("🩺 Diagnostics")
+st.markdown("Page render profiles: where each page spends its time")
+
+# Profiling switch (applies to every session in this app process)
+enabled = st.checkbox("Profile page runs", value=page_profiler.enabled,
+                      help="Times each page section, counts load_data calls and tracks peak memory. "
+                           "Adds some overhead while switched on.")
+if enabled != page_profiler.enabled:
+    page_profiler.enabled = enabled
+    st.rerun()
+
+if not page_profiler.enabled:
+    st.info("Page profiling is off. Switch it on, use the app for a while, then come back here.")
+
+runs = page_profiler.flat_runs()
+if not runs:
+    st.info("No page runs profiled yet")
+    st.stop()
+
+# Per page summary
+st.markdown("### 📊 Page Summary")
+
+by_hotel = st.checkbox("Split by hotel", value=True)
+summary_df = pd.DataFrame(page_profiler.summary(by_hotel=by_hotel))
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Profiled Runs", len(runs))
+with col2:
+    st.metric("Pages", summary_df['page'].nunique())
+with col3:
+    load_calls = sum(run['load_calls'] for run in runs)
+    cache_hits = sum(run['cache_hits'] for run in runs)
+    st.metric("load_data Cache Hit Rate", f"{cache_hits / load_calls:.1%}" if load_calls else "-")
+with col4:
+    st.metric("Max Peak Memory", f"{summary_df['max_peak_memory_mb'].max():.1f} MB")
+
+st.dataframe(summary_df, use_container_width=True, hide_index=True)
+
+# Section breakdown
+st.markdown("### ⏱️ Time by Section")
+
+section_columns = [column for column in summary_df.columns if column.endswith(' ms') and column[:-3] in
+                   page_profiler.section_names()]
+if section_columns:
+    summary_df['label'] = summary_df['page'] + ' (' + summary_df['hotel'] + ')'
+    sections_df = summary_df.melt(id_vars=['label'], value_vars=section_columns,
+                                  var_name='section', value_name='mean ms')
+    sections_df['section'] = sections_df['section'].str[:-3]
+    fig = px.bar(sections_df, x='mean ms', y='label', color='section', orientation='h',
+                 title="Mean wall time per run by section")
+    fig.update_layout(yaxis_title=None, height=max(300, 40 * len(summary_df)))
+    st.plotly_chart(fig, use_container_width=True)
+
+# Recent runs
+st.markdown("### 🕒 Recent Runs")
+
+page_names = sorted({run['page'] for run in runs})
+page_filter = st.selectbox("Page", ["All pages"] + page_names)
+runs_df = pd.DataFrame(page_profiler.flat_runs(page=None if page_filter == "All pages" else page_filter))
+st.dataframe(runs_df.head(200), use_container_width=True, hide_index=True)
+st.caption("Incomplete runs ended early (st.stop or a rerun) and only cover the sections reached.")
+
+# CSV export
+st.markdown("### 📥 Export")
+
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button(
+        label="Download Summary CSV",
+        data=summary_df.drop(columns=['label'], errors='ignore').to_csv(index=False),
+        file_name=f"page_profile_summary_{get_current_date()}.csv",
+        mime="text/csv"
+    )
+with col2:
+    st.download_button(
+        label="Download Runs CSV",
+        data=pd.DataFrame(runs).to_csv(index=False),
+        file_name=f"page_profile_runs_{get_current_date()}.csv",
+        mime="text/csv"
+    )
+
+if st.button("Reset Profiles"):
+    page_profiler.clear()
+    st.rerun()
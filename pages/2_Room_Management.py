@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, get_current_date, get_current_datetime, generate_id
 import pandas as pd
 
@@ -14,6 +15,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # All users can view rooms and book, admin can edit rooms
 user_role = st.session_state.get('user_role', 'User')
 
@@ -453,4 +457,6 @@ if user_role == 'Admin':
         })
 
     df_rooms = pd.DataFrame(room_details)
-    st.dataframe(df_rooms, use_container_width=True, hide_index=True)
\ No newline at end of file
+    st.dataframe(df_rooms, use_container_width=True, hide_index=True)
+
+profile.finish()
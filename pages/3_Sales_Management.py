@@ -6,7 +6,11 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
+from utils.page_profiler import start_page_profile
+from utils.database_data_manager import generate_id, get_current_datetime
+from utils.hotel_snapshot import HotelSnapshot
+from utils.date_filter import filter_by_period
+from utils.record_list import record_list
 import pandas as pd
 import plotly.express as px
 
@@ -15,6 +19,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # All users can add sales data, admin can edit/delete
 user_role = st.session_state.get('user_role', 'User')
 
@@ -22,27 +29,21 @@ st.title("💰 Sales Management")
 
 # Load data
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-sales = load_data('sales.json', selected_hotel)
-rooms_list = load_data('rooms.json', selected_hotel)
-outstanding_dues = load_data('outstanding_dues.json', selected_hotel)
-advance_payments = load_data('advance_payments.json', selected_hotel)
+snapshot = HotelSnapshot(selected_hotel)
+sales = snapshot.load('sales.json')
+outstanding_dues = snapshot.load('outstanding_dues.json')
+advance_payments = snapshot.load('advance_payments.json')
 
 # Ensure sales is a list
 if not isinstance(sales, list):
     sales = []
-    save_data('sales.json', sales, selected_hotel)
-
-# Convert list to dictionary if needed
-if isinstance(rooms_list, list):
-    rooms = {}
-    for room in rooms_list:
-        if isinstance(room, dict) and 'room_number' in room:
-            rooms[room['room_number']] = room
-else:
-    rooms = rooms_list if rooms_list else {}
+    snapshot.save('sales.json', sales)
+
+# Rooms keyed by room number
+rooms = snapshot.rooms_by_number()
 
 # Date filtering at the top
-from datetime import datetime, timedelta
+from datetime import datetime
 
 st.markdown("### 📅 Filter by Date")
 
@@ -63,47 +64,8 @@ with col3:
     else:
         end_date = None
 
-# Function to filter sales by date
-def filter_sales_by_date(sales_data, date_filter, start_date=None, end_date=None):
-    if date_filter == "All Time":
-        return sales_data
-
-    today = datetime.now()
-    filtered_data = []
-
-    for sale in sales_data:
-        try:
-            # Use the sale date for filtering
-            sale_date = sale['date'][:10] if sale['date'] else None
-            if not sale_date:
-                continue
-            
-            sale_datetime = datetime.strptime(sale_date, '%Y-%m-%d')
-            
-            if date_filter == "Today":
-                if sale_datetime.date() == today.date():
-                    filtered_data.append(sale)
-            elif date_filter == "This Week":
-                week_start = today - timedelta(days=today.weekday())
-                if sale_datetime.date() >= week_start.date():
-                    filtered_data.append(sale)
-            elif date_filter == "This Month":
-                if sale_datetime.month == today.month and sale_datetime.year == today.year:
-                    filtered_data.append(sale)
-            elif date_filter == "This Year":
-                if sale_datetime.year == today.year:
-                    filtered_data.append(sale)
-            elif date_filter == "Custom Range" and start_date and end_date:
-                if start_date <= sale_datetime.date() <= end_date:
-                    filtered_data.append(sale)
-        except ValueError:
-            # Skip records with invalid dates
-            continue
-
-    return filtered_data
-
 # Apply date filter to sales data
-filtered_sales_overview = filter_sales_by_date(sales, date_filter, start_date, end_date)
+filtered_sales_overview = filter_by_period(sales, date_filter, start_date, end_date)
 
 # Sales overview with filtered data
 st.markdown("### Sales Overview")
@@ -194,7 +156,7 @@ with st.form("add_sale_form"):
                     'created_by': st.session_state.get('username', 'Unknown')
                 }
                 outstanding_dues.append(new_due)
-                save_data('outstanding_dues.json', outstanding_dues, selected_hotel)
+                snapshot.save('outstanding_dues.json', outstanding_dues)
                 st.success(f"Outstanding due of ₹{amount:,.2f} added successfully!")
 
             elif payment_type == "Advance Cash":
@@ -218,7 +180,7 @@ with st.form("add_sale_form"):
                     'created_by': st.session_state.get('username', 'Unknown')
                 }
                 advance_payments.append(new_advance)
-                save_data('advance_payments.json', advance_payments, selected_hotel)
+                snapshot.save('advance_payments.json', advance_payments)
                 st.success(f"Advance payment of ₹{amount:,.2f} added successfully!")
 
             else:
@@ -237,7 +199,7 @@ with st.form("add_sale_form"):
                 }
 
                 # Add to sales data and save
-                if add_record('sales.json', new_sale, selected_hotel):
+                if snapshot.add_record('sales.json', new_sale):
                     st.success(f"Sale of ₹{amount:,.2f} added to {payment_type} sales successfully!")
                 else:
                     st.error("Failed to add sale record")
@@ -252,7 +214,7 @@ with st.form("add_sale_form"):
                     rooms[room_num]['status'] = 'Occupied'
                     rooms[room_num]['current_guest'] = customer_name
                     rooms[room_num]['checkin_date'] = get_current_datetime()[:10]
-                    save_data('rooms.json', rooms, selected_hotel)
+                    snapshot.save('rooms.json', rooms)
 
             st.rerun()
 
@@ -265,8 +227,8 @@ st.markdown("### Sales Records")
 filtered_sales = []
 
 if sales:
-    # Apply date filter first
-    filtered_sales = filter_sales_by_date(sales, date_filter, start_date, end_date)
+    # Apply date filter first (same period as the overview)
+    filtered_sales = filtered_sales_overview
     
     # Additional filter options
     st.markdown("#### Additional Filters")
@@ -294,11 +256,21 @@ if sales:
     
     st.markdown("---")
 
-    # Display sales
-    for sale in filtered_sales:
+    # Display sales: one grid, with the selected sale's details and actions below it
+    sale = record_list(filtered_sales, {
+        'ID': 'id',
+        'Date': lambda s: s.get('original_advance_date', s['date'][:10] if s['date'] else 'N/A'),
+        'Customer': 'customer_name',
+        'Type': 'type',
+        'Payment': 'payment_type',
+        'Amount': 'amount',
+        'Status': 'status'
+    }, key='sales_list', amount_columns=['Amount'])
+    if sale:
         # Show original advance date for advance payments, regular date for others
         display_date = sale.get('original_advance_date', sale['date'][:10] if sale['date'] else 'N/A')
-        with st.expander(f"#{sale['id']} - {sale['customer_name']} - ₹{sale['amount']:,.2f} - {display_date}"):
+        with st.container(border=True):
+            st.markdown(f"#### #{sale['id']} - {sale['customer_name']} - ₹{sale['amount']:,.2f} - {display_date}")
             col1, col2 = st.columns(2)
 
             with col1:
@@ -323,12 +295,12 @@ if sales:
 
                 with col1:
                     if sale['status'] == 'Pending' and st.button(f"✅ Complete", key=f"complete_{sale['id']}"):
-                        updated_sales = load_data('sales.json', selected_hotel)
+                        updated_sales = snapshot.load('sales.json')
                         for s in updated_sales:
                             if s['id'] == sale['id']:
                                 s['status'] = 'Completed'
                                 break
-                        save_data('sales.json', updated_sales, selected_hotel)
+                        snapshot.save('sales.json', updated_sales)
                         st.success("Sale marked as completed!")
                         st.rerun()
 
@@ -344,12 +316,12 @@ if sales:
 
                 with col4:
                     if sale['status'] == 'Completed' and st.button(f"⏸️ Pending", key=f"pending_{sale['id']}"):
-                        updated_sales = load_data('sales.json', selected_hotel)
+                        updated_sales = snapshot.load('sales.json')
                         for s in updated_sales:
                             if s['id'] == sale['id']:
                                 s['status'] = 'Pending'
                                 break
-                        save_data('sales.json', updated_sales, selected_hotel)
+                        snapshot.save('sales.json', updated_sales)
                         st.success("Sale marked as pending!")
                         st.rerun()
 
@@ -376,7 +348,7 @@ if sales:
                         col_update, col_cancel = st.columns(2)
                         with col_update:
                             if st.form_submit_button("💾 Update Sale", type="primary"):
-                                updated_sales = load_data('sales.json', selected_hotel)
+                                updated_sales = snapshot.load('sales.json')
                                 for s in updated_sales:
                                     if s['id'] == sale['id']:
                                         s['amount'] = new_amount
@@ -386,7 +358,7 @@ if sales:
                                         s['description'] = new_description
                                         s['status'] = new_status
                                         break
-                                save_data('sales.json', updated_sales, selected_hotel)
+                                snapshot.save('sales.json', updated_sales)
                                 st.session_state[f"edit_mode_{sale['id']}"] = False
                                 st.success("Sale updated successfully!")
                                 st.rerun()
@@ -403,9 +375,9 @@ if sales:
                     
                     with col_confirm:
                         if st.button(f"🗑️ Yes, Delete", key=f"confirm_delete_yes_{sale['id']}", type="primary"):
-                            updated_sales = load_data('sales.json', selected_hotel)
+                            updated_sales = snapshot.load('sales.json')
                             updated_sales = [s for s in updated_sales if s['id'] != sale['id']]
-                            save_data('sales.json', updated_sales, selected_hotel)
+                            snapshot.save('sales.json', updated_sales)
                             st.session_state[f"confirm_delete_{sale['id']}"] = False
                             st.success("Sale deleted successfully!")
                             st.rerun()
@@ -504,7 +476,7 @@ if cash_sales > 0:
             if not received_by:
                 st.error("Please specify who received the cash")
             else:
-                cash_handovers = load_data('cash_handovers.json', selected_hotel)
+                cash_handovers = snapshot.load('cash_handovers.json')
                 new_handover = {
                     'id': generate_id(),
                     'date': get_current_datetime(),
@@ -514,8 +486,10 @@ if cash_sales > 0:
                     'created_by': st.session_state.get('username', 'Unknown')
                 }
                 cash_handovers.append(new_handover)
-                save_data('cash_handovers.json', cash_handovers, selected_hotel)
+                snapshot.save('cash_handovers.json', cash_handovers)
                 st.success(f"Cash handover of ₹{handover_amount:,.2f} recorded for {received_by}")
                 st.rerun()
 else:
-    st.info("No cash sales to handover")
\ No newline at end of file
+    st.info("No cash sales to handover")
+
+profile.finish()
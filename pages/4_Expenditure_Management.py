@@ -7,6 +7,7 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
 import pandas as pd
 import plotly.express as px
@@ -16,6 +17,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # All users can add expenditure data, admin can edit/delete
 user_role = st.session_state.get('user_role', 'User')
 
@@ -260,4 +264,6 @@ if expenditures:
         })
 
     df_comparison = pd.DataFrame(comparison_data)
-    st.dataframe(df_comparison, use_container_width=True)
\ No newline at end of file
+    st.dataframe(df_comparison, use_container_width=True)
+
+profile.finish()
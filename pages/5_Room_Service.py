@@ -6,7 +6,9 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
+from utils.record_list import record_list
 import pandas as pd
 
 # Check authentication
@@ -14,6 +16,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # All users can add room service data, admin can edit/delete
 user_role = st.session_state.get('user_role', 'User')
 
@@ -202,8 +207,18 @@ if room_services:
     priority_order = {"Urgent": 0, "High": 1, "Normal": 2}
     filtered_services.sort(key=lambda x: (priority_order.get(x['priority'], 3), x['date']))
 
-    # Display services
-    for service in filtered_services:
+    # Display services: one grid, with the selected request's details and actions below it
+    priority_markers = {"Urgent": "🔴", "High": "🟠"}
+    service = record_list(filtered_services, {
+        'ID': 'id',
+        'Date': lambda s: s['date'][:10] if s.get('date') else 'N/A',
+        'Room': 'room_number',
+        'Service': 'service_item',
+        'Priority': lambda s: f"{priority_markers.get(s['priority'], '⚪')} {s['priority']}",
+        'Amount': 'amount',
+        'Status': 'status'
+    }, key='room_service_list', amount_columns=['Amount'])
+    if service:
         # Color coding based on priority
         if service['priority'] == 'Urgent':
             border_color = "#ff4444"
@@ -212,122 +227,122 @@ if room_services:
         else:
             border_color = "#cccccc"
 
-        with st.container():
+        with st.container(border=True):
             st.markdown(f"""
             <div style="border-left: 4px solid {border_color}; padding-left: 10px; margin-bottom: 10px;">
             """, unsafe_allow_html=True)
 
-            with st.expander(f"#{service['id']} - {service['room_number']} - {service['service_item']} - ₹{service['amount']:,.2f}"):
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.write(f"**Date:** {service['date']}")
-                    st.write(f"**Room:** {service['room_number']}")
-                    st.write(f"**Customer:** {service['customer_name']}")
-                    st.write(f"**Service:** {service['service_item']}")
-                    st.write(f"**Category:** {service['service_category']}")
-
-                with col2:
-                    st.write(f"**Quantity:** {service['quantity']}")
-                    st.write(f"**Unit Price:** ₹{service['unit_price']}")
-                    st.write(f"**Total Amount:** ₹{service['amount']:,.2f}")
-                    st.write(f"**Priority:** {service['priority']}")
-                    st.write(f"**Status:** {service['status']}")
-
-                if service.get('special_instructions'):
-                    st.write(f"**Special Instructions:** {service['special_instructions']}")
-
-                # Service status management
-                col1, col2, col3, col4 = st.columns(4)
-
-                with col1:
-                    if service['status'] == 'Pending' and st.button(f"Start Service", key=f"start_{service['id']}"):
-                        for s in room_services:
-                            if s['id'] == service['id']:
-                                s['status'] = 'In Progress'
-                                break
-                        save_data('room_services.json', room_services, selected_hotel)
-                        st.success("Service started!")
-                        st.rerun()
+            st.markdown(f"#### #{service['id']} - {service['room_number']} - {service['service_item']} - ₹{service['amount']:,.2f}")
+            col1, col2 = st.columns(2)
 
-                with col2:
-                    if service['status'] == 'In Progress':
-                        with st.form(f"complete_service_{service['id']}"):
-                            st.write(f"**Amount:** ₹{service['amount']:,.2f}")
-                            payment_type = st.selectbox("Payment Type", ["Cash", "Account"], key=f"service_payment_{service['id']}")
-
-                            if st.form_submit_button("Complete & Add to Sales"):
-                                # Update service status
-                                for s in room_services:
-                                    if s['id'] == service['id']:
-                                        s['status'] = 'Completed'
-                                        s['completed_date'] = get_current_datetime()
-                                        s['payment_method'] = payment_type
-                                        break
-                                save_data('room_services.json', room_services, selected_hotel)
-
-                                # Add to appropriate sales section based on payment type
-                                sales = load_data('sales.json', selected_hotel)
-                                new_sale = {
-                                    'id': generate_id(),
-                                    'date': get_current_datetime(),
-                                    'type': 'Room Service',
-                                    'amount': service['amount'],
-                                    'payment_type': payment_type,
-                                    'customer_name': service['customer_name'],
-                                    'description': f"Room service: {service['service_item']}",
-                                    'room_number': service['room_number'],
-                                    'status': 'Completed',
-                                    'created_by': st.session_state.get('username', 'Unknown')
-                                }
-                                sales.append(new_sale)
-                                selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                                save_data('sales.json', sales, selected_hotel)
-                                save_data('room_services.json', room_services, selected_hotel)
-
-                                # Show success message indicating which sales section it went to
-                                if payment_type == 'Cash':
-                                    st.success(f"Service completed and added to Cash Sales section!")
-                                else:
-                                    st.success(f"Service completed and added to Account Sales section!")
-                                st.rerun()
-
-                with col3:
-                    if service['status'] in ['Pending', 'In Progress'] and st.button(f"Cancel", key=f"cancel_{service['id']}"):
-                        for s in room_services:
-                            if s['id'] == service['id']:
-                                s['status'] = 'Cancelled'
-                                break
-                        save_data('room_services.json', room_services, selected_hotel)
-                        st.warning("Service cancelled!")
-                        st.rerun()
+            with col1:
+                st.write(f"**Date:** {service['date']}")
+                st.write(f"**Room:** {service['room_number']}")
+                st.write(f"**Customer:** {service['customer_name']}")
+                st.write(f"**Service:** {service['service_item']}")
+                st.write(f"**Category:** {service['service_category']}")
+
+            with col2:
+                st.write(f"**Quantity:** {service['quantity']}")
+                st.write(f"**Unit Price:** ₹{service['unit_price']}")
+                st.write(f"**Total Amount:** ₹{service['amount']:,.2f}")
+                st.write(f"**Priority:** {service['priority']}")
+                st.write(f"**Status:** {service['status']}")
+
+            if service.get('special_instructions'):
+                st.write(f"**Special Instructions:** {service['special_instructions']}")
+
+            # Service status management
+            col1, col2, col3, col4 = st.columns(4)
+
+            with col1:
+                if service['status'] == 'Pending' and st.button(f"Start Service", key=f"start_{service['id']}"):
+                    for s in room_services:
+                        if s['id'] == service['id']:
+                            s['status'] = 'In Progress'
+                            break
+                    save_data('room_services.json', room_services, selected_hotel)
+                    st.success("Service started!")
+                    st.rerun()
 
-                with col4:
-                    if user_role == 'Admin':
-                        if st.button(f"Delete", key=f"delete_{service['id']}", type="secondary"):
-                            room_services = [s for s in room_services if s['id'] != service['id']]
+            with col2:
+                if service['status'] == 'In Progress':
+                    with st.form(f"complete_service_{service['id']}"):
+                        st.write(f"**Amount:** ₹{service['amount']:,.2f}")
+                        payment_type = st.selectbox("Payment Type", ["Cash", "Account"], key=f"service_payment_{service['id']}")
+
+                        if st.form_submit_button("Complete & Add to Sales"):
+                            # Update service status
+                            for s in room_services:
+                                if s['id'] == service['id']:
+                                    s['status'] = 'Completed'
+                                    s['completed_date'] = get_current_datetime()
+                                    s['payment_method'] = payment_type
+                                    break
+                            save_data('room_services.json', room_services, selected_hotel)
+
+                            # Add to appropriate sales section based on payment type
+                            sales = load_data('sales.json', selected_hotel)
+                            new_sale = {
+                                'id': generate_id(),
+                                'date': get_current_datetime(),
+                                'type': 'Room Service',
+                                'amount': service['amount'],
+                                'payment_type': payment_type,
+                                'customer_name': service['customer_name'],
+                                'description': f"Room service: {service['service_item']}",
+                                'room_number': service['room_number'],
+                                'status': 'Completed',
+                                'created_by': st.session_state.get('username', 'Unknown')
+                            }
+                            sales.append(new_sale)
                             selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
+                            save_data('sales.json', sales, selected_hotel)
                             save_data('room_services.json', room_services, selected_hotel)
-                            st.success("Service deleted!")
+
+                            # Show success message indicating which sales section it went to
+                            if payment_type == 'Cash':
+                                st.success(f"Service completed and added to Cash Sales section!")
+                            else:
+                                st.success(f"Service completed and added to Account Sales section!")
                             st.rerun()
 
-                # Admin edit functionality
+            with col3:
+                if service['status'] in ['Pending', 'In Progress'] and st.button(f"Cancel", key=f"cancel_{service['id']}"):
+                    for s in room_services:
+                        if s['id'] == service['id']:
+                            s['status'] = 'Cancelled'
+                            break
+                    save_data('room_services.json', room_services, selected_hotel)
+                    st.warning("Service cancelled!")
+                    st.rerun()
+
+            with col4:
                 if user_role == 'Admin':
-                    if st.button(f"Edit Service", key=f"edit_service_{service['id']}"):
-                        with st.form(f"edit_service_form_{service['id']}"):
-                            new_amount = st.number_input("Amount", value=service['amount'], min_value=0.0)
-                            new_status = st.selectbox("Status", ["Pending", "In Progress", "Completed", "Cancelled"], 
-                                                    index=["Pending", "In Progress", "Completed", "Cancelled"].index(service['status']))
-                            if st.form_submit_button("Update Service"):
-                                for s in room_services:
-                                    if s['id'] == service['id']:
-                                        s['amount'] = new_amount
-                                        s['status'] = new_status
-                                        break
-                                selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                                save_data('room_services.json', room_services, selected_hotel)
-                                st.success("Service updated!")
-                                st.rerun()
+                    if st.button(f"Delete", key=f"delete_{service['id']}", type="secondary"):
+                        room_services = [s for s in room_services if s['id'] != service['id']]
+                        selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
+                        save_data('room_services.json', room_services, selected_hotel)
+                        st.success("Service deleted!")
+                        st.rerun()
+
+            # Admin edit functionality
+            if user_role == 'Admin':
+                if st.button(f"Edit Service", key=f"edit_service_{service['id']}"):
+                    with st.form(f"edit_service_form_{service['id']}"):
+                        new_amount = st.number_input("Amount", value=service['amount'], min_value=0.0)
+                        new_status = st.selectbox("Status", ["Pending", "In Progress", "Completed", "Cancelled"], 
+                                                index=["Pending", "In Progress", "Completed", "Cancelled"].index(service['status']))
+                        if st.form_submit_button("Update Service"):
+                            for s in room_services:
+                                if s['id'] == service['id']:
+                                    s['amount'] = new_amount
+                                    s['status'] = new_status
+                                    break
+                            selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
+                            save_data('room_services.json', room_services, selected_hotel)
+                            st.success("Service updated!")
+                            st.rerun()
 
             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -386,4 +401,6 @@ with col3:
 
 with col4:
     if st.button("🧹 Room Cleaning", key="quick_cleaning"):
-        st.info("Quick room cleaning service - Use form above to complete")
\ No newline at end of file
+        st.info("Quick room cleaning service - Use form above to complete")
+
+profile.finish()
@@ -6,7 +6,9 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
+from utils.page_profiler import start_page_profile
 from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
+from utils.record_list import record_list
 import pandas as pd
 
 # Check authentication
@@ -14,6 +16,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # All users can add complementary room data, admin can edit/delete
 user_role = st.session_state.get('user_role', 'User')
 
@@ -169,9 +174,19 @@ if complementary_rooms:
     if filter_approved_by != "All":
         filtered_comp_rooms = [c for c in filtered_comp_rooms if c['approved_by'] == filter_approved_by]
 
-    # Display complementary rooms
-    for comp in filtered_comp_rooms:
-        with st.expander(f"#{comp['id']} - {comp['guest_name']} - {comp['room_number']} - ₹{comp['room_value']:,.2f}"):
+    # Display complementary rooms: one grid, with the selected stay's details and actions below it
+    comp = record_list(filtered_comp_rooms, {
+        'ID': 'id',
+        'Created': lambda c: c['date'][:10] if c.get('date') else 'N/A',
+        'Guest': 'guest_name',
+        'Room': 'room_number',
+        'Reason': 'comp_reason',
+        'Room Value': 'room_value',
+        'Status': 'status'
+    }, key='complementary_rooms_list', amount_columns=['Room Value'])
+    if comp:
+        with st.container(border=True):
+            st.markdown(f"#### #{comp['id']} - {comp['guest_name']} - {comp['room_number']} - ₹{comp['room_value']:,.2f}")
             col1, col2 = st.columns(2)
 
             with col1:
@@ -325,4 +340,6 @@ if user_role == 'Admin' and complementary_rooms:
             data=df.to_csv(index=False),
             file_name=f"complementary_rooms_{get_current_datetime()[:10]}.csv",
             mime="text/csv"
-        )
\ No newline at end of file
+        )
+
+profile.finish()
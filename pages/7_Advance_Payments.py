@@ -7,7 +7,10 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
+from utils.page_profiler import start_page_profile
+from utils.database_data_manager import generate_id, get_current_datetime
+from utils.hotel_snapshot import HotelSnapshot
+from utils.record_list import record_list
 import pandas as pd
 
 # Check authentication
@@ -15,6 +18,9 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 # All users can add advance payment data, admin can edit/delete
 user_role = st.session_state.get('user_role', 'User')
 
@@ -22,8 +28,8 @@ st.title("💳 Advance Payments Management")
 
 # Load data
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-advance_payments = load_data('advance_payments.json', selected_hotel)
-rooms = load_data('rooms.json', selected_hotel)
+snapshot = HotelSnapshot(selected_hotel)
+advance_payments = snapshot.load('advance_payments.json')
 
 # Advance payments overview
 st.markdown("### Advance Payments Overview")
@@ -31,7 +37,7 @@ st.markdown("### Advance Payments Overview")
 # Calculate totals
 total_advances = len(advance_payments)
 total_amount = sum(ap.get('actual_amount', ap.get('amount', 0)) for ap in advance_payments)
-pending_advances = len([ap for ap in advance_payments if ap['status'] in ['Pending', 'Partially Received']])
+pending_advances = len(snapshot.pending_advances())
 fully_received = len([ap for ap in advance_payments if ap['status'] == 'Completed'])
 refunded_advances = len([ap for ap in advance_payments if ap['status'] == 'Refunded'])
 
@@ -60,13 +66,7 @@ with st.form("add_advance_payment_form"):
         
         # Room selection (optional for advance bookings) - load from current hotel
         selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-        rooms = load_data('rooms.json', selected_hotel)
-        if isinstance(rooms, dict):
-            all_rooms = [f"Room {k}" for k in sorted(rooms.keys(), key=lambda x: int(x))]
-        elif isinstance(rooms, list):
-            all_rooms = [f"Room {room.get('room_number', room.get('id', i+101))}" for i, room in enumerate(rooms)]
-        else:
-            all_rooms = [f"Room {i}" for i in range(101, 109)]
+        all_rooms = snapshot.room_labels()
         room_options = ["Not Selected"] + all_rooms
         selected_room = st.selectbox("Room Number (if known)", room_options)
         
@@ -134,10 +134,10 @@ with st.form("add_advance_payment_form"):
             
             advance_payments.append(new_advance)
             selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-            save_data('advance_payments.json', advance_payments, selected_hotel)
+            snapshot.save('advance_payments.json', advance_payments)
             
             # Immediately add the advance payment to sales on the advance date
-            sales = load_data('sales.json', selected_hotel)
+            sales = snapshot.load('sales.json')
             # Determine payment type for sales (Cash/Account)
             sales_payment_type = "Cash" if payment_method in ["Cash", "UPI"] else "Account"
             
@@ -155,7 +155,7 @@ with st.form("add_advance_payment_form"):
                 'created_by': st.session_state.get('username', 'Unknown')
             }
             sales.append(new_sale)
-            save_data('sales.json', sales, selected_hotel)
+            snapshot.save('sales.json', sales)
             
             st.success(f"Advance payment recorded successfully! ₹{advance_amount:,.2f} added to {sales_payment_type.lower()} sales.")
             st.rerun()
@@ -185,8 +185,17 @@ if advance_payments:
     if filter_purpose != "All":
         filtered_advances = [ap for ap in filtered_advances if ap['purpose'] == filter_purpose]
     
-    # Display advance payments
-    for advance in filtered_advances:
+    # Display advance payments: one grid, with the selected payment's details and actions below it
+    advance = record_list(filtered_advances, {
+        'ID': 'id',
+        'Date': lambda ap: ap['date'][:10] if ap['date'] else 'N/A',
+        'Customer': 'customer_name',
+        'Purpose': 'purpose',
+        'Payment Method': 'payment_method',
+        'Total Amount': lambda ap: ap.get('total_amount', ap.get('amount', 0)),
+        'Status': 'status'
+    }, key='advance_payments_list', amount_columns=['Total Amount'])
+    if advance:
         # Color coding based on status
         if advance['status'] == 'Pending':
             border_color = "#ffa500"
@@ -197,7 +206,7 @@ if advance_payments:
         else:
             border_color = "#6c757d"
         
-        with st.container():
+        with st.container(border=True):
             st.markdown(f"""
             <div style="border-left: 4px solid {border_color}; padding-left: 10px; margin-bottom: 10px;">
             """, unsafe_allow_html=True)
@@ -211,140 +220,248 @@ if advance_payments:
                 date_label = display_date
             
             total_amount = advance.get('total_amount', advance.get('amount', 0))
-            with st.expander(f"#{advance['id']} - {advance['customer_name']} - ₹{total_amount:,.2f} - {date_label}"):
-                col1, col2 = st.columns(2)
+            st.markdown(f"#### #{advance['id']} - {advance['customer_name']} - ₹{total_amount:,.2f} - {date_label}")
+            col1, col2 = st.columns(2)
                 
-                with col1:
-                    st.write(f"**Advance Date:** {advance['date'][:10] if advance['date'] else 'N/A'}")
-                    if advance['status'] == 'Completed' and advance.get('completion_date'):
-                        st.write(f"**Completion Date:** {advance['completion_date'][:10]}")
-                    st.write(f"**Customer:** {advance['customer_name']}")
-                    st.write(f"**Contact:** {advance['customer_contact']}")
-                    st.write(f"**Email:** {advance.get('customer_email', 'N/A')}")
+            with col1:
+                st.write(f"**Advance Date:** {advance['date'][:10] if advance['date'] else 'N/A'}")
+                if advance['status'] == 'Completed' and advance.get('completion_date'):
+                    st.write(f"**Completion Date:** {advance['completion_date'][:10]}")
+                st.write(f"**Customer:** {advance['customer_name']}")
+                st.write(f"**Contact:** {advance['customer_contact']}")
+                st.write(f"**Email:** {advance.get('customer_email', 'N/A')}")
                     
-                    # Handle advance amount structure
-                    advance_amt = advance.get('advance_amount', 0)
-                    remaining_amt = advance.get('remaining_amount', 0)
-                    total_amt = advance.get('total_amount', advance.get('amount', 0))
-                    received_amt = advance.get('received_amount', 0)
+                # Handle advance amount structure
+                advance_amt = advance.get('advance_amount', 0)
+                remaining_amt = advance.get('remaining_amount', 0)
+                total_amt = advance.get('total_amount', advance.get('amount', 0))
+                received_amt = advance.get('received_amount', 0)
                     
-                    st.write(f"**Advance Amount:** ₹{advance_amt:,.2f}")
-                    st.write(f"**Remaining Amount:** ₹{remaining_amt:,.2f}")
-                    st.write(f"**Total Amount:** ₹{total_amt:,.2f}")
-                    if received_amt > 0:
-                        st.write(f"**Additional Received:** ₹{received_amt:,.2f}")
-                    st.write(f"**Payment Method:** {advance['payment_method']}")
+                st.write(f"**Advance Amount:** ₹{advance_amt:,.2f}")
+                st.write(f"**Remaining Amount:** ₹{remaining_amt:,.2f}")
+                st.write(f"**Total Amount:** ₹{total_amt:,.2f}")
+                if received_amt > 0:
+                    st.write(f"**Additional Received:** ₹{received_amt:,.2f}")
+                st.write(f"**Payment Method:** {advance['payment_method']}")
                 
-                with col2:
-                    st.write(f"**Room:** {advance.get('room_number', 'Not Selected')}")
-                    st.write(f"**Booking Date:** {advance.get('booking_date', 'Not Set')}")
-                    st.write(f"**Purpose:** {advance['purpose']}")
-                    # Status with color coding
-                    status_color = "🟢" if advance['status'] == 'Completed' else "🟡" if advance['status'] == 'Partially Received' else "🔴"
-                    st.write(f"**Status:** {status_color} {advance['status']}")
+            with col2:
+                st.write(f"**Room:** {advance.get('room_number', 'Not Selected')}")
+                st.write(f"**Booking Date:** {advance.get('booking_date', 'Not Set')}")
+                st.write(f"**Purpose:** {advance['purpose']}")
+                # Status with color coding
+                status_color = "🟢" if advance['status'] == 'Completed' else "🟡" if advance['status'] == 'Partially Received' else "🔴"
+                st.write(f"**Status:** {status_color} {advance['status']}")
                     
-                    # Show completion details for completed advances
-                    if advance['status'] == 'Completed':
-                        if advance.get('final_payment_method'):
-                            st.write(f"**Final Payment Method:** {advance['final_payment_method']}")
-                        if advance.get('completion_date'):
-                            st.write(f"**Completed On:** {advance['completion_date'][:10]}")
-                        st.write("✅ **Fully Settled - No Further Action Required**")
-                    else:
-                        # Show payment progress for pending advances
-                        received_amount = advance.get('received_amount', 0)
-                        if received_amount > 0:
-                            st.write(f"**Additional Received:** ₹{received_amount:,.2f}")
-                            remaining_to_pay = remaining_amt - received_amount
-                            st.write(f"**Still Remaining:** ₹{remaining_to_pay:,.2f}")
+                # Show completion details for completed advances
+                if advance['status'] == 'Completed':
+                    if advance.get('final_payment_method'):
+                        st.write(f"**Final Payment Method:** {advance['final_payment_method']}")
+                    if advance.get('completion_date'):
+                        st.write(f"**Completed On:** {advance['completion_date'][:10]}")
+                    st.write("✅ **Fully Settled - No Further Action Required**")
+                else:
+                    # Show payment progress for pending advances
+                    received_amount = advance.get('received_amount', 0)
+                    if received_amount > 0:
+                        st.write(f"**Additional Received:** ₹{received_amount:,.2f}")
+                        remaining_to_pay = remaining_amt - received_amount
+                        st.write(f"**Still Remaining:** ₹{remaining_to_pay:,.2f}")
                     
-                    st.write(f"**Created By:** {advance.get('created_by', 'Unknown')}")
+                st.write(f"**Created By:** {advance.get('created_by', 'Unknown')}")
                 
-                # Payment details
-                if advance.get('cheque_number'):
-                    st.write(f"**Cheque Number:** {advance['cheque_number']}")
-                    st.write(f"**Cheque Date:** {advance.get('cheque_date', 'N/A')}")
+            # Payment details
+            if advance.get('cheque_number'):
+                st.write(f"**Cheque Number:** {advance['cheque_number']}")
+                st.write(f"**Cheque Date:** {advance.get('cheque_date', 'N/A')}")
                 
-                if advance.get('transaction_id'):
-                    st.write(f"**Transaction ID:** {advance['transaction_id']}")
+            if advance.get('transaction_id'):
+                st.write(f"**Transaction ID:** {advance['transaction_id']}")
                 
-                if advance.get('notes'):
-                    st.write(f"**Notes:** {advance['notes']}")
+            if advance.get('notes'):
+                st.write(f"**Notes:** {advance['notes']}")
                 
-                # Payment Collection - Only show for non-completed advances
-                if advance['status'] in ['Pending', 'Partially Received']:
-                    # Handle new structure with custom remaining amounts
-                    remaining_amt = advance.get('remaining_amount', 0)
-                    received_amount = advance.get('received_amount', 0)
-                    still_remaining = remaining_amt - received_amount
+            # Payment Collection - Only show for non-completed advances
+            if advance['status'] in ['Pending', 'Partially Received']:
+                # Handle new structure with custom remaining amounts
+                remaining_amt = advance.get('remaining_amount', 0)
+                received_amount = advance.get('received_amount', 0)
+                still_remaining = remaining_amt - received_amount
                     
-                    if still_remaining > 0:
-                        st.markdown("**💰 Collect Remaining Payment**")
-                        with st.form(f"receive_payment_{advance['id']}"):
-                            col_pay1, col_pay2 = st.columns(2)
-                            with col_pay1:
-                                st.write(f"**Remaining to Collect:** ₹{still_remaining:,.2f}")
-                                st.write(f"**Already Collected:** ₹{received_amount:,.2f}")
-                                payment_amount = st.number_input("Payment Amount", min_value=0.0, max_value=float(still_remaining), step=100.0, key=f"pay_amt_{advance['id']}")
-                                payment_type = st.selectbox("Payment Type", ["Cash", "Account", "Discount", "Complementary"], key=f"pay_type_{advance['id']}")
-                            with col_pay2:
-                                payment_date = st.date_input("Payment Received Date", value=datetime.now().date(), help="Select the date when payment was received", key=f"pay_date_{advance['id']}")
-                                st.write("")  # spacing
-                                receive_btn = st.form_submit_button("💳 Receive Payment", type="primary")
+                if still_remaining > 0:
+                    st.markdown("**💰 Collect Remaining Payment**")
+                    with st.form(f"receive_payment_{advance['id']}"):
+                        col_pay1, col_pay2 = st.columns(2)
+                        with col_pay1:
+                            st.write(f"**Remaining to Collect:** ₹{still_remaining:,.2f}")
+                            st.write(f"**Already Collected:** ₹{received_amount:,.2f}")
+                            payment_amount = st.number_input("Payment Amount", min_value=0.0, max_value=float(still_remaining), step=100.0, key=f"pay_amt_{advance['id']}")
+                            payment_type = st.selectbox("Payment Type", ["Cash", "Account", "Discount", "Complementary"], key=f"pay_type_{advance['id']}")
+                        with col_pay2:
+                            payment_date = st.date_input("Payment Received Date", value=datetime.now().date(), help="Select the date when payment was received", key=f"pay_date_{advance['id']}")
+                            st.write("")  # spacing
+                            receive_btn = st.form_submit_button("💳 Receive Payment", type="primary")
                             
-                            if receive_btn:
-                                if payment_amount > 0:
-                                    new_received = received_amount + payment_amount
+                        if receive_btn:
+                            if payment_amount > 0:
+                                new_received = received_amount + payment_amount
+                                    
+                                # Update advance payment - use selected payment date
+                                completion_datetime = f"{payment_date} {datetime.now().strftime('%H:%M:%S')}"
+                                for ap in advance_payments:
+                                    if ap['id'] == advance['id']:
+                                        ap['received_amount'] = new_received
+                                        if new_received >= remaining_amt:
+                                            ap['status'] = 'Completed'
+                                            ap['completion_date'] = completion_datetime
+                                            ap['final_payment_method'] = payment_type
+                                        else:
+                                            ap['status'] = 'Partially Received'
+                                        break
+                                selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
+                                snapshot.save('advance_payments.json', advance_payments)
+                                    
+                                # Add to respective section based on payment type
+                                if payment_type in ["Cash", "Account"]:
+                                    # Add this payment amount to sales on the actual payment date
+                                    sales = snapshot.load('sales.json')
+                                    new_sale = {
+                                        'id': generate_id(),
+                                        'date': completion_datetime,  # Use actual payment date
+                                        'transaction_date': completion_datetime,  # Actual payment date
+                                        'type': 'Advance Payment - Remaining',
+                                        'amount': payment_amount,  # Only the amount paid today
+                                        'payment_type': payment_type,
+                                        'customer_name': advance['customer_name'],
+                                        'description': f"Remaining payment for advance #{advance['id']} - ₹{payment_amount:,.2f} (Originally advanced: {advance['date'][:10]}, Payment date: {str(payment_date)})",
+                                        'original_advance_date': advance['date'][:10],
+                                        'payment_date': str(payment_date),
+                                        'advance_id': advance['id'],
+                                        'status': 'Completed',
+                                        'created_by': st.session_state.get('username', 'Unknown')
+                                    }
+                                    sales.append(new_sale)
+                                    snapshot.save('sales.json', sales)
+                                    success_msg = f"₹{payment_amount:,.2f} added to {payment_type.lower()} sales on {str(payment_date)}"
+                                    
+                                elif payment_type == "Discount":
+                                    # Add to discounts
+                                    discounts = snapshot.load('discounts.json')
+                                    new_discount = {
+                                        'id': generate_id(),
+                                        'date': completion_datetime,
+                                        'customer_name': advance['customer_name'],
+                                        'amount': payment_amount,
+                                        'original_amount': payment_amount,
+                                        'discount_type': 'Advance Payment Discount',
+                                        'reason': f"Discount applied to advance payment #{advance['id']} - partial amount waived",
+                                        'reference_id': advance['id'],
+                                        'percentage': 0,
+                                        'original_advance_date': advance['date'][:10],
+                                        'advance_id': advance['id'],
+                                        'created_by': st.session_state.get('username', 'Unknown')
+                                    }
+                                    discounts.append(new_discount)
+                                    snapshot.save('discounts.json', discounts)
+                                    success_msg = f"₹{payment_amount:,.2f} added to discount records on {str(payment_date)}"
+                                    
+                                elif payment_type == "Complementary":
+                                    # Add to complementary records
+                                    complementary_records = snapshot.load('complementary_records.json')
+                                    new_comp = {
+                                        'id': generate_id(),
+                                        'date': completion_datetime,
+                                        'customer_name': advance['customer_name'],
+                                        'amount': payment_amount,
+                                        'type': 'Advance Payment Complementary',
+                                        'reason': f"Complementary waiver for advance payment #{advance['id']} - partial amount waived",
+                                        'reference_id': advance['id'],
+                                        'original_advance_date': advance['date'][:10],
+                                        'advance_id': advance['id'],
+                                        'created_by': st.session_state.get('username', 'Unknown')
+                                    }
+                                    complementary_records.append(new_comp)
+                                    snapshot.save('complementary_records.json', complementary_records)
+                                    success_msg = f"₹{payment_amount:,.2f} added to complementary records on {str(payment_date)}"
+                                    
+                                if new_received >= remaining_amt:
+                                    st.success(f"Final payment completed! {success_msg}")
+                                else:
+                                    st.success(f"{success_msg}. Remaining: ₹{remaining_amt - new_received:,.2f}")
+                                st.rerun()
+                
+            # Management actions row - Only show for non-completed advances
+            if advance['status'] != 'Completed':
+                st.markdown("**⚙️ Management Actions**")
+                col1, col2, col3, col4 = st.columns(4)
+                    
+                with col1:
+                    # Quick actions for pending advances
+                    if advance['status'] in ['Pending', 'Partially Received']:
+                        if st.button(f"✅ Mark Fully Paid", key=f"mark_paid_{advance['id']}", help="Mark as fully received - choose payment type"):
+                            # Show payment type selection for marking as paid
+                            with st.form(f"mark_paid_form_{advance['id']}"):
+                                st.write("**Select how the remaining amount was received:**")
+                                remaining_amt = advance.get('remaining_amount', 0)
+                                received_amount = advance.get('received_amount', 0)
+                                still_remaining = remaining_amt - received_amount
                                     
-                                    # Update advance payment - use selected payment date
-                                    completion_datetime = f"{payment_date} {datetime.now().strftime('%H:%M:%S')}"
+                                st.write(f"Amount to be marked as received: ₹{still_remaining:,.2f}")
+                                    
+                                payment_method = st.selectbox("Payment Method", 
+                                                            ["Cash", "Account", "Discount", "Complementary"], 
+                                                            key=f"mark_method_{advance['id']}")
+                                completion_date = st.date_input("Date Received", 
+                                                              value=datetime.now().date(), 
+                                                              key=f"mark_date_{advance['id']}")
+                                    
+                                if st.form_submit_button("Confirm Mark as Paid"):
+                                    completion_datetime = f"{completion_date} {datetime.now().strftime('%H:%M:%S')}"
+                                        
+                                    # Update advance payment
                                     for ap in advance_payments:
                                         if ap['id'] == advance['id']:
-                                            ap['received_amount'] = new_received
-                                            if new_received >= remaining_amt:
-                                                ap['status'] = 'Completed'
-                                                ap['completion_date'] = completion_datetime
-                                                ap['final_payment_method'] = payment_type
-                                            else:
-                                                ap['status'] = 'Partially Received'
+                                            ap['status'] = 'Completed'
+                                            ap['completion_date'] = completion_datetime
+                                            ap['received_amount'] = ap.get('remaining_amount', 0)
+                                            ap['final_payment_method'] = payment_method
                                             break
                                     selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                                    save_data('advance_payments.json', advance_payments, selected_hotel)
-                                    
-                                    # Add to respective section based on payment type
-                                    if payment_type in ["Cash", "Account"]:
-                                        # Add this payment amount to sales on the actual payment date
-                                        sales = load_data('sales.json', selected_hotel)
+                                    snapshot.save('advance_payments.json', advance_payments)
+                                        
+                                    # Add to respective section based on payment method
+                                    if payment_method in ["Cash", "Account"]:
+                                        # Add to sales
+                                        sales = snapshot.load('sales.json')
                                         new_sale = {
                                             'id': generate_id(),
-                                            'date': completion_datetime,  # Use actual payment date
-                                            'transaction_date': completion_datetime,  # Actual payment date
-                                            'type': 'Advance Payment - Remaining',
-                                            'amount': payment_amount,  # Only the amount paid today
-                                            'payment_type': payment_type,
+                                            'date': completion_datetime,
+                                            'transaction_date': completion_datetime,
+                                            'type': 'Advance Payment - Final',
+                                            'amount': still_remaining,
+                                            'payment_type': payment_method,
                                             'customer_name': advance['customer_name'],
-                                            'description': f"Remaining payment for advance #{advance['id']} - ₹{payment_amount:,.2f} (Originally advanced: {advance['date'][:10]}, Payment date: {str(payment_date)})",
+                                            'description': f"Final payment for advance #{advance['id']} - ₹{still_remaining:,.2f} (Originally advanced: {advance['date'][:10]}, Final payment: {str(completion_date)})",
                                             'original_advance_date': advance['date'][:10],
-                                            'payment_date': str(payment_date),
+                                            'payment_date': str(completion_date),
                                             'advance_id': advance['id'],
                                             'status': 'Completed',
                                             'created_by': st.session_state.get('username', 'Unknown')
                                         }
                                         sales.append(new_sale)
-                                        save_data('sales.json', sales, selected_hotel)
-                                        success_msg = f"₹{payment_amount:,.2f} added to {payment_type.lower()} sales on {str(payment_date)}"
-                                    
-                                    elif payment_type == "Discount":
+                                        snapshot.save('sales.json', sales)
+                                        st.success(f"Final payment marked as received and added to {payment_method.lower()} sales!")
+                                        
+                                    elif payment_method == "Discount":
                                         # Add to discounts
-                                        discounts = load_data('discounts.json', selected_hotel)
+                                        discounts = snapshot.load('discounts.json')
                                         new_discount = {
                                             'id': generate_id(),
                                             'date': completion_datetime,
                                             'customer_name': advance['customer_name'],
-                                            'amount': payment_amount,
-                                            'original_amount': payment_amount,
+                                            'amount': still_remaining,
+                                            'original_amount': still_remaining,
                                             'discount_type': 'Advance Payment Discount',
-                                            'reason': f"Discount applied to advance payment #{advance['id']} - partial amount waived",
+                                            'reason': f"Discount applied to advance payment #{advance['id']} - remaining amount waived",
                                             'reference_id': advance['id'],
                                             'percentage': 0,
                                             'original_advance_date': advance['date'][:10],
@@ -352,192 +469,84 @@ if advance_payments:
                                             'created_by': st.session_state.get('username', 'Unknown')
                                         }
                                         discounts.append(new_discount)
-                                        save_data('discounts.json', discounts, selected_hotel)
-                                        success_msg = f"₹{payment_amount:,.2f} added to discount records on {str(payment_date)}"
-                                    
-                                    elif payment_type == "Complementary":
+                                        snapshot.save('discounts.json', discounts)
+                                        st.success(f"Remaining amount marked as discount and added to discount records!")
+                                        
+                                    elif payment_method == "Complementary":
                                         # Add to complementary records
-                                        complementary_records = load_data('complementary_records.json', selected_hotel)
+                                        complementary_records = snapshot.load('complementary_records.json')
                                         new_comp = {
                                             'id': generate_id(),
                                             'date': completion_datetime,
                                             'customer_name': advance['customer_name'],
-                                            'amount': payment_amount,
+                                            'amount': still_remaining,
                                             'type': 'Advance Payment Complementary',
-                                            'reason': f"Complementary waiver for advance payment #{advance['id']} - partial amount waived",
+                                            'reason': f"Complementary waiver for advance payment #{advance['id']} - remaining amount waived",
                                             'reference_id': advance['id'],
                                             'original_advance_date': advance['date'][:10],
                                             'advance_id': advance['id'],
                                             'created_by': st.session_state.get('username', 'Unknown')
                                         }
                                         complementary_records.append(new_comp)
-                                        save_data('complementary_records.json', complementary_records, selected_hotel)
-                                        success_msg = f"₹{payment_amount:,.2f} added to complementary records on {str(payment_date)}"
-                                    
-                                    if new_received >= remaining_amt:
-                                        st.success(f"Final payment completed! {success_msg}")
-                                    else:
-                                        st.success(f"{success_msg}. Remaining: ₹{remaining_amt - new_received:,.2f}")
+                                        snapshot.save('complementary_records.json', complementary_records)
+                                        st.success(f"Remaining amount marked as complementary and added to complementary records!")
+                                        
                                     st.rerun()
                 
-                # Management actions row - Only show for non-completed advances
-                if advance['status'] != 'Completed':
-                    st.markdown("**⚙️ Management Actions**")
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        # Quick actions for pending advances
-                        if advance['status'] in ['Pending', 'Partially Received']:
-                            if st.button(f"✅ Mark Fully Paid", key=f"mark_paid_{advance['id']}", help="Mark as fully received - choose payment type"):
-                                # Show payment type selection for marking as paid
-                                with st.form(f"mark_paid_form_{advance['id']}"):
-                                    st.write("**Select how the remaining amount was received:**")
-                                    remaining_amt = advance.get('remaining_amount', 0)
-                                    received_amount = advance.get('received_amount', 0)
-                                    still_remaining = remaining_amt - received_amount
-                                    
-                                    st.write(f"Amount to be marked as received: ₹{still_remaining:,.2f}")
-                                    
-                                    payment_method = st.selectbox("Payment Method", 
-                                                                ["Cash", "Account", "Discount", "Complementary"], 
-                                                                key=f"mark_method_{advance['id']}")
-                                    completion_date = st.date_input("Date Received", 
-                                                                  value=datetime.now().date(), 
-                                                                  key=f"mark_date_{advance['id']}")
-                                    
-                                    if st.form_submit_button("Confirm Mark as Paid"):
-                                        completion_datetime = f"{completion_date} {datetime.now().strftime('%H:%M:%S')}"
-                                        
-                                        # Update advance payment
-                                        for ap in advance_payments:
-                                            if ap['id'] == advance['id']:
-                                                ap['status'] = 'Completed'
-                                                ap['completion_date'] = completion_datetime
-                                                ap['received_amount'] = ap.get('remaining_amount', 0)
-                                                ap['final_payment_method'] = payment_method
-                                                break
-                                        selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                                        save_data('advance_payments.json', advance_payments, selected_hotel)
-                                        
-                                        # Add to respective section based on payment method
-                                        if payment_method in ["Cash", "Account"]:
-                                            # Add to sales
-                                            sales = load_data('sales.json', selected_hotel)
-                                            new_sale = {
-                                                'id': generate_id(),
-                                                'date': completion_datetime,
-                                                'transaction_date': completion_datetime,
-                                                'type': 'Advance Payment - Final',
-                                                'amount': still_remaining,
-                                                'payment_type': payment_method,
-                                                'customer_name': advance['customer_name'],
-                                                'description': f"Final payment for advance #{advance['id']} - ₹{still_remaining:,.2f} (Originally advanced: {advance['date'][:10]}, Final payment: {str(completion_date)})",
-                                                'original_advance_date': advance['date'][:10],
-                                                'payment_date': str(completion_date),
-                                                'advance_id': advance['id'],
-                                                'status': 'Completed',
-                                                'created_by': st.session_state.get('username', 'Unknown')
-                                            }
-                                            sales.append(new_sale)
-                                            save_data('sales.json', sales, selected_hotel)
-                                            st.success(f"Final payment marked as received and added to {payment_method.lower()} sales!")
-                                        
-                                        elif payment_method == "Discount":
-                                            # Add to discounts
-                                            discounts = load_data('discounts.json', selected_hotel)
-                                            new_discount = {
-                                                'id': generate_id(),
-                                                'date': completion_datetime,
-                                                'customer_name': advance['customer_name'],
-                                                'amount': still_remaining,
-                                                'original_amount': still_remaining,
-                                                'discount_type': 'Advance Payment Discount',
-                                                'reason': f"Discount applied to advance payment #{advance['id']} - remaining amount waived",
-                                                'reference_id': advance['id'],
-                                                'percentage': 0,
-                                                'original_advance_date': advance['date'][:10],
-                                                'advance_id': advance['id'],
-                                                'created_by': st.session_state.get('username', 'Unknown')
-                                            }
-                                            discounts.append(new_discount)
-                                            save_data('discounts.json', discounts, selected_hotel)
-                                            st.success(f"Remaining amount marked as discount and added to discount records!")
-                                        
-                                        elif payment_method == "Complementary":
-                                            # Add to complementary records
-                                            complementary_records = load_data('complementary_records.json', selected_hotel)
-                                            new_comp = {
-                                                'id': generate_id(),
-                                                'date': completion_datetime,
-                                                'customer_name': advance['customer_name'],
-                                                'amount': still_remaining,
-                                                'type': 'Advance Payment Complementary',
-                                                'reason': f"Complementary waiver for advance payment #{advance['id']} - remaining amount waived",
-                                                'reference_id': advance['id'],
-                                                'original_advance_date': advance['date'][:10],
-                                                'advance_id': advance['id'],
-                                                'created_by': st.session_state.get('username', 'Unknown')
-                                            }
-                                            complementary_records.append(new_comp)
-                                            save_data('complementary_records.json', complementary_records, selected_hotel)
-                                            st.success(f"Remaining amount marked as complementary and added to complementary records!")
-                                        
-                                        st.rerun()
+            with col2:
+                if advance['status'] in ['Pending', 'Partially Received']:
+                    if st.button(f"💸 Refund", key=f"refund_{advance['id']}", help="Mark advance as refunded"):
+                        for ap in advance_payments:
+                            if ap['id'] == advance['id']:
+                                ap['status'] = 'Refunded'
+                                ap['refunded_date'] = get_current_datetime()
+                                break
+                        selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
+                        snapshot.save('advance_payments.json', advance_payments)
+                        st.warning("Advance payment refunded!")
+                        st.rerun()
                 
-                with col2:
-                    if advance['status'] in ['Pending', 'Partially Received']:
-                        if st.button(f"💸 Refund", key=f"refund_{advance['id']}", help="Mark advance as refunded"):
-                            for ap in advance_payments:
-                                if ap['id'] == advance['id']:
-                                    ap['status'] = 'Refunded'
-                                    ap['refunded_date'] = get_current_datetime()
-                                    break
-                            selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                            save_data('advance_payments.json', advance_payments, selected_hotel)
-                            st.warning("Advance payment refunded!")
-                            st.rerun()
+            with col3:
+                if advance['status'] in ['Pending', 'Partially Received']:
+                    if st.button(f"⏰ Mark Expired", key=f"expire_{advance['id']}", help="Mark advance as expired"):
+                        for ap in advance_payments:
+                            if ap['id'] == advance['id']:
+                                ap['status'] = 'Expired'
+                                ap['expired_date'] = get_current_datetime()
+                                break
+                        selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
+                        snapshot.save('advance_payments.json', advance_payments)
+                        st.error("Advance payment marked as expired!")
+                        st.rerun()
                 
-                with col3:
-                    if advance['status'] in ['Pending', 'Partially Received']:
-                        if st.button(f"⏰ Mark Expired", key=f"expire_{advance['id']}", help="Mark advance as expired"):
+            with col4:
+                if user_role == 'Admin':
+                    if st.button(f"🗑️ Delete", key=f"delete_{advance['id']}", type="secondary", help="Admin only: Delete record"):
+                        advance_payments = [ap for ap in advance_payments if ap['id'] != advance['id']]
+                        selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
+                        snapshot.save('advance_payments.json', advance_payments)
+                        st.success("Advance payment deleted!")
+                        st.rerun()
+                
+            # Admin edit functionality
+            if user_role == 'Admin':
+                if st.button(f"Edit Advance", key=f"edit_advance_{advance['id']}"):
+                    with st.form(f"edit_advance_form_{advance['id']}"):
+                        new_amount = st.number_input("Amount", value=advance['amount'], min_value=0.0)
+                        new_status = st.selectbox("Status", ["Pending", "Utilized", "Refunded", "Expired"], 
+                                                index=["Pending", "Utilized", "Refunded", "Expired"].index(advance['status']))
+                        new_customer = st.text_input("Customer Name", value=advance['customer_name'])
+                        if st.form_submit_button("Update Advance"):
                             for ap in advance_payments:
                                 if ap['id'] == advance['id']:
-                                    ap['status'] = 'Expired'
-                                    ap['expired_date'] = get_current_datetime()
+                                    ap['amount'] = new_amount
+                                    ap['status'] = new_status
+                                    ap['customer_name'] = new_customer
                                     break
                             selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                            save_data('advance_payments.json', advance_payments, selected_hotel)
-                            st.error("Advance payment marked as expired!")
+                            snapshot.save('advance_payments.json', advance_payments)
+                            st.success("Advance payment updated!")
                             st.rerun()
-                
-                with col4:
-                    if user_role == 'Admin':
-                        if st.button(f"🗑️ Delete", key=f"delete_{advance['id']}", type="secondary", help="Admin only: Delete record"):
-                            advance_payments = [ap for ap in advance_payments if ap['id'] != advance['id']]
-                            selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                            save_data('advance_payments.json', advance_payments, selected_hotel)
-                            st.success("Advance payment deleted!")
-                            st.rerun()
-                
-                # Admin edit functionality
-                if user_role == 'Admin':
-                    if st.button(f"Edit Advance", key=f"edit_advance_{advance['id']}"):
-                        with st.form(f"edit_advance_form_{advance['id']}"):
-                            new_amount = st.number_input("Amount", value=advance['amount'], min_value=0.0)
-                            new_status = st.selectbox("Status", ["Pending", "Utilized", "Refunded", "Expired"], 
-                                                    index=["Pending", "Utilized", "Refunded", "Expired"].index(advance['status']))
-                            new_customer = st.text_input("Customer Name", value=advance['customer_name'])
-                            if st.form_submit_button("Update Advance"):
-                                for ap in advance_payments:
-                                    if ap['id'] == advance['id']:
-                                        ap['amount'] = new_amount
-                                        ap['status'] = new_status
-                                        ap['customer_name'] = new_customer
-                                        break
-                                selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                                save_data('advance_payments.json', advance_payments, selected_hotel)
-                                st.success("Advance payment updated!")
-                                st.rerun()
             
             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -619,3 +628,5 @@ if user_role == 'Admin' and advance_payments:
             file_name=f"advance_payments_{get_current_datetime()[:10]}.csv",
             mime="text/csv"
         )
+
+profile.finish()
@@ -11,12 +11,17 @@ from utils.database_data_manager import (
     calculate_total_sales, 
     calculate_total_expenditures, 
     calculate_pending_dues,
-    get_current_date
+    get_current_date,
+    journal_tables,
+    table_totals
 )
+from utils.page_profiler import start_page_profile
+from utils.date_filter import filter_by_period, period_bounds, period_condition
+from utils.daily_rollup import period_totals
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Check authentication
 if not check_authentication():
@@ -32,11 +37,14 @@ st.title("📈 Dashboard")
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
 hotel_name = st.session_state.get('hotel_name', 'Hotel 1')
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__, selected_hotel)
+profile.section("Widgets")
+
 st.markdown(f"### {hotel_name} Dashboard")
 
 # Date filtering at the top
 st.markdown("### 📅 Filter Data by Date")
-from datetime import datetime, timedelta
 
 col1, col2, col3 = st.columns(3)
 
@@ -55,103 +63,24 @@ with col3:
     else:
         end_date = None
 
-# Function to filter data by date
-def filter_data_by_date(data_list, date_filter, start_date=None, end_date=None):
-    if date_filter == "All Time":
-        return data_list
-
-    today = datetime.now()
-    filtered_data = []
-
-    for item in data_list:
-        try:
-            # Use the item date for filtering
-            item_date = item['date'][:10] if item['date'] else None
-            if not item_date:
-                continue
-
-            item_datetime = datetime.strptime(item_date, '%Y-%m-%d')
-
-            if date_filter == "Today":
-                if item_datetime.date() == today.date():
-                    filtered_data.append(item)
-            elif date_filter == "This Week":
-                week_start = today - timedelta(days=today.weekday())
-                if item_datetime.date() >= week_start.date():
-                    filtered_data.append(item)
-            elif date_filter == "This Month":
-                if item_datetime.month == today.month and item_datetime.year == today.year:
-                    filtered_data.append(item)
-            elif date_filter == "This Year":
-                if item_datetime.year == today.year:
-                    filtered_data.append(item)
-            elif date_filter == "Custom Range" and start_date and end_date:
-                if start_date <= item_datetime.date() <= end_date:
-                    filtered_data.append(item)
-        except ValueError:
-            # Skip records with invalid dates
-            continue
-
-    return filtered_data
-
 st.markdown("---")
 
-# Load all data for selected hotel with error handling
-try:
-    all_sales = load_data('sales.json', selected_hotel)
-    if not isinstance(all_sales, list):
-        all_sales = []
-except:
-    all_sales = []
-
-try:
-    all_expenditures = load_data('expenditures.json', selected_hotel)
-    if not isinstance(all_expenditures, list):
-        all_expenditures = []
-except:
-    all_expenditures = []
-
-try:
-    all_room_services = load_data('room_services.json', selected_hotel)
-    if not isinstance(all_room_services, list):
-        all_room_services = []
-except:
-    all_room_services = []
+# Load the columns the charts and lists use; KPIs come from the rollup and aggregate queries
+profile.section("Data load")
+bounds = period_bounds(date_filter, start_date, end_date)
 
-try:
-    all_complementary_rooms = load_data('complementary_rooms.json', selected_hotel)
-    if not isinstance(all_complementary_rooms, list):
-        all_complementary_rooms = []
-except:
-    all_complementary_rooms = []
+def load_records(filename, columns):
+    try:
+        records = load_data(filename, selected_hotel, columns=columns)
+        return records if isinstance(records, list) else []
+    except:
+        return []
 
-try:
-    all_advance_payments = load_data('advance_payments.json', selected_hotel)
-    if not isinstance(all_advance_payments, list):
-        all_advance_payments = []
-except:
-    all_advance_payments = []
-
-try:
-    all_outstanding_dues = load_data('outstanding_dues.json', selected_hotel)
-    if not isinstance(all_outstanding_dues, list):
-        all_outstanding_dues = []
-except:
-    all_outstanding_dues = []
-
-try:
-    all_uploaded_bills = load_data('uploaded_bills.json', selected_hotel)
-    if not isinstance(all_uploaded_bills, list):
-        all_uploaded_bills = []
-except:
-    all_uploaded_bills = []
-
-try:
-    all_cash_handovers = load_data('cash_handovers.json', selected_hotel)
-    if not isinstance(all_cash_handovers, list):
-        all_cash_handovers = []
-except:
-    all_cash_handovers = []
+all_sales = load_records('sales.json', ['date', 'amount', 'payment_type', 'type', 'order_type'])
+all_expenditures = load_records('expenditures.json', ['date', 'amount', 'category'])
+all_room_services = load_records('room_services.json', ['date', 'amount', 'status', 'service_item'])
+all_complementary_rooms = load_records('complementary_rooms.json', ['date', 'room_value', 'status'])
+all_uploaded_bills = load_records('uploaded_bills.json', ['date', 'status'])
 
 try:
     rooms = load_data('rooms.json', selected_hotel)
@@ -160,15 +89,18 @@ try:
 except:
     rooms = {}
 
+# Pending dues and advances in the period, and all cash handed over, without loading the records
+pending_in_period = f"status = 'Pending' AND {period_condition(bounds)}"
+other_totals = table_totals(['outstanding_dues.json', 'advance_payments.json', 'cash_handovers.json'], selected_hotel,
+                            {'outstanding_dues.json': pending_in_period, 'advance_payments.json': pending_in_period})
+
 # Apply date filtering to all data
-sales = filter_data_by_date(all_sales, date_filter, start_date, end_date)
-expenditures = filter_data_by_date(all_expenditures, date_filter, start_date, end_date)
-room_services = filter_data_by_date(all_room_services, date_filter, start_date, end_date)
-complementary_rooms = filter_data_by_date(all_complementary_rooms, date_filter, start_date, end_date)
-advance_payments = filter_data_by_date(all_advance_payments, date_filter, start_date, end_date)
-outstanding_dues = filter_data_by_date(all_outstanding_dues, date_filter, start_date, end_date)
-uploaded_bills = filter_data_by_date(all_uploaded_bills, date_filter, start_date, end_date)
-cash_handovers = filter_data_by_date(all_cash_handovers, date_filter, start_date, end_date)
+profile.section("Filtering")
+sales = filter_by_period(all_sales, date_filter, start_date, end_date)
+expenditures = filter_by_period(all_expenditures, date_filter, start_date, end_date)
+room_services = filter_by_period(all_room_services, date_filter, start_date, end_date)
+complementary_rooms = filter_by_period(all_complementary_rooms, date_filter, start_date, end_date)
+uploaded_bills = filter_by_period(all_uploaded_bills, date_filter, start_date, end_date)
 
 # Show filtered period info
 period_text = {
@@ -182,12 +114,20 @@ period_text = {
 st.info(f"📊 Showing data for: **{period_text[date_filter]}**")
 
 # Key metrics
+profile.section("Metrics")
 st.markdown("### Key Performance Indicators")
 
+# Period totals come from the daily rollup; summing the filtered records is the fallback
+totals = period_totals(selected_hotel, *bounds) if bounds is not None else None
+
 # Calculate metrics from filtered data
-total_sales = sum(sale['amount'] for sale in sales)
-total_expenditures = sum(exp['amount'] for exp in expenditures)
-pending_dues = sum(due['amount'] for due in outstanding_dues if due.get('status') == 'Pending')
+if totals:
+    total_sales = totals['total_sales']
+    total_expenditures = totals['total_expenditures']
+else:
+    total_sales = sum(sale['amount'] for sale in sales)
+    total_expenditures = sum(exp['amount'] for exp in expenditures)
+pending_dues = other_totals['outstanding_dues.json']['amount']
 net_profit = total_sales - total_expenditures
 
 # Current period metrics (based on filtered data)
@@ -207,7 +147,7 @@ else:
 occupancy_rate = (occupied_rooms / total_rooms) * 100 if total_rooms > 0 else 0
 
 # Calculate advance payments
-advance_amount = sum(ap['amount'] for ap in advance_payments if ap['status'] == 'Pending')
+advance_amount = other_totals['advance_payments.json']['amount']
 
 # Display metrics
 col1, col2, col3, col4, col5, col6 = st.columns(6)
@@ -222,8 +162,7 @@ with col3:
     st.metric("Net Profit", f"₹{net_profit:,.2f}", f"Margin: {(net_profit/total_sales*100):.1f}%" if total_sales > 0 else "0%")
 
 with col4:
-    outstanding_amount = sum(due['amount'] for due in outstanding_dues if due['status'] == 'Pending')
-    st.metric("Outstanding Dues", f"₹{outstanding_amount:,.2f}")
+    st.metric("Outstanding Dues", f"₹{pending_dues:,.2f}")
 
 with col5:
     st.metric("Advance Payments", f"₹{advance_amount:,.2f}")
@@ -234,6 +173,7 @@ with col6:
 st.markdown("---")
 
 # Sales overview
+profile.section("Charts")
 st.markdown("### Sales Overview")
 
 if sales:
@@ -322,15 +262,14 @@ st.markdown("### Cash Flow Analysis")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    cash_sales = sum(sale['amount'] for sale in sales if sale['payment_type'] == 'Cash')
+    cash_sales = totals['cash_sales'] if totals else sum(sale['amount'] for sale in sales if sale['payment_type'] == 'Cash')
     st.metric("Cash Sales", f"₹{cash_sales:,.2f}")
 
 with col2:
-    account_sales = sum(sale['amount'] for sale in sales if sale['payment_type'] == 'Account')
+    account_sales = totals['account_sales'] if totals else sum(sale['amount'] for sale in sales if sale['payment_type'] == 'Account')
     st.metric("Account Sales", f"₹{account_sales:,.2f}")
 
 with col3:
-    advance_amount = sum(ap['amount'] for ap in advance_payments if ap['status'] == 'Pending')
     st.metric("Advance Payments", f"₹{advance_amount:,.2f}")
 
 # Room service analytics
@@ -454,6 +393,7 @@ if complementary_rooms:
         st.metric("Impact on Revenue", f"{impact_percentage:.1f}%")
 
 # Period trends
+profile.section("Widgets")
 st.markdown("---")
 st.markdown(f"### {period_text[date_filter]} Performance")
 
@@ -507,15 +447,15 @@ st.markdown("### Action Items & Alerts")
 alerts = []
 
 # Check for pending outstanding dues
-if outstanding_amount > 0:
-    alerts.append(f"Outstanding dues: ₹{outstanding_amount:,.2f} - Follow up required")
+if pending_dues > 0:
+    alerts.append(f"Outstanding dues: ₹{pending_dues:,.2f} - Follow up required")
 
 # Check for pending advance payments
 if advance_amount > 0:
     alerts.append(f"Advance payments: ₹{advance_amount:,.2f} remaining to collect")
 
 # Check for pending bills
-pending_bills = len([b for b in uploaded_bills if b['status'] == 'Pending'])
+pending_bills = len([b for b in uploaded_bills if b.get('status') == 'Pending'])
 if pending_bills > 0:
     alerts.append(f"{pending_bills} bills pending review")
 
@@ -525,8 +465,7 @@ if occupancy_rate > 80:
 
 # Calculate cash in hand
 cash_sales = sum(sale['amount'] for sale in sales if sale['payment_type'] == 'Cash')
-cash_handovers = load_data('cash_handovers.json')
-total_handovers = sum(h['amount'] for h in cash_handovers)
+total_handovers = other_totals['cash_handovers.json']['amount']
 cash_in_hand = cash_sales - total_handovers
 
 # Check cash in hand
@@ -712,6 +651,11 @@ if user_role == 'Admin':
                                     check=True
                                 )
                                 print(f"Database deletion successful: {result.stdout}")
+                                # psql writes around save_data; journal the cleared tables so restores stay in step
+                                journal_tables(['sales', 'expenditures', 'room_services', 'complementary_rooms',
+                                                'advance_payments', 'outstanding_dues', 'uploaded_bills',
+                                                'cash_handovers', 'account_handovers', 'bad_debts', 'discounts',
+                                                'restaurant', 'rooms'], selected_hotel)
                                 st.success(f"✅ All data has been successfully deleted from database for {selected_hotel}!")
                                 st.balloons()
                                 st.rerun()
@@ -729,4 +673,6 @@ if user_role == 'Admin':
 
 # Data refresh info
 st.markdown("---")
-st.caption(f"Dashboard last updated: {get_current_date()} | Showing data for: {period_text[date_filter]} | Data refreshes automatically")
\ No newline at end of file
+st.caption(f"Dashboard last updated: {get_current_date()} | Showing data for: {period_text[date_filter]} | Data refreshes automatically")
+
+profile.finish()
@@ -6,7 +6,10 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 
 from utils.auth import check_authentication
-from utils.database_data_manager import load_data, save_data, generate_id, get_current_datetime, add_record
+from utils.page_profiler import start_page_profile
+from utils.database_data_manager import generate_id, get_current_datetime
+from utils.hotel_snapshot import HotelSnapshot
+from utils.record_list import record_list
 import pandas as pd
 
 # Check authentication
@@ -14,19 +17,23 @@ if not check_authentication():
     st.error("Please login first")
     st.stop()
 
+# Profile this run when page profiling is switched on
+profile = start_page_profile(__file__)
+
 user_role = st.session_state.get('user_role', 'User')
 
 st.title("💰 Outstanding Dues")
 
 # Load data
 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-outstanding_dues = load_data('outstanding_dues.json', selected_hotel)
-sales = load_data('sales.json', selected_hotel)
+snapshot = HotelSnapshot(selected_hotel)
+outstanding_dues = snapshot.load('outstanding_dues.json')
+sales = snapshot.load('sales.json')
 
 # Overview
 st.markdown("### Outstanding Dues Overview")
 
-total_outstanding = sum(due['amount'] for due in outstanding_dues if due['status'] == 'Pending')
+total_outstanding = sum(due['amount'] for due in snapshot.pending_dues())
 received_today = sum(due['amount'] for due in outstanding_dues if due['status'] == 'Received' and due.get('received_date', '').startswith('2025-06-23'))
 total_received = sum(due['amount'] for due in outstanding_dues if due['status'] == 'Received')
 
@@ -58,13 +65,7 @@ with st.form("add_due_form"):
 
     # Room number (optional) - dynamic based on selected hotel
         selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-        rooms = load_data('rooms.json', selected_hotel)
-        if isinstance(rooms, dict):
-            all_rooms = [f"Room {k}" for k in sorted(rooms.keys(), key=lambda x: int(x))]
-        elif isinstance(rooms, list):
-            all_rooms = [f"Room {room.get('room_number', room.get('id', i+101))}" for i, room in enumerate(rooms)]
-        else:
-            all_rooms = [f"Room {i}" for i in range(101, 109)]
+        all_rooms = snapshot.room_labels()
         room_options = ["None"] + all_rooms
         room_number = st.selectbox("Room Number (if applicable)", room_options)
 
@@ -86,7 +87,7 @@ with st.form("add_due_form"):
                 'created_by': st.session_state.get('username', 'Unknown')
             }
 
-            if add_record('outstanding_dues.json', new_due, selected_hotel):
+            if snapshot.add_record('outstanding_dues.json', new_due):
                 st.success(f"Outstanding due of ₹{amount:,.2f} added for {customer_name}")
                 st.rerun()
             else:
@@ -107,9 +108,20 @@ if outstanding_dues:
     if filter_status != "All":
         filtered_dues = [d for d in filtered_dues if d['status'] == filter_status]
 
-    for due in filtered_dues:
+    # One grid, with the selected due's details and actions below it
+    due = record_list(filtered_dues, {
+        'ID': 'id',
+        'Date': lambda d: d['date'][:10] if d['date'] else 'N/A',
+        'Customer': 'customer_name',
+        'Type': 'due_type',
+        'Due Date': 'due_date',
+        'Amount': 'amount',
+        'Status': 'status'
+    }, key='outstanding_dues_list', amount_columns=['Amount'])
+    if due:
         due_date = due['date'][:10] if due['date'] else 'N/A'
-        with st.expander(f"#{due['id']} - {due['customer_name']} - ₹{due['amount']:,.2f} - {due_date}"):
+        with st.container(border=True):
+            st.markdown(f"#### #{due['id']} - {due['customer_name']} - ₹{due['amount']:,.2f} - {due_date}")
             col1, col2 = st.columns(2)
 
             with col1:
@@ -168,7 +180,7 @@ if outstanding_dues:
                                 # Add payment to sales (except for bad debt, discount, complementary)
                                 selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
                                 if payment_type in ["Cash", "Account"]:
-                                    sales = load_data('sales.json',selected_hotel)
+                                    sales = snapshot.load('sales.json')
                                     new_sale = {
                                         'id': generate_id(),
                                         'date': get_current_datetime(),
@@ -182,12 +194,12 @@ if outstanding_dues:
                                         'notes': notes
                                     }
                                     sales.append(new_sale)
-                                    save_data('sales.json', sales, selected_hotel)
+                                    snapshot.save('sales.json', sales)
 
                                 # Handle different payment types
                                 if payment_type == "Bad Debt":
                                     # Add to bad debt records
-                                    bad_debts = load_data('bad_debts.json', selected_hotel)
+                                    bad_debts = snapshot.load('bad_debts.json')
                                     new_bad_debt = {
                                         'id': generate_id(),
                                         'date': get_current_datetime(),
@@ -198,11 +210,11 @@ if outstanding_dues:
                                         'created_by': st.session_state.get('username', 'Unknown')
                                     }
                                     bad_debts.append(new_bad_debt)
-                                    save_data('bad_debts.json', bad_debts, selected_hotel)
+                                    snapshot.save('bad_debts.json', bad_debts)
 
                                 elif payment_type == "Discount":
                                     # Add to discount records
-                                    discounts = load_data('discounts.json', selected_hotel)
+                                    discounts = snapshot.load('discounts.json')
                                     new_discount = {
                                         'id': generate_id(),
                                         'date': get_current_datetime(),
@@ -213,11 +225,11 @@ if outstanding_dues:
                                         'created_by': st.session_state.get('username', 'Unknown')
                                     }
                                     discounts.append(new_discount)
-                                    save_data('discounts.json', discounts, selected_hotel)
+                                    snapshot.save('discounts.json', discounts)
 
                                 elif payment_type == "Complementary":
                                     # Add to complementary records
-                                    complementary_records = load_data('complementary_records.json', selected_hotel)
+                                    complementary_records = snapshot.load('complementary_records.json')
                                     new_comp = {
                                         'id': generate_id(),
                                         'date': get_current_datetime(),
@@ -228,7 +240,7 @@ if outstanding_dues:
                                         'created_by': st.session_state.get('username', 'Unknown')
                                     }
                                     complementary_records.append(new_comp)
-                                    save_data('complementary_records.json', complementary_records, selected_hotel)
+                                    snapshot.save('complementary_records.json', complementary_records)
 
                                 # Update the outstanding due
                                 for d in outstanding_dues:
@@ -254,7 +266,7 @@ if outstanding_dues:
                                             })
                                         break
 
-                                save_data('outstanding_dues.json', outstanding_dues, selected_hotel)
+                                snapshot.save('outstanding_dues.json', outstanding_dues)
 
                                 if remaining_amount <= 0:
                                     st.success(f"Outstanding due fully settled with {payment_type}!")
@@ -276,7 +288,7 @@ if outstanding_dues:
                                     d['status'] = new_status
                                     break
                             selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
-                            save_data('outstanding_dues.json', outstanding_dues, selected_hotel)
+                            snapshot.save('outstanding_dues.json', outstanding_dues)
                             st.success("Due updated!")
                             st.rerun()
 
@@ -284,7 +296,7 @@ if outstanding_dues:
                 if user_role == 'Admin' and st.button(f"Delete", key=f"delete_{due['id']}", type="secondary"):
                     selected_hotel = st.session_state.get('selected_hotel', 'hotel1')
                     outstanding_dues = [d for d in outstanding_dues if d['id'] != due['id']]
-                    save_data('outstanding_dues.json', outstanding_dues, selected_hotel)
+                    snapshot.save('outstanding_dues.json', outstanding_dues)
                     st.success("Due deleted!")
                     st.rerun()
 else:
@@ -312,4 +324,6 @@ if user_role == 'Admin':
 
     with col2:
         if st.button("🎯 Go to Download Center"):
-            st.switch_page("pages/18_Data_Download.py")
\ No newline at end of file
+            st.switch_page("pages/18_Data_Download.py")
+
+profile.finish()
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import data_manager, jsonl_store
+from utils.backup_worker import backup_worker
+from utils.parse_cache import parse_cache
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Run a test in an empty working directory (the data layer uses relative data/ paths)"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    parse_cache.invalidate()
+    jsonl_store._stores.clear()
+    yield tmp_path
+    # Background copies use relative paths, so they must land before the directory changes back
+    backup_worker.flush()
+    parse_cache.invalidate()
+    jsonl_store._stores.clear()
+
+@pytest.fixture
+def jsonl_storage(data_dir, monkeypatch):
+    """Store list-of-records files as JSON Lines"""
+    monkeypatch.setattr(data_manager, 'STORAGE_FORMAT', 'jsonl')
+    return data_dir
@@ -0,0 +1,36 @@
+import time
+from datetime import datetime
+
+from utils.change_journal import ChangeJournal
+
+def test_changes_made_around_the_journal_are_a_gap(data_dir):
+    journal = ChangeJournal('data/journal')
+    journal.record_table('sales', 'hotel1', [{'id': '1', 'amount': 10}])
+    assert journal.in_step('sales', 'hotel1', [{'id': '1', 'amount': 10}])
+    assert not journal.resync('sales', 'hotel1', [{'id': '1', 'amount': 10}])
+
+    time.sleep(0.01)
+    inside_gap = datetime.now()
+    time.sleep(0.01)
+    # Written without going through the journal
+    stored = [{'id': '1', 'amount': 15}, {'id': '2', 'amount': 5}]
+    assert not journal.in_step('sales', 'hotel1', stored)
+    assert journal.resync('sales', 'hotel1', stored)
+
+    first, last = journal.timeline('sales', 'hotel1')
+    assert journal.gap_at('sales', 'hotel1', inside_gap) is not None
+    assert journal.gap_at('sales', 'hotel1', first) is None
+    assert journal.gap_at('sales', 'hotel1', last) is None
+    assert journal.in_step('sales', 'hotel1', stored)
+    assert journal.state_at('sales', 'hotel1', last) == stored
+
+def test_journaled_changes_leave_no_gap(data_dir):
+    journal = ChangeJournal('data/journal')
+    journal.record_table('sales', 'hotel1', [{'id': '1', 'amount': 10}])
+    journal.record_upsert('sales', 'hotel1', {'id': '2', 'amount': 5})
+    journal.record_delete('sales', 'hotel1', '1')
+
+    assert not journal.resync('sales', 'hotel1', [{'id': '2', 'amount': 5}])
+    first, last = journal.timeline('sales', 'hotel1')
+    assert journal.gap_at('sales', 'hotel1', last) is None
+    assert journal.state_at('sales', 'hotel1', first) == [{'id': '1', 'amount': 10}]
@@ -0,0 +1,40 @@
+import threading
+
+from utils import data_integrity
+from utils.data_integrity import check_data_file, repair_corrupted_files
+from utils.data_manager import save_data, load_data
+
+def test_integrity_check_during_saves_sees_no_mismatch(data_dir):
+    save_data('sales.json', [{'id': '0'}])
+    issues = []
+    done = threading.Event()
+
+    def check():
+        while not done.is_set():
+            issue = check_data_file('hotel1_sales.json')
+            if issue:
+                issues.append(issue)
+
+    checker = threading.Thread(target=check)
+    checker.start()
+    try:
+        for count in range(1, 100):
+            save_data('sales.json', [{'id': str(i)} for i in range(count)])
+    finally:
+        done.set()
+        checker.join()
+
+    assert issues == []
+
+def test_repair_leaves_a_file_that_is_intact_on_recheck(data_dir, monkeypatch):
+    save_data('sales.json', [{'id': 'old'}])
+    save_data('sales.json', [{'id': 'new'}])
+    # A scan that ran before the last save finished
+    monkeypatch.setattr(data_integrity, 'check_all_data_integrity',
+                        lambda deep=False: ["Corrupted file: hotel1_sales.json - checksum mismatch"])
+
+    success, repairs = repair_corrupted_files()
+
+    assert success
+    assert repairs == ["hotel1_sales.json is intact on a second check; left as is"]
+    assert [record['id'] for record in load_data('sales.json')] == ['new']
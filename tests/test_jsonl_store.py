@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from utils.data_manager import load_data
+from utils.jsonl_store import JsonlStore
+
+def test_corrupt_json_file_is_not_migrated(jsonl_storage):
+    with open('data/hotel1_sales.json', 'w') as f:
+        f.write('[{"id": "1"},')
+
+    with pytest.raises(ValueError):
+        load_data('sales.json')
+
+    assert os.path.exists('data/hotel1_sales.json')
+    assert not os.path.exists('data/hotel1_sales.json.migrated')
+    assert not os.path.exists('data/hotel1_sales.jsonl')
+
+def test_json_file_is_migrated(jsonl_storage):
+    with open('data/hotel1_sales.json', 'w') as f:
+        json.dump([{'id': '1', 'amount': 10}, {'id': '2', 'amount': 20}], f)
+
+    assert [record['id'] for record in load_data('sales.json')] == ['1', '2']
+    assert os.path.exists('data/hotel1_sales.jsonl')
+    assert os.path.exists('data/hotel1_sales.json.migrated')
+
+def test_unindexed_tail_is_recovered_once(data_dir):
+    JsonlStore('data/sales.jsonl').rewrite([{'id': '1', 'date': '2025-01-01'}])
+    # Two readers with the index loaded, then a crash after the data write but before the index write
+    first = JsonlStore('data/sales.jsonl')
+    second = JsonlStore('data/sales.jsonl')
+    first._load_index()
+    second._load_index()
+    with open('data/sales.jsonl', 'ab') as f:
+        f.write(b'{"id": "2", "date": "2025-01-02"}\n{"id": "3", "da')
+
+    # Both find the same unindexed tail (under the shared lock they may run at once)
+    first._scan_tail()
+    second._scan_tail()
+
+    assert [record['id'] for record in first.load_all()] == ['1', '2']
+    assert [record['id'] for record in second.load_all()] == ['1', '2']
+
+    with open('data/sales.jsonl.idx') as f:
+        ids = [json.loads(line)[0] for line in f]
+    assert ids == ['1', '2']
+    assert JsonlStore('data/sales.jsonl').load_range('2025-01-02', '2025-01-02') == [
+        {'id': '2', 'date': '2025-01-02'}
+    ]
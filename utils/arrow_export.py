@@ -0,0 +1,221 @@
+"""
+Arrow export - typed Parquet snapshots partitioned by hotel and month, plus Arrow IPC files that
+can be memory-mapped, streamed from the batched table readers (needs pyarrow)
+"""
+import os
+import re
+import tempfile
+import zipfile
+from datetime import date, datetime
+from utils.database_data_manager import column_types, get_table_name
+from utils.data_export import table_batches, EXPORT_BATCH_SIZE, EXPORT_SPOOL_BYTES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Text columns written as dictionaries (a few distinct values repeated over many rows)
+DICTIONARY_COLUMNS = {'status', 'payment_type', 'payment_method'}
+# Parquet compression codec
+PARQUET_COMPRESSION = os.environ.get('PARQUET_COMPRESSION', 'zstd')
+# Rows buffered before they're written out as Parquet row groups
+PARQUET_ROW_GROUP_ROWS = int(os.environ.get('PARQUET_ROW_GROUP_ROWS', 65536))
+# Partition for records without a month (the name Hive and pyarrow use for nulls)
+NO_MONTH = '__HIVE_DEFAULT_PARTITION__'
+
+ISO_MONTH = re.compile(r'\d{4}-\d{2}')
+
+def arrow_available():
+    return pa is not None
+
+def arrow_type(column, sql_type):
+    """The Arrow type a column is exported as, from its SQL type"""
+    sql_type = (sql_type or '').lower()
+    if sql_type in ('smallint', 'integer', 'bigint'):
+        return pa.int64()
+    if sql_type in ('numeric', 'real', 'double precision'):
+        return pa.float64()
+    if sql_type == 'boolean':
+        return pa.bool_()
+    if sql_type == 'date':
+        return pa.date32()
+    if sql_type == 'timestamp with time zone':
+        return pa.timestamp('us', tz='UTC')
+    if sql_type.startswith('timestamp'):
+        return pa.timestamp('us')
+    if column in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+def _converter(arrow_type):
+    """Turn record values (as load_data returns them: ISO text for dates) into Python values of the type"""
+    if pa.types.is_integer(arrow_type):
+        return int
+    if pa.types.is_floating(arrow_type):
+        return float
+    if pa.types.is_boolean(arrow_type):
+        return bool
+    if pa.types.is_date(arrow_type):
+        return lambda value: date.fromisoformat(str(value)[:10])
+    if pa.types.is_timestamp(arrow_type):
+        return lambda value: datetime.fromisoformat(str(value))
+    return str
+
+class BatchEncoder:
+    """Builds record batches of one schema from batches of records.
+
+    Dictionary columns share one growing dictionary per column, so each
+    batch's dictionary extends the last one; the IPC file writer can then
+    send just the new entries (a delta) instead of a replacement, which the
+    file format doesn't allow.
+    """
+
+    def __init__(self, columns):
+        self.schema = pa.schema([(column, arrow_type(column, sql_type)) for column, sql_type in columns.items()])
+        self.converters = {field.name: _converter(field.type) for field in self.schema}
+        self.vocabularies = {field.name: {} for field in self.schema if pa.types.is_dictionary(field.type)}
+
+    def encode(self, records):
+        arrays = []
+        for field in self.schema:
+            values = [self._convert(field.name, record.get(field.name)) for record in records]
+            vocabulary = self.vocabularies.get(field.name)
+            if vocabulary is None:
+                arrays.append(pa.array(values, type=field.type))
+                continue
+            indices = [None if value is None else vocabulary.setdefault(value, len(vocabulary)) for value in values]
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(indices, type=pa.int32()),
+                                                         pa.array(list(vocabulary), type=pa.string())))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _convert(self, column, value):
+        if value is None or value == '':
+            return None
+        try:
+            return self.converters[column](value)
+        except (TypeError, ValueError):
+            return None
+
+def record_month(record):
+    """'YYYY-MM' of a record's date (or creation time), or None"""
+    value = record.get('date') or record.get('created_at')
+    value = str(value) if value else ''
+    return value[:7] if ISO_MONTH.match(value) else None
+
+class PartitionedParquetWriter:
+    """Writes a table as <directory>/hotel=<hotel>/month=<YYYY-MM>/part-0.parquet.
+
+    Rows are buffered until PARQUET_ROW_GROUP_ROWS are pending, then each
+    partition's share is written as a row group; records come mostly in date
+    order, so row groups stay large while memory stays bounded. The hotel
+    column lives in the path, not the files.
+    """
+
+    def __init__(self, directory, hotel, schema):
+        self.directory = directory
+        self.hotel = hotel
+        self.schema = schema.remove(schema.get_field_index('hotel')) if 'hotel' in schema.names else schema
+        self.writers = {}
+        self.pending = {}
+        self.pending_rows = 0
+
+    def write(self, month, batch):
+        if 'hotel' in batch.schema.names:
+            batch = batch.drop_columns(['hotel'])
+        self.pending.setdefault(month or NO_MONTH, []).append(batch)
+        self.pending_rows += batch.num_rows
+        if self.pending_rows >= PARQUET_ROW_GROUP_ROWS:
+            self.flush()
+
+    def flush(self):
+        for month, batches in self.pending.items():
+            writer = self.writers.get(month)
+            if writer is None:
+                path = os.path.join(self.directory, f"hotel={self.hotel}", f"month={month}")
+                os.makedirs(path, exist_ok=True)
+                writer = self.writers[month] = pq.ParquetWriter(os.path.join(path, 'part-0.parquet'), self.schema,
+                                                                compression=PARQUET_COMPRESSION)
+            writer.write_table(pa.Table.from_batches(batches, schema=self.schema))
+        self.pending.clear()
+        self.pending_rows = 0
+
+    def close(self):
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+
+def write_table_files(filename, hotel, directory, ipc=False, batch_size=EXPORT_BATCH_SIZE):
+    """Write one table's Parquet partitions (and <table>.arrow with ipc) under directory; returns the record count"""
+    table_name = get_table_name(filename, hotel)
+    columns = column_types(filename, hotel)
+    encoder = None
+    parquet_writer = None
+    ipc_sink = ipc_writer = None
+    count = 0
+    try:
+        for records in table_batches(filename, hotel, batch_size=batch_size):
+            if not records:
+                continue
+            if encoder is None:
+                encoder = BatchEncoder(columns or {column: None for column in records[0]})
+                parquet_writer = PartitionedParquetWriter(os.path.join(directory, table_name), hotel, encoder.schema)
+                if ipc:
+                    # Uncompressed, so readers can memory-map the file and use its buffers in place
+                    ipc_sink = pa.OSFile(os.path.join(directory, f"{table_name}.arrow"), 'wb')
+                    ipc_writer = pa.ipc.new_file(ipc_sink, encoder.schema,
+                                                 options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+            by_month = {}
+            for record in records:
+                by_month.setdefault(record_month(record), []).append(record)
+            for month, month_records in by_month.items():
+                parquet_writer.write(month, encoder.encode(month_records))
+            if ipc_writer is not None:
+                ipc_writer.write_batch(encoder.encode(records))
+            count += len(records)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if ipc_writer is not None:
+            ipc_writer.close()
+            ipc_sink.close()
+    return count
+
+def export_parquet(filenames, hotel, ipc=False, progress=None, batch_size=EXPORT_BATCH_SIZE):
+    """Stream tables into a ZIP of Parquet datasets (one directory per table), with Arrow IPC files if ipc.
+
+    Tables whose data files map to the same table are written once. progress
+    is called as in data_export.export_zip. Returns (archive, counts): the ZIP
+    file rewound for reading and {table: records written}.
+    """
+    if not arrow_available():
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    tables = {}
+    for filename in filenames:
+        tables.setdefault(get_table_name(filename, hotel), filename)
+
+    counts = {}
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    with tempfile.TemporaryDirectory(prefix='parquet_export_') as directory:
+        for done, (table_name, filename) in enumerate(tables.items(), start=1):
+            counts[table_name] = write_table_files(filename, hotel, directory, ipc, batch_size)
+            if progress:
+                progress(done, len(tables), table_name, counts[table_name])
+
+        # Parquet is compressed already and IPC files stay uncompressed for memory mapping, so store as is
+        with zipfile.ZipFile(spool, 'w', zipfile.ZIP_STORED) as zip_file:
+            for root, _, files in os.walk(directory):
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    zip_file.write(path, os.path.relpath(path, directory))
+    spool.seek(0)
+    return spool, counts
+
+def open_ipc(path):
+    """Read an exported .arrow file through a memory map (columns are read from the page cache, not copied)"""
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
@@ -61,8 +61,20 @@ def ensure_system_users(users):
 
 def save_users(users):
     """Save users to JSON file"""
-    with open('data/users.json', 'w') as f:
-        json.dump(users, f, indent=2)
+    from utils.data_manager import encode_data
+    with open('data/users.json', 'wb') as f:
+        f.write(encode_data(users))
+
+def _touch_session(username):
+    """Count this browser session as active for the metrics exporter"""
+    from utils.metrics import touch_session
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        session_id = ctx.session_id if ctx else username
+    except Exception:
+        session_id = username
+    touch_session(session_id)
 
 def check_authentication():
     """Check if user is authenticated with persistent sessions"""
@@ -72,6 +84,7 @@ def check_authentication():
 
     # If user is authenticated and has username, keep session active
     if authenticated and username:
+        _touch_session(username)
         return True
 
     return False
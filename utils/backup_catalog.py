@@ -0,0 +1,195 @@
+"""
+Backup catalog - persistent index of backup generations per data file
+"""
+import json
+import os
+import glob
+import threading
+from collections import deque
+from utils.data_integrity import DIGEST_SUFFIX, process_file_lock
+from utils.parse_cache import file_signature
+
+CATALOG_FILE = 'data/backup_catalog.json'
+# Changes since the catalog file was written, one JSON line each; folded into the file once this many pile up
+CATALOG_LOG_SUFFIX = '.log'
+COMPACT_AFTER_ENTRIES = 1000
+
+# Backup kinds tracked by the catalog: directory, file name pattern and retention
+BACKUP_KINDS = {
+    'auto': {
+        'directory': 'data/auto_backups',
+        'pattern': '{filename}_*.backup',
+        'keep': 100
+    },
+    'emergency': {
+        'directory': 'data/emergency_backups',
+        'pattern': 'emergency_{filename}_*.json',
+        'keep': 200
+    }
+}
+
+class BackupCatalog:
+    """Backup generations per kind and data file, oldest first.
+
+    The catalog file is a snapshot; each change is appended to a log beside
+    it (["add" | "drop", kind, filename, path], ["set", kind, filename,
+    paths] or ["reset"]), so recording a backup writes one line instead of
+    the whole catalog. Once COMPACT_AFTER_ENTRIES lines pile up they are
+    folded into a new snapshot. Replaying a line twice changes nothing, so a
+    crash between writing the snapshot and emptying the log is harmless.
+    """
+
+    def __init__(self, catalog_file=CATALOG_FILE):
+        self.catalog_file = catalog_file
+        self.log_file = catalog_file + CATALOG_LOG_SUFFIX
+        self.lock = threading.RLock()
+        self.entries = None
+        self.signature = None
+        self.log_entries = 0
+        self.scanned = set()     # (kind, filename) read from the directory but not logged yet
+
+    def _signature(self):
+        return file_signature(self.catalog_file), file_signature(self.log_file)
+
+    def _load(self):
+        """Load catalog from disk on first use, or again if another process changed it"""
+        if self.entries is not None and self._signature() == self.signature:
+            return
+        self.signature = self._signature()
+        self.entries = {kind: {} for kind in BACKUP_KINDS}
+        self.log_entries = 0
+        self.scanned = set()
+        try:
+            with open(self.catalog_file, 'r') as f:
+                stored = json.load(f)
+            for kind in BACKUP_KINDS:
+                for filename, paths in stored.get(kind, {}).items():
+                    self.entries[kind][filename] = deque(paths)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Backup catalog unreadable, rebuilding from backup directories: {e}")
+
+        try:
+            with open(self.log_file, 'r') as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, IndexError):
+                        # Partial last line from an interrupted append
+                        continue
+                    self.log_entries += 1
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, change):
+        operation = change[0]
+        if operation == 'reset':
+            self.entries = {kind: {} for kind in BACKUP_KINDS}
+            return
+        files = self.entries[change[1]]
+        if operation == 'set':
+            files[change[2]] = deque(change[3])
+            return
+        generations = files.setdefault(change[2], deque())
+        if operation == 'add' and change[3] not in generations:
+            generations.append(change[3])
+        elif operation == 'drop' and change[3] in generations:
+            generations.remove(change[3])
+
+    def _log(self, changes):
+        """Apply changes and append them to the log (the caller holds the catalog locks)"""
+        for change in changes:
+            self._apply(change)
+        if self.log_entries + len(changes) > COMPACT_AFTER_ENTRIES:
+            self._save()
+            return
+        os.makedirs(os.path.dirname(self.catalog_file), exist_ok=True)
+        try:
+            with open(self.log_file, 'a') as f:
+                f.write(''.join(json.dumps(change) + '\n' for change in changes))
+            self.log_entries += len(changes)
+            self.signature = self._signature()
+        except Exception as e:
+            print(f"Failed to save backup catalog: {e}")
+
+    def _save(self):
+        """Write the whole catalog atomically and start an empty log"""
+        stored = {kind: {filename: list(paths) for filename, paths in files.items()}
+                  for kind, files in self.entries.items()}
+        os.makedirs(os.path.dirname(self.catalog_file), exist_ok=True)
+        temp_path = f"{self.catalog_file}.tmp_{os.getpid()}"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(stored, f)
+            os.replace(temp_path, self.catalog_file)
+            open(self.log_file, 'w').close()
+            self.log_entries = 0
+            self.signature = self._signature()
+        except Exception as e:
+            print(f"Failed to save backup catalog: {e}")
+
+    def _generations(self, kind, filename):
+        """Get generation queue (oldest first), scanning the directory only once per file"""
+        self._load()
+        files = self.entries[kind]
+        if filename not in files:
+            config = BACKUP_KINDS[kind]
+            pattern = os.path.join(config['directory'], config['pattern'].format(filename=filename))
+            files[filename] = deque(sorted(glob.glob(pattern)))
+            self.scanned.add((kind, filename))
+        return files[filename]
+
+    def _scan_changes(self, kind, filename):
+        """A 'set' change for generations found by a directory scan, so the log holds them too"""
+        if (kind, filename) not in self.scanned:
+            return []
+        self.scanned.discard((kind, filename))
+        return [['set', kind, filename, list(self.entries[kind][filename])]]
+
+    def record(self, kind, filename, path):
+        """Register a new backup generation and prune the oldest ones beyond retention"""
+        with self.lock, process_file_lock(self.catalog_file):
+            generations = self._generations(kind, filename)
+            changes = self._scan_changes(kind, filename)
+            if not generations or generations[-1] != path:
+                generations.append(path)
+                changes.append(['add', kind, filename, path])
+
+            keep = BACKUP_KINDS[kind]['keep']
+            while len(generations) > keep:
+                oldest = generations.popleft()
+                changes.append(['drop', kind, filename, oldest])
+                for path_to_remove in (oldest, oldest + DIGEST_SUFFIX):
+                    try:
+                        os.remove(path_to_remove)
+                    except FileNotFoundError:
+                        pass
+                    except Exception as e:
+                        print(f"Failed to prune backup {path_to_remove}: {e}")
+
+            self._log(changes)
+
+    def latest(self, kind, filename):
+        """List backup generations for a file, newest first"""
+        with self.lock:
+            return list(reversed(self._generations(kind, filename)))
+
+    def forget(self, kind, filename, path):
+        """Drop a generation that no longer exists on disk"""
+        with self.lock, process_file_lock(self.catalog_file):
+            generations = self._generations(kind, filename)
+            if path not in generations:
+                return
+            generations.remove(path)
+            self._log(self._scan_changes(kind, filename) + [['drop', kind, filename, path]])
+
+    def rebuild(self):
+        """Rebuild the catalog from the backup directories"""
+        with self.lock, process_file_lock(self.catalog_file):
+            self._load()
+            self.entries = {kind: {} for kind in BACKUP_KINDS}
+            self._save()
+
+# Global catalog instance
+backup_catalog = BackupCatalog()
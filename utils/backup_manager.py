@@ -1,8 +1,13 @@
 import json
 import os
 import shutil
+from fnmatch import fnmatch
 from datetime import datetime
 
+# Left out of file backups and restores: other backups, the change journal, and the backup
+# catalog (it indexes the live backup directories, so an old copy would point at the wrong files)
+EXCLUDED_FROM_BACKUP = ('backups', 'journal', 'db_backups', 'backup_catalog.json*')
+
 def create_backup():
     """Create a backup of all data files"""
     try:
@@ -16,7 +21,11 @@ def create_backup():
         backup_path = os.path.join(backup_dir, f'backup_{timestamp}')
         
         # Copy entire data directory
-        shutil.copytree('data', backup_path, ignore=shutil.ignore_patterns('backups'))
+        shutil.copytree('data', backup_path, ignore=shutil.ignore_patterns(*EXCLUDED_FROM_BACKUP))
+
+        from utils.metrics import record_backup
+        record_backup('files', sum(os.path.getsize(os.path.join(root, name))
+                                   for root, _, names in os.walk(backup_path) for name in names))
         
         return True, f"Backup created successfully at {backup_path}"
     except Exception as e:
@@ -65,7 +74,7 @@ def restore_from_backup(backup_name):
         
         # Get list of files to restore (excluding backups folder)
         for item in os.listdir(backup_path):
-            if item == 'backups':
+            if any(fnmatch(item, pattern) for pattern in EXCLUDED_FROM_BACKUP):
                 continue
                 
             source_path = os.path.join(backup_path, item)
@@ -77,11 +86,82 @@ def restore_from_backup(backup_name):
                 if os.path.exists(dest_path):
                     shutil.rmtree(dest_path)
                 shutil.copytree(source_path, dest_path)
+
+        # The backup directories were replaced, so index them afresh
+        from utils.backup_catalog import backup_catalog
+        backup_catalog.rebuild()
         
         return True, f"Data restored successfully from {backup_name}"
     except Exception as e:
         return False, f"Restore failed: {str(e)}"
 
+def _journaled_state(table_name, hotel, timestamp, stored):
+    """The journal's state of a table at a timestamp: (success, message, records).
+
+    A table changed around the journal (e.g. by SQL outside the app) is
+    re-based first; times inside such a gap are refused, as the journal
+    doesn't know the table's state then.
+    """
+    from utils.change_journal import change_journal
+
+    change_journal.resync(table_name, hotel, stored)
+    gap = change_journal.gap_at(table_name, hotel, timestamp)
+    if gap:
+        start = gap[0][:19].replace('T', ' ') if gap[0] else "the start of the journal"
+        return (False, f"{table_name} was changed outside the change journal between {start} and "
+                       f"{gap[1][:19].replace('T', ' ')}; its state in that span is unknown", None)
+
+    target = change_journal.state_at(table_name, hotel, timestamp)
+    if target is None:
+        first, _ = change_journal.timeline(table_name, hotel)
+        if first is None:
+            return False, f"No change history recorded for {table_name}", None
+        return False, f"Change history for {table_name} starts at {first[:19].replace('T', ' ')}", None
+    return True, "", target
+
+def preview_point_in_time(table_name, hotel, timestamp):
+    """Compare a hotel's table with its state at a point in time.
+
+    Returns (success, message, diff) where diff holds the records that would be
+    'added', 'removed' and 'changed' by restoring to that time.
+    """
+    try:
+        from utils.change_journal import diff_records
+        from utils.database_data_manager import get_db_manager
+
+        db = get_db_manager()
+        if not db:
+            return False, "Database not available", None
+        stored = db.load_data_from_db(table_name, hotel)
+        success, message, target = _journaled_state(table_name, hotel, timestamp, stored)
+        if not success:
+            return False, message, None
+
+        diff = diff_records(stored, target)
+        changes = len(diff['added']) + len(diff['removed']) + len(diff['changed'])
+        return True, f"{changes} records differ from {table_name} at {timestamp}", diff
+    except Exception as e:
+        return False, f"Preview failed: {str(e)}", None
+
+def restore_point_in_time(table_name, hotel, timestamp):
+    """Restore one hotel's table to its state at a point in time by replaying the change journal"""
+    try:
+        from utils.database_data_manager import get_db_manager, save_data
+
+        db = get_db_manager()
+        if not db:
+            return False, "Database not available"
+        success, message, target = _journaled_state(table_name, hotel, timestamp, db.load_data_from_db(table_name, hotel))
+        if not success:
+            return False, message
+
+        # Only this hotel's table is rewritten; the restore is journaled like any other save
+        if not save_data(f"{table_name}.json", target, hotel):
+            return False, f"Failed to write {table_name}"
+        return True, f"{table_name} restored to {timestamp} ({len(target)} records)"
+    except Exception as e:
+        return False, f"Restore failed: {str(e)}"
+
 def restore_system_defaults():
     """Restore system default users and essential data"""
     try:
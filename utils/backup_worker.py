@@ -0,0 +1,104 @@
+"""
+Background backup worker - runs redundancy work (backups, redundant copies, pruning) off the save path
+"""
+import atexit
+import os
+import queue
+import threading
+
+# Pending backup tasks before saves start applying backpressure
+MAX_PENDING_TASKS = 256
+
+class BackupWorker:
+    def __init__(self, max_pending=MAX_PENDING_TASKS):
+        self.tasks = queue.Queue(maxsize=max_pending)
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.waited = 0
+
+    def _reset_after_fork(self):
+        """Forked children don't inherit the worker thread - start over with an empty queue"""
+        self.tasks = queue.Queue(maxsize=self.tasks.maxsize)
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread"""
+        with self.lock:
+            if not self.running:
+                self.running = True
+                self.thread = threading.Thread(target=self._work_loop, name='backup-worker', daemon=True)
+                self.thread.start()
+
+    def _work_loop(self):
+        """Run queued tasks in submission order"""
+        while True:
+            task = self.tasks.get()
+            try:
+                if task is None:
+                    return
+                self._run(*task)
+            finally:
+                self.tasks.task_done()
+
+    def _run(self, description, func, args):
+        try:
+            func(*args)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Background backup task failed ({description}): {e}")
+
+    def submit(self, description, func, *args):
+        """Queue a backup task.
+
+        Blocks while the queue is full (backpressure) rather than running the
+        task in the caller's thread, so tasks always run in submission order
+        and an older copy never lands on top of a newer one. Tasks don't take
+        data file locks, so a saving thread can wait for them.
+        """
+        self.start()
+        if threading.current_thread() is self.thread:
+            # A task submitting more work would wait on itself
+            self._run(description, func, args)
+            return
+        try:
+            self.tasks.put_nowait((description, func, args))
+        except queue.Full:
+            self.waited += 1
+            self.tasks.put((description, func, args))
+
+    def flush(self):
+        """Wait until every queued task has finished"""
+        if self.running:
+            self.tasks.join()
+
+    def shutdown(self):
+        """Flush pending tasks and stop the worker thread"""
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+        self.tasks.put(None)
+        self.thread.join()
+
+    def stats(self):
+        """Get worker statistics"""
+        return {
+            'pending': self.tasks.qsize(),
+            'completed': self.completed,
+            'failed': self.failed,
+            'waited': self.waited
+        }
+
+# Global worker instance
+backup_worker = BackupWorker()
+
+# Flush outstanding backups when the process exits
+atexit.register(backup_worker.shutdown)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=backup_worker._reset_after_fork)
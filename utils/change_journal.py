@@ -0,0 +1,381 @@
+"""
+Change journal - ordered per-hotel, per-table log of data changes for point-in-time restore
+"""
+import os
+import re
+import json
+import bisect
+import threading
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+from utils.data_integrity import process_file_lock
+from utils.parse_cache import file_signature
+
+JOURNAL_DIR = 'data/journal'
+
+# Journals larger than this are compacted: entries older than JOURNAL_RETENTION_DAYS are folded into one base
+MAX_JOURNAL_BYTES = 64 * 1024 * 1024
+JOURNAL_RETENTION_DAYS = 30
+# Upsert/delete entries written before a table gets a fresh base snapshot (bounds how far a replay reads)
+BASE_INTERVAL = 500
+
+ISO_TIMESTAMP = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}')
+
+def encode_entry(timestamp, operation, payload):
+    """Encode one journal line: timestamp, operation and JSON payload separated by tabs"""
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=str)
+    return f"{timestamp}\t{operation}\t{body}\n".encode('utf-8')
+
+def decode_entry(line):
+    """Decode a journal line into (timestamp, operation, payload)"""
+    timestamp, operation, body = line.decode('utf-8').rstrip('\n').split('\t', 2)
+    return timestamp, operation, json.loads(body)
+
+def normalize_value(value):
+    """A value as the database hands it back: ISO timestamps with 'T', decimals as floats"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, str) and ISO_TIMESTAMP.match(value) and value[10] == ' ':
+        return f"{value[:10]}T{value[11:]}"
+    return value
+
+def normalize_record(record):
+    return {key: normalize_value(value) for key, value in record.items()}
+
+def comparable(value):
+    """A value in one form however it was written: normalized, numbers as floats and
+    midnight timestamps as bare dates (a DATE saved into a TIMESTAMP column reads back at midnight)"""
+    value = normalize_value(value)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and ISO_TIMESTAMP.match(value):
+        value = value.rstrip('0').rstrip('.') if '.' in value[19:26] else value
+        if value[10:] in ('T00:00:00', 'T00:00'):
+            return value[:10]
+    return value
+
+def same_record(current, target):
+    """Whether a stored record matches a journaled one on the journaled fields it has"""
+    return all(comparable(current[key]) == comparable(value) for key, value in target.items() if key in current)
+
+def apply_entry(state, operation, payload):
+    """Apply a journal entry to a state dict of id -> record"""
+    if operation == 'snapshot':
+        state.clear()
+        for record in payload:
+            state[str(record.get('id'))] = record
+    elif operation == 'upsert':
+        state[str(payload.get('id'))] = payload
+    elif operation == 'delete':
+        state.pop(str(payload), None)
+
+class TableJournal:
+    """Journal for one hotel's table: a base snapshot followed by upsert/delete entries.
+
+    A save is journaled as the records it added, changed or removed, diffed
+    against the journal's current state (kept in memory), so each edit costs
+    the size of the change rather than of the table. Every BASE_INTERVAL diff
+    entries a new base snapshot is written so replays stay short; an index of
+    base offsets lets a replay start from the last base before the requested
+    time. Compaction folds entries past the retention period into a new base.
+    A 'gap' entry marks a span where the table changed without being journaled.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.snapshots = None      # sorted [(timestamp, offset)] of base snapshot entries
+        self.gaps = []             # [(from, to)] spans where the table changed without being journaled
+        self.diffs_since_base = 0
+        self.last_timestamp = None
+        self.state = None          # id -> record at the end of the journal
+        self.signature = None
+
+    def _load_index(self):
+        """Index base offsets, reloading if another process changed the journal"""
+        if self.snapshots is not None and file_signature(self.path) == self.signature:
+            return
+        self.snapshots = []
+        self.gaps = []
+        self.diffs_since_base = 0
+        self.last_timestamp = None
+        self.state = None
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    # Only the timestamp/operation prefix is read; payloads aren't parsed
+                    parts = line.split(b'\t', 2)
+                    if len(parts) == 3 and line.endswith(b'\n'):
+                        self.last_timestamp = parts[0].decode('ascii')
+                        if parts[1] == b'snapshot':
+                            self.snapshots.append((self.last_timestamp, offset))
+                            self.diffs_since_base = 0
+                        elif parts[1] == b'gap':
+                            self.gaps.append((json.loads(parts[2]), self.last_timestamp))
+                        else:
+                            self.diffs_since_base += 1
+                    offset += len(line)
+        self.signature = file_signature(self.path)
+
+    def _end_state(self):
+        """The table as the journal currently has it (replayed from the last base once, then kept current)"""
+        if self.state is None:
+            self.state = {}
+            if self.snapshots:
+                self._replay(self.state, self.snapshots[-1][1])
+        return self.state
+
+    def _replay(self, state, offset, until=None):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if until is not None and line[:len(until)].decode('ascii', errors='ignore') > until:
+                    break
+                try:
+                    entry_time, operation, payload = decode_entry(line)
+                except Exception:
+                    # Partial last line from an interrupted append
+                    break
+                if until is not None and entry_time > until:
+                    break
+                apply_entry(state, operation, payload)
+
+    def has_history(self):
+        with self.lock:
+            self._load_index()
+            return bool(self.snapshots)
+
+    def _timestamp(self):
+        # Entries must stay in time order for replays to stop at the right line
+        timestamp = datetime.now().isoformat(timespec='microseconds')
+        return max(timestamp, self.last_timestamp or timestamp)
+
+    def _write(self, entries):
+        """Append [(operation, payload)] at one timestamp, in a single write"""
+        timestamp = self._timestamp()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        lines = [encode_entry(timestamp, operation, payload) for operation, payload in entries]
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(lines))
+        for (operation, payload), line in zip(entries, lines):
+            if operation == 'snapshot':
+                self.snapshots.append((timestamp, offset))
+                self.diffs_since_base = 0
+            elif operation == 'gap':
+                self.gaps.append((payload, timestamp))
+            else:
+                self.diffs_since_base += 1
+            offset += len(line)
+        self.last_timestamp = timestamp
+        self.signature = file_signature(self.path)
+        if offset > MAX_JOURNAL_BYTES:
+            self._compact()
+
+    def record_table(self, records):
+        """Journal a table's full contents after a save, as the changes since the journal's last state"""
+        records = {str(record.get('id')): normalize_record(record) for record in records}
+        with self.lock, process_file_lock(self.path):
+            self._load_index()
+            if not self.snapshots:
+                entries = [('snapshot', list(records.values()))]
+            else:
+                current = self._end_state()
+                entries = [('upsert', record) for key, record in records.items() if current.get(key) != record]
+                entries += [('delete', key) for key in current if key not in records]
+                if not entries:
+                    return
+                if self.diffs_since_base + len(entries) >= BASE_INTERVAL:
+                    entries = [('snapshot', list(records.values()))]
+            self._write(entries)
+            self.state = records
+
+    def record_upsert(self, record, current_records=None):
+        """Journal one added or changed record; current_records() supplies the base the first time"""
+        record = normalize_record(record)
+        key = str(record.get('id'))
+        with self.lock, process_file_lock(self.path):
+            self._load_index()
+            entries = []
+            if not self.snapshots:
+                if current_records is None:
+                    return
+                entries.append(('snapshot', [normalize_record(r) for r in current_records()
+                                             if str(r.get('id')) != key]))
+            state = self._end_state()
+            entries.append(('upsert', record))
+            self._write(entries)
+            if entries[0][0] == 'snapshot':
+                state.clear()
+                state.update((str(r.get('id')), r) for r in entries[0][1])
+            state[key] = record
+
+    def record_delete(self, record_id):
+        with self.lock, process_file_lock(self.path):
+            self._load_index()
+            if not self.snapshots:
+                return
+            state = self._end_state()
+            self._write([('delete', str(record_id))])
+            state.pop(str(record_id), None)
+
+    def record_gap(self, records):
+        """Re-base on the table as stored, marking the time since the last entry as unknown"""
+        records = [normalize_record(record) for record in records]
+        with self.lock, process_file_lock(self.path):
+            self._load_index()
+            self._write([('gap', self.last_timestamp), ('snapshot', records)])
+            self.state = {str(record.get('id')): record for record in records}
+
+    def gap_at(self, timestamp):
+        """The (from, to) span of unjournaled changes a timestamp falls in, or None"""
+        with self.lock:
+            self._load_index()
+            for start, end in self.gaps:
+                if (start or '') < timestamp < end:
+                    return start, end
+            return None
+
+    def current(self):
+        """The table's records as the journal ends (None without history)"""
+        with self.lock:
+            self._load_index()
+            return list(self._end_state().values()) if self.snapshots else None
+
+    def _compact(self):
+        """Fold entries older than the retention period into one base snapshot at the cutoff"""
+        cutoff = (datetime.now() - timedelta(days=JOURNAL_RETENTION_DAYS)).isoformat(timespec='microseconds')
+        position = bisect.bisect_right(self.snapshots, (cutoff, float('inf')))
+        if position == 0:
+            return
+        state = {}
+        self._replay(state, self.snapshots[position - 1][1], until=cutoff)
+
+        temp_path = f"{self.path}.tmp_{os.getpid()}"
+        with open(self.path, 'rb') as source, open(temp_path, 'wb') as dest:
+            dest.write(encode_entry(cutoff, 'snapshot', list(state.values())))
+            source.seek(self.snapshots[position - 1][1])
+            for line in source:
+                if line[:len(cutoff)].decode('ascii', errors='ignore') > cutoff:
+                    dest.write(line)
+                    break
+            for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                dest.write(chunk)
+        os.replace(temp_path, self.path)
+        self.snapshots = None
+        self._load_index()
+
+    def timeline(self):
+        """Get (first, last) timestamps covered by the journal"""
+        with self.lock:
+            self._load_index()
+            if not self.snapshots:
+                return None, None
+            return self.snapshots[0][0], self.last_timestamp
+
+    def state_at(self, timestamp):
+        """Replay the journal up to (and including) a timestamp.
+
+        Returns the list of records as of that time, or None if the journal has
+        no snapshot at or before it.
+        """
+        with self.lock:
+            self._load_index()
+            position = bisect.bisect_right(self.snapshots, (timestamp, float('inf')))
+            if position == 0:
+                return None
+            state = {}
+            self._replay(state, self.snapshots[position - 1][1], until=timestamp)
+            return list(state.values())
+
+class ChangeJournal:
+    def __init__(self, journal_dir=JOURNAL_DIR):
+        self.journal_dir = journal_dir
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def table(self, table_name, hotel):
+        """Get the journal for one hotel's table"""
+        key = (hotel, table_name)
+        with self.lock:
+            journal = self.tables.get(key)
+            if journal is None:
+                journal = TableJournal(os.path.join(self.journal_dir, f"{hotel}_{table_name}.journal"))
+                self.tables[key] = journal
+            return journal
+
+    def record_table(self, table_name, hotel, records):
+        """Journal a hotel's table after a full save (only what changed is written)"""
+        self.table(table_name, hotel).record_table(list(records))
+
+    def record_upsert(self, table_name, hotel, record, current_records=None):
+        """Journal a single added or updated record.
+
+        current_records is called to obtain the base snapshot the first time a
+        table is journaled.
+        """
+        self.table(table_name, hotel).record_upsert(record, current_records)
+
+    def record_delete(self, table_name, hotel, record_id):
+        """Journal a deleted record"""
+        self.table(table_name, hotel).record_delete(record_id)
+
+    def state_at(self, table_name, hotel, timestamp):
+        """Get a hotel's table as of a timestamp (ISO format), None if before the journal starts"""
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat(timespec='microseconds')
+        return self.table(table_name, hotel).state_at(timestamp)
+
+    def in_step(self, table_name, hotel, stored_records):
+        """Whether the journal ends where the table is now; False means it was written around the journal"""
+        journaled = self.table(table_name, hotel).current()
+        if journaled is None:
+            return False
+        diff = diff_records(stored_records, journaled)
+        return not (diff['added'] or diff['removed'] or diff['changed'])
+
+    def resync(self, table_name, hotel, stored_records):
+        """Catch the journal up with a table changed around it; returns True if a gap had to be recorded.
+
+        The changes themselves are lost, so the time since the last journaled
+        entry is marked as a gap that point-in-time restore refuses to target.
+        """
+        journal = self.table(table_name, hotel)
+        if journal.current() is None or self.in_step(table_name, hotel, stored_records):
+            return False
+        journal.record_gap(stored_records)
+        return True
+
+    def gap_at(self, table_name, hotel, timestamp):
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat(timespec='microseconds')
+        return self.table(table_name, hotel).gap_at(timestamp)
+
+    def timeline(self, table_name, hotel):
+        """Get (first, last) timestamps journaled for a hotel's table"""
+        return self.table(table_name, hotel).timeline()
+
+def diff_records(current, target):
+    """Compare two record lists by id.
+
+    Returns dict with 'added' (only in target), 'removed' (only in current)
+    and 'changed' ([(current, target)] pairs). Records are compared on the
+    target's fields (see same_record), so stored rows with extra columns or
+    differently written timestamps don't count as changed.
+    """
+    current_by_id = {str(r.get('id')): r for r in current}
+    target_by_id = {str(r.get('id')): r for r in target}
+    return {
+        'added': [r for key, r in target_by_id.items() if key not in current_by_id],
+        'removed': [r for key, r in current_by_id.items() if key not in target_by_id],
+        'changed': [(current_by_id[key], r) for key, r in target_by_id.items()
+                    if key in current_by_id and not same_record(current_by_id[key], r)]
+    }
+
+# Global journal instance
+change_journal = ChangeJournal()
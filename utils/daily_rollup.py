@@ -0,0 +1,265 @@
+"""
+Daily rollup - per hotel, day, stream, payment type and category totals kept current by triggers,
+so period KPIs sum a few hundred rollup rows instead of every record
+
+Usage: python utils/daily_rollup.py rebuild|check [--hotel hotel1]
+"""
+import os
+import sys
+import argparse
+from sqlalchemy import text
+
+# Streams summed into the rollup: stream -> (table, day, payment type, category) as SQL over the table's columns.
+# Sales are rolled up twice: by record date (Dashboard) and by transaction date (Financial Summary).
+ROLLUP_STREAMS = {
+    'sales': ('sales', 'date::date', 'payment_type', 'type'),
+    'sales_by_transaction': ('sales', 'COALESCE(transaction_date, date)::date', 'payment_type', 'type'),
+    'expenditures': ('expenditures', 'date::date', 'payment_method', 'category'),
+    'cash_handovers': ('cash_handovers', 'date::date', "'Cash'", 'handover_type'),
+    'account_handovers': ('account_handovers', 'date::date', "'Account'", 'handover_type'),
+    'bad_debts': ('bad_debts', 'date::date', "''", "''"),
+    'discounts': ('discounts', 'date::date', "''", 'discount_type')
+}
+
+# Expenditure payment methods (lower case) counted as cash and as account payments
+CASH_PAYMENT_METHODS = ['cash', 'cash payment']
+ACCOUNT_PAYMENT_METHODS = ['bank transfer', 'account', 'bank', 'online transfer']
+
+ROLLUP_KEY = "hotel, day, stream, payment_type, category"
+
+def rollup_tables():
+    """Source tables, in stream order"""
+    return list(dict.fromkeys(table for table, _, _, _ in ROLLUP_STREAMS.values()))
+
+def _stream_select(stream, source, sign=1):
+    """One row per source record: its rollup key, signed amount and signed count"""
+    _, day, payment_type, category = ROLLUP_STREAMS[stream]
+    return f"""
+        SELECT COALESCE(hotel, '') AS hotel, {day} AS day, '{stream}' AS stream,
+               COALESCE({payment_type}, '') AS payment_type, COALESCE({category}, '') AS category,
+               {sign} * amount AS amount, {sign} AS records
+        FROM {source}
+    """
+
+def _aggregate_sql(selects, having=""):
+    return f"""
+        SELECT {ROLLUP_KEY}, SUM(amount) AS amount, SUM(records)::integer AS records
+        FROM ({' UNION ALL '.join(selects)}) AS rows
+        GROUP BY {ROLLUP_KEY} {having}
+    """
+
+def _expected_sql(hotel=None):
+    """Rollup rows as they should be, aggregated from the source tables"""
+    sql = _aggregate_sql([_stream_select(stream, table) for stream, (table, _, _, _) in ROLLUP_STREAMS.items()])
+    if hotel is not None:
+        sql = f"SELECT * FROM ({sql}) AS expected WHERE hotel = :hotel"
+    return sql
+
+def _apply_sql(table, sources):
+    """Add the changed rows of a table (old_rows counted negative, new_rows positive) to the rollup.
+
+    Updates that leave a key's totals as they were (e.g. save_data re-upserting
+    unchanged rows) net out to nothing and write nothing.
+    """
+    selects = [_stream_select(stream, source, sign)
+               for stream, (stream_table, _, _, _) in ROLLUP_STREAMS.items() if stream_table == table
+               for source, sign in sources]
+    return f"""
+        INSERT INTO daily_rollup AS r ({ROLLUP_KEY}, amount, records)
+        {_aggregate_sql(selects, "HAVING SUM(records) <> 0 OR SUM(amount) <> 0")}
+        ON CONFLICT ({ROLLUP_KEY}) DO UPDATE
+        SET amount = r.amount + EXCLUDED.amount, records = r.records + EXCLUDED.records;
+        DELETE FROM daily_rollup WHERE records = 0;
+    """
+
+def _trigger_function(table):
+    """Statement trigger function for a source table.
+
+    Statement triggers see every row a statement changed through transition
+    tables, so a bulk save (save_data_to_db writes a table in one upsert
+    statement) updates each rollup row once instead of once per record.
+    """
+    return f"""
+        CREATE OR REPLACE FUNCTION rollup_{table}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {_apply_sql(table, [('new_rows', 1)])}
+            ELSIF TG_OP = 'UPDATE' THEN
+                {_apply_sql(table, [('old_rows', -1), ('new_rows', 1)])}
+            ELSE
+                {_apply_sql(table, [('old_rows', -1)])}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+
+def init_daily_rollup(db):
+    """Create the rollup table and its triggers, filling the table the first time"""
+    from utils.database import existing_triggers
+
+    with db.engine.connect() as conn:
+        created = conn.execute(text("SELECT to_regclass('daily_rollup') IS NULL")).scalar()
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS daily_rollup (
+                hotel VARCHAR(20) NOT NULL,
+                day DATE NOT NULL,
+                stream VARCHAR(30) NOT NULL,
+                payment_type VARCHAR(50) NOT NULL,
+                category VARCHAR(100) NOT NULL,
+                amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+                records INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (hotel, day, stream, payment_type, category)
+            )
+        """))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS daily_rollup_stream_idx ON daily_rollup (hotel, stream, day)"))
+        # Keeps the sweep for emptied keys cheap
+        conn.execute(text("CREATE INDEX IF NOT EXISTS daily_rollup_empty_idx ON daily_rollup (hotel) WHERE records = 0"))
+
+        # Functions are replaced in place; only missing triggers are created, as
+        # recreating one locks its table against every reader and writer
+        triggers = existing_triggers(conn, rollup_tables())
+        for table_name in rollup_tables():
+            conn.execute(text(_trigger_function(table_name)))
+            # Transition tables allow only one event per trigger
+            for event, referencing in (('INSERT', 'NEW TABLE AS new_rows'),
+                                       ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+                                       ('DELETE', 'OLD TABLE AS old_rows')):
+                trigger = f"{table_name}_rollup_{event.lower()}"
+                if trigger in triggers:
+                    continue
+                conn.execute(text(f"""
+                    CREATE TRIGGER {trigger}
+                    AFTER {event} ON {table_name}
+                    REFERENCING {referencing}
+                    FOR EACH STATEMENT EXECUTE FUNCTION rollup_{table_name}()
+                """))
+        conn.commit()
+
+    if created:
+        rebuild_daily_rollup(db)
+
+def rebuild_daily_rollup(db, hotel=None):
+    """Recompute the rollup (for one hotel or all) from the source tables"""
+    try:
+        with db.engine.connect() as conn:
+            # Hold off writers so no change lands between the delete and the re-aggregation
+            conn.execute(text(f"LOCK TABLE {', '.join(rollup_tables())} IN SHARE MODE"))
+            if hotel is None:
+                conn.execute(text("DELETE FROM daily_rollup"))
+            else:
+                conn.execute(text("DELETE FROM daily_rollup WHERE hotel = :hotel"), {"hotel": hotel})
+            result = conn.execute(text(f"INSERT INTO daily_rollup ({ROLLUP_KEY}, amount, records) {_expected_sql(hotel)}"),
+                                  {"hotel": hotel} if hotel is not None else {})
+            conn.commit()
+        return True, f"Daily rollup rebuilt: {result.rowcount} rows"
+    except Exception as e:
+        return False, f"Daily rollup rebuild failed: {str(e)}"
+
+def check_daily_rollup(db, hotel=None, limit=100):
+    """Compare the rollup with a fresh aggregation; returns the rows that differ"""
+    params = {"limit": limit}
+    hotel_filter = ""
+    if hotel is not None:
+        params["hotel"] = hotel
+        hotel_filter = "WHERE hotel = :hotel"
+    with db.engine.connect() as conn:
+        result = conn.execute(text(f"""
+            SELECT {ROLLUP_KEY},
+                   e.amount AS expected_amount, a.amount AS rollup_amount,
+                   e.records AS expected_records, a.records AS rollup_records
+            FROM ({_expected_sql(hotel)}) AS e
+            FULL OUTER JOIN (SELECT * FROM daily_rollup {hotel_filter}) AS a USING ({ROLLUP_KEY})
+            WHERE e.amount IS DISTINCT FROM a.amount OR e.records IS DISTINCT FROM a.records
+            ORDER BY hotel, day, stream
+            LIMIT :limit
+        """), params)
+        return [dict(row._mapping) for row in result]
+
+def rollup_rows(db, hotel, first_day=None, last_day=None, streams=None):
+    """Rollup totals per stream, payment type and category for days first_day..last_day (inclusive, None for open)"""
+    conditions = ["hotel = :hotel"]
+    params = {"hotel": hotel}
+    if first_day is not None:
+        conditions.append("day >= :first_day")
+        params["first_day"] = first_day
+    if last_day is not None:
+        conditions.append("day <= :last_day")
+        params["last_day"] = last_day
+    if streams:
+        conditions.append("stream = ANY(:streams)")
+        params["streams"] = list(streams)
+    with db.engine.connect() as conn:
+        result = conn.execute(text(f"""
+            SELECT stream, payment_type, category, SUM(amount) AS amount, SUM(records) AS records
+            FROM daily_rollup
+            WHERE {' AND '.join(conditions)}
+            GROUP BY stream, payment_type, category
+        """), params)
+        return [
+            {'stream': row[0], 'payment_type': row[1], 'category': row[2],
+             'amount': float(row[3]), 'records': int(row[4])}
+            for row in result
+        ]
+
+def period_totals(hotel, first_day=None, last_day=None, sales_stream='sales', db=None):
+    """Sales, expenditure and handover KPIs for a period, read from the rollup.
+
+    Sales come from sales_stream ('sales' by record date or 'sales_by_transaction').
+    Returns None when the rollup can't be read, so callers can sum the records instead.
+    """
+    try:
+        if db is None:
+            from utils.database_data_manager import get_db_manager
+            db = get_db_manager()
+        rows = rollup_rows(db, hotel, first_day, last_day,
+                           [sales_stream, 'expenditures', 'cash_handovers', 'account_handovers'])
+    except Exception as e:
+        print(f"Daily rollup unavailable: {e}")
+        return None
+
+    def total(stream, match=None):
+        return sum(row['amount'] for row in rows if row['stream'] == stream and (match is None or match(row)))
+
+    return {
+        'total_sales': total(sales_stream),
+        'cash_sales': total(sales_stream, lambda row: row['payment_type'] == 'Cash'),
+        'account_sales': total(sales_stream, lambda row: row['payment_type'] == 'Account'),
+        'total_expenditures': total('expenditures'),
+        'cash_expenditures': total('expenditures', lambda row: row['payment_type'].lower() in CASH_PAYMENT_METHODS),
+        'account_expenditures': total('expenditures',
+                                      lambda row: row['payment_type'].lower() in ACCOUNT_PAYMENT_METHODS),
+        'total_handovers': total('cash_handovers'),
+        'total_account_handovers': total('account_handovers')
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild or check the daily_rollup table")
+    parser.add_argument('command', choices=['rebuild', 'check'])
+    parser.add_argument('--hotel', help="Only this hotel (default: all hotels)")
+    args = parser.parse_args(argv)
+
+    from utils.database import DatabaseManager
+    db = DatabaseManager()
+    init_daily_rollup(db)
+
+    if args.command == 'rebuild':
+        success, message = rebuild_daily_rollup(db, args.hotel)
+        print(message)
+        return 0 if success else 1
+
+    mismatches = check_daily_rollup(db, args.hotel)
+    if not mismatches:
+        print("Daily rollup is consistent")
+        return 0
+    print(f"{len(mismatches)} rollup rows differ from the source tables:")
+    for row in mismatches:
+        print(f"  {row['hotel']} {row['day']} {row['stream']} [{row['payment_type']}/{row['category']}]: "
+              f"expected {row['expected_amount']} ({row['expected_records']}), "
+              f"rollup {row['rollup_amount']} ({row['rollup_records']})")
+    return 1
+
+if __name__ == '__main__':
+    # Add project root to path
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Data export - ZIP archives and Excel workbooks of whole tables streamed batch by batch, so exporting
+holds one batch of records (plus a bounded spool) in memory instead of every table at once
+"""
+import io
+import os
+import re
+import csv
+import json
+import tempfile
+import zipfile
+from datetime import date, datetime
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from utils.database_data_manager import iter_data
+
+# Records read from the database per round trip
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+# Bytes of archive kept in memory before it spills to a temporary file
+EXPORT_SPOOL_BYTES = int(os.environ.get('EXPORT_SPOOL_BYTES', 32 * 1024 * 1024))
+
+# Excel number formats by cell type
+DATE_FORMAT = 'yyyy-mm-dd'
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+AMOUNT_FORMAT = '#,##0.00'
+INTEGER_FORMAT = '0'
+# Sheet column widths, in characters (set from the header, as rows aren't known yet)
+MIN_COLUMN_WIDTH = 12
+MAX_COLUMN_WIDTH = 50
+
+ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+ISO_DATETIME = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?')
+
+def write_csv(stream, batches):
+    """Write batches of records as CSV (header from the first record); returns the record count"""
+    writer = None
+    count = 0
+    for batch in batches:
+        for record in batch:
+            if writer is None:
+                writer = csv.DictWriter(stream, fieldnames=list(record), extrasaction='ignore', lineterminator='\n')
+                writer.writeheader()
+            writer.writerow(record)
+        count += len(batch)
+    return count
+
+def write_json(stream, batches):
+    """Write batches of records as one JSON array, a record at a time; returns the record count"""
+    count = 0
+    stream.write('[')
+    for batch in batches:
+        for record in batch:
+            stream.write(',\n  ' if count else '\n  ')
+            stream.write(json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+            count += 1
+    stream.write('\n]' if count else ']')
+    return count
+
+WRITERS = {'csv': write_csv, 'json': write_json}
+
+def table_batches(filename, hotel, transform=None, batch_size=EXPORT_BATCH_SIZE):
+    """A table's records in batches, each mapped through transform if given"""
+    batches = iter_data(filename, hotel, batch_size)
+    if transform is not None:
+        batches = (transform(batch) for batch in batches)
+    return batches
+
+def _peek(batches):
+    """The first non-empty batch and an iterator over all batches (None if there are none)"""
+    for batch in batches:
+        if batch:
+            return batch, _chain(batch, batches)
+    return None, iter(())
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+def export_zip(entries, hotel, skip_empty=False, progress=None, batch_size=EXPORT_BATCH_SIZE):
+    """Stream tables into a ZIP archive.
+
+    entries is a list of (archive name, data file, format, transform) where
+    format is 'csv' or 'json' and transform (or None) maps each batch before
+    it's written. Empty tables are left out with skip_empty. progress, if given,
+    is called as progress(done, total, archive name, records) after each table.
+
+    Returns (export, counts): a ZipExport still open for summary files and
+    {archive name: records written}. export.finish() closes it and hands back
+    the archive file.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    zip_file = zipfile.ZipFile(spool, 'w', zipfile.ZIP_DEFLATED)
+    counts = {}
+    try:
+        for done, (name, filename, fmt, transform) in enumerate(entries, start=1):
+            first, batches = _peek(table_batches(filename, hotel, transform, batch_size))
+            if first is not None or not skip_empty:
+                # force_zip64 lets an entry grow past 2 GiB without knowing its size up front
+                with zip_file.open(name, 'w', force_zip64=True) as entry:
+                    with io.TextIOWrapper(entry, encoding='utf-8', newline='') as stream:
+                        counts[name] = WRITERS[fmt](stream, batches)
+            if progress:
+                progress(done, len(entries), name, counts.get(name, 0))
+    except Exception:
+        zip_file.close()
+        spool.close()
+        raise
+    return ZipExport(zip_file, spool), counts
+
+class ZipExport:
+    """An archive being written by export_zip"""
+
+    def __init__(self, zip_file, spool):
+        self.zip_file = zip_file
+        self.spool = spool
+
+    def add_text(self, name, content):
+        self.zip_file.writestr(name, content)
+
+    def finish(self):
+        """Close the archive; returns its file object, rewound for reading"""
+        self.zip_file.close()
+        self.spool.seek(0)
+        return self.spool
+
+def excel_value(value):
+    """A record value as an Excel value and number format: ISO dates become dates, numbers stay numbers"""
+    if isinstance(value, bool) or value is None:
+        return value, None
+    if isinstance(value, int):
+        return value, INTEGER_FORMAT
+    if isinstance(value, float):
+        return value, AMOUNT_FORMAT
+    if isinstance(value, str):
+        if ISO_DATE.fullmatch(value):
+            try:
+                return date.fromisoformat(value), DATE_FORMAT
+            except ValueError:
+                return value, None
+        if ISO_DATETIME.fullmatch(value):
+            try:
+                # Excel has no time zones; keep the wall-clock time
+                return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None), DATETIME_FORMAT
+            except ValueError:
+                return value, None
+        return ILLEGAL_CHARACTERS_RE.sub('', value), None
+    return str(value), None
+
+def sheet_title(name, taken):
+    """A valid, unique worksheet title (at most 31 characters, none of []:*?/\\)"""
+    title = re.sub(r'[\[\]:*?/\\]', ' ', name).strip()[:31] or 'Sheet'
+    base, number = title, 2
+    while title.lower() in taken:
+        suffix = f" ({number})"
+        title = base[:31 - len(suffix)] + suffix
+        number += 1
+    taken.add(title.lower())
+    return title
+
+def _write_sheet(sheet, batches):
+    """Write batches of records as a header row plus one typed row per record; returns the record count"""
+    header = None
+    count = 0
+    for batch in batches:
+        for record in batch:
+            if header is None:
+                header = list(record)
+                # Column widths and frozen panes must be set before the first row is written
+                sheet.freeze_panes = 'A2'
+                for index, column in enumerate(header, start=1):
+                    width = min(max(len(str(column)) + 2, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH)
+                    sheet.column_dimensions[get_column_letter(index)].width = width
+                sheet.append([_header_cell(sheet, column) for column in header])
+            row = []
+            for index, column in enumerate(header):
+                value, number_format = excel_value(record.get(column))
+                if number_format:
+                    cell = WriteOnlyCell(sheet, value=value)
+                    cell.number_format = number_format
+                    row.append(cell)
+                else:
+                    row.append(value)
+            sheet.append(row)
+        count += len(batch)
+    return count
+
+def _header_cell(sheet, value):
+    cell = WriteOnlyCell(sheet, value=ILLEGAL_CHARACTERS_RE.sub('', str(value)))
+    cell.font = Font(bold=True)
+    return cell
+
+def export_xlsx(entries, hotel, summary=None, progress=None, batch_size=EXPORT_BATCH_SIZE):
+    """Stream tables into one workbook: a Summary sheet, then a sheet per table.
+
+    Uses openpyxl's write-only mode, which writes each row out as it is
+    appended instead of keeping a workbook model, so memory stays at one batch
+    whatever the table sizes. entries is a list of (sheet name, data file,
+    transform); summary is an optional dict of label -> value shown above the
+    per-sheet record counts. progress is called as in export_zip.
+
+    Returns the workbook file, rewound for reading.
+    """
+    workbook = Workbook(write_only=True)
+    taken = set()
+    summary_sheet = workbook.create_sheet(sheet_title('Summary', taken))
+    counts = {}
+    for done, (name, filename, transform) in enumerate(entries, start=1):
+        sheet = workbook.create_sheet(sheet_title(name, taken))
+        counts[sheet.title] = _write_sheet(sheet, table_batches(filename, hotel, transform, batch_size))
+        if progress:
+            progress(done, len(entries), name, counts[sheet.title])
+
+    summary_sheet.column_dimensions['A'].width = 30
+    summary_sheet.column_dimensions['B'].width = 20
+    for label, value in (summary or {}).items():
+        summary_sheet.append([_header_cell(summary_sheet, label), excel_value(value)[0]])
+    if summary:
+        summary_sheet.append([])
+    summary_sheet.append([_header_cell(summary_sheet, 'Sheet'), _header_cell(summary_sheet, 'Records')])
+    for title, count in counts.items():
+        summary_sheet.append([title, count])
+    summary_sheet.append([_header_cell(summary_sheet, 'Total'), sum(counts.values())])
+
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    workbook.save(spool)
+    spool.seek(0)
+    return spool
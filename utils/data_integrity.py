@@ -3,11 +3,124 @@ import os
 from datetime import datetime
 import uuid
 import shutil
+import hashlib
 import threading
 import time
+from contextlib import contextmanager
 
-# Global lock for file operations
-file_lock = threading.Lock()
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Each data file has its own thread lock; fcntl lock files coordinate processes
+LOCK_DIR = 'data/locks'
+
+class ReadWriteLock:
+    """Thread lock allowing many concurrent readers or one writer (writers preferred)"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+
+    def acquire(self, shared=False):
+        with self.condition:
+            if shared:
+                while self.writer or self.waiting_writers:
+                    self.condition.wait()
+                self.readers += 1
+            else:
+                self.waiting_writers += 1
+                while self.writer or self.readers:
+                    self.condition.wait()
+                self.waiting_writers -= 1
+                self.writer = True
+
+    def release(self, shared=False):
+        with self.condition:
+            if shared:
+                self.readers -= 1
+            else:
+                self.writer = False
+            self.condition.notify_all()
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+def _thread_lock(name):
+    """The thread lock of a data file, created on first use"""
+    with _file_locks_guard:
+        lock = _file_locks.get(name)
+        if lock is None:
+            lock = _file_locks[name] = ReadWriteLock()
+        return lock
+
+@contextmanager
+def process_file_lock(filename, shared=False):
+    """Advisory fcntl lock on data/locks/<filename>.lock shared by all processes"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    lock_path = os.path.join(LOCK_DIR, os.path.basename(filename) + '.lock')
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+_held_locks = threading.local()
+
+@contextmanager
+def file_lock(filename, shared=False):
+    """Lock a data file against other threads and processes.
+
+    Shared (reader) locks don't block each other; an exclusive (writer) lock
+    blocks everyone else on the same file. A thread may nest locks (e.g. load
+    then save under one exclusive lock); nested acquisitions reuse the
+    outermost lock and its mode. A shared lock can't be upgraded in place,
+    so asking for an exclusive lock on a file while holding a shared one on
+    it raises RuntimeError instead of quietly writing under a read lock;
+    take the exclusive lock first.
+    """
+    name = os.path.basename(filename)
+    held = _held_locks.__dict__.setdefault('names', {})
+
+    if name in held:
+        if not shared and held[name][1]:
+            raise RuntimeError(f"Exclusive lock on {name} requested while holding a shared lock on it")
+        held[name][0] += 1
+        try:
+            yield
+        finally:
+            held[name][0] -= 1
+        return
+
+    lock = _thread_lock(name)
+    lock.acquire(shared)
+    held[name] = [1, shared]
+    try:
+        with process_file_lock(filename, shared):
+            yield
+    finally:
+        del held[name]
+        lock.release(shared)
+
+def data_lock_name(filename):
+    """The lock guarding a stored data file: a JSON Lines file shares the lock of the .json file it replaced"""
+    return filename[:-1] if filename.endswith('.jsonl') else filename
+
+# The access log is written while data file locks are held, so it has its own lock
+access_log_lock = threading.Lock()
+
+# Checksum sidecar written next to every data file and backup
+DIGEST_SUFFIX = '.digest'
+DIGEST_ALGORITHM = 'blake2b'
+DIGEST_CHUNK_SIZE = 1024 * 1024
 
 def ensure_data_directory():
     """Ensure data directory exists with all backup directories"""
@@ -16,7 +129,8 @@ def ensure_data_directory():
         'data/auto_backups',
         'data/redundant',
         'data/emergency_backups',
-        'data/sessions'
+        'data/sessions',
+        LOCK_DIR
     ]
     for directory in directories:
         if not os.path.exists(directory):
@@ -35,86 +149,346 @@ def log_data_access(operation, filename, hotel=None):
 
     log_file = 'data/access_log.json'
     try:
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                logs = json.load(f)
-        else:
-            logs = []
+        from utils.data_manager import encode_data
+        with access_log_lock, process_file_lock(log_file):
+            if os.path.exists(log_file):
+                with open(log_file, 'r') as f:
+                    logs = json.load(f)
+            else:
+                logs = []
 
-        logs.append(log_entry)
+            logs.append(log_entry)
 
-        # Keep more log entries for permanent storage
-        if len(logs) > 5000:
-            logs = logs[-5000:]
+            # Keep more log entries for permanent storage
+            if len(logs) > 5000:
+                logs = logs[-5000:]
 
-        with open(log_file, 'w') as f:
-            json.dump(logs, f, indent=2)
+            with open(log_file, 'wb') as f:
+                f.write(encode_data(logs))
     except Exception as e:
         print(f"Failed to log data access: {e}")
 
-def create_emergency_backup(filename, data):
-    """Create emergency backup with timestamp"""
+def compute_digest(payload):
+    """Compute checksum of in-memory file content"""
+    return hashlib.blake2b(payload).hexdigest()
+
+def compute_file_digest(path, size=None):
+    """Compute checksum of a file (or of its first size bytes) by streaming its bytes"""
+    digest = hashlib.blake2b()
+    remaining = size
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(DIGEST_CHUNK_SIZE if remaining is None else min(DIGEST_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+def write_digest(path, digest, size, appendable=False):
+    """Write checksum sidecar for a file (atomically, as backups may hard-link it).
+
+    An appendable sidecar (JSON Lines files) covers the first size bytes;
+    lines appended after them are checked by parsing them.
+    """
+    sidecar = {'algorithm': DIGEST_ALGORITHM, 'digest': digest, 'size': size}
+    if appendable:
+        sidecar['appendable'] = True
+    temp_path = path + DIGEST_SUFFIX + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(sidecar, f)
+    os.replace(temp_path, path + DIGEST_SUFFIX)
+
+def read_digest(path):
+    """Read checksum sidecar for a file, None if missing or unreadable"""
+    try:
+        with open(path + DIGEST_SUFFIX, 'r') as f:
+            sidecar = json.load(f)
+        if sidecar.get('algorithm') != DIGEST_ALGORITHM:
+            return None
+        return sidecar
+    except Exception:
+        return None
+
+def write_file_with_digest(path, payload, appendable=False):
+    """Write file content (via a temporary file and rename, so no reader sees it half written)
+    and its checksum sidecar, returning the digest"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    # Sidecar first: a reader in between sees a mismatch and passes this copy over, rather
+    # than a stale checksum that matches the old bytes
+    digest = compute_digest(payload)
+    write_digest(path, digest, len(payload), appendable)
+    os.replace(temp_path, path)
+    return digest
+
+def copy_with_digest(source_path, dest_path):
+    """Copy a file together with its checksum sidecar"""
+    shutil.copy2(source_path, dest_path)
+    if os.path.exists(source_path + DIGEST_SUFFIX):
+        shutil.copy2(source_path + DIGEST_SUFFIX, dest_path + DIGEST_SUFFIX)
+    elif os.path.exists(dest_path + DIGEST_SUFFIX):
+        # Never leave a stale sidecar describing the previous content
+        os.remove(dest_path + DIGEST_SUFFIX)
+
+def snapshot_file(source_path, dest_path):
+    """Snapshot a file and its sidecar by hard-linking them (O(1)), copying if links are unsupported.
+
+    The source must only ever be replaced atomically afterwards, never rewritten in place.
+    """
+    for suffix in ('', DIGEST_SUFFIX):
+        source = source_path + suffix
+        dest = dest_path + suffix
+        if not os.path.exists(source):
+            if os.path.exists(dest):
+                os.remove(dest)
+            continue
+        # Link under a temporary name and rename so readers never see the backup missing
+        temp_path = dest + '.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copy2(source, temp_path)
+        os.replace(temp_path, dest)
+
+def complete_backup(filename, timestamped_backup, regular_backup):
+    """Refresh the regular backup from a timestamped snapshot and prune old generations"""
+    from utils.backup_catalog import backup_catalog
+    copy_with_digest(timestamped_backup, regular_backup)
+    # Keep more timestamped backups for permanent storage (100 backups per file)
+    backup_catalog.record('auto', filename, timestamped_backup)
+
+def write_redundant_copies(filename, payload, appendable=False):
+    """Write both redundant copies of a data file from its serialized content"""
+    redundant_dir = 'data/redundant'
+    write_file_with_digest(os.path.join(redundant_dir, filename), payload, appendable)
+    write_file_with_digest(os.path.join(redundant_dir, f"{filename}.copy2"), payload, appendable)
+
+def append_redundant_copies(filename, offset, lines):
+    """Append lines written to a JSON Lines data file at offset to its redundant copies.
+
+    A copy that doesn't end where the data file did (missing, or it missed an
+    earlier append) is refreshed from the data file instead. That copy is
+    taken without the file's lock (a saving thread may be waiting on this
+    worker); if it catches an append midway, that append's own task
+    refreshes it again.
+    """
+    data_path = os.path.join('data', filename)
+    for path in (os.path.join('data/redundant', filename), os.path.join('data/redundant', f"{filename}.copy2")):
+        if os.path.exists(path) and os.path.getsize(path) == offset:
+            with open(path, 'ab') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            copy_with_digest(data_path, path)
+
+def verify_file_digest(path, expected_digest=None):
+    """Verify a file against its checksum sidecar without parsing it.
+
+    Returns True if the digest matches, False on mismatch and None if the
+    file has no sidecar to compare with.
+    """
+    if expected_digest is None:
+        sidecar = read_digest(path)
+        if sidecar is None:
+            return None
+        if sidecar.get('appendable'):
+            if os.path.getsize(path) < sidecar.get('size', 0):
+                return False
+            if compute_file_digest(path, sidecar['size']) != sidecar['digest']:
+                return False
+            return verify_lines(path, sidecar['size'])
+        if os.path.getsize(path) != sidecar.get('size'):
+            return False
+        expected_digest = sidecar['digest']
+    return compute_file_digest(path) == expected_digest
+
+def verify_lines(path, offset=0):
+    """Check that every line of a JSON Lines file from offset on parses.
+
+    An unterminated last line is an append still in progress (or one cut
+    short, which the store skips), so it isn't treated as damage.
+    """
+    from utils.data_manager import decode_data
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n') or not line.strip():
+                continue
+            try:
+                decode_data(line)
+            except Exception:
+                return False
+    return True
+
+def create_emergency_backup(filename, data, payload=None):
+    """Create emergency backup with timestamp (payload: already serialized data)"""
     ensure_data_directory()
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
     backup_filename = f"emergency_{filename}_{timestamp}.json"
     backup_path = os.path.join('data/emergency_backups', backup_filename)
 
     try:
-        with open(backup_path, 'w') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if payload is None:
+            from utils.data_manager import encode_data
+            payload = encode_data(data)
+        write_file_with_digest(backup_path, payload)
 
         # Keep more emergency backups for permanent storage (keep last 200 per file)
-        import glob
-        pattern = os.path.join('data/emergency_backups', f"emergency_{filename}_*.json")
-        backups = sorted(glob.glob(pattern))
-        while len(backups) > 200:
-            os.remove(backups.pop(0))
+        from utils.backup_catalog import backup_catalog
+        backup_catalog.record('emergency', filename, backup_path)
 
     except Exception as e:
         print(f"Failed to create emergency backup: {e}")
 
-def verify_data_integrity(filename, expected_data):
-    """Verify that saved data matches expected data"""
+def verify_data_integrity(filename, expected_data=None, expected_digest=None, deep=False):
+    """Verify that saved data matches expected data.
+
+    By default the file bytes are compared with the expected digest (or the
+    checksum sidecar). A deep verify parses the file and compares it with
+    expected_data.
+    """
     try:
         filepath = os.path.join('data', filename)
         if not os.path.exists(filepath):
             return False
 
-        with open(filepath, 'r') as f:
-            saved_data = json.load(f)
+        if not deep:
+            verified = verify_file_digest(filepath, expected_digest)
+            if verified is not None:
+                return verified
+            if expected_data is None:
+                return False
+
+        from utils.data_manager import decode_data
+        with open(filepath, 'rb') as f:
+            saved_data = decode_data(f.read())
 
+        if expected_data is None:
+            return True
         return saved_data == expected_data
     except Exception:
         return False
 
-def check_all_data_integrity():
-    """Check integrity of all critical data files"""
-    issues = []
-    critical_files = [
-        'sales.json', 'rooms.json', 'expenditures.json',
-        'advance_payments.json', 'outstanding_dues.json'
-    ]
+# Data files checked by the integrity scanner and monitor
+CRITICAL_FILES = [
+    'sales.json', 'rooms.json', 'expenditures.json',
+    'advance_payments.json', 'outstanding_dues.json'
+]
+HOTELS = ['hotel1', 'hotel2']
 
-    for hotel in ['hotel1', 'hotel2']:
-        for filename in critical_files:
-            hotel_filename = f"{hotel}_{filename}"
-            filepath = os.path.join('data', hotel_filename)
+def check_data_file(hotel_filename, deep=False):
+    """Check one data file, returning an issue description or None if it is intact.
 
-            if not os.path.exists(filepath):
-                issues.append(f"Missing file: {hotel_filename}")
-                continue
+    Files with a checksum sidecar are verified by streaming their bytes; files
+    without one (or all files when deep=True) are parsed.
+    """
+    # Under the file's shared lock, so a save's rename and sidecar write are never seen half done
+    with file_lock(data_lock_name(hotel_filename), shared=True):
+        return _check_data_file(hotel_filename, deep)
 
-            try:
-                with open(filepath, 'r') as f:
-                    content = f.read().strip()
-                    if not content:
-                        issues.append(f"Empty file: {hotel_filename}")
-                        continue
-                    json.loads(content)
-            except Exception as e:
-                issues.append(f"Corrupted file: {hotel_filename} - {str(e)}")
+def _check_data_file(hotel_filename, deep):
+    from utils.data_manager import decode_data
+
+    filepath = os.path.join('data', hotel_filename)
+    # JSON Lines files (see data_manager.stored_filename) are appended to and may hold no records
+    lines = hotel_filename.endswith('.jsonl')
+
+    if not os.path.exists(filepath):
+        return f"Missing file: {hotel_filename}"
+
+    try:
+        if os.path.getsize(filepath) == 0 and not lines:
+            return f"Empty file: {hotel_filename}"
+
+        if not deep:
+            verified = verify_file_digest(filepath)
+            if verified is False:
+                return f"Corrupted file: {hotel_filename} - checksum mismatch"
+            if verified:
+                return None
+
+        with open(filepath, 'rb') as f:
+            payload = f.read()
+        if lines:
+            if not verify_lines(filepath):
+                return f"Corrupted file: {hotel_filename} - unreadable line"
+        elif not payload.strip():
+            return f"Empty file: {hotel_filename}"
+        else:
+            decode_data(payload)
+
+        # Record a sidecar so the next check can skip parsing
+        if read_digest(filepath) is None:
+            write_digest(filepath, compute_digest(payload), len(payload), appendable=lines)
+        elif verify_file_digest(filepath) is False:
+            return f"Corrupted file: {hotel_filename} - checksum mismatch"
+    except Exception as e:
+        return f"Corrupted file: {hotel_filename} - {str(e)}"
+    return None
+
+def check_all_data_integrity(deep=False):
+    """Check integrity of all critical data files.
+
+    Files are checked in parallel, and files unchanged since their last good
+    check are skipped unless deep=True.
+    """
+    from utils.integrity_scanner import integrity_scanner
+
+    return integrity_scanner.scan_files(deep=deep)
 
-    return issues
+def restore_data_file(source_path, filename):
+    """Put a backup copy in place of a data file (a JSON Lines file's offset index is rebuilt from it)"""
+    copy_with_digest(source_path, os.path.join('data', filename))
+    if filename.endswith('.jsonl'):
+        from utils.jsonl_store import INDEX_SUFFIX
+        index_path = os.path.join('data', filename + INDEX_SUFFIX)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+def _restore_from_backups(filename, repairs):
+    """Put the newest intact backup copy in place of a data file (the caller holds its lock)"""
+    # Try redundant copy first
+    redundant_path = os.path.join('data/redundant', filename)
+    if os.path.exists(redundant_path) and verify_file_digest(redundant_path) is not False:
+        try:
+            restore_data_file(redundant_path, filename)
+            repairs.append(f"Restored {filename} from redundant copy")
+            return True
+        except Exception:
+            pass
+
+    # Try regular backup
+    backup_path = os.path.join('data/auto_backups', f"{filename}.backup")
+    if os.path.exists(backup_path) and verify_file_digest(backup_path) is not False:
+        try:
+            restore_data_file(backup_path, filename)
+            repairs.append(f"Restored {filename} from backup")
+            return True
+        except Exception:
+            pass
+
+    # Try emergency backups
+    from utils.backup_catalog import backup_catalog
+    for emergency_backup in backup_catalog.latest('emergency', filename):
+        try:
+            # Skip backups whose bytes no longer match their checksum
+            if verify_file_digest(emergency_backup) is False:
+                continue
+            restore_data_file(emergency_backup, filename)
+            repairs.append(f"Restored {filename} from emergency backup")
+            return True
+        except Exception:
+            continue
+    return False
 
 def repair_corrupted_files():
     """Attempt to repair corrupted files from backups"""
@@ -127,44 +501,13 @@ def repair_corrupted_files():
         if "Missing file:" in issue or "Empty file:" in issue or "Corrupted file:" in issue:
             filename = issue.split(": ")[1].split(" - ")[0]
 
-            # Try to restore from various backup sources
-            restored = False
-
-            # Try redundant copy first
-            redundant_path = os.path.join('data/redundant', filename)
-            if os.path.exists(redundant_path):
-                try:
-                    shutil.copy2(redundant_path, os.path.join('data', filename))
-                    repairs.append(f"Restored {filename} from redundant copy")
-                    restored = True
-                except Exception:
-                    pass
-
-            # Try regular backup
-            if not restored:
-                backup_path = os.path.join('data/auto_backups', f"{filename}.backup")
-                if os.path.exists(backup_path):
-                    try:
-                        shutil.copy2(backup_path, os.path.join('data', filename))
-                        repairs.append(f"Restored {filename} from backup")
-                        restored = True
-                    except Exception:
-                        pass
-
-            # Try emergency backups
-            if not restored:
-                import glob
-                emergency_pattern = os.path.join('data/emergency_backups', f"emergency_{filename}_*.json")
-                emergency_backups = sorted(glob.glob(emergency_pattern), reverse=True)
-
-                for emergency_backup in emergency_backups:
-                    try:
-                        shutil.copy2(emergency_backup, os.path.join('data', filename))
-                        repairs.append(f"Restored {filename} from emergency backup")
-                        restored = True
-                        break
-                    except Exception:
-                        continue
+            # The whole repair holds the file's exclusive lock, and the file is checked again
+            # first: a save may have finished since the scan released it
+            with file_lock(data_lock_name(filename)):
+                if _check_data_file(filename, deep=False) is None:
+                    repairs.append(f"{filename} is intact on a second check; left as is")
+                    continue
+                restored = _restore_from_backups(filename, repairs)
 
             if not restored:
                 success = False
@@ -1,8 +1,154 @@
 import json
 import os
+import time
 from datetime import datetime
 import uuid
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+class JsonCodec:
+    """Standard library JSON codec"""
+    name = 'json'
+
+    def dumps(self, data, pretty=False):
+        if pretty:
+            return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, payload):
+        return json.loads(payload)
+
+class OrjsonCodec:
+    """orjson codec (used when orjson is installed)"""
+    name = 'orjson'
+
+    def dumps(self, data, pretty=False):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+    def loads(self, payload):
+        return orjson.loads(payload)
+
+class MsgspecCodec:
+    """msgspec JSON codec (used when msgspec is installed)"""
+    name = 'msgspec'
+
+    def __init__(self):
+        self.encoder = msgspec.json.Encoder()
+        self.decoder = msgspec.json.Decoder()
+
+    def dumps(self, data, pretty=False):
+        payload = self.encoder.encode(data)
+        if pretty:
+            return msgspec.json.format(payload, indent=2)
+        return payload
+
+    def loads(self, payload):
+        return self.decoder.decode(payload)
+
+def available_codecs():
+    """Get all installed codecs, fastest first"""
+    codecs = {}
+    if orjson is not None:
+        codecs['orjson'] = OrjsonCodec()
+    if msgspec is not None:
+        codecs['msgspec'] = MsgspecCodec()
+    codecs['json'] = JsonCodec()
+    return codecs
+
+def get_codec(name=None):
+    """Get codec by name (or DATA_CODEC env var), defaulting to the fastest installed one"""
+    codecs = available_codecs()
+    name = name or os.environ.get('DATA_CODEC')
+    if name in codecs:
+        return codecs[name]
+    return next(iter(codecs.values()))
+
+codec = get_codec()
+fallback_codec = JsonCodec()
+
+def encode_data(data, pretty=False):
+    """Serialize data to UTF-8 JSON bytes - compact on disk, pretty only for exports"""
+    try:
+        return codec.dumps(data, pretty)
+    except (TypeError, OverflowError, ValueError):
+        # Fast codecs reject some values the stdlib accepts (e.g. huge ints)
+        return fallback_codec.dumps(data, pretty)
+
+def decode_data(payload):
+    """Parse JSON bytes or text"""
+    try:
+        return codec.loads(payload)
+    except Exception:
+        return fallback_codec.loads(payload)
+
+# Storage format for list-of-records data files: 'json' (one array per file)
+# or 'jsonl' (one record per line with an id/date offset index)
+STORAGE_FORMAT = os.environ.get('DATA_STORAGE_FORMAT', 'json')
+
+# Files that are not lists of records and always stay as plain JSON
+JSON_ONLY_FILES = ['rooms.json', 'users.json', 'hotels.json']
+
+def uses_jsonl(filename):
+    """Check whether a (hotel-prefixed) data file is stored as JSON Lines"""
+    if STORAGE_FORMAT != 'jsonl':
+        return False
+    return not any(filename.endswith(name) for name in JSON_ONLY_FILES)
+
+def jsonl_filename(filename):
+    """The JSON Lines file name for a (hotel-prefixed) .json data file name"""
+    return filename[:-len('.json')] + '.jsonl' if filename.endswith('.json') else filename + '.jsonl'
+
+def stored_filename(filename):
+    """The file under data/ holding a (hotel-prefixed) data file: its .jsonl once stored as JSON Lines"""
+    if not uses_jsonl(filename):
+        return filename
+    lines_name = jsonl_filename(filename)
+    if not os.path.exists(os.path.join('data', lines_name)) and os.path.exists(os.path.join('data', filename)):
+        # Not migrated yet
+        return filename
+    return lines_name
+
+def get_record_store(filename):
+    """Get the JSON Lines store for a (hotel-prefixed) data file, migrating the JSON file on first use.
+
+    Migration writes, so it takes the file's exclusive lock; callers holding
+    only a shared lock must get the store before taking it. A JSON file that
+    can't be read is not migrated: it stays in place for recovery and
+    ValueError is raised.
+    """
+    from utils.jsonl_store import get_store
+    from utils.data_integrity import file_lock, write_digest, compute_digest, DIGEST_SUFFIX
+    json_path = os.path.join('data', filename)
+    store = get_store(os.path.join('data', jsonl_filename(filename)))
+    if os.path.exists(store.path) or not os.path.exists(json_path):
+        return store
+
+    with file_lock(filename):
+        if not os.path.exists(store.path) and os.path.exists(json_path):
+            try:
+                with open(json_path, 'rb') as f:
+                    content = f.read().strip()
+                records = decode_data(content) if content else []
+            except Exception as e:
+                raise ValueError(f"Could not migrate {json_path} to JSON Lines: {e}") from e
+            if not isinstance(records, list):
+                raise ValueError(f"Could not migrate {json_path} to JSON Lines: not a list of records")
+            payload = store.rewrite(records)
+            write_digest(store.path, compute_digest(payload), len(payload), appendable=True)
+            # Set the JSON file aside so integrity checks and repairs don't take it for the live data
+            for suffix in ('', DIGEST_SUFFIX):
+                if os.path.exists(json_path + suffix):
+                    os.replace(json_path + suffix, f"{json_path}.migrated{suffix}")
+    return store
+
 def ensure_data_directory():
     """Ensure data directory exists"""
     if not os.path.exists('data'):
@@ -142,19 +288,24 @@ def initialize_data():
     for file_name in data_files:
         # Create main file
         file_path = f'data/{file_name}'
-        if not os.path.exists(file_path):
+        if not os.path.exists(os.path.join('data', stored_filename(file_name))):
             with open(file_path, 'w') as f:
                 json.dump([], f)
         
         # Create hotel-specific files
         for hotel_id in ['hotel1', 'hotel2']:
             hotel_file_path = f'data/{hotel_id}_{file_name}'
-            if not os.path.exists(hotel_file_path):
+            if not os.path.exists(os.path.join('data', stored_filename(f'{hotel_id}_{file_name}'))):
                 with open(hotel_file_path, 'w') as f:
                     json.dump([], f)
 
-def load_data(filename, hotel='hotel1'):
-    """Load data from JSON file with hotel-specific support and automatic recovery"""
+def load_data(filename, hotel='hotel1', readonly=False):
+    """Load data from JSON file with hotel-specific support and automatic recovery.
+
+    Parsed files are cached per process and re-parsed only when the file's
+    mtime, size or inode changes. Callers get a private copy they may mutate,
+    or (cheaper) a shared frozen view (tuples/mappings) with readonly=True.
+    """
     # For hotel-specific files, prefix with hotel identifier
     if hotel and filename != 'users.json':
         filename = f"{hotel}_{filename}"
@@ -164,22 +315,46 @@ def load_data(filename, hotel='hotel1'):
     # Ensure data directory exists
     os.makedirs('data', exist_ok=True)
 
+    from utils.data_integrity import copy_with_digest, file_lock
+    from utils.parse_cache import parse_cache, file_signature, freeze_data
+    from utils.page_profiler import page_profiler
+    from utils.metrics import LOAD_DATA_CALLS
+
+    # Record-per-line storage reads through the offset index
+    if uses_jsonl(filename):
+        page_profiler.record_load(filename)
+        LOAD_DATA_CALLS.inc(backend='jsonl', cache='miss')
+        store = get_record_store(filename)
+        with file_lock(filename, shared=True):
+            records = store.load_all()
+        return freeze_data(records) if readonly else records
+
+    # Serve unchanged files from the parse cache
+    cached = parse_cache.get(filepath, readonly=readonly)
+    page_profiler.record_load(filename, cached=cached is not None)
+    LOAD_DATA_CALLS.inc(backend='json', cache='hit' if cached is not None else 'miss')
+    if cached is not None:
+        return cached
+
     # Try multiple recovery methods if main file fails
     def try_load_from_path(path):
         try:
-            with open(path, 'r') as f:
+            with open(path, 'rb') as f:
                 content = f.read().strip()
                 if not content:
                     return None
-                return json.loads(content)
+                return decode_data(content)
         except:
             return None
 
-    # Try main file first
-    data = try_load_from_path(filepath)
+    # Try main file first (signature taken before reading so a concurrent write invalidates it)
+    with file_lock(filename, shared=True):
+        signature = file_signature(filepath)
+        data = try_load_from_path(filepath)
     
     if data is not None:
-        return data
+        parse_cache.store(filepath, data, signature)
+        return freeze_data(data) if readonly else data
     
     # Try redundant copy
     redundant_path = os.path.join('data/redundant', filename)
@@ -188,8 +363,8 @@ def load_data(filename, hotel='hotel1'):
         if data is not None:
             # Restore main file from redundant copy
             try:
-                import shutil
-                shutil.copy2(redundant_path, filepath)
+                with file_lock(filename):
+                    copy_with_digest(redundant_path, filepath)
                 print(f"Restored {filepath} from redundant copy")
                 return data
             except:
@@ -202,30 +377,28 @@ def load_data(filename, hotel='hotel1'):
         if data is not None:
             # Restore main file from backup
             try:
-                import shutil
-                shutil.copy2(backup_path, filepath)
+                with file_lock(filename):
+                    copy_with_digest(backup_path, filepath)
                 print(f"Restored {filepath} from backup")
                 return data
             except:
                 pass
     
-    # Try timestamped backups (newest first)
-    backup_dir = 'data/auto_backups'
-    if os.path.exists(backup_dir):
-        import glob
-        backup_pattern = os.path.join(backup_dir, f"{filename}_*.backup")
-        backups = sorted(glob.glob(backup_pattern), reverse=True)
-        
-        for backup in backups:
-            data = try_load_from_path(backup)
-            if data is not None:
-                try:
-                    import shutil
-                    shutil.copy2(backup, filepath)
-                    print(f"Restored {filepath} from timestamped backup {backup}")
-                    return data
-                except:
-                    continue
+    # Try timestamped backups (newest first) from the backup catalog
+    from utils.backup_catalog import backup_catalog
+    for backup in backup_catalog.latest('auto', filename):
+        if not os.path.exists(backup):
+            backup_catalog.forget('auto', filename, backup)
+            continue
+        data = try_load_from_path(backup)
+        if data is not None:
+            try:
+                with file_lock(filename):
+                    copy_with_digest(backup, filepath)
+                print(f"Restored {filepath} from timestamped backup {backup}")
+                return data
+            except:
+                continue
     
     # If all recovery attempts fail, create default structure
     print(f"All recovery attempts failed for {filename}, creating new file")
@@ -241,15 +414,28 @@ def load_data(filename, hotel='hotel1'):
         return []
 
 def save_data(filename, data, hotel='hotel1'):
-    """Save data to JSON file with triple redundancy and enhanced persistence"""
-    from utils.data_integrity import log_data_access, create_emergency_backup, verify_data_integrity, file_lock
-    
-    # Thread-safe file operations
-    with file_lock:
-        # For hotel-specific files, prefix with hotel identifier
-        if hotel and filename != 'users.json':
-            filename = f"{hotel}_{filename}"
+    """Save data to JSON file with triple redundancy and enhanced persistence.
+
+    Only the primary write (and its fsync) happens in the caller's thread;
+    emergency snapshots, backup copies, redundant copies and pruning are
+    handed to the background backup worker.
+    """
+    from utils.data_integrity import (
+        log_data_access, create_emergency_backup, file_lock, compute_digest, compute_file_digest,
+        write_digest, copy_with_digest, snapshot_file, complete_backup, write_redundant_copies
+    )
+    from utils.backup_worker import backup_worker
+    from utils.parse_cache import parse_cache
+    from utils.metrics import SAVE_SECONDS
 
+    table = filename.replace('.json', '')
+
+    # For hotel-specific files, prefix with hotel identifier
+    if hotel and filename != 'users.json':
+        filename = f"{hotel}_{filename}"
+    
+    # Exclusive per-file lock (threads and processes); other files save in parallel
+    with SAVE_SECONDS.time(backend='json', table=table), file_lock(filename):
         # Ensure data directory exists
         os.makedirs('data', exist_ok=True)
         os.makedirs('data/auto_backups', exist_ok=True)
@@ -260,32 +446,28 @@ def save_data(filename, data, hotel='hotel1'):
         
         # Log the save operation
         log_data_access('save', filename, hotel)
+
+        # Record-per-line storage rewrites (and compacts) the JSON Lines file, with the same backups
+        if uses_jsonl(filename):
+            _save_jsonl(filename, data)
+            return
+
+        # Serialize once; the digest of these bytes is what every copy is verified against
+        payload = encode_data(data)
+        digest = compute_digest(payload)
         
-        # Create emergency backup before any operation
-        create_emergency_backup(filename, data)
-        
-        # Create multiple backup layers for all data files
+        # Snapshot the previous version for the timestamped backup; the worker copies it later
+        timestamped_backup = None
         if os.path.exists(filepath):
             backup_dir = 'data/auto_backups'
-            
-            # Create timestamped backup
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             timestamped_backup = os.path.join(backup_dir, f"{filename}_{timestamp}.backup")
             regular_backup = os.path.join(backup_dir, f"{filename}.backup")
             
             try:
-                import shutil
-                shutil.copy2(filepath, timestamped_backup)
-                shutil.copy2(filepath, regular_backup)
-                
-                # Keep more timestamped backups for permanent storage (100 backups per file)
-                import glob
-                backup_pattern = os.path.join(backup_dir, f"{filename}_*.backup")
-                backups = sorted(glob.glob(backup_pattern))
-                while len(backups) > 100:
-                    os.remove(backups.pop(0))
-                    
+                snapshot_file(filepath, timestamped_backup)
             except Exception as e:
+                timestamped_backup = None
                 print(f"Warning: Backup creation failed: {e}")
         
         # Multiple save attempts with verification
@@ -298,23 +480,20 @@ def save_data(filename, data, hotel='hotel1'):
             try:
                 # Write to temporary file first, then rename (atomic operation)
                 temp_path = filepath + f'.tmp_{attempts}'
-                with open(temp_path, 'w') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                with open(temp_path, 'wb') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
                 
-                # Verify temp file before rename
-                with open(temp_path, 'r') as f:
-                    temp_data = json.load(f)
-                    if temp_data != data:
-                        raise Exception("Data verification failed for temp file")
+                # Verify temp file before rename by streaming its bytes
+                if compute_file_digest(temp_path) != digest:
+                    raise Exception("Data verification failed for temp file")
                 
-                # Rename temp file to actual file (atomic on most systems)
-                os.rename(temp_path, filepath)
-                
-                # Double verification that data was written correctly
-                if verify_data_integrity(filename, data):
-                    save_successful = True
-                else:
-                    raise Exception("Data integrity verification failed after save")
+                # Sidecar first, then rename temp file to actual file (atomic on most systems);
+                # integrity checks take the shared lock, so they see neither step alone
+                write_digest(filepath, digest, len(payload))
+                os.replace(temp_path, filepath)
+                save_successful = True
                 
             except Exception as e:
                 print(f"Save attempt {attempts} failed: {e}")
@@ -326,36 +505,158 @@ def save_data(filename, data, hotel='hotel1'):
                         pass
                 
                 if attempts >= max_attempts:
-                    # Try to restore from backup if all save attempts failed
-                    backup_path = os.path.join('data/auto_backups', f"{filename}.backup")
+                    # Try to restore the previous version if all save attempts failed
+                    backup_worker.flush()
+                    backup_path = timestamped_backup or os.path.join('data/auto_backups', f"{filename}.backup")
                     if os.path.exists(backup_path):
                         try:
-                            shutil.copy2(backup_path, filepath)
+                            copy_with_digest(backup_path, filepath)
                             print(f"Restored {filepath} from backup due to save failure")
                         except Exception:
                             pass
                     raise Exception(f"Failed to save data after {max_attempts} attempts: {e}")
                 else:
                     time.sleep(0.1)  # Brief pause before retry
-        
+
+        # Prime the parse cache with the data just written
+        parse_cache.store(filepath, data)
+
+        # Hand redundancy work to the background worker (runs in submission order)
+        backup_worker.submit(f"emergency backup of {filename}", create_emergency_backup, filename, None, payload)
+        if timestamped_backup:
+            backup_worker.submit(f"backup of {filename}", complete_backup, filename, timestamped_backup, regular_backup)
         # Create redundant copies for ALL files (not just critical ones)
-        try:
-            redundant_dir = 'data/redundant'
-            redundant_path = os.path.join(redundant_dir, filename)
-            shutil.copy2(filepath, redundant_path)
-            
-            # Also create a second redundant copy
-            redundant2_path = os.path.join(redundant_dir, f"{filename}.copy2")
-            shutil.copy2(filepath, redundant2_path)
+        backup_worker.submit(f"redundant copies of {filename}", write_redundant_copies, filename, payload)
             
+        print(f"Data successfully saved to {filepath}")
+
+def _save_jsonl(filename, data):
+    """Rewrite a JSON Lines data file; the caller holds its exclusive lock.
+
+    The previous file is snapshotted for the timestamped backup and the new
+    one gets a checksum sidecar, an emergency backup and redundant copies,
+    all under the .jsonl name, so repairs never restore a JSON array over it.
+    """
+    from utils.data_integrity import (
+        create_emergency_backup, compute_digest, write_digest, snapshot_file, complete_backup, write_redundant_copies
+    )
+    from utils.backup_worker import backup_worker
+
+    store = get_record_store(filename)
+    lines_name = os.path.basename(store.path)
+
+    timestamped_backup = None
+    if os.path.exists(store.path):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamped_backup = os.path.join('data/auto_backups', f"{lines_name}_{timestamp}.backup")
+        regular_backup = os.path.join('data/auto_backups', f"{lines_name}.backup")
+        try:
+            # rewrite() replaces the file, so the link keeps the previous version
+            snapshot_file(store.path, timestamped_backup)
         except Exception as e:
-            print(f"Warning: Redundant copy creation failed: {e}")
-        
-        # Final verification
-        if not verify_data_integrity(filename, data):
-            raise Exception("Final data integrity check failed")
-            
-        print(f"Data successfully saved to {filepath} with full redundancy")
+            timestamped_backup = None
+            print(f"Warning: Backup creation failed: {e}")
+
+    payload = store.rewrite(data)
+    # Appended lines aren't covered by the checksum; they are checked by parsing them
+    write_digest(store.path, compute_digest(payload), len(payload), appendable=True)
+
+    backup_worker.submit(f"emergency backup of {lines_name}", create_emergency_backup, lines_name, None, payload)
+    if timestamped_backup:
+        backup_worker.submit(f"backup of {lines_name}", complete_backup, lines_name, timestamped_backup, regular_backup)
+    backup_worker.submit(f"redundant copies of {lines_name}", write_redundant_copies, lines_name, payload, True)
+    print(f"Data successfully saved to {store.path}")
+
+def _append_jsonl(filename, change):
+    """Apply an append-only change to a JSON Lines store and copy the new lines to the redundant copies.
+
+    The caller holds the file's exclusive lock; change is called with the store.
+    """
+    from utils.data_integrity import append_redundant_copies
+    from utils.backup_worker import backup_worker
+
+    store = get_record_store(filename)
+    offset = os.path.getsize(store.path) if os.path.exists(store.path) else 0
+    change(store)
+    with open(store.path, 'rb') as f:
+        f.seek(offset)
+        lines = f.read()
+    if lines:
+        lines_name = os.path.basename(store.path)
+        backup_worker.submit(f"redundant copies of {lines_name}", append_redundant_copies, lines_name, offset, lines)
+
+def add_record(filename, record, hotel='hotel1'):
+    """Add a record, or replace the record with the same id.
+
+    With JSON Lines storage this is a single append; otherwise the whole file
+    is loaded and saved.
+    """
+    from utils.data_integrity import log_data_access, file_lock
+
+    prefixed = f"{hotel}_{filename}" if hotel and filename != 'users.json' else filename
+    if uses_jsonl(prefixed):
+        with file_lock(prefixed):
+            log_data_access('add', prefixed, hotel)
+            _append_jsonl(prefixed, lambda store: store.append(record))
+        return True
+
+    # Hold the exclusive lock across load and save so concurrent adds aren't lost
+    with file_lock(prefixed):
+        records = load_data(filename, hotel)
+        records = [r for r in records if r.get('id') != record.get('id')]
+        records.append(record)
+        save_data(filename, records, hotel)
+    return True
+
+def delete_record(filename, record_id, hotel='hotel1'):
+    """Delete a record by id"""
+    from utils.data_integrity import log_data_access, file_lock
+
+    prefixed = f"{hotel}_{filename}" if hotel and filename != 'users.json' else filename
+    if uses_jsonl(prefixed):
+        with file_lock(prefixed):
+            log_data_access('delete', prefixed, hotel)
+            _append_jsonl(prefixed, lambda store: store.delete(record_id))
+        return True
+
+    with file_lock(prefixed):
+        records = load_data(filename, hotel)
+        remaining = [r for r in records if r.get('id') != record_id]
+        if len(remaining) != len(records):
+            save_data(filename, remaining, hotel)
+    return True
+
+def get_record(filename, record_id, hotel='hotel1'):
+    """Get a single record by id, None if missing"""
+    from utils.data_integrity import file_lock
+
+    prefixed = f"{hotel}_{filename}" if hotel and filename != 'users.json' else filename
+    if uses_jsonl(prefixed):
+        store = get_record_store(prefixed)
+        with file_lock(prefixed, shared=True):
+            return store.get(record_id)
+
+    for record in load_data(filename, hotel, readonly=True):
+        if record.get('id') == record_id:
+            return dict(record)
+    return None
+
+def load_data_range(filename, start_date=None, end_date=None, hotel='hotel1'):
+    """Load records whose date (YYYY-MM-DD) falls within [start_date, end_date]"""
+    from utils.data_integrity import file_lock
+
+    prefixed = f"{hotel}_{filename}" if hotel and filename != 'users.json' else filename
+    if uses_jsonl(prefixed):
+        store = get_record_store(prefixed)
+        with file_lock(prefixed, shared=True):
+            return store.load_range(start_date, end_date)
+
+    records = []
+    for record in load_data(filename, hotel):
+        record_date = str(record.get('date') or '')[:10]
+        if (start_date is None or record_date >= start_date) and (end_date is None or record_date <= end_date):
+            records.append(record)
+    return records
 
 def generate_id():
     """Generate unique ID"""
@@ -374,7 +675,7 @@ def calculate_total_sales(hotel=None):
     import streamlit as st
     if not hotel:
         hotel = st.session_state.get('selected_hotel', 'hotel1')
-    sales = load_data('sales.json', hotel)
+    sales = load_data('sales.json', hotel, readonly=True)
     total = 0
     for sale in sales:
         total += sale.get('amount', 0)
@@ -385,7 +686,7 @@ def calculate_total_expenditures(hotel=None):
     import streamlit as st
     if not hotel:
         hotel = st.session_state.get('selected_hotel', 'hotel1')
-    expenditures = load_data('expenditures.json', hotel)
+    expenditures = load_data('expenditures.json', hotel, readonly=True)
     total = 0
     for exp in expenditures:
         total += exp.get('amount', 0)
@@ -435,8 +736,8 @@ def calculate_pending_dues(hotel=None):
         hotel = st.session_state.get('selected_hotel', 'hotel1')
     # This would be based on unpaid bookings, account sales, etc.
     # For now, we'll calculate from account sales that are unpaid
-    sales = load_data('sales.json', hotel)
-    outstanding_dues = load_data('outstanding_dues.json', hotel)
+    sales = load_data('sales.json', hotel, readonly=True)
+    outstanding_dues = load_data('outstanding_dues.json', hotel, readonly=True)
 
     pending = 0
     # Add account sales that are pending
@@ -465,7 +766,7 @@ def validate_data_integrity():
     
     for filename in critical_files:
         try:
-            data = load_data(filename, current_hotel)
+            data = load_data(filename, current_hotel, readonly=True)
             if data is None:
                 # File was corrupted, reinitialize
                 if filename == 'rooms.json':
@@ -5,7 +5,9 @@ import os
 import threading
 import time
 from datetime import datetime
-from utils.database_data_manager import load_data, save_data
+from utils.database_data_manager import get_db_manager
+from utils.integrity_scanner import integrity_scanner
+from utils.history_tables import ensure_history_partitions
 
 class DataMonitor:
     def __init__(self):
@@ -36,21 +38,19 @@ class DataMonitor:
                 time.sleep(60)  # Wait 1 minute on error
     
     def _check_data_integrity(self):
-        """Check and repair data integrity"""
-        critical_files = [
-            'sales.json', 'rooms.json', 'expenditures.json',
-            'advance_payments.json', 'outstanding_dues.json'
-        ]
-        
-        for hotel in ['hotel1', 'hotel2']:
-            for filename in critical_files:
-                try:
-                    data = load_data(filename, hotel)
-                    if data is None:
-                        print(f"Data integrity issue detected for {hotel}_{filename}")
-                        # The load_data function will automatically attempt recovery
-                except Exception as e:
-                    print(f"Critical data error for {hotel}_{filename}: {e}")
+        """Check critical tables with row counts and checksums instead of full reads"""
+        db = get_db_manager()
+        if not db:
+            print("Data integrity issue detected: database not available")
+            return
+
+        for issue in integrity_scanner.scan_database(db):
+            print(f"Data integrity issue detected: {issue}")
+
+        try:
+            ensure_history_partitions(db)
+        except Exception as e:
+            print(f"History partition maintenance failed: {e}")
 
 # Global monitor instance
 data_monitor = DataMonitor()
@@ -6,6 +6,33 @@ import json
 from datetime import datetime
 from sqlalchemy import create_engine, text
 import pandas as pd
+from utils.query_monitor import query_monitor
+
+# Columns save_data_to_db leaves as they are when a record omits them (set once, when the row is created)
+PRESERVED_COLUMNS = {'id', 'hotel', 'created_at', 'updated_at'}
+
+def row_to_record(columns, row):
+    """A result row as a record dict, with dates as ISO strings and decimals as floats"""
+    row_dict = dict(zip(columns, row))
+    # Convert datetime objects to strings for compatibility
+    for key, value in row_dict.items():
+        if hasattr(value, 'isoformat'):
+            row_dict[key] = value.isoformat()
+        elif hasattr(value, '__float__'):  # Handle Decimal types
+            row_dict[key] = float(value)
+        elif value is None:
+            row_dict[key] = None
+        else:
+            row_dict[key] = str(value) if not isinstance(value, (int, float, bool)) else value
+    return row_dict
+
+def existing_triggers(conn, table_names):
+    """Names of the triggers already defined on the given tables (so init can skip recreating them)"""
+    result = conn.execute(text("""
+        SELECT tgname FROM pg_trigger
+        WHERE NOT tgisinternal AND tgrelid = ANY(CAST(:tables AS regclass[]))
+    """), {"tables": list(table_names)})
+    return {row[0] for row in result}
 
 class DatabaseManager:
     def __init__(self):
@@ -13,8 +40,11 @@ class DatabaseManager:
         if not self.database_url:
             raise ValueError("DATABASE_URL environment variable not found")
         
-        # Create engine
+        # Create engine (statement timing applies to every engine, including reconnects)
+        query_monitor.install()
         self.engine = create_engine(self.database_url)
+        # Column names per table, filled on first use by table_columns()
+        self.column_cache = {}
         
     def init_tables(self):
         """Initialize all database tables"""
@@ -494,34 +524,37 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error initializing database tables: {e}")
             raise
+
+        # History tracking is optional - the app keeps working without it
+        try:
+            from utils.history_tables import init_history_tables
+            init_history_tables(self)
+        except Exception as e:
+            print(f"Error initializing history tables: {e}")
+
+        # The daily rollup only speeds up period totals - pages fall back to summing records
+        try:
+            from utils.daily_rollup import init_daily_rollup
+            init_daily_rollup(self)
+        except Exception as e:
+            print(f"Error initializing daily rollup: {e}")
     
-    def load_data_from_db(self, table_name, hotel='hotel1'):
-        """Load data from database table with retry logic"""
+    def load_data_from_db(self, table_name, hotel='hotel1', columns=None):
+        """Load data from database table with retry logic (only the given columns, if any, that the table has)"""
         max_retries = 3
         for attempt in range(max_retries):
             try:
                 with self.engine.connect() as conn:
-                    query = text(f"SELECT * FROM {table_name} WHERE hotel = :hotel ORDER BY created_at DESC")
+                    select = '*'
+                    if columns:
+                        existing = self.table_columns(table_name)
+                        select = ', '.join([col for col in columns if col in existing]) or 'id'
+                    query = text(f"SELECT {select} FROM {table_name} WHERE hotel = :hotel ORDER BY created_at DESC")
                     result = conn.execute(query, {"hotel": hotel})
                     
                     # Convert to list of dictionaries
-                    columns = result.keys()
-                    data = []
-                    for row in result:
-                        row_dict = dict(zip(columns, row))
-                        # Convert datetime objects to strings for compatibility
-                        for key, value in row_dict.items():
-                            if hasattr(value, 'isoformat'):
-                                row_dict[key] = value.isoformat()
-                            elif hasattr(value, '__float__'):  # Handle Decimal types
-                                row_dict[key] = float(value)
-                            elif value is None:
-                                row_dict[key] = None
-                            else:
-                                row_dict[key] = str(value) if not isinstance(value, (int, float, bool)) else value
-                        data.append(row_dict)
-                    
-                    return data
+                    columns = list(result.keys())
+                    return [row_to_record(columns, row) for row in result]
                     
             except Exception as e:
                 print(f"Error loading data from {table_name} (attempt {attempt + 1}): {e}")
@@ -534,33 +567,66 @@ class DatabaseManager:
                 else:
                     return []
     
+    def iter_data_from_db(self, table_name, hotel='hotel1', batch_size=1000):
+        """Yield a table's records in batches, read through a server-side cursor.
+
+        Only one batch is held in memory at a time, so exports can walk tables
+        of any size. Rows come in the same order as load_data_from_db.
+        """
+        with self.engine.connect() as conn:
+            # stream_results opens a named (server-side) cursor; fetchmany pulls one batch per round trip
+            result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                text(f"SELECT * FROM {table_name} WHERE hotel = :hotel ORDER BY created_at DESC"), {"hotel": hotel})
+            columns = list(result.keys())
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row_to_record(columns, row) for row in rows]
+
     def save_data_to_db(self, table_name, data, hotel='hotel1'):
         """Save data to database table"""
         try:
             with self.engine.connect() as conn:
-                # Clear existing data for this hotel
-                conn.execute(text(f"DELETE FROM {table_name} WHERE hotel = :hotel"), {"hotel": hotel})
+                # Remove this hotel's rows that are no longer in the data; the rest are
+                # upserted below, so unchanged rows don't create history versions
+                conn.execute(
+                    text(f"DELETE FROM {table_name} WHERE hotel = :hotel AND NOT (id::text = ANY(:ids))"),
+                    {"hotel": hotel, "ids": [str(item['id']) for item in data or [] if item.get('id') is not None]}
+                )
                 
-                # Insert new data
+                # Upsert the data set-based: one statement per distinct set of record keys
+                # (usually one), so statement triggers such as the daily rollup run once
                 if data:
-                    for item in data:
-                        # Prepare data for insertion
-                        item_copy = item.copy()
-                        item_copy['hotel'] = hotel
-                        
-                        # Build column list and values
-                        columns = list(item_copy.keys())
-                        placeholders = [f":{col}" for col in columns]
-                        
+                    table_columns = self.table_column_types(table_name)
+                    # A statement can't update the same row twice; the last copy of an id wins
+                    # as it did when rows were written one at a time
+                    latest = {}
+                    for position, item in enumerate(data):
+                        latest[item.get('id', ('new', position))] = item
+                    groups = {}
+                    for item in latest.values():
+                        item_copy = dict(item, hotel=hotel)
+                        groups.setdefault(tuple(item_copy), []).append(item_copy)
+
+                    for columns, rows in groups.items():
+                        # A save replaces each record, so columns it leaves out go back to their defaults
+                        # (as when rows were deleted and re-inserted), apart from the creation columns
+                        assignments = [f"{col} = EXCLUDED.{col}" for col in columns if col != 'id']
+                        assignments += [f"{col} = DEFAULT" for col in table_columns
+                                        if col not in columns and col not in PRESERVED_COLUMNS]
+
+                        # Rows travel as one JSON array, converted with the table's own row type
                         query = text(f"""
                             INSERT INTO {table_name} ({', '.join(columns)})
-                            VALUES ({', '.join(placeholders)})
+                            SELECT {', '.join(columns)}
+                            FROM jsonb_populate_recordset(NULL::{table_name}, CAST(:rows AS jsonb))
                             ON CONFLICT (id) DO UPDATE SET
-                            {', '.join([f"{col} = EXCLUDED.{col}" for col in columns if col != 'id'])}
+                            {', '.join(assignments)}
                         """)
-                        
-                        conn.execute(query, item_copy)
-                
+
+                        conn.execute(query, {"rows": json.dumps(rows, default=str)})
+
                 conn.commit()
                 return True
                 
@@ -599,6 +665,56 @@ class DatabaseManager:
                 else:
                     return False
     
+    def table_columns(self, table_name):
+        """Get a table's column names (cached for the life of this manager)"""
+        return set(self.table_column_types(table_name))
+
+    def table_column_types(self, table_name):
+        """Get a table's columns and their SQL types, in table order (cached for the life of this manager)"""
+        cache = self.column_cache
+        if table_name not in cache:
+            with self.engine.connect() as conn:
+                result = conn.execute(text("""
+                    SELECT column_name, data_type FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND table_name = :table_name
+                    ORDER BY ordinal_position
+                """), {"table_name": table_name})
+                cache[table_name] = {row[0]: row[1] for row in result}
+        return cache[table_name]
+
+    def table_totals(self, table_names, hotel='hotel1', conditions=None):
+        """Get record count and amount total for several tables in one query.
+
+        conditions maps a table to an SQL condition its rows must meet
+        (e.g. "status = 'Pending'"). Tables without an amount column total 0.
+        Returns dict of table -> (record_count, amount_total).
+        """
+        conditions = conditions or {}
+        selects = []
+        for index, table_name in enumerate(table_names):
+            amount = "COALESCE(SUM(amount), 0)" if 'amount' in self.table_columns(table_name) else "0"
+            condition = f" AND ({conditions[table_name]})" if table_name in conditions else ""
+            selects.append(f"SELECT {index} AS position, COUNT(*) AS records, {amount} AS amount "
+                           f"FROM {table_name} WHERE hotel = :hotel{condition}")
+        if not selects:
+            return {}
+        with self.engine.connect() as conn:
+            result = conn.execute(text(" UNION ALL ".join(selects)), {"hotel": hotel})
+            return {table_names[row[0]]: (int(row[1]), float(row[2])) for row in result}
+
+    def table_checksums(self, table_name):
+        """Get row count and checksum per hotel for a table without transferring its rows.
+
+        Returns dict of hotel -> (row_count, md5 of the rows ordered by id).
+        """
+        with self.engine.connect() as conn:
+            query = text(f"""
+                SELECT hotel, COUNT(*), md5(string_agg(t::text, E'\\n' ORDER BY t.id::text))
+                FROM {table_name} t
+                GROUP BY hotel
+            """)
+            return {row[0]: (row[1], row[2]) for row in conn.execute(query)}
+
     def migrate_json_to_db(self):
         """Migration disabled to prevent data mixing between hotels"""
         print("Migration disabled to prevent data mixing between Saz Valley Bhaderwah and Saz Valley Kishtwar")
@@ -4,6 +4,9 @@ Database-only data manager - replaces JSON file operations with PostgreSQL
 import uuid
 from datetime import datetime
 from utils.database import DatabaseManager
+from utils.change_journal import change_journal
+from utils.page_profiler import page_profiler
+from utils.metrics import LOAD_DATA_CALLS, SAVE_SECONDS
 
 # Create global database manager instance
 db_manager = None
@@ -45,104 +48,131 @@ def get_db_manager():
     
     return db_manager
 
-def load_data(filename, hotel='hotel1'):
-    """Load data from database table"""
+# Map data filenames to table names
+TABLE_MAPPING = {
+    'sales.json': 'sales',
+    'restaurant.json': 'restaurant',
+    'expenditures.json': 'expenditures',
+    'advance_payments.json': 'advance_payments',
+    'outstanding_dues.json': 'outstanding_dues',
+    'rooms.json': 'rooms',
+    'users.json': 'users',
+    'cash_handovers.json': 'cash_handovers',
+    'account_handovers.json': 'account_handovers',
+    'bad_debts.json': 'bad_debts',
+    'discounts.json': 'discounts',
+    'uploaded_bills.json': 'uploaded_bills',
+    'complementary_rooms.json': 'complementary_rooms',
+    'room_services.json': 'room_services',
+    'complementary_records.json': 'complementary_rooms'
+}
+
+# Tables left out of the change journal (credentials shouldn't be kept in history)
+UNJOURNALED_TABLES = {'users'}
+
+# Writes per (table, hotel) made through this process, so in-memory aggregates can tell a table changed
+_table_versions = {}
+
+def table_version(filename, hotel='hotel1'):
+    """Number of saves and added records for a hotel's table since the app started"""
+    return _table_versions.get((get_table_name(filename, hotel), hotel), 0)
+
+def _bump_table_version(table_name, hotel):
+    _table_versions[(table_name, hotel)] = _table_versions.get((table_name, hotel), 0) + 1
+
+def get_table_name(filename, hotel='hotel1'):
+    """Get the database table for a data filename (hotel prefix optional)"""
+    clean_filename = filename.replace(f'{hotel}_', '')
+    return TABLE_MAPPING.get(clean_filename, clean_filename.replace('.json', ''))
+
+def load_data(filename, hotel='hotel1', columns=None):
+    """Load data from database table (only the given columns, if any)"""
     db = get_db_manager()
     if not db:
         return []
 
-    # Map filename to table name
-    table_mapping = {
-        'sales.json': 'sales',
-        'restaurant.json': 'restaurant',
-        'expenditures.json': 'expenditures',
-        'advance_payments.json': 'advance_payments',
-        'outstanding_dues.json': 'outstanding_dues',
-        'rooms.json': 'rooms',
-        'users.json': 'users',
-        'cash_handovers.json': 'cash_handovers',
-        'account_handovers.json': 'account_handovers',
-        'bad_debts.json': 'bad_debts',
-        'discounts.json': 'discounts',
-        'uploaded_bills.json': 'uploaded_bills',
-        'complementary_rooms.json': 'complementary_rooms',
-        'room_services.json': 'room_services',
-        'complementary_records.json': 'complementary_rooms'
-    }
-
-    # Remove hotel prefix if present
-    clean_filename = filename.replace(f'{hotel}_', '')
-    table_name = table_mapping.get(clean_filename, clean_filename.replace('.json', ''))
+    table_name = get_table_name(filename, hotel)
+    page_profiler.record_load(filename)
+    LOAD_DATA_CALLS.inc(backend='postgres', cache='miss')
 
     try:
-        return db.load_data_from_db(table_name, hotel)
+        return db.load_data_from_db(table_name, hotel, columns)
     except Exception as e:
         print(f"Error loading {filename}: {e}")
         return []
 
+def iter_data(filename, hotel='hotel1', batch_size=1000):
+    """Yield a table's records in batches (see DatabaseManager.iter_data_from_db)"""
+    db = get_db_manager()
+    if not db:
+        return
+
+    page_profiler.record_load(filename)
+    LOAD_DATA_CALLS.inc(backend='postgres', cache='stream')
+    yield from db.iter_data_from_db(get_table_name(filename, hotel), hotel, batch_size)
+
+def column_types(filename, hotel='hotel1'):
+    """A data file's columns and their SQL types, in table order (empty when unknown)"""
+    db = get_db_manager()
+    if not db:
+        return {}
+    try:
+        return db.table_column_types(get_table_name(filename, hotel))
+    except Exception as e:
+        print(f"Error reading columns of {filename}: {e}")
+        return {}
+
+def table_totals(filenames, hotel='hotel1', conditions=None):
+    """Record count and amount total per data file, from one aggregate query.
+
+    conditions maps a filename to an SQL condition on its rows. Returns dict of
+    filename -> {'records': count, 'amount': total}.
+    """
+    db = get_db_manager()
+    if not db:
+        return {filename: {'records': 0, 'amount': 0.0} for filename in filenames}
+
+    conditions = conditions or {}
+    tables = {filename: get_table_name(filename, hotel) for filename in filenames}
+    try:
+        totals = db.table_totals(list(dict.fromkeys(tables.values())), hotel,
+                                 {tables[filename]: condition for filename, condition in conditions.items()})
+        return {filename: {'records': totals[table][0], 'amount': totals[table][1]}
+                for filename, table in tables.items()}
+    except Exception as e:
+        print(f"Error totalling {', '.join(filenames)}: {e}")
+        return {filename: {'records': 0, 'amount': 0.0} for filename in filenames}
+
 def save_data(filename, data, hotel='hotel1'):
     """Save data to database table"""
     db = get_db_manager()
     if not db:
         return False
 
-    # Map filename to table name
-    table_mapping = {
-        'sales.json': 'sales',
-        'restaurant.json': 'restaurant',
-        'expenditures.json': 'expenditures',
-        'advance_payments.json': 'advance_payments',
-        'outstanding_dues.json': 'outstanding_dues',
-        'rooms.json': 'rooms',
-        'users.json': 'users',
-        'cash_handovers.json': 'cash_handovers',
-        'account_handovers.json': 'account_handovers',
-        'bad_debts.json': 'bad_debts',
-        'discounts.json': 'discounts',
-        'uploaded_bills.json': 'uploaded_bills',
-        'complementary_rooms.json': 'complementary_rooms',
-        'room_services.json': 'room_services',
-        'complementary_records.json': 'complementary_rooms'
-    }
-
-    # Remove hotel prefix if present
-    clean_filename = filename.replace(f'{hotel}_', '')
-    table_name = table_mapping.get(clean_filename, clean_filename.replace('.json', ''))
+    table_name = get_table_name(filename, hotel)
 
     try:
-        return db.save_data_to_db(table_name, data, hotel)
+        with SAVE_SECONDS.time(backend='postgres', table=table_name):
+            saved = db.save_data_to_db(table_name, data, hotel)
     except Exception as e:
         print(f"Error saving {filename}: {e}")
         return False
 
+    _bump_table_version(table_name, hotel)
+    if saved and table_name not in UNJOURNALED_TABLES:
+        try:
+            change_journal.record_table(table_name, hotel, [dict(item, hotel=hotel) for item in data or []])
+        except Exception as e:
+            print(f"Error journaling {filename}: {e}")
+    return saved
+
 def add_record(filename, record, hotel='hotel1'):
     """Add a single record to database with validation"""
     db = get_db_manager()
     if not db:
         return False
 
-    # Map filename to table name
-    table_mapping = {
-        'sales.json': 'sales',
-        'restaurant.json': 'restaurant',
-        'expenditures.json': 'expenditures',
-        'advance_payments.json': 'advance_payments',
-        'outstanding_dues.json': 'outstanding_dues',
-        'rooms.json': 'rooms',
-        'users.json': 'users',
-        'cash_handovers.json': 'cash_handovers',
-        'account_handovers.json': 'account_handovers',
-        'bad_debts.json': 'bad_debts',
-        'discounts.json': 'discounts',
-        'uploaded_bills.json': 'uploaded_bills',
-        'complementary_rooms.json': 'complementary_rooms',
-        'room_services.json': 'room_services',
-        'complementary_records.json': 'complementary_rooms'
-    }
-
-    # Remove hotel prefix if present
-    clean_filename = filename.replace(f'{hotel}_', '')
-    table_name = table_mapping.get(clean_filename, clean_filename.replace('.json', ''))
+    table_name = get_table_name(filename, hotel)
 
     # Add hotel to record and validate data
     record['hotel'] = hotel
@@ -166,11 +196,33 @@ def add_record(filename, record, hotel='hotel1'):
                 record[field] = 0.0
 
     try:
-        return db.add_record_to_db(table_name, record)
+        added = db.add_record_to_db(table_name, record)
     except Exception as e:
         print(f"Error adding record to {filename}: {e}")
         return False
 
+    _bump_table_version(table_name, hotel)
+    if added and table_name not in UNJOURNALED_TABLES:
+        try:
+            change_journal.record_upsert(table_name, hotel, record,
+                                         current_records=lambda: db.load_data_from_db(table_name, hotel))
+        except Exception as e:
+            print(f"Error journaling {filename}: {e}")
+    return added
+
+def journal_tables(table_names, hotel='hotel1'):
+    """Journal tables written with SQL outside save_data/add_record, from what is stored now"""
+    db = get_db_manager()
+    if not db:
+        return
+    for table_name in table_names:
+        if table_name in UNJOURNALED_TABLES:
+            continue
+        try:
+            change_journal.record_table(table_name, hotel, db.load_data_from_db(table_name, hotel))
+        except Exception as e:
+            print(f"Error journaling {table_name}: {e}")
+
 def generate_id():
     """Generate unique ID"""
     return str(uuid.uuid4())[:8]
@@ -0,0 +1,132 @@
+"""
+Date filter - period filters answered by bisecting a table's dates, parsed once into a sorted NumPy datetime64 array
+"""
+import re
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+import numpy as np
+
+PERIODS = ["All Time", "Today", "This Week", "This Month", "This Year", "Custom Range"]
+
+ISO_DAY = re.compile(r'\d{4}-\d{2}-\d{2}')
+NOT_A_DAY = np.datetime64('NaT', 'D')
+
+def record_day(item):
+    """A record's day as text: the first 10 characters of its date"""
+    value = item.get('date')
+    return value[:10] if isinstance(value, str) and value else None
+
+def sale_display_day(sale):
+    """The day a sale counts towards: the completion date of a completed advance payment,
+    otherwise its transaction date, otherwise its date"""
+    if 'Advance Payment' in (sale.get('type') or '') and sale.get('completion_date'):
+        return sale['completion_date']
+    if sale.get('transaction_date'):
+        return sale['transaction_date'][:10]
+    return record_day(sale)
+
+def parse_days(values):
+    """Parse 'YYYY-MM-DD' strings to datetime64[D]; NaT wherever strptime('%Y-%m-%d') would fail"""
+    days = np.full(len(values), NOT_A_DAY)
+    iso = [index for index, value in enumerate(values) if isinstance(value, str) and ISO_DAY.fullmatch(value)]
+    try:
+        days[iso] = np.array([values[index] for index in iso], dtype='datetime64[D]')
+        others = set(range(len(values))).difference(iso)
+    except ValueError:
+        # An impossible calendar day (e.g. 2025-02-30) fails the whole batch; go one by one
+        others = range(len(values))
+
+    for index in others:
+        value = values[index]
+        if not isinstance(value, str):
+            continue
+        try:
+            days[index] = np.datetime64(datetime.strptime(value, '%Y-%m-%d').date(), 'D')
+        except ValueError:
+            continue
+    return days
+
+def as_day(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, 'D')
+
+def period_bounds(period, start_date=None, end_date=None, today=None):
+    """First and last day (inclusive, None for open) of a period.
+
+    Returns None when the period selects nothing (unknown period, or a custom
+    range without both ends).
+    """
+    today = today or datetime.now()
+    if isinstance(today, datetime):
+        today = today.date()
+    if period == "All Time":
+        return None, None
+    if period == "Today":
+        return today, today
+    if period == "This Week":
+        # Everything from Monday on, including future-dated records
+        return today - timedelta(days=today.weekday()), None
+    if period == "This Month":
+        month_start = today.replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        return month_start, next_month - timedelta(days=1)
+    if period == "This Year":
+        return today.replace(month=1, day=1), today.replace(month=12, day=31)
+    if period == "Custom Range" and start_date and end_date:
+        return start_date, end_date
+    return None
+
+def period_condition(bounds, column='date'):
+    """SQL condition selecting rows whose column falls within period_bounds() (None selects nothing)"""
+    if bounds is None:
+        return "FALSE"
+    conditions = [f"{column}::date {operator} '{as_day(day)}'"
+                  for operator, day in (('>=', bounds[0]), ('<=', bounds[1])) if day is not None]
+    return ' AND '.join(conditions) or "TRUE"
+
+class DateIndex:
+    """A table's records ordered by day.
+
+    Records whose day can't be parsed are left out of every period except
+    "All Time". Filters return records in their original table order.
+    """
+
+    def __init__(self, records, key=record_day):
+        self.records = records
+        days = parse_days([key(record) if isinstance(record, Mapping) else None for record in records])
+        valid = np.flatnonzero(~np.isnat(days))
+        order = np.argsort(days[valid], kind='stable')
+        self.positions = valid[order]
+        self.days = days[valid][order]
+
+    def positions_between(self, first=None, last=None):
+        """Table positions of records dated first..last (inclusive), in table order"""
+        low = np.searchsorted(self.days, as_day(first), 'left') if first is not None else 0
+        high = np.searchsorted(self.days, as_day(last), 'right') if last is not None else len(self.days)
+        return np.sort(self.positions[low:high])
+
+    def between(self, first=None, last=None):
+        return [self.records[position] for position in self.positions_between(first, last)]
+
+    def filter(self, period, start_date=None, end_date=None, today=None):
+        """Records in a period ("Today", "This Week", "This Month", "This Year", "Custom Range" or "All Time")"""
+        if period == "All Time":
+            return self.records
+        bounds = period_bounds(period, start_date, end_date, today)
+        if bounds is None:
+            return []
+        return self.between(*bounds)
+
+def filter_by_period(records, period, start_date=None, end_date=None, today=None, key=record_day):
+    """Filter a table by period using a date index.
+
+    The index is built per call and not cached: tables are edited in place,
+    and a cache would keep them alive. Build a DateIndex once to filter the
+    same table several times in a run.
+    """
+    if period == "All Time":
+        return records
+    if not records:
+        return []
+    return DateIndex(records, key).filter(period, start_date, end_date, today)
@@ -0,0 +1,262 @@
+"""
+Database backup - logical dump/restore of PostgreSQL tables with COPY into compressed archives
+"""
+import os
+import json
+import time
+import zipfile
+from datetime import datetime
+from utils.data_integrity import HOTELS
+from utils.metrics import record_backup
+
+DB_BACKUP_DIR = 'data/db_backups'
+MANIFEST_NAME = 'manifest.json'
+ARCHIVE_FORMAT = 1
+
+# Tables included in database backups. users is left out: archives are plain CSV
+# and would otherwise carry every account's password hash
+BACKUP_TABLES = [
+    'rooms', 'sales', 'restaurant', 'expenditures', 'advance_payments',
+    'outstanding_dues', 'cash_handovers', 'account_handovers', 'bad_debts',
+    'discounts', 'uploaded_bills', 'complementary_rooms', 'room_services',
+    'complementary_records'
+]
+
+class CountingWriter:
+    """File-like wrapper that counts bytes written through it"""
+
+    def __init__(self, target):
+        self.target = target
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return self.target.write(data)
+
+def _throughput(rows, size, elapsed):
+    return {
+        'rows': rows,
+        'bytes': size,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed) if elapsed else rows,
+        'mb_per_second': round(size / elapsed / (1024 * 1024), 2) if elapsed else 0.0
+    }
+
+def _entry_name(table_name, hotel):
+    return f"{table_name}/{hotel}.csv"
+
+def _select_tables(tables):
+    tables = tables or BACKUP_TABLES
+    unknown = [table for table in tables if table not in BACKUP_TABLES]
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(unknown)}")
+    return tables
+
+def _select_hotels(hotels):
+    hotels = hotels or HOTELS
+    unknown = [hotel for hotel in hotels if hotel not in HOTELS]
+    if unknown:
+        raise ValueError(f"Unknown hotels: {', '.join(unknown)}")
+    return hotels
+
+def _table_columns(cursor, table_name):
+    cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
+    return [column[0] for column in cursor.description]
+
+def dump_database(db, tables=None, hotels=None, archive_path=None, progress=None):
+    """Dump tables into a compressed archive with COPY ... TO STDOUT.
+
+    Every table/hotel pair becomes one CSV entry, all read from a single
+    repeatable-read snapshot so the archive is consistent without locking
+    writers out. progress(table_name, hotel, rows) is called after each entry.
+
+    Returns (success, message, report).
+    """
+    try:
+        tables = _select_tables(tables)
+        hotels = _select_hotels(hotels)
+    except ValueError as e:
+        return False, str(e), None
+
+    if archive_path is None:
+        os.makedirs(DB_BACKUP_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        archive_path = os.path.join(DB_BACKUP_DIR, f"db_backup_{timestamp}.zip")
+    temp_path = f"{archive_path}.tmp_{os.getpid()}"
+
+    manifest = {
+        'format': ARCHIVE_FORMAT,
+        'created_at': datetime.now().isoformat(),
+        'hotels': hotels,
+        'tables': {}
+    }
+    started = time.perf_counter()
+    total_rows = 0
+    total_bytes = 0
+
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+            for table_name in tables:
+                table_entry = {'columns': _table_columns(cursor, table_name), 'entries': {}}
+                for hotel in hotels:
+                    query = cursor.mogrify(
+                        f"COPY (SELECT * FROM {table_name} WHERE hotel = %s) TO STDOUT WITH (FORMAT csv, HEADER)",
+                        (hotel,)
+                    ).decode('utf-8')
+                    name = _entry_name(table_name, hotel)
+                    with archive.open(name, 'w', force_zip64=True) as entry:
+                        writer = CountingWriter(entry)
+                        cursor.copy_expert(query, writer)
+                    rows = max(cursor.rowcount, 0)
+                    table_entry['entries'][hotel] = {'path': name, 'rows': rows, 'bytes': writer.bytes}
+                    total_rows += rows
+                    total_bytes += writer.bytes
+                    if progress:
+                        progress(table_name, hotel, rows)
+                manifest['tables'][table_name] = table_entry
+
+            elapsed = time.perf_counter() - started
+            manifest['throughput'] = _throughput(total_rows, total_bytes, elapsed)
+            archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+        raw.rollback()
+        os.replace(temp_path, archive_path)
+    except Exception as e:
+        raw.rollback()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, f"Database backup failed: {str(e)}", None
+    finally:
+        raw.close()
+
+    report = dict(manifest['throughput'], path=archive_path,
+                  compressed_bytes=os.path.getsize(archive_path))
+    record_backup('database', report['compressed_bytes'])
+    return True, f"Database backup created at {archive_path}", report
+
+def read_manifest(archive_path):
+    """Read the manifest of a database backup archive"""
+    with zipfile.ZipFile(archive_path) as archive:
+        return json.loads(archive.read(MANIFEST_NAME))
+
+def list_database_backups():
+    """List database backup archives, newest first"""
+    if not os.path.exists(DB_BACKUP_DIR):
+        return []
+
+    backups = []
+    for item in os.listdir(DB_BACKUP_DIR):
+        if not (item.startswith('db_backup_') and item.endswith('.zip')):
+            continue
+        path = os.path.join(DB_BACKUP_DIR, item)
+        try:
+            manifest = read_manifest(path)
+        except Exception:
+            continue
+        timestamp = datetime.fromisoformat(manifest['created_at'])
+        backups.append({
+            'name': item,
+            'path': path,
+            'timestamp': timestamp,
+            'formatted_date': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'hotels': manifest['hotels'],
+            'tables': list(manifest['tables']),
+            'rows': manifest.get('throughput', {}).get('rows', 0),
+            'size': os.path.getsize(path)
+        })
+
+    backups.sort(key=lambda x: x['timestamp'], reverse=True)
+    return backups
+
+def restore_database(db, archive_path, tables=None, hotels=None, progress=None):
+    """Restore tables from a database backup archive.
+
+    Each table is first loaded with COPY FROM into an unlogged staging table
+    and checked against the manifest row counts. Only then are the selected
+    hotels' rows of every table replaced in one transaction, so readers see
+    either the old data or the restored data, never a partial restore.
+    progress(table_name, hotel, rows) is called after each staged entry.
+
+    Returns (success, message, report).
+    """
+    try:
+        manifest = read_manifest(archive_path)
+        tables = [table for table in _select_tables(tables) if table in manifest['tables']]
+        hotels = [hotel for hotel in _select_hotels(hotels) if hotel in manifest['hotels']]
+    except Exception as e:
+        return False, f"Invalid database backup: {str(e)}", None
+    if not tables or not hotels:
+        return False, "Backup contains none of the selected tables or hotels", None
+
+    started = time.perf_counter()
+    total_rows = 0
+    total_bytes = 0
+    staged = []
+
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        with zipfile.ZipFile(archive_path) as archive:
+            for table_name in tables:
+                table_entry = manifest['tables'][table_name]
+                columns = ', '.join(table_entry['columns'])
+                staging = f"{table_name}_restore_{os.getpid()}"
+                cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+                cursor.execute(f"CREATE UNLOGGED TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS)")
+                raw.commit()
+                staged.append(staging)
+
+                for hotel in hotels:
+                    entry = table_entry['entries'][hotel]
+                    # Reading the entry checks its CRC, so a damaged archive fails here
+                    with archive.open(entry['path']) as source:
+                        cursor.copy_expert(
+                            f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv, HEADER)", source
+                        )
+                    if cursor.rowcount >= 0 and cursor.rowcount != entry['rows']:
+                        raise ValueError(f"{entry['path']} has {cursor.rowcount} rows, manifest says {entry['rows']}")
+                    total_rows += entry['rows']
+                    total_bytes += entry['bytes']
+                    if progress:
+                        progress(table_name, hotel, entry['rows'])
+                raw.commit()
+
+        # Swap all restored rows in at once
+        for table_name, staging in zip(tables, staged):
+            columns = ', '.join(manifest['tables'][table_name]['columns'])
+            cursor.execute(f"DELETE FROM {table_name} WHERE hotel = ANY(%s)", (hotels,))
+            cursor.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging}")
+        raw.commit()
+    except Exception as e:
+        raw.rollback()
+        return False, f"Database restore failed: {str(e)}", None
+    finally:
+        try:
+            cursor = raw.cursor()
+            for staging in staged:
+                cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            raw.commit()
+        except Exception as e:
+            print(f"Failed to drop staging tables: {e}")
+        raw.close()
+
+    _journal_restored_tables(db, tables, hotels)
+
+    report = _throughput(total_rows, total_bytes, time.perf_counter() - started)
+    return True, f"Restored {len(tables)} tables for {', '.join(hotels)} from {os.path.basename(archive_path)}", report
+
+def _journal_restored_tables(db, tables, hotels):
+    """Record restored tables in the change journal so point-in-time restore stays continuous"""
+    from utils.change_journal import change_journal
+    from utils.database_data_manager import UNJOURNALED_TABLES
+
+    for table_name in tables:
+        if table_name in UNJOURNALED_TABLES:
+            continue
+        for hotel in hotels:
+            try:
+                change_journal.record_table(table_name, hotel, db.load_data_from_db(table_name, hotel))
+            except Exception as e:
+                print(f"Error journaling restored {table_name} for {hotel}: {e}")
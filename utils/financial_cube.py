@@ -0,0 +1,248 @@
+"""
+Financial cube - hotel x day x stream x kind x channel x payment x status totals held in NumPy arrays,
+so Financial Summary slices, rollups and drilldowns work on aggregated cells instead of every record
+"""
+import os
+import time
+import threading
+from collections.abc import Mapping
+import numpy as np
+from utils.date_filter import parse_days, record_day, sale_display_day, as_day
+
+# Seconds a table's cells are trusted without a write through this process (picks up other writers)
+CUBE_MAX_AGE = float(os.environ.get('FINANCIAL_CUBE_MAX_AGE', 60))
+
+# Label dimensions of a cell, after hotel and day
+DIMENSIONS = ('hotel', 'stream', 'kind', 'channel', 'payment', 'status')
+
+def _field(name, default=''):
+    return lambda record: record.get(name) or default
+
+def _is_restaurant(record):
+    return record.get('type') == 'Restaurant'
+
+# Stream -> (table file, records it takes, day, kind, channel, payment, status).
+# Restaurant orders are sales of type 'Restaurant', kept as their own stream with the order type as channel.
+STREAMS = {
+    'sales': ('sales.json', lambda record: not _is_restaurant(record), sale_display_day, _field('type'),
+              _field('order_type'), _field('payment_type'), _field('status', 'Completed')),
+    'restaurant': ('sales.json', _is_restaurant, sale_display_day, _field('type'),
+                   _field('order_type'), _field('payment_type'), _field('status', 'Completed')),
+    'expenditures': ('expenditures.json', None, record_day, _field('category'), _field('vendor_name'),
+                     _field('payment_method', 'Unknown'), _field('status')),
+    'cash_handovers': ('cash_handovers.json', None, record_day, _field('handover_type'), _field('received_by'),
+                       lambda record: 'Cash', _field('status')),
+    'account_handovers': ('account_handovers.json', None, record_day, _field('handover_type'), _field('received_by'),
+                          lambda record: 'Account', _field('status')),
+    'room_services': ('room_services.json', None, record_day, _field('service_item'), _field('room_number'),
+                      _field('payment_type'), _field('status')),
+    'bad_debts': ('bad_debts.json', None, record_day, _field('reason'), _field('customer_name'),
+                  lambda record: '', _field('status')),
+    'discounts': ('discounts.json', None, record_day, _field('discount_type'), _field('customer_name'),
+                  lambda record: '', _field('status'))
+}
+
+# Streams that together make up sales
+SALES_STREAMS = ['sales', 'restaurant']
+
+# Streams each table file feeds
+TABLE_STREAMS = {}
+for _stream, _spec in STREAMS.items():
+    TABLE_STREAMS.setdefault(_spec[0], []).append(_stream)
+
+# Day stored for records without a parseable date: below every real day, so bounded slices skip it
+NO_DAY = np.iinfo(np.int64).min
+
+class CubeCells:
+    """Immutable cell arrays: one row per distinct coordinate"""
+
+    def __init__(self, days, coords, amount, count):
+        self.days = days
+        self.coords = coords
+        self.amount = amount
+        self.count = count
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=np.int64), np.empty((0, len(DIMENSIONS)), dtype=np.int32),
+                   np.empty(0), np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def concat(cls, blocks):
+        blocks = [block for block in blocks if len(block.days)]
+        if not blocks:
+            return cls.empty()
+        return cls(np.concatenate([block.days for block in blocks]),
+                   np.concatenate([block.coords for block in blocks]),
+                   np.concatenate([block.amount for block in blocks]),
+                   np.concatenate([block.count for block in blocks]))
+
+class CubeView:
+    """A slice of the cube; narrowing and grouping only touch its cells"""
+
+    def __init__(self, cube, cells, mask):
+        self.cube = cube
+        self.cells = cells
+        self.mask = mask
+
+    def where(self, first_day=None, last_day=None, **dimensions):
+        """Narrow the slice.
+
+        Each dimension takes a label, a list of labels or a predicate on the
+        label. Days are inclusive; records without a date only match an open
+        range on both ends.
+        """
+        mask = self.mask.copy()
+        if first_day is not None or last_day is not None:
+            mask &= self.cells.days != NO_DAY
+        if first_day is not None:
+            mask &= self.cells.days >= as_day(first_day).astype(np.int64)
+        if last_day is not None:
+            mask &= self.cells.days <= as_day(last_day).astype(np.int64)
+        for dimension, selector in dimensions.items():
+            codes = self.cube.matching_codes(dimension, selector)
+            mask &= np.isin(self.cells.coords[:, DIMENSIONS.index(dimension)], codes)
+        return CubeView(self.cube, self.cells, mask)
+
+    def total(self):
+        return float(self.cells.amount[self.mask].sum())
+
+    def count(self):
+        return int(self.cells.count[self.mask].sum())
+
+    def by(self, dimension, measure='amount', grain='day'):
+        """Roll the slice up to one dimension: {label: total} ordered by label (days) or first appearance.
+
+        dimension 'day' groups by grain 'day', 'week' (Monday) or 'month', keyed by ISO date.
+        """
+        values = (self.cells.amount if measure == 'amount' else self.cells.count)[self.mask]
+        if dimension == 'day':
+            days = self.cells.days[self.mask]
+            dated = days != NO_DAY
+            keys = days[dated].astype('datetime64[D]')
+            if grain == 'week':
+                # 1970-01-01 was a Thursday (weekday 3)
+                keys = keys - ((days[dated] + 3) % 7).astype('timedelta64[D]')
+            elif grain == 'month':
+                keys = keys.astype('datetime64[M]').astype('datetime64[D]')
+            labels, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse, weights=values[dated], minlength=len(labels))
+            return {str(label): self._measure(total, measure) for label, total in zip(labels, sums)}
+
+        column = self.cells.coords[self.mask][:, DIMENSIONS.index(dimension)]
+        labels = self.cube.labels(dimension)
+        sums = np.bincount(column, weights=values, minlength=len(labels))
+        present = np.bincount(column, minlength=len(labels)) > 0
+        return {labels[code]: self._measure(sums[code], measure) for code in np.flatnonzero(present)}
+
+    @staticmethod
+    def _measure(value, measure):
+        return float(value) if measure == 'amount' else int(value)
+
+class FinancialCube:
+    """Aggregated financial cells for every hotel, refreshed one table at a time.
+
+    A table's cells are rebuilt when it was written through this process since
+    they were built (see database_data_manager.table_version) or after
+    CUBE_MAX_AGE seconds; everything else is reused across page runs.
+    """
+
+    def __init__(self, max_age=CUBE_MAX_AGE):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.codes = {dimension: {} for dimension in DIMENSIONS}
+        self.blocks = {}
+        self.built = {}
+        self.cells = CubeCells.empty()
+
+    def labels(self, dimension):
+        with self.lock:
+            return list(self.codes[dimension])
+
+    def matching_codes(self, dimension, selector):
+        codes = self.codes[dimension]
+        with self.lock:
+            items = list(codes.items())
+        if callable(selector):
+            return [code for label, code in items if selector(label)]
+        wanted = set(selector) if isinstance(selector, (list, tuple, set, frozenset)) else {selector}
+        return [code for label, code in items if label in wanted]
+
+    def _encode(self, dimension, labels):
+        codes = self.codes[dimension]
+        return np.fromiter((codes.setdefault(label, len(codes)) for label in labels), dtype=np.int32, count=len(labels))
+
+    def _aggregate(self, hotel, stream, records):
+        """Group a stream's records into cells with np.unique over their coordinates"""
+        _, takes, day, kind, channel, payment, status = STREAMS[stream]
+        if takes is not None:
+            records = [record for record in records if takes(record)]
+        if not records:
+            return CubeCells.empty()
+
+        days = parse_days([day(record) for record in records])
+        day_numbers = np.where(np.isnat(days), NO_DAY, days.astype(np.int64))
+        with self.lock:
+            coords = np.column_stack([
+                self._encode('hotel', [hotel] * len(records)),
+                self._encode('stream', [stream] * len(records)),
+                self._encode('kind', [str(kind(record)) for record in records]),
+                self._encode('channel', [str(channel(record)) for record in records]),
+                self._encode('payment', [str(payment(record)) for record in records]),
+                self._encode('status', [str(status(record)) for record in records])
+            ])
+        amounts = np.array([float(record.get('amount') or 0) for record in records])
+
+        keys = np.column_stack([day_numbers, coords.astype(np.int64)])
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        return CubeCells(unique[:, 0], unique[:, 1:].astype(np.int32),
+                         np.bincount(inverse, weights=amounts, minlength=len(unique)),
+                         np.bincount(inverse, minlength=len(unique)))
+
+    def refresh(self, hotel, tables=None):
+        """Rebuild the hotel's stale tables.
+
+        tables maps table files to records the caller already loaded; other
+        stale tables are loaded here. Returns the files that were rebuilt.
+        """
+        from utils.database_data_manager import load_data, table_version
+        tables = tables or {}
+        rebuilt = []
+        now = time.monotonic()
+        for filename, streams in TABLE_STREAMS.items():
+            version = table_version(filename, hotel)
+            built = self.built.get((hotel, filename))
+            if built is not None and built[0] == version and now - built[1] < self.max_age:
+                continue
+
+            records = tables[filename] if filename in tables else load_data(filename, hotel)
+            records = [record for record in records if isinstance(record, Mapping)] if isinstance(records, list) else []
+            blocks = {stream: self._aggregate(hotel, stream, records) for stream in streams}
+            with self.lock:
+                for stream, block in blocks.items():
+                    self.blocks[(hotel, stream)] = block
+                self.built[(hotel, filename)] = (version, now)
+            rebuilt.append(filename)
+
+        if rebuilt:
+            with self.lock:
+                self.cells = CubeCells.concat(list(self.blocks.values()))
+        return rebuilt
+
+    def view(self, hotel=None, **dimensions):
+        """All cells (of a hotel), optionally narrowed as in CubeView.where"""
+        cells = self.cells
+        view = CubeView(self, cells, np.ones(len(cells.days), dtype=bool))
+        if hotel is not None:
+            dimensions['hotel'] = hotel
+        return view.where(**dimensions) if dimensions else view
+
+    def clear(self):
+        with self.lock:
+            self.blocks.clear()
+            self.built.clear()
+            self.cells = CubeCells.empty()
+
+# Global cube instance
+financial_cube = FinancialCube()
@@ -0,0 +1,237 @@
+"""
+History tables - trigger-maintained row versions for "as of" reads and per-record undo
+"""
+import json
+from datetime import datetime
+from sqlalchemy import text
+from utils.database import existing_triggers
+
+# Tables with history tracking (credentials are left out, as in the change journal)
+HISTORY_TABLES = [
+    'rooms', 'sales', 'restaurant', 'expenditures', 'advance_payments',
+    'outstanding_dues', 'cash_handovers', 'account_handovers', 'bad_debts',
+    'discounts', 'uploaded_bills', 'complementary_rooms', 'room_services',
+    'complementary_records'
+]
+
+# Month partitions are created this many months ahead of the current one
+PARTITION_MONTHS_AHEAD = 1
+
+# Trigger function shared by every tracked table. An UPDATE or DELETE closes the
+# current version (valid_to) and an INSERT or UPDATE opens a new one, both at the
+# same instant so consecutive versions meet exactly.
+HISTORY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION record_row_history() RETURNS trigger AS $$
+    DECLARE
+        changed_at TIMESTAMP := clock_timestamp();
+        history_table TEXT := TG_TABLE_NAME || '_history';
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            EXECUTE format('UPDATE %I SET valid_to = $1 WHERE record_id = $2 AND valid_to = ''infinity''', history_table)
+                USING changed_at, OLD.id::text;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            EXECUTE format('INSERT INTO %I (record_id, hotel, operation, row_data, valid_from) VALUES ($1, $2, $3, $4, $5)', history_table)
+                USING NEW.id::text, NEW.hotel, left(TG_OP, 1), to_jsonb(NEW), changed_at;
+            RETURN NEW;
+        END IF;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+_partitions_ready = set()
+
+def _month_start(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1)
+
+def _to_timestamp(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def init_history_tables(db):
+    """Create history tables, partitions and triggers for every tracked table.
+
+    Only missing triggers are created (dropping and recreating them would take
+    an exclusive lock on every table at each start), and a table's existing
+    rows get their initial versions in the same transaction that starts
+    tracking it, so the backfill runs once per table.
+    """
+    with db.engine.connect() as conn:
+        conn.execute(text(HISTORY_FUNCTION))
+        for table_name in HISTORY_TABLES:
+            history_table = f"{table_name}_history"
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {history_table} (
+                    history_id BIGSERIAL,
+                    record_id VARCHAR(50) NOT NULL,
+                    hotel VARCHAR(20),
+                    operation CHAR(1) NOT NULL,
+                    row_data JSONB NOT NULL,
+                    valid_from TIMESTAMP NOT NULL,
+                    valid_to TIMESTAMP NOT NULL DEFAULT 'infinity',
+                    PRIMARY KEY (history_id, valid_from)
+                ) PARTITION BY RANGE (valid_from)
+            """))
+            # Catches versions outside the monthly partitions, so a missing partition never blocks a write
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {history_table}_default PARTITION OF {history_table} DEFAULT"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {history_table}_record_idx ON {history_table} (record_id, valid_from)"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {history_table}_hotel_idx ON {history_table} (hotel, valid_from)"))
+        conn.commit()
+
+    # Partitions must exist before any version is written, or it lands in the default partition
+    ensure_history_partitions(db)
+
+    with db.engine.connect() as conn:
+        triggers = existing_triggers(conn, HISTORY_TABLES)
+        for table_name in HISTORY_TABLES:
+            if f"{table_name}_history_write" not in triggers:
+                conn.execute(text(f"""
+                    CREATE TRIGGER {table_name}_history_write
+                    AFTER INSERT OR DELETE ON {table_name}
+                    FOR EACH ROW EXECUTE FUNCTION record_row_history()
+                """))
+                # Rows that existed before tracking started get an initial version
+                conn.execute(text(f"""
+                    INSERT INTO {table_name}_history (record_id, hotel, operation, row_data, valid_from)
+                    SELECT t.id::text, t.hotel, 'I', to_jsonb(t), LOCALTIMESTAMP
+                    FROM {table_name} t
+                    WHERE NOT EXISTS (SELECT 1 FROM {table_name}_history h WHERE h.record_id = t.id::text)
+                """))
+            if f"{table_name}_history_update" not in triggers:
+                conn.execute(text(f"""
+                    CREATE TRIGGER {table_name}_history_update
+                    AFTER UPDATE ON {table_name}
+                    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION record_row_history()
+                """))
+        conn.commit()
+
+def ensure_history_partitions(db, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Create monthly partitions for the current month and the next ones (once per month per process)"""
+    today = datetime.now()
+    key = (today.year, today.month, months_ahead)
+    if key in _partitions_ready:
+        return
+
+    with db.engine.connect() as conn:
+        for offset in range(months_ahead + 1):
+            start = _month_start(today.year, today.month + offset)
+            end = _month_start(today.year, today.month + offset + 1)
+            for table_name in HISTORY_TABLES:
+                history_table = f"{table_name}_history"
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {history_table}_{start:%Y_%m}
+                    PARTITION OF {history_table}
+                    FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')
+                """))
+        conn.commit()
+    _partitions_ready.add(key)
+
+def record_as_of(db, table_name, record_id, timestamp):
+    """Get a record as it was at a timestamp, None if it didn't exist then"""
+    with db.engine.connect() as conn:
+        row = conn.execute(text(f"""
+            SELECT row_data FROM {table_name}_history
+            WHERE record_id = :record_id AND valid_from <= :ts AND valid_to > :ts
+            ORDER BY valid_from DESC LIMIT 1
+        """), {"record_id": str(record_id), "ts": _to_timestamp(timestamp)}).fetchone()
+    return row[0] if row else None
+
+def table_as_of(db, table_name, hotel, timestamp):
+    """Get a hotel's table as it was at a timestamp"""
+    with db.engine.connect() as conn:
+        result = conn.execute(text(f"""
+            SELECT row_data FROM {table_name}_history
+            WHERE hotel = :hotel AND valid_from <= :ts AND valid_to > :ts
+            ORDER BY valid_from DESC
+        """), {"hotel": hotel, "ts": _to_timestamp(timestamp)})
+        return [row[0] for row in result]
+
+def record_versions(db, table_name, record_id):
+    """Get every version of a record, newest first"""
+    with db.engine.connect() as conn:
+        result = conn.execute(text(f"""
+            SELECT operation, valid_from, NULLIF(valid_to, 'infinity'), row_data FROM {table_name}_history
+            WHERE record_id = :record_id
+            ORDER BY valid_from DESC
+        """), {"record_id": str(record_id)})
+        # valid_to is None for the current version
+        return [
+            {'operation': row[0], 'valid_from': row[1], 'valid_to': row[2], 'data': row[3]}
+            for row in result
+        ]
+
+def recent_changes(db, table_name, hotel, limit=50):
+    """Get the latest inserts, updates and deletes for a hotel's table, newest first"""
+    with db.engine.connect() as conn:
+        result = conn.execute(text(f"""
+            SELECT record_id, operation, valid_from AS changed_at, row_data
+            FROM {table_name}_history
+            WHERE hotel = :hotel
+            UNION ALL
+            SELECT h.record_id, 'D', h.valid_to, h.row_data
+            FROM {table_name}_history h
+            WHERE h.hotel = :hotel AND h.valid_to <> 'infinity'
+              AND NOT EXISTS (
+                  SELECT 1 FROM {table_name}_history n
+                  WHERE n.record_id = h.record_id AND n.valid_from = h.valid_to
+              )
+            ORDER BY changed_at DESC
+            LIMIT :limit
+        """), {"hotel": hotel, "limit": limit})
+        return [
+            {'record_id': row[0], 'operation': row[1], 'changed_at': row[2], 'data': row[3]}
+            for row in result
+        ]
+
+def undo_record_change(db, table_name, record_id):
+    """Undo the latest change to a record.
+
+    An insert is undone by deleting the record, an update by restoring the
+    previous version and a delete by restoring the deleted version. The undo
+    is itself recorded in the history, so it can be undone too.
+    """
+    try:
+        versions = record_versions(db, table_name, record_id)
+        if not versions:
+            return False, f"No history for record {record_id}"
+
+        latest = versions[0]
+        if latest['valid_to'] is not None:
+            # The record is currently deleted - bring back its last version
+            restored, action = latest['data'], "restored deleted record"
+        elif len(versions) > 1:
+            restored, action = versions[1]['data'], "reverted to previous version"
+        else:
+            restored, action = None, "removed added record"
+
+        with db.engine.connect() as conn:
+            if restored is None:
+                conn.execute(text(f"DELETE FROM {table_name} WHERE id::text = :record_id"),
+                             {"record_id": str(record_id)})
+            else:
+                columns = list(restored.keys())
+                conn.execute(text(f"""
+                    INSERT INTO {table_name} ({', '.join(columns)})
+                    SELECT {', '.join(columns)} FROM jsonb_populate_record(NULL::{table_name}, CAST(:row AS jsonb))
+                    ON CONFLICT (id) DO UPDATE SET
+                    {', '.join([f"{col} = EXCLUDED.{col}" for col in columns if col != 'id'])}
+                """), {"row": json.dumps(restored)})
+            conn.commit()
+
+        # The undo bypasses save_data, so journal it here to keep point-in-time restore in step
+        from utils.change_journal import change_journal
+        from utils.database_data_manager import UNJOURNALED_TABLES
+        hotel = (restored or latest['data']).get('hotel')
+        if table_name not in UNJOURNALED_TABLES and hotel:
+            try:
+                if restored is None:
+                    change_journal.record_delete(table_name, hotel, record_id)
+                else:
+                    change_journal.record_upsert(table_name, hotel, restored,
+                                                 current_records=lambda: db.load_data_from_db(table_name, hotel))
+            except Exception as e:
+                print(f"Error journaling undo of {record_id}: {e}")
+        return True, f"Record {record_id}: {action}"
+    except Exception as e:
+        return False, f"Undo failed: {str(e)}"
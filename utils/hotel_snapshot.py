@@ -0,0 +1,111 @@
+"""
+Hotel snapshot - one hotel's tables loaded at most once per page run and shared by every widget on the page
+"""
+from utils.database_data_manager import load_data, save_data, add_record
+from utils.page_profiler import page_profiler
+from utils.metrics import LOAD_DATA_CALLS
+
+class HotelSnapshot:
+    """Lazily loaded tables and derived views for one hotel.
+
+    A page builds one snapshot near the top of its script. Streamlit re-runs the
+    script on every interaction, so each rerun starts from fresh data, while
+    widgets within a run share a single load per table.
+
+    Every caller gets the same list for a table. Handlers that change records
+    should write through save()/add_record() so the snapshot and its derived
+    views stay in step with the database.
+    """
+
+    def __init__(self, hotel):
+        self.hotel = hotel
+        self.tables = {}
+        self.views = {}
+
+    def load(self, filename, columns=None):
+        """Get a table, loading it on first use.
+
+        With columns, only those are loaded - unless the whole table already
+        is, in which case that is returned.
+        """
+        key = filename if filename in self.tables or not columns else (filename, tuple(columns))
+        if key in self.tables:
+            page_profiler.record_load(filename, cached=True)
+            LOAD_DATA_CALLS.inc(backend='snapshot', cache='hit')
+            return self.tables[key]
+        data = load_data(filename, self.hotel, columns)
+        self.tables[key] = data
+        return data
+
+    def save(self, filename, data):
+        """Save a table and keep the saved list as the snapshot's copy (if the save failed, it's reloaded on next use)"""
+        result = save_data(filename, data, self.hotel)
+        self._forget(filename)
+        if result:
+            self.tables[filename] = data
+        return result
+
+    def add_record(self, filename, record):
+        """Add a record; the table is reloaded on next use"""
+        result = add_record(filename, record, self.hotel)
+        self.invalidate(filename)
+        return result
+
+    def invalidate(self, filename=None):
+        """Forget a loaded table (or everything) so it's reloaded on next use"""
+        if filename is None:
+            self.tables.clear()
+            self.views.clear()
+            return
+        self._forget(filename)
+
+    def _forget(self, filename):
+        for key in [key for key in self.tables if key == filename or (isinstance(key, tuple) and key[0] == filename)]:
+            del self.tables[key]
+        self._drop_views(filename)
+
+    def _drop_views(self, filename):
+        for name in [name for name, (filenames, _) in self.views.items() if filename in filenames]:
+            del self.views[name]
+
+    def view(self, name, filenames, build):
+        """Memoize build(*tables) until one of its tables is saved or invalidated"""
+        if name not in self.views:
+            self.views[name] = (tuple(filenames), build(*[self.load(filename) for filename in filenames]))
+        return self.views[name][1]
+
+    # Derived views shared by the pages
+
+    def rooms_by_number(self):
+        """Rooms keyed by room number (rooms without one are left out)"""
+        def build(rooms):
+            if isinstance(rooms, list):
+                return {room['room_number']: room for room in rooms if isinstance(room, dict) and 'room_number' in room}
+            return rooms if rooms else {}
+        return self.view('rooms_by_number', ['rooms.json'], build)
+
+    def room_labels(self):
+        """'Room N' labels for room pickers, in the order the pages have always listed them"""
+        def build(rooms):
+            if isinstance(rooms, dict):
+                return [f"Room {k}" for k in sorted(rooms.keys(), key=lambda x: int(x))]
+            elif isinstance(rooms, list):
+                return [f"Room {room.get('room_number', room.get('id', i+101))}" for i, room in enumerate(rooms)]
+            return [f"Room {i}" for i in range(101, 109)]
+        return self.view('room_labels', ['rooms.json'], build)
+
+    def cash_sales(self):
+        return self.view('cash_sales', ['sales.json'],
+                         lambda sales: [s for s in sales if s.get('payment_type') == 'Cash'])
+
+    def account_sales(self):
+        return self.view('account_sales', ['sales.json'],
+                         lambda sales: [s for s in sales if s.get('payment_type') == 'Account'])
+
+    def pending_dues(self):
+        return self.view('pending_dues', ['outstanding_dues.json'],
+                         lambda dues: [due for due in dues if due.get('status') == 'Pending'])
+
+    def pending_advances(self):
+        return self.view('pending_advances', ['advance_payments.json'],
+                         lambda advances: [ap for ap in advances if ap.get('status') in ['Pending', 'Partially Received']])
@@ -0,0 +1,102 @@
+"""
+Integrity scanner - parallel, cached integrity checks for data files and database tables
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from utils.data_integrity import CRITICAL_FILES, HOTELS, check_data_file, read_digest
+from utils.parse_cache import file_signature
+
+# Threads used for one scan
+SCAN_WORKERS = 8
+
+class IntegrityScanner:
+    """Runs file and table checks in a thread pool.
+
+    A file whose (mtime, size, inode) signature and checksum sidecar are the
+    same as at its last good check is skipped. Tables are checked with row
+    counts and server-side md5 checksums, so no rows are transferred.
+    """
+
+    def __init__(self, max_workers=SCAN_WORKERS):
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.known_good = {}     # path -> (signature, digest) at the last good check
+        self.table_states = {}   # (table, hotel) -> {'rows', 'checksum', 'checked_at'}
+        self.skipped = 0
+        self.checked = 0
+
+    def _file_state(self, path):
+        digest = read_digest(path)
+        return file_signature(path), digest.get('digest') if digest else None
+
+    def _check_file(self, hotel_filename, deep):
+        path = os.path.join('data', hotel_filename)
+        state = self._file_state(path)
+        if not deep and state[0] is not None:
+            with self.lock:
+                if self.known_good.get(path) == state:
+                    self.skipped += 1
+                    return None
+
+        issue = check_data_file(hotel_filename, deep=deep)
+        with self.lock:
+            self.checked += 1
+            if issue is None:
+                # A sidecar may have just been written for a legacy file
+                self.known_good[path] = self._file_state(path)
+            else:
+                self.known_good.pop(path, None)
+        return issue
+
+    def scan_files(self, deep=False):
+        """Check all critical data files, returning a list of issue descriptions"""
+        from utils.data_manager import stored_filename
+
+        # Tables kept as JSON Lines are checked in their .jsonl file, not the migrated JSON file
+        filenames = [stored_filename(f"{hotel}_{filename}") for hotel in HOTELS for filename in CRITICAL_FILES]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda name: self._check_file(name, deep), filenames)
+            return [issue for issue in results if issue]
+
+    def _check_table(self, db, table_name):
+        try:
+            checksums = db.table_checksums(table_name)
+        except Exception as e:
+            return [f"Unreadable table: {table_name} - {str(e)}"]
+
+        issues = []
+        checked_at = datetime.now().isoformat()
+        with self.lock:
+            for hotel in HOTELS:
+                rows, checksum = checksums.get(hotel, (0, None))
+                previous = self.table_states.get((table_name, hotel))
+                if previous and previous['rows'] > 0 and rows == 0:
+                    issues.append(f"Table emptied: {hotel} {table_name} had {previous['rows']} rows")
+                self.table_states[(table_name, hotel)] = {
+                    'rows': rows,
+                    'checksum': checksum,
+                    'changed': previous is not None and previous['checksum'] != checksum,
+                    'checked_at': checked_at
+                }
+        return issues
+
+    def scan_database(self, db, tables=None):
+        """Check critical tables with one count/checksum query per table"""
+        tables = tables or [filename.replace('.json', '') for filename in CRITICAL_FILES]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tables))) as pool:
+            results = pool.map(lambda table: self._check_table(db, table), tables)
+            return [issue for issues in results for issue in issues]
+
+    def stats(self):
+        """Get scanner statistics"""
+        with self.lock:
+            return {
+                'checked': self.checked,
+                'skipped': self.skipped,
+                'tables': dict(self.table_states)
+            }
+
+# Global scanner instance
+integrity_scanner = IntegrityScanner()
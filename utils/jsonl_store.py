@@ -0,0 +1,283 @@
+"""
+JSON Lines record store - one record per line with an id/date offset index beside the data file
+"""
+import os
+import mmap
+import bisect
+import threading
+from utils.data_manager import encode_data, decode_data, generate_id
+from utils.parse_cache import file_signature
+
+INDEX_SUFFIX = '.idx'
+
+class JsonlStore:
+    """Append-only record file for list-of-records data (sales, expenditures, ...).
+
+    Every record is one line. Updates append a new version of the record and
+    deletes append a tombstone, so the latest line for an id wins. The index
+    file holds one [id, date, offset, length, deleted] entry per data line and
+    is also append-only; it is loaded into memory once and reloaded only when
+    another process has changed the data file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.lock = threading.RLock()
+        self.ids = None          # id -> (offset, length) of the latest version
+        self.dates = None        # sorted [(date, offset, length, id)]
+        self.order = None        # id -> first offset (keeps original record order)
+        self.indexed_size = 0
+        self.data_signature = None
+        self.mapped = None
+        self.mapped_size = 0
+
+    # Index maintenance
+
+    def _reset_index(self):
+        self.ids = {}
+        self.dates = []
+        self.order = {}
+        self.indexed_size = 0
+
+    def _apply_entry(self, record_id, date, offset, length, deleted=False):
+        """Apply one index entry to the in-memory index"""
+        if deleted:
+            self.ids.pop(record_id, None)
+            self.order.pop(record_id, None)
+        else:
+            self.ids[record_id] = (offset, length)
+            self.order.setdefault(record_id, offset)
+            bisect.insort(self.dates, (date or '', offset, length, record_id))
+        self.indexed_size = max(self.indexed_size, offset + length)
+
+    def _load_index(self):
+        """Load the index on first use, or again after another process changed the file"""
+        if self.ids is not None and file_signature(self.path) == self.data_signature:
+            return
+        self._reset_index()
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        data_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record_id, date, offset, length, deleted = decode_data(line)
+                    except Exception:
+                        continue
+                    self._apply_entry(record_id, date, offset, length, deleted)
+
+        if self.indexed_size > data_size:
+            # Data file is shorter than the index describes - rebuild from scratch
+            self._reset_index()
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+        if self.indexed_size < data_size:
+            self._scan_tail()
+        self.data_signature = file_signature(self.path)
+
+    def _scan_tail(self):
+        """Index data lines beyond the indexed size (e.g. after a crash)"""
+        entries = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.indexed_size)
+            offset = self.indexed_size
+            for line in f:
+                length = len(line)
+                if line.strip():
+                    try:
+                        record = decode_data(line)
+                    except Exception:
+                        # Partial last line from an interrupted append
+                        break
+                    entries.append(self._entry_for(record, offset, length))
+                offset += length
+        for entry in entries:
+            self._apply_entry(*entry)
+
+        # Callers may hold only the data file's shared lock, so another process can be indexing
+        # the same tail: append under the index's own lock, only what the index doesn't have yet
+        from utils.data_integrity import process_file_lock
+        with process_file_lock(self.index_path):
+            indexed = self._indexed_size_on_disk()
+            with open(self.index_path, 'ab') as f:
+                for entry in entries:
+                    if entry[2] >= indexed:
+                        f.write(encode_data(list(entry)) + b'\n')
+
+    def _indexed_size_on_disk(self):
+        """End of the data described by the index file"""
+        size = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                for line in f:
+                    try:
+                        _, _, offset, length, _ = decode_data(line)
+                    except Exception:
+                        continue
+                    size = max(size, offset + length)
+        return size
+
+    @staticmethod
+    def _identified(record):
+        """Give a record without an id one (in place); lines are keyed by id, so id-less records would replace each other"""
+        if record.get('id') in (None, ''):
+            record['id'] = generate_id()
+        return record
+
+    @staticmethod
+    def _entry_for(record, offset, length):
+        deleted = bool(record.get('_deleted'))
+        date = str(record.get('date') or '')[:10]
+        return (str(record.get('id')), date, offset, length, deleted)
+
+    # Reading
+
+    def _map(self):
+        """Memory-map the data file, remapping when it has grown"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if self.mapped is None or size != self.mapped_size:
+            if self.mapped is not None:
+                self.mapped.close()
+                self.mapped = None
+            if size == 0:
+                self.mapped_size = 0
+                return None
+            with open(self.path, 'rb') as f:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped_size = size
+        return self.mapped
+
+    def _read(self, offset, length):
+        return decode_data(self._map()[offset:offset + length])
+
+    def get(self, record_id):
+        """Get the latest version of a record by id, None if missing"""
+        with self.lock:
+            self._load_index()
+            location = self.ids.get(str(record_id))
+            if location is None:
+                return None
+            return self._read(*location)
+
+    def load_range(self, start_date=None, end_date=None):
+        """Get records whose date (YYYY-MM-DD) falls within [start_date, end_date]"""
+        with self.lock:
+            self._load_index()
+            low = bisect.bisect_left(self.dates, (start_date or '',))
+            high = len(self.dates) if end_date is None else bisect.bisect_right(self.dates, (end_date, float('inf')))
+            records = []
+            for date, offset, length, record_id in self.dates[low:high]:
+                # Skip superseded versions of updated records
+                if self.ids.get(record_id) == (offset, length):
+                    records.append(self._read(offset, length))
+            return records
+
+    def load_all(self):
+        """Get all live records in their original order"""
+        with self.lock:
+            self._load_index()
+            records = []
+            for record_id in sorted(self.ids, key=self.order.get):
+                records.append(self._read(*self.ids[record_id]))
+            return records
+
+    def __len__(self):
+        with self.lock:
+            self._load_index()
+            return len(self.ids)
+
+    # Writing
+
+    def _append_lines(self, records):
+        """Append records to the data file and their entries to the index"""
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        entries = []
+        with open(self.path, 'ab') as f:
+            for record in records:
+                record = self._identified(record)
+                line = encode_data(record) + b'\n'
+                f.write(line)
+                entries.append(self._entry_for(record, offset, len(line)))
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, 'ab') as f:
+            for entry in entries:
+                self._apply_entry(*entry)
+                f.write(encode_data(list(entry)) + b'\n')
+        self.data_signature = file_signature(self.path)
+
+    def append(self, record):
+        """Append a new record (or a new version of an existing one)"""
+        with self.lock:
+            self._load_index()
+            self._append_lines([record])
+
+    def delete(self, record_id):
+        """Delete a record by appending a tombstone"""
+        with self.lock:
+            self._load_index()
+            if str(record_id) in self.ids:
+                self._append_lines([{'id': str(record_id), '_deleted': True}])
+
+    def rewrite(self, records):
+        """Replace the whole file with the given records (also compacts it); returns the bytes written"""
+        with self.lock:
+            temp_path = self.path + '.tmp'
+            temp_index = self.index_path + '.tmp'
+            for path in (temp_path, temp_index):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            offset = 0
+            entries = []
+            lines = []
+            with open(temp_path, 'wb') as f:
+                for record in records:
+                    record = self._identified(record)
+                    line = encode_data(record) + b'\n'
+                    f.write(line)
+                    lines.append(line)
+                    entries.append(self._entry_for(record, offset, len(line)))
+                    offset += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(temp_index, 'wb') as f:
+                for entry in entries:
+                    f.write(encode_data(list(entry)) + b'\n')
+
+            if self.mapped is not None:
+                self.mapped.close()
+                self.mapped = None
+            os.replace(temp_path, self.path)
+            os.replace(temp_index, self.index_path)
+
+            self._reset_index()
+            for entry in entries:
+                self._apply_entry(*entry)
+            self.data_signature = file_signature(self.path)
+            return b''.join(lines)
+
+    def compact(self):
+        """Drop superseded versions and tombstones"""
+        with self.lock:
+            self.rewrite(self.load_all())
+
+# Open stores, one per data file
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(path):
+    """Get the shared store for a data file path"""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = JsonlStore(path)
+            _stores[path] = store
+        return store
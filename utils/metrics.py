@@ -0,0 +1,325 @@
+"""
+Metrics - counters, gauges and histograms exported in the Prometheus text format,
+served over a local HTTP thread and/or written to a node exporter textfile
+"""
+import os
+import sys
+import math
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Port for the /metrics HTTP endpoint; 0 disables it
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+# Address the endpoint binds to (local only unless changed)
+METRICS_BIND = os.environ.get('METRICS_BIND', '127.0.0.1')
+# Node exporter textfile collector path (e.g. /var/lib/node_exporter/textfile/hotel.prom); empty disables it
+METRICS_TEXTFILE = os.environ.get('METRICS_TEXTFILE', '')
+# Seconds between textfile writes
+METRICS_INTERVAL = float(os.environ.get('METRICS_INTERVAL', 15))
+# Sessions seen within this many seconds count as active
+ACTIVE_SESSION_SECONDS = 300
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+        return str(int(value))
+    return repr(float(value))
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of raw samples (fraction in 0..1), 0.0 when there are none"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+class Metric:
+    type_name = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """(suffix, label values, extra label, value) tuples for exposition"""
+        with self.lock:
+            return [('', key, None, value) for key, value in self.values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(self.labelnames, key, extra)} {format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """Set a running total kept elsewhere (sampled by a collector)"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+class Gauge(Metric):
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block in seconds (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self.lock:
+            states = [(key, dict(state, buckets=list(state['buckets']))) for key, state in self.values.items()]
+        samples = []
+        for key, state in states:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['buckets']):
+                cumulative += count
+                samples.append(('_bucket', key, ('le', format_value(bound)), cumulative))
+            samples.append(('_sum', key, None, state['sum']))
+            samples.append(('_count', key, None, state['count']))
+        return samples
+
+class MetricsRegistry:
+    """Named metrics plus collectors that refresh gauges right before each export"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def register_collector(self, collector):
+        """Call collector() before every export (e.g. to sample pool usage)"""
+        with self.lock:
+            if collector not in self.collectors:
+                self.collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        for collector in list(self.collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Global registry instance
+metrics = MetricsRegistry()
+
+# Metrics recorded across the app
+DB_QUERY_SECONDS = metrics.histogram('hotel_db_query_seconds', "Database statement latency", ['page', 'operation'])
+DB_QUERY_ERRORS = metrics.counter('hotel_db_query_errors_total', "Database statements that raised", ['page', 'operation'])
+LOAD_DATA_CALLS = metrics.counter('hotel_load_data_total', "load_data calls by backend and cache result",
+                                  ['backend', 'cache'])
+SAVE_SECONDS = metrics.histogram('hotel_save_seconds', "save_data duration", ['backend', 'table'])
+BACKUP_BYTES = metrics.gauge('hotel_backup_size_bytes', "Size of the latest backup", ['kind'])
+BACKUP_TIMESTAMP = metrics.gauge('hotel_backup_timestamp_seconds', "Unix time of the latest backup", ['kind'])
+PAGE_RENDER_SECONDS = metrics.histogram('hotel_page_render_seconds', "Page script run time", ['page'],
+                                        buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0))
+ACTIVE_SESSIONS = metrics.gauge('hotel_active_sessions', f"Sessions seen in the last {ACTIVE_SESSION_SECONDS}s")
+
+_session_last_seen = {}
+
+def touch_session(session_id):
+    """Mark a browser session as active"""
+    _session_last_seen[session_id] = time.time()
+
+def record_backup(kind, size_bytes):
+    BACKUP_BYTES.set(size_bytes, kind=kind)
+    BACKUP_TIMESTAMP.set(time.time(), kind=kind)
+
+def collect_sessions():
+    cutoff = time.time() - ACTIVE_SESSION_SECONDS
+    for session_id, last_seen in list(_session_last_seen.items()):
+        if last_seen < cutoff:
+            _session_last_seen.pop(session_id, None)
+    ACTIVE_SESSIONS.set(len(_session_last_seen))
+
+def collect_pool():
+    """Connection pool utilization of the current database manager (without connecting)"""
+    # Only sample a manager that already exists; the exporter never opens connections itself
+    manager_module = sys.modules.get('utils.database_data_manager')
+    db = getattr(manager_module, 'db_manager', None)
+    if db is None:
+        return
+    pool = db.engine.pool
+    gauge = metrics.gauge('hotel_db_pool_connections', "Database pool connections by state", ['state'])
+    for state in ('checkedout', 'checkedin', 'overflow', 'size'):
+        method = getattr(pool, state, None)
+        if method is not None:
+            gauge.set(method(), state=state)
+
+def collect_caches():
+    from utils.parse_cache import parse_cache
+    from utils.backup_worker import backup_worker
+    stats = parse_cache.stats()
+    metrics.gauge('hotel_parse_cache_entries', "Parsed files held in the parse cache").set(stats['entries'])
+    metrics.gauge('hotel_parse_cache_bytes', "Source bytes held in the parse cache").set(stats['bytes'])
+    lookups = metrics.counter('hotel_parse_cache_lookups_total', "Parse cache lookups since start", ['result'])
+    lookups.set_total(stats['hits'], result='hit')
+    lookups.set_total(stats['misses'], result='miss')
+    worker = backup_worker.stats()
+    metrics.gauge('hotel_backup_queue_pending', "Backup tasks waiting in the worker queue").set(worker['pending'])
+    tasks = metrics.counter('hotel_backup_tasks_total', "Background backup tasks since start", ['result'])
+    for result in ('completed', 'failed'):
+        tasks.set_total(worker[result], result=result)
+    metrics.counter('hotel_backup_submit_waits_total', "Backup submissions that waited for queue space"
+                    ).set_total(worker['waited'])
+
+for _collector in (collect_sessions, collect_pool, collect_caches):
+    metrics.register_collector(_collector)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MetricsExporter:
+    def __init__(self, port=METRICS_PORT, bind=METRICS_BIND, textfile=METRICS_TEXTFILE, interval=METRICS_INTERVAL):
+        self.port = port
+        self.bind = bind
+        self.textfile = textfile
+        self.interval = interval
+        self.server = None
+        self.textfile_thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start the HTTP endpoint and/or textfile writer (whichever is configured)"""
+        with self.lock:
+            if self.port and self.server is None:
+                try:
+                    self.server = ThreadingHTTPServer((self.bind, self.port), MetricsHandler)
+                    self.server.daemon_threads = True
+                    threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True).start()
+                    print(f"Metrics endpoint listening on http://{self.bind}:{self.port}/metrics")
+                except OSError as e:
+                    print(f"Metrics endpoint could not start on port {self.port}: {e}")
+            if self.textfile and self.textfile_thread is None:
+                self.textfile_thread = threading.Thread(target=self._textfile_loop, name='metrics-textfile',
+                                                        daemon=True)
+                self.textfile_thread.start()
+
+    def write_textfile(self):
+        """Write the exposition atomically so the node exporter never reads a partial file"""
+        directory = os.path.dirname(self.textfile)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(metrics.render())
+        os.replace(temp_path, self.textfile)
+
+    def _textfile_loop(self):
+        while True:
+            try:
+                self.write_textfile()
+            except Exception as e:
+                print(f"Metrics textfile write failed: {e}")
+            time.sleep(self.interval)
+
+# Global exporter instance
+metrics_exporter = MetricsExporter()
+
+def start_metrics_exporter():
+    """Start exporting metrics if METRICS_PORT or METRICS_TEXTFILE is set"""
+    metrics_exporter.start()
@@ -0,0 +1,249 @@
+"""
+Page profiler - opt-in timing of page script runs by section, with load_data counts and peak memory
+"""
+import os
+import time
+import threading
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from utils.metrics import PAGE_RENDER_SECONDS, percentile
+
+# Profile every page run from startup (admins can also switch it on from the Diagnostics page)
+PAGE_PROFILING = os.environ.get('PAGE_PROFILING', '').lower() in ('1', 'true', 'yes')
+# Number of finished page runs kept in memory
+PROFILE_HISTORY = int(os.environ.get('PROFILE_HISTORY', 2000))
+# Section for time not inside a named section (all of it on pages that don't mark sections)
+DEFAULT_SECTION = 'Other'
+
+class PageProfile:
+    """One page script run, split into named sections.
+
+    section() closes the running section and starts the next one, so a page
+    marks where each part begins instead of wrapping code in blocks.
+    """
+
+    def __init__(self, profiler, page, hotel, thread_id):
+        self.profiler = profiler
+        self.page = page
+        self.hotel = hotel
+        self.thread_id = thread_id
+        self.timestamp = datetime.now().isoformat()
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.current_section = DEFAULT_SECTION
+        self.section_started = self.started
+        self.load_calls = 0
+        self.cache_hits = 0
+        self.tables = set()
+        self.memory_baseline = None
+        self.finished = False
+
+    def section(self, name):
+        """End the running section and start timing the next one"""
+        now = time.perf_counter()
+        self._close_section(now)
+        self.current_section = name
+        self.section_started = now
+
+    def _close_section(self, now):
+        elapsed = now - self.section_started
+        self.sections[self.current_section] = self.sections.get(self.current_section, 0.0) + elapsed
+
+    def record_load(self, filename, cached=False):
+        self.load_calls += 1
+        self.tables.add(filename)
+        if cached:
+            self.cache_hits += 1
+
+    def finish(self, complete=True):
+        """Stop timing and hand the run to the profiler"""
+        if self.finished:
+            return
+        self.finished = True
+        now = time.perf_counter()
+        self._close_section(now)
+        self.profiler._record(self, now - self.started, complete)
+
+class PageTimer:
+    """Stand-in returned while profiling is off: only feeds the page render time metric"""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+
+    def section(self, name):
+        pass
+
+    def record_load(self, filename, cached=False):
+        pass
+
+    def finish(self, complete=True):
+        if complete:
+            PAGE_RENDER_SECONDS.observe(time.perf_counter() - self.started, page=self.page)
+
+class PageProfiler:
+    """Collects page runs and aggregates them per page and hotel.
+
+    Peak memory comes from tracemalloc, which is only running while at least
+    one profiled page is. tracemalloc traces the whole process, so runs that
+    overlap with other sessions share one peak.
+    """
+
+    def __init__(self, enabled=PAGE_PROFILING, history=PROFILE_HISTORY):
+        self.enabled = enabled
+        self.runs = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.active = {}
+        self.tracing_runs = 0
+        self.started_tracing = False
+
+    def start(self, page_file, hotel=None):
+        """Start profiling a page run on this thread.
+
+        Returns a profile whose section() and finish() the page calls; a plain
+        timer when profiling is off.
+        """
+        page = os.path.splitext(os.path.basename(page_file))[0]
+        if not self.enabled:
+            return PageTimer(page)
+
+        if hotel is None:
+            try:
+                import streamlit as st
+                hotel = st.session_state.get('selected_hotel', 'hotel1')
+            except Exception:
+                hotel = None
+
+        self._finish_abandoned()
+        thread_id = threading.get_ident()
+        profile = PageProfile(self, page, hotel or 'all', thread_id)
+
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            if self.tracing_runs == 0:
+                tracemalloc.reset_peak()
+            self.tracing_runs += 1
+            profile.memory_baseline = tracemalloc.get_traced_memory()[0]
+            self.active[thread_id] = profile
+        return profile
+
+    def _finish_abandoned(self):
+        """Close runs cut short by st.stop() or st.rerun(), whose finish() never ran"""
+        current = threading.get_ident()
+        alive = {thread.ident for thread in threading.enumerate()}
+        with self.lock:
+            abandoned = [profile for thread_id, profile in self.active.items()
+                         if thread_id == current or thread_id not in alive]
+        for profile in abandoned:
+            profile.finish(complete=False)
+
+    def current(self):
+        """The profile running on this thread, if any"""
+        return self.active.get(threading.get_ident())
+
+    def record_load(self, filename, cached=False):
+        """Count a load_data call against the page running on this thread"""
+        if not self.active:
+            return
+        profile = self.active.get(threading.get_ident())
+        if profile is not None:
+            profile.record_load(filename, cached)
+
+    def _record(self, profile, seconds, complete):
+        if complete:
+            PAGE_RENDER_SECONDS.observe(seconds, page=profile.page)
+        with self.lock:
+            peak = 0
+            if tracemalloc.is_tracing():
+                peak = max(0, tracemalloc.get_traced_memory()[1] - (profile.memory_baseline or 0))
+            self.tracing_runs = max(0, self.tracing_runs - 1)
+            if self.tracing_runs == 0 and self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+            if self.active.get(profile.thread_id) is profile:
+                del self.active[profile.thread_id]
+
+            self.runs.append({
+                'timestamp': profile.timestamp,
+                'page': profile.page,
+                'hotel': profile.hotel,
+                'wall_ms': round(seconds * 1000, 2),
+                'sections': {name: round(value * 1000, 2) for name, value in profile.sections.items()},
+                'load_calls': profile.load_calls,
+                'cache_hits': profile.cache_hits,
+                'distinct_tables': len(profile.tables),
+                'peak_memory_mb': round(peak / (1024 * 1024), 2),
+                'complete': complete
+            })
+
+    def recent_runs(self, page=None, hotel=None):
+        """Finished runs, newest first"""
+        with self.lock:
+            runs = list(self.runs)
+        return [run for run in reversed(runs)
+                if (page is None or run['page'] == page) and (hotel is None or run['hotel'] == hotel)]
+
+    def section_names(self):
+        names = []
+        for run in self.recent_runs():
+            for name in run['sections']:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def flat_runs(self, page=None, hotel=None):
+        """Runs with one '<section> ms' column per section, ready for a DataFrame or CSV"""
+        sections = self.section_names()
+        rows = []
+        for run in self.recent_runs(page, hotel):
+            row = {key: value for key, value in run.items() if key != 'sections'}
+            for name in sections:
+                row[f"{name} ms"] = run['sections'].get(name, 0.0)
+            rows.append(row)
+        return rows
+
+    def summary(self, by_hotel=True):
+        """Aggregate runs per page (and hotel): wall time, section means, load_data calls and memory"""
+        groups = {}
+        for run in self.recent_runs():
+            key = (run['page'], run['hotel'] if by_hotel else 'all')
+            groups.setdefault(key, []).append(run)
+
+        sections = self.section_names()
+        summary = []
+        for (page, hotel), runs in groups.items():
+            wall = [run['wall_ms'] for run in runs]
+            load_calls = sum(run['load_calls'] for run in runs)
+            row = {
+                'page': page,
+                'hotel': hotel,
+                'runs': len(runs),
+                'incomplete': len([run for run in runs if not run['complete']]),
+                'total_ms': round(sum(wall), 1),
+                'mean_ms': round(sum(wall) / len(wall), 1),
+                'p95_ms': round(percentile(wall, 0.95), 1),
+                'max_ms': round(max(wall), 1),
+                'load_calls_per_run': round(load_calls / len(runs), 1),
+                'cache_hit_rate': round(sum(run['cache_hits'] for run in runs) / load_calls, 3) if load_calls else 0.0,
+                'mean_peak_memory_mb': round(sum(run['peak_memory_mb'] for run in runs) / len(runs), 2),
+                'max_peak_memory_mb': max(run['peak_memory_mb'] for run in runs)
+            }
+            for name in sections:
+                row[f"{name} ms"] = round(sum(run['sections'].get(name, 0.0) for run in runs) / len(runs), 1)
+            summary.append(row)
+        summary.sort(key=lambda item: item['total_ms'], reverse=True)
+        return summary
+
+    def clear(self):
+        with self.lock:
+            self.runs.clear()
+
+# Global profiler instance
+page_profiler = PageProfiler()
+
+def start_page_profile(page_file, hotel=None):
+    """Start profiling the calling page script (see PageProfiler.start)"""
+    return page_profiler.start(page_file, hotel)
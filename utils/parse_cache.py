@@ -0,0 +1,126 @@
+"""
+Parse cache - process-level cache of parsed JSON data files validated by file metadata
+"""
+import marshal
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+# Memory cap for cached entries, measured by the size of the source files
+MAX_CACHE_BYTES = int(os.environ.get('PARSE_CACHE_MAX_BYTES', 128 * 1024 * 1024))
+
+def freeze_data(data):
+    """Build a read-only view of parsed JSON data (tuples and mapping proxies)"""
+    if isinstance(data, list):
+        return tuple(freeze_data(item) for item in data)
+    if isinstance(data, dict):
+        return MappingProxyType({key: freeze_data(value) for key, value in data.items()})
+    return data
+
+def file_signature(path):
+    """Get (mtime_ns, size, inode) of a file, None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+class ParseCache:
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self):
+        """Evict least recently used entries until under the memory cap"""
+        while self.total_bytes > self.max_bytes and self.entries:
+            _, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry['size']
+
+    def _lookup(self, path):
+        """Get the cached entry for a path if the file is unchanged"""
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry['signature'] == signature:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def get(self, path, readonly=True):
+        """Get parsed data for an unchanged file.
+
+        Returns a shared frozen view, built once per file version. Callers that
+        will modify the data pass readonly=False and get a private copy, decoded
+        from a marshal snapshot (faster than re-parsing the file, where a deep
+        copy of the parsed data is slower). Returns None on a cache miss.
+        """
+        entry = self._lookup(path)
+        if entry is None:
+            return None
+        if readonly:
+            if entry['frozen'] is None:
+                entry['frozen'] = freeze_data(marshal.loads(entry['snapshot']))
+            return entry['frozen']
+        return marshal.loads(entry['snapshot'])
+
+    def store(self, path, data, signature=None):
+        """Cache parsed data for a file as of its current (or given) signature"""
+        if signature is None:
+            signature = file_signature(path)
+        if signature is None:
+            return
+        size = signature[1]
+        if size > self.max_bytes:
+            return
+        # A snapshot rather than the parsed objects, so later changes by the caller don't leak in
+        try:
+            snapshot = marshal.dumps(data)
+        except ValueError:
+            return
+        with self.lock:
+            previous = self.entries.pop(path, None)
+            if previous is not None:
+                self.total_bytes -= previous['size']
+            self.entries[path] = {
+                'signature': signature,
+                'snapshot': snapshot,
+                'frozen': None,
+                'size': size
+            }
+            self.total_bytes += size
+            self._evict()
+
+    def invalidate(self, path=None):
+        """Drop one cached file, or everything when no path is given"""
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                self.total_bytes = 0
+                return
+            entry = self.entries.pop(path, None)
+            if entry is not None:
+                self.total_bytes -= entry['size']
+
+    def stats(self):
+        """Get cache statistics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+# Global parse cache instance
+parse_cache = ParseCache()
@@ -0,0 +1,201 @@
+"""
+Query monitor - times every SQL statement, tags it with the calling page and operation,
+and keeps recent timings in memory with an optional slow-query log
+"""
+import os
+import sys
+import json
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.metrics import DB_QUERY_SECONDS, DB_QUERY_ERRORS, percentile
+
+# Number of recent statements kept in memory
+QUERY_BUFFER_SIZE = int(os.environ.get('QUERY_BUFFER_SIZE', 5000))
+# Statements slower than this are appended to the slow-query log
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 250))
+# Slow-query log path; set SLOW_QUERY_LOG to an empty string to disable it
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'data/logs/slow_queries.jsonl')
+MAX_STATEMENT_LENGTH = 300
+
+# Explicit tags set with query_context(); otherwise they are taken from the call stack
+_query_tags = contextvars.ContextVar('query_tags', default=None)
+
+@contextmanager
+def query_context(page=None, operation=None):
+    """Tag statements run inside the block with a page and/or operation"""
+    current = _query_tags.get() or {}
+    token = _query_tags.set({
+        'page': page or current.get('page'),
+        'operation': operation or current.get('operation')
+    })
+    try:
+        yield
+    finally:
+        _query_tags.reset(token)
+
+def normalize_statement(statement):
+    """Collapse whitespace so the same query groups together"""
+    statement = ' '.join(statement.split())
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH] + '...'
+    return statement
+
+def caller_tags():
+    """Find the calling page script and data-layer function from the call stack"""
+    tags = dict(_query_tags.get() or {})
+    page = tags.get('page')
+    operation = tags.get('operation')
+    frame = sys._getframe(2)
+    while frame is not None and not (page and operation):
+        filename = frame.f_code.co_filename.replace(os.sep, '/')
+        if operation is None and (filename.endswith('utils/database.py') or
+                                  filename.endswith('utils/database_data_manager.py')):
+            operation = frame.f_code.co_name
+        elif page is None and ('/pages/' in filename or filename.endswith('/app.py')):
+            page = os.path.splitext(os.path.basename(filename))[0]
+        frame = frame.f_back
+    return page or 'background', operation or 'other'
+
+class QueryMonitor:
+    def __init__(self, buffer_size=QUERY_BUFFER_SIZE, slow_query_ms=SLOW_QUERY_MS, slow_log=SLOW_QUERY_LOG):
+        self.entries = deque(maxlen=buffer_size)
+        self.slow_query_ms = slow_query_ms
+        self.slow_log = slow_log
+        self.lock = threading.Lock()
+        self.installed = False
+
+    def install(self):
+        """Hook statement timing into every SQLAlchemy engine"""
+        with self.lock:
+            if self.installed:
+                return
+            event.listen(Engine, 'before_cursor_execute', self._before_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_execute)
+            event.listen(Engine, 'handle_error', self._on_error)
+            self.installed = True
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_start')
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        self.record(statement, elapsed_ms, cursor.rowcount)
+
+    def _on_error(self, exception_context):
+        starts = exception_context.connection.info.get('query_start') if exception_context.connection else None
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        self.record(exception_context.statement or '', elapsed_ms, -1,
+                    error=type(exception_context.original_exception).__name__)
+
+    def record(self, statement, elapsed_ms, rows, error=None):
+        """Record one executed statement"""
+        page, operation = caller_tags()
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'statement': normalize_statement(statement),
+            'page': page,
+            'operation': operation,
+            'ms': round(elapsed_ms, 3),
+            'rows': rows if rows is not None and rows >= 0 else None,
+            'error': error
+        }
+        with self.lock:
+            self.entries.append(entry)
+        DB_QUERY_SECONDS.observe(elapsed_ms / 1000, page=page, operation=operation)
+        if error:
+            DB_QUERY_ERRORS.inc(page=page, operation=operation)
+        if self.slow_log and elapsed_ms >= self.slow_query_ms:
+            self._log_slow(entry)
+
+    def _log_slow(self, entry):
+        try:
+            os.makedirs(os.path.dirname(self.slow_log), exist_ok=True)
+            line = json.dumps(entry, ensure_ascii=False) + '\n'
+            with self.lock:
+                with open(self.slow_log, 'a') as f:
+                    f.write(line)
+        except Exception as e:
+            print(f"Failed to write slow query log: {e}")
+
+    def recent(self, limit=100):
+        """Get the most recent statements, newest first"""
+        with self.lock:
+            entries = list(self.entries)
+        return entries[::-1][:limit]
+
+    def top_queries(self, limit=10, sort_by='total_ms', page=None):
+        """Aggregate buffered statements by (statement, page, operation)"""
+        with self.lock:
+            entries = list(self.entries)
+
+        groups = {}
+        for entry in entries:
+            if page and entry['page'] != page:
+                continue
+            groups.setdefault((entry['statement'], entry['page'], entry['operation']), []).append(entry)
+
+        summary = []
+        for (statement, page_name, operation), group in groups.items():
+            timings = [entry['ms'] for entry in group]
+            rows = [entry['rows'] for entry in group if entry['rows'] is not None]
+            summary.append({
+                'statement': statement,
+                'page': page_name,
+                'operation': operation,
+                'calls': len(group),
+                'total_ms': round(sum(timings), 1),
+                'mean_ms': round(sum(timings) / len(timings), 2),
+                'p95_ms': round(percentile(timings, 0.95), 2),
+                'max_ms': round(max(timings), 2),
+                'total_rows': sum(rows),
+                'mean_rows': round(sum(rows) / len(rows), 1) if rows else 0,
+                'errors': len([entry for entry in group if entry['error']])
+            })
+        summary.sort(key=lambda item: item[sort_by], reverse=True)
+        return summary[:limit]
+
+    def page_totals(self):
+        """Total statement time and count per page"""
+        with self.lock:
+            entries = list(self.entries)
+        totals = {}
+        for entry in entries:
+            page_total = totals.setdefault(entry['page'], {'page': entry['page'], 'calls': 0, 'total_ms': 0.0})
+            page_total['calls'] += 1
+            page_total['total_ms'] += entry['ms']
+        return sorted(totals.values(), key=lambda item: item['total_ms'], reverse=True)
+
+    def read_slow_log(self, limit=50):
+        """Read the latest entries of the slow-query log, newest first"""
+        if not self.slow_log or not os.path.exists(self.slow_log):
+            return []
+        with open(self.slow_log, 'rb') as f:
+            f.seek(max(0, os.path.getsize(self.slow_log) - 256 * 1024))
+            lines = f.read().splitlines()
+        entries = []
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except Exception:
+                continue
+            if len(entries) >= limit:
+                break
+        return entries
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+# Global monitor instance
+query_monitor = QueryMonitor()
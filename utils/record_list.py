@@ -0,0 +1,50 @@
+"""
+Record list - a record history shown as one scrollable grid with row selection and a single detail panel,
+so a page renders the same handful of widgets however many records it lists
+"""
+import streamlit as st
+import pandas as pd
+
+# Grid height in pixels (the grid scrolls, drawing only the rows in view)
+LIST_HEIGHT = 400
+
+def _cell(record, field):
+    value = field(record) if callable(field) else record.get(field)
+    return value if value is None or isinstance(value, (int, float, bool)) else str(value)
+
+def record_list(records, columns, key, amount_columns=(), height=LIST_HEIGHT):
+    """Show records in a grid with single-row selection; returns the selected record (None if none is).
+
+    columns maps each grid header to a record field or a function of the
+    record; amount_columns are headers shown as rupee amounts. The page
+    renders the returned record's details and actions once, below the grid,
+    in place of a widget set per record.
+    """
+    if not records:
+        return None
+
+    frame = pd.DataFrame([[_cell(record, field) for field in columns.values()] for record in records],
+                         columns=list(columns))
+    event = st.dataframe(frame, key=key, on_select="rerun", selection_mode="single-row", hide_index=True,
+                         use_container_width=True, height=min(height, 38 + 35 * len(records)),
+                         column_config={column: st.column_config.NumberColumn(format="₹%.2f")
+                                        for column in amount_columns})
+
+    # The grid's selection is a row position, which points at another record once the list
+    # changes (a record added, deleted or re-sorted), so the selected record's id is kept
+    # and looked up again; a new position means the user picked another row
+    rows = event.selection.rows if event is not None else []
+    state_key = f"{key}_selected"
+    selected = st.session_state.get(state_key)
+    if not rows:
+        selected = None
+    elif selected is None or selected['row'] != rows[0]:
+        selected = {'row': rows[0], 'id': records[rows[0]].get('id')} if rows[0] < len(records) else None
+    st.session_state[state_key] = selected
+
+    record = None
+    if selected is not None:
+        record = next((record for record in records if record.get('id') == selected['id']), None)
+    if record is None:
+        st.caption(f"{len(records)} records. Select a row to see its details and actions.")
+    return record
@@ -3,6 +3,7 @@ import streamlit as st
 import json
 import os
 from datetime import datetime, timedelta
+from utils.data_manager import encode_data
 
 def save_session_state():
     """Save critical session state to persistent storage"""
@@ -21,13 +22,14 @@ def save_session_state():
         os.makedirs('data/sessions', exist_ok=True)
         session_file = f"data/sessions/session_{st.session_state.get('username', 'unknown')}.json"
         
-        with open(session_file, 'w') as f:
-            json.dump(session_data, f, indent=2)
+        payload = encode_data(session_data)
+        with open(session_file, 'wb') as f:
+            f.write(payload)
         
         # Create backup of session file
         backup_session_file = f"{session_file}.backup"
-        with open(backup_session_file, 'w') as f:
-            json.dump(session_data, f, indent=2)
+        with open(backup_session_file, 'wb') as f:
+            f.write(payload)
             
     except Exception as e:
         print(f"Failed to save session state: {e}")